@@ -52,6 +52,8 @@ EMITTER_ORDERING = [
     'constant',
     'envmap',
     'spot',
+    'pointarray',
+    'spotarray',
     'projector'
 ]
 
@@ -87,10 +89,12 @@ SAMPLER_ORDERING = [
 
 INTEGRATOR_ORDERING = [
     'direct',
+    'lightcuts',
     'path',
     'aov',
     'volpath',
     'volpathmis',
+    'vpl',
     '../src/python/python/ad/integrators/prb.py',
     '../src/python/python/ad/integrators/prb_basic.py',
     '../src/python/python/ad/integrators/direct_reparam.py',
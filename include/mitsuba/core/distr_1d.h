@@ -248,6 +248,272 @@ private:
     ScalarVector2u m_valid;
 };
 
+/**
+ * \brief Discrete 1D probability distribution based on Walker's alias method
+ *
+ * This data structure provides the same interface as \ref
+ * DiscreteDistribution, but it transforms uniformly distributed samples using
+ * an alias table instead of a binary search over the cumulative distribution.
+ * Sampling therefore runs in constant time independently of the number of
+ * entries, at the cost of an additional table lookup. This is preferable when
+ * the distribution has many entries (e.g. when selecting one among thousands
+ * of emitters), and when samples are drawn far more often than the
+ * distribution is updated.
+ *
+ * Note that unnormalized probability mass functions (PMFs) will automatically
+ * be normalized during initialization. The associated scale factor can be
+ * retrieved using the function \ref normalization().
+ */
+template <typename Value> struct AliasDistribution {
+    using Float = std::conditional_t<dr::is_static_array_v<Value>,
+                                     dr::value_t<Value>, Value>;
+    using FloatStorage   = DynamicBuffer<Float>;
+    using Index          = dr::uint32_array_t<Value>;
+    using IndexStorage   = DynamicBuffer<Index>;
+    using Mask           = dr::mask_t<Value>;
+
+    using ScalarFloat    = dr::scalar_t<Float>;
+
+public:
+    /// Create an uninitialized AliasDistribution instance
+    AliasDistribution() { }
+
+    /// Initialize from a given probability mass function
+    AliasDistribution(const FloatStorage &pmf)
+        : m_pmf(pmf) {
+        update();
+    }
+
+    /// Initialize from a given probability mass function (rvalue version)
+    AliasDistribution(FloatStorage &&pmf)
+        : m_pmf(std::move(pmf)) {
+        update();
+    }
+
+    /// Initialize from a given floating point array
+    AliasDistribution(const ScalarFloat *values, size_t size)
+        : m_pmf(dr::load<FloatStorage>(values, size)) {
+        compute_alias_table(values, size);
+    }
+
+    /// Update the internal state. Must be invoked when changing the pmf.
+    void update() {
+        if constexpr (dr::is_jit_v<Float>) {
+            FloatStorage temp = dr::migrate(m_pmf, AllocType::Host);
+            dr::sync_thread();
+            compute_alias_table(temp.data(), temp.size());
+        } else {
+            compute_alias_table(m_pmf.data(), m_pmf.size());
+        }
+    }
+
+    /// Return the unnormalized probability mass function
+    FloatStorage &pmf() { return m_pmf; }
+
+    /// Return the unnormalized probability mass function (const version)
+    const FloatStorage &pmf() const { return m_pmf; }
+
+    /// Return the probability of keeping the entry of each alias table bin
+    const FloatStorage &prob() const { return m_prob; }
+
+    /// Return the index of the alias entry of each alias table bin
+    const IndexStorage &alias() const { return m_alias; }
+
+    /// \brief Return the original sum of PMF entries before normalization
+    Float sum() const { return m_sum; }
+
+    /// \brief Return the normalization factor (i.e. the inverse of \ref sum())
+    Float normalization() const { return m_normalization; }
+
+    /// Return the number of entries
+    size_t size() const { return m_pmf.size(); }
+
+    /// Is the distribution object empty/uninitialized?
+    bool empty() const { return m_pmf.empty(); }
+
+    /// Evaluate the unnormalized probability mass function (PMF) at index \c index
+    Value eval_pmf(Index index, Mask active = true) const {
+        return dr::gather<Value>(m_pmf, index, active);
+    }
+
+    /// Evaluate the normalized probability mass function (PMF) at index \c index
+    Value eval_pmf_normalized(Index index, Mask active = true) const {
+        return dr::gather<Value>(m_pmf, index, active) * m_normalization;
+    }
+
+    /**
+     * \brief %Transform a uniformly distributed sample to the stored
+     * distribution
+     *
+     * \param value
+     *     A uniformly distributed sample on the interval [0, 1].
+     *
+     * \return
+     *     The discrete index associated with the sample
+     */
+    Index sample(Value value, Mask active = true) const {
+        return sample_reuse(value, active).first;
+    }
+
+    /**
+     * \brief %Transform a uniformly distributed sample to the stored
+     * distribution
+     *
+     * \param value
+     *     A uniformly distributed sample on the interval [0, 1].
+     *
+     * \return
+     *     A tuple consisting of
+     *
+     *     1. the discrete index associated with the sample, and
+     *     2. the normalized probability value of the sample.
+     */
+    std::pair<Index, Value> sample_pmf(Value value, Mask active = true) const {
+        MI_MASK_ARGUMENT(active);
+
+        Index index = sample(value, active);
+        return { index, eval_pmf_normalized(index, active) };
+    }
+
+    /**
+     * \brief %Transform a uniformly distributed sample to the stored
+     * distribution
+     *
+     * The original sample is value adjusted so that it can be reused as a
+     * uniform variate.
+     *
+     * \param value
+     *     A uniformly distributed sample on the interval [0, 1].
+     *
+     * \return
+     *     A tuple consisting of
+     *
+     *     1. the discrete index associated with the sample, and
+     *     2. the re-scaled sample value.
+     */
+    std::pair<Index, Value>
+    sample_reuse(Value value, Mask active = true) const {
+        MI_MASK_ARGUMENT(active);
+
+        // Select a bin of the alias table uniformly
+        Value scaled = value * ScalarFloat(m_pmf.size());
+        Index bin = dr::minimum(Index(dr::maximum(scaled, 0.f)),
+                                uint32_t(m_pmf.size() - 1));
+        Value offset = scaled - Value(bin);
+
+        // Either keep the bin's own entry, or jump to its alias
+        Value prob  = dr::gather<Value>(m_prob, bin, active);
+        Index alias = dr::gather<Index>(m_alias, bin, active);
+        Mask keep   = offset < prob;
+
+        Index index = dr::select(keep, bin, alias);
+        Value reused = dr::select(keep, offset / prob,
+                                  (offset - prob) / (1.f - prob));
+
+        return { index, dr::clamp(reused, 0.f, dr::OneMinusEpsilon<Value>) };
+    }
+
+    /**
+     * \brief %Transform a uniformly distributed sample to the stored
+     * distribution.
+     *
+     * The original sample is value adjusted so that it can be reused as a
+     * uniform variate.
+     *
+     * \param value
+     *     A uniformly distributed sample on the interval [0, 1].
+     *
+     * \return
+     *     A tuple consisting of
+     *
+     *     1. the discrete index associated with the sample
+     *     2. the re-scaled sample value
+     *     3. the normalized probability value of the sample
+     */
+    std::tuple<Index, Value, Value>
+    sample_reuse_pmf(Value value, Mask active = true) const {
+        MI_MASK_ARGUMENT(active);
+
+        auto [index, reused] = sample_reuse(value, active);
+        return { index, reused, eval_pmf_normalized(index, active) };
+    }
+
+private:
+    /// Build the alias table using Vose's variant of Walker's method
+    void compute_alias_table(const ScalarFloat *pmf, size_t size) {
+        if (size == 0)
+            Throw("AliasDistribution: empty distribution!");
+
+        double sum = 0.0;
+        uint32_t last_valid = (uint32_t) -1;
+        for (uint32_t i = 0; i < size; ++i) {
+            double value = (double) pmf[i];
+            if (value < 0.0)
+                Throw("AliasDistribution: entries must be non-negative!");
+            else if (value > 0.0)
+                last_valid = i;
+            sum += value;
+        }
+
+        if (last_valid == (uint32_t) -1)
+            Throw("AliasDistribution: no probability mass found!");
+
+        std::vector<double> scaled(size);
+        std::vector<ScalarFloat> prob(size);
+        std::vector<uint32_t> alias(size), small, large;
+        small.reserve(size);
+        large.reserve(size);
+
+        for (uint32_t i = 0; i < size; ++i) {
+            scaled[i] = (double) pmf[i] * (double) size / sum;
+            if (scaled[i] < 1.0)
+                small.push_back(i);
+            else
+                large.push_back(i);
+        }
+
+        while (!small.empty() && !large.empty()) {
+            uint32_t s = small.back(), l = large.back();
+            small.pop_back();
+            large.pop_back();
+
+            prob[s]  = (ScalarFloat) scaled[s];
+            alias[s] = l;
+
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0;
+            if (scaled[l] < 1.0)
+                small.push_back(l);
+            else
+                large.push_back(l);
+        }
+
+        // Remaining bins are (up to round-off) completely filled
+        for (uint32_t l : large) {
+            prob[l]  = 1.f;
+            alias[l] = l;
+        }
+
+        for (uint32_t s : small) {
+            // Never allow round-off to select an entry without probability mass
+            bool valid = pmf[s] > 0.f;
+            prob[s]  = valid ? 1.f : 0.f;
+            alias[s] = valid ? s : last_valid;
+        }
+
+        m_sum = dr::opaque<Float>(sum);
+        m_normalization = dr::opaque<Float>(1.0 / sum);
+        m_prob = dr::load<FloatStorage>(prob.data(), size);
+        m_alias = dr::load<IndexStorage>(alias.data(), size);
+    }
+
+private:
+    FloatStorage m_pmf;
+    FloatStorage m_prob;
+    IndexStorage m_alias;
+    Float m_sum = 0.f;
+    Float m_normalization = 0.f;
+};
+
 /**
  * \brief Continuous 1D probability distribution defined in terms of a regularly
  * sampled linear interpolant
@@ -866,6 +1132,16 @@ std::ostream &operator<<(std::ostream &os, const DiscreteDistribution<Value> &di
     return os;
 }
 
+template <typename Value>
+std::ostream &operator<<(std::ostream &os, const AliasDistribution<Value> &distr) {
+    os << "AliasDistribution[" << std::endl
+        << "  size = " << distr.size() << "," << std::endl
+        << "  sum = " << distr.sum() << "," << std::endl
+        << "  pmf = " << distr.pmf() << std::endl
+        << "]";
+    return os;
+}
+
 template <typename Value>
 std::ostream &operator<<(std::ostream &os, const ContinuousDistribution<Value> &distr) {
     os << "ContinuousDistribution[" << std::endl
@@ -27,6 +27,15 @@ extern MI_EXPORT_LIB std::string time_string(float time, bool precise = false);
 /// Turn a memory size into a human-readable string
 extern MI_EXPORT_LIB std::string mem_string(size_t size, bool precise = false);
 
+/**
+ * \brief Determine the amount of physical memory (in bytes) that is
+ * available to new allocations
+ *
+ * On macOS, this returns the total amount of physical memory. Returns zero
+ * if the amount could not be determined.
+ */
+extern MI_EXPORT_LIB size_t available_memory();
+
 /// Returns 'true' if the application is running inside a debugger
 extern MI_EXPORT_LIB bool detect_debugger();
 
@@ -426,6 +426,119 @@ Parameter ``sample_scale``:
     A scale factor that must be applied to each sample to account for
     the film resolution and number of samples.)doc";
 
+static const char *__doc_mitsuba_AliasDistribution =
+R"doc(Discrete 1D probability distribution based on Walker's alias method
+
+This data structure provides the same interface as
+DiscreteDistribution, but it transforms uniformly distributed samples
+using an alias table instead of a binary search over the cumulative
+distribution. Sampling therefore runs in constant time independently
+of the number of entries, at the cost of an additional table lookup.
+This is preferable when the distribution has many entries (e.g. when
+selecting one among thousands of emitters), and when samples are drawn
+far more often than the distribution is updated.
+
+Note that unnormalized probability mass functions (PMFs) will
+automatically be normalized during initialization. The associated
+scale factor can be retrieved using the function normalization().)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_AliasDistribution = R"doc(Create an uninitialized AliasDistribution instance)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_AliasDistribution_2 = R"doc(Initialize from a given probability mass function)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_AliasDistribution_3 = R"doc(Initialize from a given probability mass function (rvalue version))doc";
+
+static const char *__doc_mitsuba_AliasDistribution_AliasDistribution_4 = R"doc(Initialize from a given floating point array)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_alias = R"doc(Return the index of the alias entry of each alias table bin)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_compute_alias_table = R"doc(Build the alias table using Vose's variant of Walker's method)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_empty = R"doc(Is the distribution object empty/uninitialized?)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_eval_pmf =
+R"doc(Evaluate the unnormalized probability mass function (PMF) at index
+``index``)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_eval_pmf_normalized =
+R"doc(Evaluate the normalized probability mass function (PMF) at index
+``index``)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_m_alias = R"doc()doc";
+
+static const char *__doc_mitsuba_AliasDistribution_m_normalization = R"doc()doc";
+
+static const char *__doc_mitsuba_AliasDistribution_m_pmf = R"doc()doc";
+
+static const char *__doc_mitsuba_AliasDistribution_m_prob = R"doc()doc";
+
+static const char *__doc_mitsuba_AliasDistribution_m_sum = R"doc()doc";
+
+static const char *__doc_mitsuba_AliasDistribution_normalization = R"doc(Return the normalization factor (i.e. the inverse of sum()))doc";
+
+static const char *__doc_mitsuba_AliasDistribution_pmf = R"doc(Return the unnormalized probability mass function)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_pmf_2 = R"doc(Return the unnormalized probability mass function (const version))doc";
+
+static const char *__doc_mitsuba_AliasDistribution_prob = R"doc(Return the probability of keeping the entry of each alias table bin)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_sample =
+R"doc(%Transform a uniformly distributed sample to the stored distribution
+
+Parameter ``value``:
+    A uniformly distributed sample on the interval [0, 1].
+
+Returns:
+    The discrete index associated with the sample)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_sample_pmf =
+R"doc(%Transform a uniformly distributed sample to the stored distribution
+
+Parameter ``value``:
+    A uniformly distributed sample on the interval [0, 1].
+
+Returns:
+    A tuple consisting of
+
+1. the discrete index associated with the sample, and 2. the
+normalized probability value of the sample.)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_sample_reuse =
+R"doc(%Transform a uniformly distributed sample to the stored distribution
+
+The original sample is value adjusted so that it can be reused as a
+uniform variate.
+
+Parameter ``value``:
+    A uniformly distributed sample on the interval [0, 1].
+
+Returns:
+    A tuple consisting of
+
+1. the discrete index associated with the sample, and 2. the re-scaled
+sample value.)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_sample_reuse_pmf =
+R"doc(%Transform a uniformly distributed sample to the stored distribution.
+
+The original sample is value adjusted so that it can be reused as a
+uniform variate.
+
+Parameter ``value``:
+    A uniformly distributed sample on the interval [0, 1].
+
+Returns:
+    A tuple consisting of
+
+1. the discrete index associated with the sample 2. the re-scaled
+sample value 3. the normalized probability value of the sample)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_size = R"doc(Return the number of entries)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_sum = R"doc(Return the original sum of PMF entries before normalization)doc";
+
+static const char *__doc_mitsuba_AliasDistribution_update = R"doc(Update the internal state. Must be invoked when changing the pmf.)doc";
+
 static const char *__doc_mitsuba_Appender =
 R"doc(This class defines an abstract destination for logging-relevant
 information)doc";
@@ -604,6 +717,25 @@ See also:
 See also:
     mitsuba.BSDFSample3f)doc";
 
+static const char *__doc_mitsuba_BSDFLobe =
+R"doc(Coarse cone bound of the directions into which a BSDF scatters most of
+the light arriving from a given direction
+
+This description of a BSDF lobe is cheap to evaluate, and allows emitter
+selection strategies (e.g. the LightTree) to favour emitters that lie
+within the lobe of glossy materials (see BSDF::lobe()). Directions
+within an angle ``acos(cos_theta)`` of ``axis`` receive the full
+weight, while the weight of the other directions decreases with their
+angular distance to the cone, but never falls below ``diffuse``.)doc";
+
+static const char *__doc_mitsuba_BSDFLobe_BSDFLobe = R"doc(Create a lobe bound from its central direction, angle and floor)doc";
+
+static const char *__doc_mitsuba_BSDFLobe_axis = R"doc(Central direction of the lobe in world coordinates)doc";
+
+static const char *__doc_mitsuba_BSDFLobe_cos_theta = R"doc(Cosine of the half-angle of the cone)doc";
+
+static const char *__doc_mitsuba_BSDFLobe_diffuse = R"doc(Relative weight of the directions outside of the cone (in [0, 1]))doc";
+
 static const char *__doc_mitsuba_BSDF_2 = R"doc()doc";
 
 static const char *__doc_mitsuba_BSDF_3 = R"doc()doc";
@@ -884,6 +1016,26 @@ static const char *__doc_mitsuba_BSDF_flags_2 = R"doc(Flags for a specific compo
 
 static const char *__doc_mitsuba_BSDF_id = R"doc(Return a string identifier)doc";
 
+static const char *__doc_mitsuba_BSDF_lobe =
+R"doc(Return a coarse cone bound of the directions into which the BSDF
+scatters the light arriving from ``si.wi``
+
+This is used to account for the BSDF when selecting emitters (see
+Scene::sample_emitter_direction()), and only needs to be a rough
+approximation. The default implementation relies on the flags of the
+BSDF: BSDFs with a diffuse or transmissive component do not favour any
+direction, while purely glossy reflection is bounded by a wide cone
+around the mirror direction. Plugins that know their roughness
+override this method with a tighter bound.
+
+Parameter ``si``:
+    A surface interaction data structure describing the underlying
+    surface position. The incident direction is obtained from the
+    field ``si.wi``.
+
+Returns:
+    The lobe bound, with its axis expressed in world coordinates.)doc";
+
 static const char *__doc_mitsuba_BSDF_m_components = R"doc(Flags for each component of this BSDF.)doc";
 
 static const char *__doc_mitsuba_BSDF_m_flags = R"doc(Combined flags for all components of this BSDF.)doc";
@@ -2343,12 +2495,33 @@ static const char *__doc_mitsuba_Emitter_Emitter = R"doc()doc";
 
 static const char *__doc_mitsuba_Emitter_class = R"doc()doc";
 
+static const char *__doc_mitsuba_Emitter_emission_cone =
+R"doc(Return a cone bounding the directions into which this emitter radiates
+light
+
+The returned tuple ``(axis, cos_theta_o, cos_theta_e)`` states that all
+surface normals of the emitter lie within an angle ``theta_o`` of
+``axis``, and that light is emitted within an angle ``theta_e`` around
+each of these normals. This information is used by the scene's light
+tree to cull emitters facing away from a reference point. The default
+implementation returns an unbounded cone (``cos_theta_o = -1``,
+``cos_theta_e = 0``).)doc";
+
+static const char *__doc_mitsuba_Emitter_estimate_power =
+R"doc(Return a rough estimate of the total power emitted by this emitter.
+
+This value is only used to build the emitter selection distribution of
+the scene (see Scene::sample_emitter()), hence it does not need to be
+exact. The default implementation returns ``1``.)doc";
+
 static const char *__doc_mitsuba_Emitter_flags = R"doc(Flags for all components combined.)doc";
 
 static const char *__doc_mitsuba_Emitter_is_environment = R"doc(Is this an environment map light emitter?)doc";
 
 static const char *__doc_mitsuba_Emitter_m_flags = R"doc(Combined flags for all properties of this emitter.)doc";
 
+static const char *__doc_mitsuba_Emitter_m_scene_index = R"doc()doc";
+
 static const char *__doc_mitsuba_Emitter_operator_delete = R"doc()doc";
 
 static const char *__doc_mitsuba_Emitter_operator_delete_2 = R"doc()doc";
@@ -2357,6 +2530,37 @@ static const char *__doc_mitsuba_Emitter_operator_new = R"doc()doc";
 
 static const char *__doc_mitsuba_Emitter_operator_new_2 = R"doc()doc";
 
+static const char *__doc_mitsuba_Emitter_pdf_direction_primitive =
+R"doc(Evaluate the density of sample_direction_primitive() for the primitive
+with index ``ds.prim_index``
+
+The default implementation forwards the call to pdf_direction().)doc";
+
+static const char *__doc_mitsuba_Emitter_primitive_bounds =
+R"doc(Return the light bounds of the primitives that make up this emitter
+
+Emitters attached to a triangle mesh may expose each of their
+triangles as a separate light primitive, which allows the scene's
+light tree to select individual triangles based on their position,
+orientation and power. The ``i``-th entry of the returned list
+corresponds to the primitive with index ``i`` in
+sample_direction_primitive() and pdf_direction_primitive(). The
+default implementation returns a single primitive covering the whole
+emitter (based on bbox(), estimate_power() and emission_cone()).)doc";
+
+static const char *__doc_mitsuba_Emitter_sample_direction_primitive =
+R"doc(Given a reference point in the scene, sample a direction towards the
+primitive with index ``prim_index`` of this emitter
+
+This is the primitive-level counterpart of
+Endpoint::sample_direction(): the returned density is conditioned on
+the choice of the primitive. The default implementation ignores
+``prim_index`` and forwards the call to sample_direction().)doc";
+
+static const char *__doc_mitsuba_Emitter_scene_index = R"doc(Return the index of this emitter in the scene's emitter list)doc";
+
+static const char *__doc_mitsuba_Emitter_set_scene_index = R"doc(Set the index of this emitter in the scene's emitter list)doc";
+
 static const char *__doc_mitsuba_Endpoint =
 R"doc(Abstract interface subsuming emitters and sensors in Mitsuba.
 
@@ -3550,7 +3754,10 @@ static const char *__doc_mitsuba_Integrator_m_stop = R"doc(Integrators should st
 static const char *__doc_mitsuba_Integrator_m_timeout =
 R"doc(Maximum amount of time to spend rendering (excluding scene parsing).
 
-Specified in seconds. A negative values indicates no timeout.)doc";
+Specified in seconds. A negative values indicates no timeout. JIT
+variants check the timeout between rendering passes, which then
+contain a single sample per pixel unless ``samples_per_pass`` is
+specified. The image is normalized by the samples actually taken.)doc";
 
 static const char *__doc_mitsuba_Integrator_render =
 R"doc(Render the scene
@@ -3799,6 +4006,334 @@ time. If not, the application is terminated via ``abort()``.)doc";
 
 static const char *__doc_mitsuba_Jit_static_shutdown = R"doc(Release all memory used by JIT-compiled routines)doc";
 
+static const char *__doc_mitsuba_LightBounds =
+R"doc(Bounds of the emission of a light primitive (or of a cluster of light
+primitives) used to build and traverse a LightTree
+
+Besides a spatial bounding box and the total emitted power, the bounds
+store an orientation cone: all surface normals of the primitive lie
+within an angle ``theta_o`` of ``axis``, and light is emitted within
+an angle ``theta_e`` around each of these normals. Only the cosines of
+both angles are stored.)doc";
+
+static const char *__doc_mitsuba_LightBounds_LightBounds = R"doc()doc";
+
+static const char *__doc_mitsuba_LightBounds_LightBounds_2 = R"doc()doc";
+
+static const char *__doc_mitsuba_LightBounds_axis = R"doc(Central direction of the orientation cone)doc";
+
+static const char *__doc_mitsuba_LightBounds_bbox = R"doc(Spatial extent of the primitive(s))doc";
+
+static const char *__doc_mitsuba_LightBounds_cos_theta_e = R"doc(Cosine of the spread of the emission around each surface normal)doc";
+
+static const char *__doc_mitsuba_LightBounds_cos_theta_o = R"doc(Cosine of the spread of the surface normals around ``axis``)doc";
+
+static const char *__doc_mitsuba_LightBounds_merge = R"doc(Return the union of two light bounds)doc";
+
+static const char *__doc_mitsuba_LightBounds_orientation_measure =
+R"doc(Return the measure of the set of directions into which the bounded
+primitives may emit (used by the tree construction heuristic))doc";
+
+static const char *__doc_mitsuba_LightBounds_power = R"doc(Total emitted power)doc";
+
+static const char *__doc_mitsuba_LightCache =
+R"doc(Spatial cache that learns which emitters contribute to each region of
+the scene
+
+The cache is a hash grid whose cells are keyed on the quantized
+position and normal of a reference point. Each cell stores the
+accumulated contribution of every emitter of the scene, as observed
+through visibility tested emitter samples (see record()). Unlike power
+or distance based heuristics, this accounts for occlusion.
+
+Observations are accumulated separately, and only become part of the
+learned distribution when update() is called, so that the
+distribution stays fixed within a rendering pass.
+SamplingIntegrator::render() calls it at the start of each call, and
+between passes in JIT variants (scalar variants render the passes of
+all image blocks concurrently, and hence only learn across calls).
+
+Emitters are sampled from a mixture of the learned distribution of the
+cell and of a defensive distribution proportional to the emitters'
+power, which keeps the estimator unbiased for emitters that have not
+been observed yet.
+
+Sampling the learned distribution performs a linear scan over the
+emitters of the cell, hence this cache is intended for scenes with a
+moderate number of emitters.)doc";
+
+static const char *__doc_mitsuba_LightCache_LightCache =
+R"doc(Create an empty cache for the given list of emitters
+
+Parameter ``bbox``:
+    Bounding box of the scene, which is subdivided into
+    ``resolution^3`` voxels.
+
+Parameter ``cell_count``:
+    Number of cells of the hash grid.
+
+Parameter ``fallback``:
+    Probability of selecting emitters proportionally to their power
+    instead of using the learned distribution.)doc";
+
+static const char *__doc_mitsuba_LightCache_cell = R"doc(Return the index of the cell of the given reference point)doc";
+
+static const char *__doc_mitsuba_LightCache_cell_count = R"doc(Return the number of cells of the hash grid)doc";
+
+static const char *__doc_mitsuba_LightCache_class = R"doc()doc";
+
+static const char *__doc_mitsuba_LightCache_emitter_count = R"doc(Return the number of emitters tracked by each cell)doc";
+
+static const char *__doc_mitsuba_LightCache_eval_pmf = R"doc(Evaluate the mixture pmf given the cell index and its learned sum)doc";
+
+static const char *__doc_mitsuba_LightCache_fallback = R"doc(Return the probability of falling back to power-based selection)doc";
+
+static const char *__doc_mitsuba_LightCache_m_fallback_distr = R"doc(Defensive distribution proportional to the emitters' power)doc";
+
+static const char *__doc_mitsuba_LightCache_m_learned =
+R"doc(Per cell and emitter: learned contribution (row-major, one row per
+cell))doc";
+
+static const char *__doc_mitsuba_LightCache_m_learned_sum = R"doc(Per cell: sum of the learned contributions)doc";
+
+static const char *__doc_mitsuba_LightCache_m_mutex = R"doc(Serializes recording in scalar variants)doc";
+
+static const char *__doc_mitsuba_LightCache_m_recorded = R"doc(Contributions recorded since the last call to update())doc";
+
+static const char *__doc_mitsuba_LightCache_pdf_emitter =
+R"doc(Evaluate the discrete probability with which sample_emitter() selects
+the emitter with the given index from the given reference point)doc";
+
+static const char *__doc_mitsuba_LightCache_record =
+R"doc(Record the observed contribution of the emitter with the given index
+at the given reference point
+
+The contribution should be an unbiased estimate of the emitter's
+contribution, i.e. already divided by its selection probability, and
+zero if the emitter sample was occluded.)doc";
+
+static const char *__doc_mitsuba_LightCache_reset = R"doc(Discard everything that has been learned so far)doc";
+
+static const char *__doc_mitsuba_LightCache_sample_emitter =
+R"doc(Sample an emitter according to the distribution learned in the cell of
+the given reference point
+
+Returns:
+    The index of the chosen emitter, its discrete probability and the
+    transformed random sample for reuse.)doc";
+
+static const char *__doc_mitsuba_LightCache_update = R"doc(Merge the recorded contributions into the learned distribution)doc";
+
+static const char *__doc_mitsuba_LightTree =
+R"doc(Light tree (also known as light BVH) for spatially-aware emitter
+selection
+
+This data structure hierarchically clusters the finite emitters of a
+scene based on their position, orientation and power. Given a
+reference point, an emitter is selected by stochastically traversing
+the tree from the root, choosing each child proportionally to a
+conservative estimate of its contribution at that point. The discrete
+probability of any emitter can then be evaluated by walking up the
+tree from its leaf, which is required for multiple importance
+sampling.
+
+Infinite emitters (and emitters without a valid bounding box) cannot
+be clustered meaningfully and are instead chosen uniformly with a
+fixed probability.
+
+By default, each finite emitter forms a single leaf of the tree. When
+emitters are split, the leaves instead hold the individual light
+primitives reported by Emitter::primitive_bounds() (e.g. the triangles
+of an emissive mesh), so that the interior nodes of the tree act as
+spatially coherent clusters of primitives.
+
+The tree is built on the CPU, and then stored in flat arrays so that
+its traversal works in scalar, LLVM and CUDA variants alike.)doc";
+
+static const char *__doc_mitsuba_LightTree_LightTree =
+R"doc(Build a light tree over the given list of emitters
+
+Parameter ``split_emitters``:
+    If set, the tree stores the individual light primitives of each
+    emitter (see Emitter::primitive_bounds()) instead of a single leaf
+    per emitter.)doc";
+
+static const char *__doc_mitsuba_LightTree_MinLobeDiffuse = R"doc(Lower bound of the weight of nodes outside of a BSDF lobe)doc";
+
+static const char *__doc_mitsuba_LightTree_build = R"doc(Recursively build the subtree over ``prims[start, end)``)doc";
+
+static const char *__doc_mitsuba_LightTree_class = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_emitter_leaf =
+R"doc(Return the index of the leaf storing the given primitive of the
+emitter with the given index, or ``-1`` if it is not part of the tree
+(e.g. infinite emitters and emitters without power))doc";
+
+static const char *__doc_mitsuba_LightTree_eval_importance = R"doc(Evaluate the importance of a node, with an optional BSDF lobe bound)doc";
+
+static const char *__doc_mitsuba_LightTree_finite_count = R"doc(Return the number of light primitives stored in the leaves of the
+tree)doc";
+
+static const char *__doc_mitsuba_LightTree_importance =
+R"doc(Evaluate the importance of a tree node as seen from a reference point
+with the given normal (which may be zero))doc";
+
+static const char *__doc_mitsuba_LightTree_importance_2 =
+R"doc(Evaluate the importance of a tree node as seen from a reference point
+with the given normal, weighted by its overlap with a BSDF lobe)doc";
+
+static const char *__doc_mitsuba_LightTree_importance_segment =
+R"doc(Evaluate the importance of a tree node as seen from the point of the
+ray segment ``[0, ray.maxt]`` that is closest to the center of its
+bounds (without foreshortening))doc";
+
+static const char *__doc_mitsuba_LightTree_infinite_count = R"doc(Return the number of emitters that are sampled outside of the tree)doc";
+
+static const char *__doc_mitsuba_LightTree_infinite_emitter = R"doc(Return the scene index of the ``i``-th infinite emitter)doc";
+
+static const char *__doc_mitsuba_LightTree_is_leaf = R"doc(Return whether the given node is a leaf)doc";
+
+static const char *__doc_mitsuba_LightTree_m_emitter_infinite_pmf =
+R"doc(Per emitter: selection probability of infinite emitters, zero
+otherwise)doc";
+
+static const char *__doc_mitsuba_LightTree_m_emitter_offset = R"doc(Per emitter: index of its first light primitive)doc";
+
+static const char *__doc_mitsuba_LightTree_m_emitter_prim_count = R"doc(Per emitter: number of light primitives (zero for infinite emitters))doc";
+
+static const char *__doc_mitsuba_LightTree_m_finite_count = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_infinite_count = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_infinite_index = R"doc(Indices of the emitters that are sampled outside of the tree)doc";
+
+static const char *__doc_mitsuba_LightTree_m_infinite_prob = R"doc(Probability of selecting one of the infinite emitters)doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_axis = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_bbox_max = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_bbox_min = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_children =
+R"doc(Per node: the indices of the two children, or the index of the light
+primitive followed by zero for leaves (the root is never a child))doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_cos_theta_e = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_cos_theta_o = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_count = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_parent = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_node_power = R"doc()doc";
+
+static const char *__doc_mitsuba_LightTree_m_nodes = R"doc(Bounds of all nodes (kept on the host for inspection))doc";
+
+static const char *__doc_mitsuba_LightTree_m_prim_emitter = R"doc(Per light primitive: index of the emitter it belongs to)doc";
+
+static const char *__doc_mitsuba_LightTree_m_prim_index = R"doc(Per light primitive: index of the primitive within its emitter)doc";
+
+static const char *__doc_mitsuba_LightTree_m_prim_leaf = R"doc(Per light primitive: index of its leaf node, or -1 if it isn't in the tree)doc";
+
+static const char *__doc_mitsuba_LightTree_node_bounds = R"doc(Return the bounds of the given tree node)doc";
+
+static const char *__doc_mitsuba_LightTree_node_children = R"doc(Return the indices of the two children of the given interior node)doc";
+
+static const char *__doc_mitsuba_LightTree_node_count = R"doc(Return the number of nodes of the tree)doc";
+
+static const char *__doc_mitsuba_LightTree_node_parent = R"doc(Return the index of the parent of the given node (zero for the root))doc";
+
+static const char *__doc_mitsuba_LightTree_pdf_emitter =
+R"doc(Evaluate the discrete probability with which sample_emitter() selects
+the given primitive of the emitter with the given index from the given
+reference point
+
+The primitive index is ignored for emitters that consist of a single
+primitive.)doc";
+
+static const char *__doc_mitsuba_LightTree_pdf_emitter_2 =
+R"doc(Evaluate the discrete probability with which the lobe-aware variant of
+sample_emitter() selects the given primitive of the emitter with the
+given index)doc";
+
+static const char *__doc_mitsuba_LightTree_pdf_emitter_segment =
+R"doc(Evaluate the discrete probability with which sample_emitter_segment()
+selects the given primitive of the emitter with the given index for
+the given ray segment)doc";
+
+static const char *__doc_mitsuba_LightTree_pdf_leaf =
+R"doc(Evaluate the probability of a primitive using the given importance
+function)doc";
+
+static const char *__doc_mitsuba_LightTree_sample_emitter =
+R"doc(Sample an emitter proportionally to its estimated contribution at the
+given reference point
+
+Parameter ``ref``:
+    Reference interaction. Its normal is used to account for the
+    foreshortening at the receiver unless it is zero (e.g. within
+    participating media).
+
+Parameter ``sample``:
+    A uniformly distributed number in [0, 1).
+
+Returns:
+    The index of the chosen emitter, the index of the chosen primitive
+    of this emitter (zero unless emitters are split), the discrete
+    probability of the choice (zero if no emitter could be chosen), and
+    the transformed random sample for reuse.)doc";
+
+static const char *__doc_mitsuba_LightTree_sample_emitter_2 =
+R"doc(Sample an emitter proportionally to its estimated contribution at the
+given reference point, including a bound of the BSDF lobe at that
+point
+
+The importance of every node is additionally weighted by the overlap
+of its bounds with the cone of the given lobe (see BSDF::lobe()),
+which favours emitters that lie in the reflection lobe of glossy
+materials. The weight of the nodes outside of the lobe is clamped to
+MinLobeDiffuse, so that every emitter remains selectable.)doc";
+
+static const char *__doc_mitsuba_LightTree_sample_emitter_segment =
+R"doc(Sample an emitter proportionally to its estimated contribution along
+the given ray segment
+
+This is the counterpart of sample_emitter() for reference locations
+that are distributed along a segment (e.g. the possible scattering
+locations of a ray within participating media). Each node is evaluated
+from the point of the segment ``[0, ray.maxt]`` that is closest to the
+center of its bounds (see importance_segment()).
+
+Returns:
+    The same quantities as sample_emitter().)doc";
+
+static const char *__doc_mitsuba_LightTree_sample_node =
+R"doc(Traverse the subtree rooted at ``node`` using the given importance
+function)doc";
+
+static const char *__doc_mitsuba_LightTree_sample_root =
+R"doc(Select an infinite emitter or traverse the tree from its root using
+the given node importance function)doc";
+
+static const char *__doc_mitsuba_LightTree_sample_subtree =
+R"doc(Sample a light primitive within the subtree rooted at the given node
+proportionally to its estimated contribution at the given reference
+point
+
+This performs the same traversal as sample_emitter(), but starts at an
+arbitrary node (e.g. a node of a light cut) and ignores infinite
+emitters.
+
+Returns:
+    The index of the chosen emitter, the index of the chosen primitive
+    of this emitter, the discrete probability of the choice among the
+    primitives of the subtree, and the transformed random sample for
+    reuse.)doc";
+
+static const char *__doc_mitsuba_LightTree_to_string = R"doc()doc";
+
 static const char *__doc_mitsuba_LogLevel = R"doc(Available Log message types)doc";
 
 static const char *__doc_mitsuba_LogLevel_Debug = R"doc(Trace message, for extremely verbose debugging)doc";
@@ -4358,6 +4893,10 @@ static const char *__doc_mitsuba_Mesh_embree_geometry = R"doc(Return the Embree
 
 static const char *__doc_mitsuba_Mesh_ensure_pmf_built = R"doc()doc";
 
+static const char *__doc_mitsuba_Mesh_face_area = R"doc(Return the surface area of the triangle with index ``face_idx``)doc";
+
+static const char *__doc_mitsuba_Mesh_flip_normals = R"doc(Are the normals of this mesh flipped?)doc";
+
 static const char *__doc_mitsuba_Mesh_has_attribute = R"doc()doc";
 
 static const char *__doc_mitsuba_Mesh_eval_attribute = R"doc()doc";
@@ -4496,6 +5035,13 @@ static const char *__doc_mitsuba_Mesh_recompute_bbox = R"doc(Recompute the bound
 
 static const char *__doc_mitsuba_Mesh_recompute_vertex_normals = R"doc(Compute smooth vertex normals and replace the current normal values)doc";
 
+static const char *__doc_mitsuba_Mesh_sample_face_position =
+R"doc(Sample a point uniformly on the triangle with index ``face_idx``
+
+The returned position sample stores the face index in
+``ps.prim_index``, and its density (per unit area) is the inverse of
+the triangle's area.)doc";
+
 static const char *__doc_mitsuba_Mesh_sample_position = R"doc()doc";
 
 static const char *__doc_mitsuba_Mesh_set_scene = R"doc()doc";
@@ -5368,6 +5914,10 @@ static const char *__doc_mitsuba_PositionSample_p = R"doc(Sampled position)doc";
 
 static const char *__doc_mitsuba_PositionSample_pdf = R"doc(Probability density at the sample)doc";
 
+static const char *__doc_mitsuba_PositionSample_prim_index =
+R"doc(Index of the sampled primitive (e.g. triangle) of the shape, if
+applicable)doc";
+
 static const char *__doc_mitsuba_PositionSample_time = R"doc(Associated time value)doc";
 
 static const char *__doc_mitsuba_PositionSample_uv =
@@ -6288,6 +6838,8 @@ static const char *__doc_mitsuba_Sampler_next_2d = R"doc(Retrieve the next two c
 
 static const char *__doc_mitsuba_Sampler_sample_count = R"doc(Return the number of samples per pixel)doc";
 
+static const char *__doc_mitsuba_Sampler_samples_per_wavefront = R"doc(Return the number of samples per pixel per pass in wavefront modes)doc";
+
 static const char *__doc_mitsuba_Sampler_schedule_state = R"doc(dr::schedule() variables that represent the internal sampler state)doc";
 
 static const char *__doc_mitsuba_Sampler_seed =
@@ -6332,12 +6884,30 @@ static const char *__doc_mitsuba_SamplingIntegrator_class = R"doc()doc";
 
 static const char *__doc_mitsuba_SamplingIntegrator_m_block_size = R"doc(Size of (square) image blocks to render in parallel (in scalar mode))doc";
 
+static const char *__doc_mitsuba_SamplingIntegrator_m_memory_budget =
+R"doc(Memory budget (in bytes) of a rendering pass in JIT variants
+
+If set to zero, LLVM variants use half of the available system memory,
+and CUDA variants are only limited by the maximum wavefront size.)doc";
+
 static const char *__doc_mitsuba_SamplingIntegrator_m_samples_per_pass =
 R"doc(Number of samples to compute for each pass over the image blocks.
 
 Must be a multiple of the total sample count per pixel. If set to
 (uint32_t) -1, all the work is done in a single pass (default).)doc";
 
+static const char *__doc_mitsuba_SamplingIntegrator_plan_passes =
+R"doc(Choose the number of samples per pixel of each pass in JIT variants,
+such that passes fit into the memory budget
+
+The fewest passes that fit are made equally large, and the returned
+pass size is at most ``spp_per_pass``. Their total sample count can
+therefore exceed ``spp`` (e.g. when it is prime).
+
+Returns:
+    The number of samples per pixel of each pass and the number of
+    passes.)doc";
+
 static const char *__doc_mitsuba_SamplingIntegrator_render = R"doc(//! @{ \name Integrator interface implementation)doc";
 
 static const char *__doc_mitsuba_SamplingIntegrator_render_block = R"doc()doc";
@@ -6387,6 +6957,18 @@ Remark:
 (spec, mask, aov) = integrator.sample(scene, sampler, ray, medium, active)
 ```)doc";
 
+static const char *__doc_mitsuba_SamplingIntegrator_sample_state_size =
+R"doc(Estimate the memory (in bytes) occupied by the state of each Monte
+Carlo sample when rendering in JIT variants
+
+render() uses this estimate to split the rendering into passes that
+fit into the memory budget (see the ``memory_budget`` parameter). The
+default implementation accounts for the sampler state, the image plane
+position and the values splatted to the film, as well as for the ray,
+interaction and path state when loops or virtual function calls are
+not recorded (as it is then stored between kernels). Integrators with
+a larger per-sample state should override it.)doc";
+
 static const char *__doc_mitsuba_Scene =
 R"doc(Central scene data structure
 
@@ -6417,6 +6999,19 @@ static const char *__doc_mitsuba_Scene_4 = R"doc()doc";
 
 static const char *__doc_mitsuba_Scene_5 = R"doc()doc";
 
+static const char *__doc_mitsuba_Scene_DirtyShapeGroup = R"doc(Entry of m_dirty_shapes denoting a change within a shape group)doc";
+
+static const char *__doc_mitsuba_Scene_EmitterSampling = R"doc(Strategy used to select an emitter in sample_emitter())doc";
+
+static const char *__doc_mitsuba_Scene_EmitterSampling_Power = R"doc()doc";
+
+static const char *__doc_mitsuba_Scene_EmitterSampling_Tree =
+R"doc(Emitters are chosen by traversing a light tree from the reference
+point in sample_emitter_direction(). Other queries fall back to power-
+based selection.)doc";
+
+static const char *__doc_mitsuba_Scene_EmitterSampling_Uniform = R"doc()doc";
+
 static const char *__doc_mitsuba_Scene_Scene = R"doc(Instantiate a scene from a Properties object)doc";
 
 static const char *__doc_mitsuba_Scene_accel_init_cpu = R"doc(Create the ray-intersection acceleration data structure)doc";
@@ -6437,6 +7032,23 @@ static const char *__doc_mitsuba_Scene_class = R"doc()doc";
 
 static const char *__doc_mitsuba_Scene_clear_shapes_dirty = R"doc(Unmarks all shapes as dirty)doc";
 
+static const char *__doc_mitsuba_Scene_count_rays =
+R"doc(Add the number of active lanes to the given ray counter (0: rays, 1:
+shadow rays))doc";
+
+static const char *__doc_mitsuba_Scene_dirty_shapes =
+R"doc(Return the sorted indices of the shapes whose geometry changed since
+the last update of the acceleration data structure
+
+Instances are included whenever the content of a shape group changed.)doc";
+
+static const char *__doc_mitsuba_Scene_emitter_generation =
+R"doc(Return an identifier of the current state of the emitters
+
+It changes whenever the emitters are updated (see parameters_changed()),
+and is unique across scenes. Data structures built over the emitters of a
+scene can compare it to detect that they are stale.)doc";
+
 static const char *__doc_mitsuba_Scene_emitters = R"doc(Return the list of emitters)doc";
 
 static const char *__doc_mitsuba_Scene_emitters_2 = R"doc(Return the list of emitters (const version))doc";
@@ -6484,6 +7096,12 @@ static const char *__doc_mitsuba_Scene_integrator = R"doc(Return the scene's int
 
 static const char *__doc_mitsuba_Scene_integrator_2 = R"doc(Return the scene's integrator)doc";
 
+static const char *__doc_mitsuba_Scene_light_cache = R"doc(Return the light cache used to select emitters (if any))doc";
+
+static const char *__doc_mitsuba_Scene_light_cache_2 = R"doc(Return the light cache used to select emitters (if any))doc";
+
+static const char *__doc_mitsuba_Scene_light_tree = R"doc(Return the light tree used to select emitters (if any))doc";
+
 static const char *__doc_mitsuba_Scene_m_accel = R"doc(Acceleration data structure (IAS) (type depends on implementation))doc";
 
 static const char *__doc_mitsuba_Scene_m_accel_handle = R"doc(Handle to the IAS used to ensure its lifetime in jit variants)doc";
@@ -6492,8 +7110,17 @@ static const char *__doc_mitsuba_Scene_m_bbox = R"doc()doc";
 
 static const char *__doc_mitsuba_Scene_m_children = R"doc()doc";
 
+static const char *__doc_mitsuba_Scene_m_dirty_shapes =
+R"doc(Indices (in m_shapes) of the shapes whose geometry changed since the
+last update of the acceleration data structure. Shapes append
+themselves to this list in Shape::mark_dirty().)doc";
+
+static const char *__doc_mitsuba_Scene_m_emitter_distr = R"doc()doc";
+
 static const char *__doc_mitsuba_Scene_m_emitter_pmf = R"doc()doc";
 
+static const char *__doc_mitsuba_Scene_m_emitter_sampling = R"doc()doc";
+
 static const char *__doc_mitsuba_Scene_m_emitters = R"doc()doc";
 
 static const char *__doc_mitsuba_Scene_m_emitters_dr = R"doc()doc";
@@ -6502,6 +7129,14 @@ static const char *__doc_mitsuba_Scene_m_environment = R"doc()doc";
 
 static const char *__doc_mitsuba_Scene_m_integrator = R"doc()doc";
 
+static const char *__doc_mitsuba_Scene_m_light_tree = R"doc()doc";
+
+static const char *__doc_mitsuba_Scene_m_ray_counts = R"doc(Ray counters of JIT variants (rays, shadow rays))doc";
+
+static const char *__doc_mitsuba_Scene_m_ray_counts_scalar = R"doc(Ray counters of scalar variants (rays, shadow rays))doc";
+
+static const char *__doc_mitsuba_Scene_m_ray_statistics = R"doc(Whether count_rays() is enabled)doc";
+
 static const char *__doc_mitsuba_Scene_m_sensors = R"doc()doc";
 
 static const char *__doc_mitsuba_Scene_m_shapegroups = R"doc()doc";
@@ -6516,7 +7151,10 @@ static const char *__doc_mitsuba_Scene_parameters_changed = R"doc(Update interna
 
 static const char *__doc_mitsuba_Scene_pdf_emitter =
 R"doc(Evaluate the discrete probability of the sample_emitter() technique
-for the given a emitter index.)doc";
+for the given a emitter index.
+
+This accounts for the emitter selection strategy (uniform or power-
+based) configured on the scene.)doc";
 
 static const char *__doc_mitsuba_Scene_pdf_emitter_direction =
 R"doc(Evaluate the PDF of direct illumination sampling
@@ -6537,6 +7175,32 @@ Parameter ``ds``:
 Returns:
     The solid angle density of the sample)doc";
 
+static const char *__doc_mitsuba_Scene_pdf_emitter_direction_2 =
+R"doc(Evaluate the PDF of the BSDF-aware variant of
+sample_emitter_direction() for the given BSDF lobe bound)doc";
+
+static const char *__doc_mitsuba_Scene_pdf_emitter_direction_impl = R"doc(Direct illumination density with an optional BSDF lobe bound)doc";
+
+static const char *__doc_mitsuba_Scene_pdf_emitter_segment =
+R"doc(Evaluate the discrete probability of the sample_emitter_segment()
+technique for the given emitter primitive)doc";
+
+static const char *__doc_mitsuba_Scene_pdf_emitter_selection =
+R"doc(Evaluate the discrete probability with which
+sample_emitter_direction() selects the given primitive of the emitter
+with the given index from the given reference point
+
+Unlike pdf_emitter_direction(), this does not include the density of
+the direction sampled on the emitter, and is thus also meaningful for
+emitters with a Dirac delta emission profile.)doc";
+
+static const char *__doc_mitsuba_Scene_pdf_emitter_selection_2 =
+R"doc(Evaluate the discrete probability with which the BSDF-aware variant of
+sample_emitter_direction() selects the given primitive of the emitter
+with the given index)doc";
+
+static const char *__doc_mitsuba_Scene_pdf_emitter_selection_impl = R"doc(Emitter selection probability with an optional BSDF lobe bound)doc";
+
 static const char *__doc_mitsuba_Scene_ray_intersect =
 R"doc(Intersect a ray with the shapes comprising the scene and return a
 detailed data structure describing the intersection, if one is found.
@@ -6694,6 +7358,14 @@ static const char *__doc_mitsuba_Scene_ray_intersect_preliminary_cpu = R"doc(Tra
 
 static const char *__doc_mitsuba_Scene_ray_intersect_preliminary_gpu = R"doc()doc";
 
+static const char *__doc_mitsuba_Scene_ray_statistics =
+R"doc(Return the number of rays and shadow rays traced since statistics were
+enabled or last reset
+
+In JIT variants, this evaluates all pending computation.)doc";
+
+static const char *__doc_mitsuba_Scene_ray_statistics_enabled = R"doc(Return whether rays traced through this scene are being counted)doc";
+
 static const char *__doc_mitsuba_Scene_ray_test =
 R"doc(Intersect a ray with the shapes comprising the scene and return a
 boolean specifying whether or not an intersection was found.
@@ -6756,12 +7428,15 @@ static const char *__doc_mitsuba_Scene_ray_test_cpu = R"doc(Trace a shadow ray)d
 
 static const char *__doc_mitsuba_Scene_ray_test_gpu = R"doc()doc";
 
+static const char *__doc_mitsuba_Scene_reset_ray_statistics = R"doc(Reset the ray counters to zero)doc";
+
 static const char *__doc_mitsuba_Scene_sample_emitter =
 R"doc(Sample one emitter in the scene and rescale the input sample for
 reuse.
 
-Currently, the sampling scheme implemented by the Scene class is very
-simplistic (uniform).
+By default, emitters are chosen uniformly. When the scene parameter
+``emitter_sampling`` is set to ``power``, emitters are instead chosen
+proportionally to Emitter::estimate_power() using an alias table.
 
 Parameter ``sample``:
     A uniformly distributed number in [0, 1).
@@ -6787,6 +7462,14 @@ between the reference point and the sampled emitter position. However,
 approximations are acceptable as long as these are reflected in the
 returned Monte Carlo sampling weight.
 
+When the scene's ``emitter_sampling`` parameter is set to ``"tree"``,
+the emitter is chosen by traversing a LightTree, which accounts for the
+distance and orientation of emitters relative to ``ref``. If the
+scene's ``split_emitters`` parameter is additionally set, the tree
+selects individual primitives of emitters (e.g. the triangles of
+emissive meshes), and directions are sampled using
+Emitter::sample_direction_primitive().
+
 Parameter ``ref``:
     A 3D reference location within the scene, which may influence the
     sampling process.
@@ -6813,6 +7496,20 @@ were involved, etc.)
 the radiance incident from the emitter and the sample probability per
 unit solid angle.)doc";
 
+static const char *__doc_mitsuba_Scene_sample_emitter_direction_2 =
+R"doc(Direct illumination sampling that accounts for the BSDF at the
+reference point
+
+This variant of sample_emitter_direction() takes a coarse bound of the
+BSDF lobe at the reference point (see BSDF::lobe()), which the
+``"tree"`` emitter selection strategy uses to favour emitters that lie
+within the lobe of glossy materials (see LightTree::sample_emitter()).
+Other strategies ignore the lobe. The density of the resulting samples
+must be evaluated with the matching variant of
+pdf_emitter_direction().)doc";
+
+static const char *__doc_mitsuba_Scene_sample_emitter_direction_impl = R"doc(Direct illumination sampling with an optional BSDF lobe bound)doc";
+
 static const char *__doc_mitsuba_Scene_sample_emitter_ray =
 R"doc(Sample a ray according to the emission profile of scene emitters
 
@@ -6849,10 +7546,37 @@ directional sampling density
 
 * ``emitter`` is a pointer specifying the sampled emitter)doc";
 
+static const char *__doc_mitsuba_Scene_sample_emitter_segment =
+R"doc(Sample one emitter (and one of its primitives) according to its
+estimated contribution along a ray segment
+
+This is intended for techniques that subsequently choose a reference
+point along the segment ``[0, ray.maxt]``, such as equiangular
+sampling in participating media. When the scene's ``emitter_sampling``
+parameter is set to ``"tree"``, the selection accounts for the
+distance of emitters to the segment (see
+LightTree::sample_emitter_segment()). Other strategies select emitters
+as in sample_emitter().
+
+Returns:
+    The index of the chosen emitter, the index of the chosen primitive
+    (zero unless emitters are split), the discrete probability of the
+    choice, and the transformed random sample for reuse.)doc";
+
 static const char *__doc_mitsuba_Scene_sensors = R"doc(Return the list of sensors)doc";
 
 static const char *__doc_mitsuba_Scene_sensors_2 = R"doc(Return the list of sensors (const version))doc";
 
+static const char *__doc_mitsuba_Scene_set_ray_statistics =
+R"doc(Enable or disable counting of the rays traced through this scene
+
+When enabled, every active lane of ray_intersect() and
+ray_intersect_preliminary() counts as one ray, and every active lane
+of ray_test() as one shadow ray. Counting adds an atomic update per
+query, hence it is disabled by default and should not be enabled
+while measuring performance. Changing this setting resets the
+counters.)doc";
+
 static const char *__doc_mitsuba_Scene_shapes = R"doc(Return the list of shapes)doc";
 
 static const char *__doc_mitsuba_Scene_shapes_2 = R"doc(Return the list of shapes)doc";
@@ -6870,6 +7594,8 @@ information. Furthermore, differentiable geometry introduces bias
 through visibility-induced discontinuities, and reparameterizations
 (Loubet et al., SIGGRAPH 2019) are needed to avoid this bias.)doc";
 
+static const char *__doc_mitsuba_Scene_split_emitters = R"doc(Return whether emitters are split into primitives for selection)doc";
+
 static const char *__doc_mitsuba_Scene_static_accel_initialization = R"doc(Static initialization of ray-intersection acceleration data structure)doc";
 
 static const char *__doc_mitsuba_Scene_static_accel_initialization_cpu = R"doc()doc";
@@ -6886,6 +7612,10 @@ static const char *__doc_mitsuba_Scene_to_string = R"doc(Return a human-readable
 
 static const char *__doc_mitsuba_Scene_traverse = R"doc(Traverse the scene graph and invoke the given callback for each object)doc";
 
+static const char *__doc_mitsuba_Scene_update_emitter_sampling =
+R"doc(Rebuild the emitter selection distribution (called on construction and
+whenever scene parameters change))doc";
+
 static const char *__doc_mitsuba_ScopedPhase = R"doc()doc";
 
 static const char *__doc_mitsuba_ScopedPhase_ScopedPhase = R"doc()doc";
@@ -7361,6 +8091,8 @@ static const char *__doc_mitsuba_Shape_m_is_instance = R"doc(True if the shape i
 
 static const char *__doc_mitsuba_Shape_m_optix_data_ptr = R"doc(OptiX hitgroup data buffer)doc";
 
+static const char *__doc_mitsuba_Shape_m_parent_scenes = R"doc(Scenes containing this shape, along with its index in each of them)doc";
+
 static const char *__doc_mitsuba_Shape_m_sensor = R"doc()doc";
 
 static const char *__doc_mitsuba_Shape_m_to_object = R"doc()doc";
@@ -7369,7 +8101,12 @@ static const char *__doc_mitsuba_Shape_m_to_world = R"doc()doc";
 
 static const char *__doc_mitsuba_Shape_mark_as_instance = R"doc()doc";
 
-static const char *__doc_mitsuba_Shape_mark_dirty = R"doc(Mark that the shape's geometry has changed)doc";
+static const char *__doc_mitsuba_Shape_mark_dirty =
+R"doc(Mark that the shape's geometry has changed
+
+The first call after the scene's last acceleration data structure
+update appends the shape to the dirty list of every scene that
+contains it, so that only the modified geometry needs to be updated.)doc";
 
 static const char *__doc_mitsuba_Shape_operator_delete = R"doc()doc";
 
@@ -11666,6 +12403,13 @@ the additional information tracked by the Mueller matrix. For instance
 when performing Russian Roulette based on the path throughput or when
 writing a final RGB pixel value to the image block.)doc";
 
+static const char *__doc_mitsuba_util_available_memory =
+R"doc(Determine the amount of physical memory (in bytes) that is available
+to new allocations
+
+On macOS, this returns the total amount of physical memory. Returns
+zero if the amount could not be determined.)doc";
+
 static const char *__doc_mitsuba_util_core_count = R"doc(Determine the number of available CPU cores (including virtual cores))doc";
 
 static const char *__doc_mitsuba_util_detect_debugger = R"doc(Returns 'true' if the application is running inside a debugger)doc";
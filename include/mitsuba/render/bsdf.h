@@ -237,6 +237,50 @@ template <typename Float, typename Spectrum> struct BSDFSample3 {
     DRJIT_STRUCT(BSDFSample3, wo, pdf, eta, sampled_type, sampled_component);
 };
 
+/**
+ * \brief Coarse cone bound of the directions into which a BSDF scatters
+ * most of the light arriving from a given direction
+ *
+ * This description of a BSDF lobe is cheap to evaluate, and allows emitter
+ * selection strategies (e.g. the \ref LightTree) to favour emitters that lie
+ * within the lobe of glossy materials (see \ref BSDF::lobe()). Directions
+ * within an angle <tt>acos(cos_theta)</tt> of \c axis receive the full
+ * weight, while the weight of the other directions decreases with their
+ * angular distance to the cone, but never falls below \c diffuse.
+ */
+template <typename Float, typename Spectrum> struct BSDFLobe {
+    // =============================================================
+    //! @{ \name Type declarations
+    // =============================================================
+
+    using Vector3f = Vector<Float, 3>;
+
+    //! @}
+    // =============================================================
+
+    // =============================================================
+    //! @{ \name Fields
+    // =============================================================
+
+    /// Central direction of the lobe in world coordinates
+    Vector3f axis = Vector3f(0.f, 0.f, 1.f);
+
+    /// Cosine of the half-angle of the cone
+    Float cos_theta = -1.f;
+
+    /// Relative weight of the directions outside of the cone (in [0, 1])
+    Float diffuse = 1.f;
+
+    //! @}
+    // =============================================================
+
+    /// Create a lobe bound from its central direction, angle and floor
+    BSDFLobe(const Vector3f &axis, const Float &cos_theta, const Float &diffuse)
+        : axis(axis), cos_theta(cos_theta), diffuse(diffuse) { }
+
+    DRJIT_STRUCT(BSDFLobe, axis, cos_theta, diffuse);
+};
+
 
 /**
  * \brief Bidirectional Scattering Distribution Function (BSDF) interface
@@ -519,6 +563,30 @@ public:
     virtual Spectrum eval_diffuse_reflectance(const SurfaceInteraction3f &si,
                                               Mask active = true) const;
 
+    /**
+     * \brief Return a coarse cone bound of the directions into which the
+     * BSDF scatters the light arriving from <tt>si.wi</tt>
+     *
+     * This is used to account for the BSDF when selecting emitters (see
+     * \ref Scene::sample_emitter_direction()), and only needs to be a rough
+     * approximation. The default implementation relies on the flags of the
+     * BSDF: BSDFs with a diffuse or transmissive component do not favour
+     * any direction, while purely glossy reflection is bounded by a wide
+     * cone around the mirror direction. Plugins that know their roughness
+     * override this method with a tighter bound.
+     *
+     * \param si
+     *     A surface interaction data structure describing the underlying
+     *     surface position. The incident direction is obtained from
+     *     the field <tt>si.wi</tt>.
+     *
+     * \return
+     *     The lobe bound, with its axis expressed in world coordinates.
+     */
+    virtual BSDFLobe3f lobe(const BSDFContext &ctx,
+                            const SurfaceInteraction3f &si,
+                            Mask active = true) const;
+
     /// Return a human-readable representation of the BSDF
     std::string to_string() const override = 0;
 
@@ -565,6 +633,16 @@ std::ostream &operator<<(std::ostream &os, const BSDFSample3<Float, Spectrum>& b
     return os;
 }
 
+template <typename Float, typename Spectrum>
+std::ostream &operator<<(std::ostream &os, const BSDFLobe<Float, Spectrum>& lobe) {
+    os << "BSDFLobe[" << std::endl
+        << "  axis = " << lobe.axis << "," << std::endl
+        << "  cos_theta = " << lobe.cos_theta << "," << std::endl
+        << "  diffuse = " << lobe.diffuse << std::endl
+        << "]";
+    return os;
+}
+
 template <typename Float, typename Spectrum>
 typename SurfaceInteraction<Float, Spectrum>::BSDFPtr SurfaceInteraction<Float, Spectrum>::bsdf(
     const typename SurfaceInteraction<Float, Spectrum>::RayDifferential3f &ray) {
@@ -600,6 +678,7 @@ DRJIT_VCALL_TEMPLATE_BEGIN(mitsuba::BSDF)
     DRJIT_VCALL_METHOD(eval_pdf)
     DRJIT_VCALL_METHOD(eval_pdf_sample)
     DRJIT_VCALL_METHOD(eval_diffuse_reflectance)
+    DRJIT_VCALL_METHOD(lobe)
     DRJIT_VCALL_GETTER(flags, uint32_t)
     auto needs_differentials() const {
         return has_flag(flags(), mitsuba::BSDFFlags::NeedsDifferentials);
@@ -4,6 +4,7 @@
 #include <mitsuba/core/transform.h>
 #include <mitsuba/render/endpoint.h>
 #include <mitsuba/render/fwd.h>
+#include <mitsuba/render/lighttree.h>
 #include <drjit/vcall.h>
 
 NAMESPACE_BEGIN(mitsuba)
@@ -52,6 +53,7 @@ MI_DECLARE_ENUM_OPERATORS(EmitterFlags)
 template <typename Float, typename Spectrum>
 class MI_EXPORT_LIB Emitter : public Endpoint<Float, Spectrum> {
 public:
+    MI_IMPORT_TYPES()
     MI_IMPORT_BASE(Endpoint, m_shape)
 
     /// Is this an environment map light emitter?
@@ -63,6 +65,84 @@ public:
     /// Flags for all components combined.
     uint32_t flags(dr::mask_t<Float> /*active*/ = true) const { return m_flags; }
 
+    /**
+     * \brief Return an estimate of the total power (radiant flux) emitted by
+     * this emitter
+     *
+     * The scene uses this value to build its emitter selection distribution
+     * when the \c power emitter sampling strategy is selected. The estimate
+     * only needs to be roughly proportional to the emitter's actual
+     * contribution, since any mismatch is accounted for in the Monte Carlo
+     * sampling weights. The default implementation returns 1, which
+     * corresponds to uniform emitter selection.
+     */
+    virtual ScalarFloat estimate_power() const;
+
+    /**
+     * \brief Return a cone bounding the directions into which this emitter
+     * radiates light
+     *
+     * The returned tuple <tt>(axis, cos_theta_o, cos_theta_e)</tt> states
+     * that all surface normals of the emitter lie within an angle
+     * <tt>theta_o</tt> of \c axis, and that light is emitted within an angle
+     * <tt>theta_e</tt> around each of these normals. This information is
+     * used by the scene's light tree to cull emitters facing away from a
+     * reference point. The default implementation returns an unbounded cone
+     * (<tt>cos_theta_o = -1</tt>, <tt>cos_theta_e = 0</tt>).
+     */
+    virtual std::tuple<ScalarVector3f, ScalarFloat, ScalarFloat>
+    emission_cone() const;
+
+    /**
+     * \brief Return the light bounds of the primitives that make up this
+     * emitter
+     *
+     * Emitters attached to a triangle mesh may expose each of their
+     * triangles as a separate light primitive, which allows the scene's light
+     * tree to select individual triangles based on their position,
+     * orientation and power. The <tt>i</tt>-th entry of the returned list
+     * corresponds to the primitive with index <tt>i</tt> in \ref
+     * sample_direction_primitive() and \ref pdf_direction_primitive(). The
+     * default implementation returns a single primitive covering the whole
+     * emitter (based on \ref bbox(), \ref estimate_power() and \ref
+     * emission_cone()).
+     */
+    virtual std::vector<LightBounds<Float>> primitive_bounds() const;
+
+    /**
+     * \brief Given a reference point in the scene, sample a direction
+     * towards the primitive with index \c prim_index of this emitter
+     *
+     * This is the primitive-level counterpart of \ref
+     * Endpoint::sample_direction(): the returned density is conditioned on
+     * the choice of the primitive. The default implementation ignores
+     * \c prim_index and forwards the call to \ref sample_direction().
+     */
+    virtual std::pair<DirectionSample3f, Spectrum>
+    sample_direction_primitive(const Interaction3f &it, UInt32 prim_index,
+                               const Point2f &sample,
+                               Mask active = true) const;
+
+    /**
+     * \brief Evaluate the density of \ref sample_direction_primitive()
+     * for the primitive with index <tt>ds.prim_index</tt>
+     *
+     * The default implementation forwards the call to \ref
+     * pdf_direction().
+     */
+    virtual Float pdf_direction_primitive(const Interaction3f &it,
+                                          const DirectionSample3f &ds,
+                                          Mask active = true) const;
+
+    /// Return the index of this emitter in the list of the scene's emitters
+    uint32_t scene_index(dr::mask_t<Float> /*active*/ = true) const { return m_scene_index; }
+
+    /// Set the index of this emitter in the list of the scene's emitters
+    void set_scene_index(uint32_t index) {
+        m_scene_index = index;
+        dr::set_attr(this, "scene_index", m_scene_index);
+    }
+
     DRJIT_VCALL_REGISTER(Float, mitsuba::Emitter)
 
     MI_DECLARE_CLASS()
@@ -74,6 +154,9 @@ protected:
 protected:
     /// Combined flags for all properties of this emitter.
     uint32_t m_flags;
+
+    /// Index of this emitter in the list of the scene's emitters
+    uint32_t m_scene_index = 0;
 };
 
 MI_EXTERN_CLASS(Emitter)
@@ -92,8 +175,11 @@ DRJIT_VCALL_TEMPLATE_BEGIN(mitsuba::Emitter)
     DRJIT_VCALL_METHOD(pdf_position)
     DRJIT_VCALL_METHOD(eval)
     DRJIT_VCALL_METHOD(sample_wavelengths)
+    DRJIT_VCALL_METHOD(sample_direction_primitive)
+    DRJIT_VCALL_METHOD(pdf_direction_primitive)
     DRJIT_VCALL_METHOD(is_environment)
     DRJIT_VCALL_GETTER(flags, uint32_t)
+    DRJIT_VCALL_GETTER(scene_index, uint32_t)
     DRJIT_VCALL_GETTER(shape, const typename Class::Shape *)
     DRJIT_VCALL_GETTER(medium, const typename Class::Medium *)
 DRJIT_VCALL_TEMPLATE_END(mitsuba::Emitter)
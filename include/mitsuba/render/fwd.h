@@ -17,6 +17,8 @@ template <typename Float, typename Spectrum> class Integrator;
 template <typename Float, typename Spectrum> class SamplingIntegrator;
 template <typename Float, typename Spectrum> class MonteCarloIntegrator;
 template <typename Float, typename Spectrum> class AdjointIntegrator;
+template <typename Float, typename Spectrum> class LightCache;
+template <typename Float, typename Spectrum> class LightTree;
 template <typename Float, typename Spectrum> class Medium;
 template <typename Float, typename Spectrum> class Mesh;
 template <typename Float, typename Spectrum> class MicrofacetDistribution;
@@ -37,6 +39,7 @@ template <typename Float, typename Spectrum> class MeshAttribute;
 template <typename Float, typename Spectrum> struct DirectionSample;
 template <typename Float, typename Spectrum> struct PositionSample;
 template <typename Float, typename Spectrum> struct BSDFSample3;
+template <typename Float, typename Spectrum> struct BSDFLobe;
 template <typename Float, typename Spectrum> struct PhaseFunctionContext;
 template <typename Float, typename Spectrum> struct Interaction;
 template <typename Float, typename Spectrum> struct MediumInteraction;
@@ -64,6 +67,7 @@ template <typename Float_, typename Spectrum_> struct RenderAliases {
     using PositionSample3f          = PositionSample<Float, Spectrum>;
     using DirectionSample3f         = DirectionSample<Float, Spectrum>;
     using BSDFSample3f              = BSDFSample3<Float, Spectrum>;
+    using BSDFLobe3f                = BSDFLobe<Float, Spectrum>;
     using PhaseFunctionContext      = mitsuba::PhaseFunctionContext<Float, Spectrum>;
     using Interaction3f             = Interaction<Float, Spectrum>;
     using MediumInteraction3f       = MediumInteraction<Float, Spectrum>;
@@ -81,6 +85,8 @@ template <typename Float_, typename Spectrum_> struct RenderAliases {
     using SamplingIntegrator     = mitsuba::SamplingIntegrator<FloatU, SpectrumU>;
     using MonteCarloIntegrator   = mitsuba::MonteCarloIntegrator<FloatU, SpectrumU>;
     using AdjointIntegrator      = mitsuba::AdjointIntegrator<FloatU, SpectrumU>;
+    using LightCache             = mitsuba::LightCache<FloatU, SpectrumU>;
+    using LightTree              = mitsuba::LightTree<FloatU, SpectrumU>;
     using BSDF                   = mitsuba::BSDF<FloatU, SpectrumU>;
     using OptixDenoiser          = mitsuba::OptixDenoiser<FloatU, SpectrumU>;
     using Sensor                 = mitsuba::Sensor<FloatU, SpectrumU>;
@@ -155,6 +161,7 @@ template <typename Float_, typename Spectrum_> struct RenderAliases {
     using MediumInteraction3f       = typename RenderAliases::MediumInteraction3f;                 \
     using PreliminaryIntersection3f = typename RenderAliases::PreliminaryIntersection3f;           \
     using BSDFSample3f              = typename RenderAliases::BSDFSample3f;                        \
+    using BSDFLobe3f                = typename RenderAliases::BSDFLobe3f;                          \
     DRJIT_MAP(MI_IMPORT_TYPES_MACRO, __VA_ARGS__)
 
 #define MI_IMPORT_OBJECT_TYPES()                                                                   \
@@ -168,6 +175,8 @@ template <typename Float_, typename Spectrum_> struct RenderAliases {
     using SamplingIntegrator     = typename RenderAliases::SamplingIntegrator;                     \
     using MonteCarloIntegrator   = typename RenderAliases::MonteCarloIntegrator;                   \
     using AdjointIntegrator      = typename RenderAliases::AdjointIntegrator;                      \
+    using LightCache             = typename RenderAliases::LightCache;                             \
+    using LightTree              = typename RenderAliases::LightTree;                              \
     using BSDF                   = typename RenderAliases::BSDF;                                   \
     using OptixDenoiser          = typename RenderAliases::OptixDenoiser;                          \
     using Sensor                 = typename RenderAliases::Sensor;                                 \
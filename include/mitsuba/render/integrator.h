@@ -130,7 +130,10 @@ protected:
     /**
      * \brief Maximum amount of time to spend rendering (excluding scene parsing).
      *
-     * Specified in seconds. A negative values indicates no timeout.
+     * Specified in seconds. A negative values indicates no timeout. JIT
+     * variants check the timeout between rendering passes, which then
+     * contain a single sample per pixel unless \c samples_per_pass is
+     * specified. The image is normalized by the samples actually taken.
      */
     float m_timeout;
 
@@ -204,6 +207,20 @@ public:
                                              Float *aovs = nullptr,
                                              Mask active = true) const;
 
+    /**
+     * \brief Estimate the memory (in bytes) occupied by the state of each
+     * Monte Carlo sample when rendering in JIT variants
+     *
+     * \ref render() uses this estimate to split the rendering into passes
+     * that fit into the memory budget (see the \c memory_budget parameter).
+     * The default implementation accounts for the sampler state, the image
+     * plane position and the values splatted to the film, as well as for
+     * the ray, interaction and path state when loops or virtual function
+     * calls are not recorded (as it is then stored between kernels).
+     * Integrators with a larger per-sample state should override it.
+     */
+    virtual size_t sample_state_size() const;
+
     // =========================================================================
     //! @{ \name Integrator interface implementation
     // =========================================================================
@@ -242,6 +259,22 @@ protected:
                        ScalarFloat diff_scale_factor,
                        Mask active = true) const;
 
+    /**
+     * \brief Choose the number of samples per pixel of each pass in JIT
+     * variants, such that passes fit into the memory budget
+     *
+     * The fewest passes that fit are made equally large, and the returned
+     * pass size is at most \c spp_per_pass. Their total sample count can
+     * therefore exceed \c spp (e.g. when it is prime).
+     *
+     * \return
+     *    The number of samples per pixel of each pass and the number of
+     *    passes.
+     */
+    std::pair<uint32_t, uint32_t> plan_passes(const ScalarVector2u &film_size,
+                                              uint32_t spp,
+                                              uint32_t spp_per_pass) const;
+
 protected:
 
     /// Size of (square) image blocks to render in parallel (in scalar mode)
@@ -254,6 +287,14 @@ protected:
      * If set to (uint32_t) -1, all the work is done in a single pass (default).
      */
     uint32_t m_samples_per_pass;
+
+    /**
+     * \brief Memory budget (in bytes) of a rendering pass in JIT variants
+     *
+     * If set to zero, LLVM variants use half of the available system memory,
+     * and CUDA variants are only limited by the maximum wavefront size.
+     */
+    size_t m_memory_budget;
 };
 
 /** \brief Abstract integrator that performs *recursive* Monte Carlo sampling
@@ -0,0 +1,261 @@
+#pragma once
+
+#include <mitsuba/core/bitmap.h>
+#include <mitsuba/core/distr_1d.h>
+#include <mitsuba/core/fresolver.h>
+#include <mitsuba/core/properties.h>
+#include <mitsuba/core/string.h>
+#include <mitsuba/render/emitter.h>
+#include <mitsuba/render/srgb.h>
+#include <mitsuba/render/texture.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**
+ * \brief Functionality shared by the emitters that store a large number of
+ * light sources with a delta position in flat buffers (e.g. \c pointarray
+ * and \c spotarray)
+ *
+ * Subclasses read their input data with \ref load_data(), fill \ref m_power
+ * with the power of each light, and pass the converted positions and
+ * intensities to \ref init_lights(). Lights are then selected proportionally
+ * to their power using an alias table, and \ref sample_light() evaluates an
+ * individual light.
+ *
+ * The positions are exposed through \ref traverse(). When they are updated,
+ * the bounding box is recomputed and the scene rebuilds its emitter sampling
+ * data structures (e.g. its light tree) from \ref primitive_bounds().
+ */
+template <typename Float, typename Spectrum>
+class LightArray : public Emitter<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(Emitter, m_flags)
+    MI_IMPORT_TYPES(Texture)
+
+    using FloatStorage         = DynamicBuffer<Float>;
+    using IntensityData        = dr::Array<Float, is_spectral_v<Spectrum> ? 4 : 3>;
+    using ScalarIntensityData  = dr::Array<ScalarFloat, is_spectral_v<Spectrum> ? 4 : 3>;
+
+    void traverse(TraversalCallback *callback) override {
+        Base::traverse(callback);
+        callback->put_parameter("position", m_position, +ParamFlags::NonDifferentiable);
+    }
+
+    void parameters_changed(const std::vector<std::string> &keys) override {
+        if (keys.empty() || string::contains(keys, "position")) {
+            if (dr::width(m_position) != 3 * m_light_count)
+                Throw("The number of light sources cannot be changed!");
+
+            auto &&position = dr::migrate(m_position, AllocType::Host);
+            if constexpr (dr::is_jit_v<Float>)
+                dr::sync_thread();
+            update_bbox(position.data());
+        }
+        Base::parameters_changed(keys);
+    }
+
+    std::pair<DirectionSample3f, Spectrum> sample_direction(const Interaction3f &it,
+                                                            const Point2f &sample,
+                                                            Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleDirection, active);
+
+        auto [index, pmf] = m_light_distr.sample_pmf(sample.x(), active);
+        auto [ds, spec] = sample_light(it, index, active);
+        ds.pdf = pmf;
+
+        return { ds, spec / pmf };
+    }
+
+    std::pair<DirectionSample3f, Spectrum>
+    sample_direction_primitive(const Interaction3f &it, UInt32 prim_index,
+                               const Point2f & /*sample*/,
+                               Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleDirection, active);
+        return sample_light(it, prim_index, active);
+    }
+
+    Float pdf_direction(const Interaction3f &, const DirectionSample3f &,
+                        Mask) const override {
+        return 0.f;
+    }
+
+    std::pair<Wavelength, Spectrum>
+    sample_wavelengths(const SurfaceInteraction3f &si, Float sample,
+                       Mask active) const override {
+        auto [wavelengths, weight] = m_d65->sample_spectrum(
+            si, math::sample_shifted<Wavelength>(sample), active);
+
+        return { wavelengths,
+                 weight * eval_intensity(si.prim_index, wavelengths, active, false) };
+    }
+
+    Spectrum eval(const SurfaceInteraction3f &, Mask) const override {
+        return 0.f;
+    }
+
+    ScalarFloat estimate_power() const override {
+        double power = 0.0;
+        for (ScalarFloat value : m_power)
+            power += (double) value;
+        return (ScalarFloat) power;
+    }
+
+    ScalarBoundingBox3f bbox() const override { return m_bbox; }
+
+protected:
+    LightArray(const Properties &props) : Base(props) { }
+
+    /**
+     * \brief Load the input data given by the \c data or \c filename
+     * parameter, which must contain \c column_count values per light source
+     *
+     * Also sets \ref m_light_count, and returns the data with one row per
+     * light in the precision of \c ScalarFloat.
+     */
+    ref<Bitmap> load_data(const Properties &props, size_t column_count) {
+        ref<Bitmap> bitmap;
+        if (props.has_property("data")) {
+            if (props.has_property("filename"))
+                Throw("Cannot specify both \"data\" and \"filename\".");
+            ref<Object> other = props.object("data");
+            bitmap = dynamic_cast<Bitmap *>(other.get());
+            if (!bitmap)
+                Throw("Property \"data\" must be a Bitmap instance.");
+        } else {
+            FileResolver *fs = Thread::thread()->file_resolver();
+            fs::path file_path = fs->resolve(props.string("filename"));
+            if (!fs::exists(file_path))
+                Throw("\"%s\": file does not exist!", file_path);
+            bitmap = new Bitmap(file_path);
+        }
+
+        bitmap = bitmap->convert(bitmap->pixel_format(),
+                                 struct_type_v<ScalarFloat>, false);
+        size_t columns = bitmap->width() * bitmap->channel_count();
+        if (columns != column_count)
+            Throw("Expected %zu values per light source, got %zu!",
+                  column_count, columns);
+
+        m_light_count = bitmap->height();
+        if (m_light_count == 0)
+            Throw("The light array must contain at least one light source!");
+
+        return bitmap;
+    }
+
+    /**
+     * \brief Upload the positions and intensities (see \ref
+     * intensity_coefficients()) of the lights, and build the alias table
+     * from \ref m_power
+     */
+    void init_lights(const ScalarFloat *position, const ScalarFloat *intensity) {
+        m_position = dr::load<FloatStorage>(position, 3 * m_light_count);
+        m_intensity = dr::load<FloatStorage>(
+            intensity, IntensityData::Size * m_light_count);
+        update_bbox(position);
+
+        std::vector<ScalarFloat> pmf = m_power;
+        if (std::all_of(pmf.begin(), pmf.end(), [](ScalarFloat v) { return v == 0.f; }))
+            std::fill(pmf.begin(), pmf.end(), 1.f);
+        m_light_distr = AliasDistribution<Float>(pmf.data(), pmf.size());
+
+        m_d65 = Texture::D65(1.f);
+        m_flags = +EmitterFlags::DeltaPosition;
+        dr::set_attr(this, "flags", m_flags);
+    }
+
+    /// Recompute the bounding box of the lights from their positions
+    void update_bbox(const ScalarFloat *position) {
+        m_bbox.reset();
+        for (size_t i = 0; i < m_light_count; ++i)
+            m_bbox.expand(dr::load<ScalarPoint3f>(position + 3 * i));
+    }
+
+    /// Convert a linear RGB intensity into the representation used by \c m_intensity
+    static ScalarIntensityData intensity_coefficients(const ScalarColor3f &rgb) {
+        if constexpr (is_monochromatic_v<Spectrum>) {
+            return ScalarIntensityData(mitsuba::luminance(rgb));
+        } else if constexpr (is_rgb_v<Spectrum>) {
+            return rgb;
+        } else {
+            static_assert(is_spectral_v<Spectrum>);
+            /* Evaluate the spectral upsampling model on a color whose highest
+               component is 50%, and store the scale separately */
+            ScalarFloat scale = dr::max(rgb) * 2.f;
+            ScalarColor3f rgb_norm = rgb / dr::maximum(1e-8f, scale);
+            return dr::concat((ScalarColor3f) srgb_model_fetch(rgb_norm),
+                              dr::Array<ScalarFloat, 1>(scale));
+        }
+    }
+
+    /// Evaluate the radiant intensity of the light with the given index
+    UnpolarizedSpectrum eval_intensity(UInt32 index, const Wavelength &wavelengths,
+                                       Mask active,
+                                       bool include_whitepoint = true) const {
+        IntensityData v = dr::gather<IntensityData>(m_intensity, index, active);
+
+        if constexpr (is_spectral_v<Spectrum>) {
+            UnpolarizedSpectrum result =
+                srgb_model_eval<UnpolarizedSpectrum>(dr::head<3>(v), wavelengths) * v.w();
+
+            if (include_whitepoint) {
+                SurfaceInteraction3f si = dr::zeros<SurfaceInteraction3f>();
+                si.wavelengths = wavelengths;
+                result *= m_d65->eval(si, active);
+            }
+
+            return result;
+        } else {
+            DRJIT_MARK_USED(wavelengths);
+            DRJIT_MARK_USED(include_whitepoint);
+            if constexpr (is_monochromatic_v<Spectrum>)
+                return dr::head<1>(v);
+            else
+                return v;
+        }
+    }
+
+    /**
+     * \brief Sample the light with the given index (the density is
+     * conditioned on it)
+     *
+     * This evaluates an isotropic light, subclasses can additionally account
+     * for the emission profile of their lights.
+     */
+    virtual std::pair<DirectionSample3f, Spectrum>
+    sample_light(const Interaction3f &it, const UInt32 &index, Mask active) const {
+        DirectionSample3f ds;
+        ds.p          = dr::gather<Point3f>(m_position, index, active);
+        ds.n          = 0.f;
+        ds.uv         = 0.f;
+        ds.time       = it.time;
+        ds.pdf        = 1.f;
+        ds.delta      = true;
+        ds.emitter    = this;
+        ds.prim_index = index;
+        ds.d          = ds.p - it.p;
+
+        Float dist2    = dr::squared_norm(ds.d),
+              inv_dist = dr::rsqrt(dist2);
+
+        // Redundant sqrt (removed by the JIT when the 'dist' field is not used)
+        ds.dist = dr::sqrt(dist2);
+        ds.d *= inv_dist;
+
+        UnpolarizedSpectrum spec =
+            eval_intensity(index, it.wavelengths, active) * dr::sqr(inv_dist);
+
+        return { ds, depolarizer<Spectrum>(spec) & active };
+    }
+
+protected:
+    size_t m_light_count = 0;
+    FloatStorage m_position;
+    FloatStorage m_intensity;
+    AliasDistribution<Float> m_light_distr;
+    std::vector<ScalarFloat> m_power;
+    ScalarBoundingBox3f m_bbox;
+    ref<Texture> m_d65;
+};
+
+NAMESPACE_END(mitsuba)
@@ -0,0 +1,148 @@
+#pragma once
+
+#include <mitsuba/core/bbox.h>
+#include <mitsuba/core/distr_1d.h>
+#include <mitsuba/core/object.h>
+#include <mitsuba/render/fwd.h>
+#include <mitsuba/render/interaction.h>
+#include <mutex>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**
+ * \brief Spatial cache that learns which emitters contribute to each region
+ * of the scene
+ *
+ * The cache is a hash grid whose cells are keyed on the quantized position
+ * and normal of a reference point. Each cell stores the accumulated
+ * contribution of every emitter of the scene, as observed through visibility
+ * tested emitter samples (see \ref record()). Unlike power or distance based
+ * heuristics, this accounts for occlusion.
+ *
+ * Observations are accumulated separately, and only become part of the
+ * learned distribution when \ref update() is called, so that the
+ * distribution stays fixed within a rendering pass. \ref
+ * SamplingIntegrator::render() calls it at the start of each call, and
+ * between passes in JIT variants (scalar variants render the passes of
+ * all image blocks concurrently, and hence only learn across calls).
+ *
+ * Emitters are sampled from a mixture of the learned distribution of the
+ * cell and of a defensive distribution proportional to the emitters'
+ * power, which keeps the estimator unbiased for emitters that have not been
+ * observed yet.
+ *
+ * Sampling the learned distribution performs a linear scan over the
+ * emitters of the cell, hence this cache is intended for scenes with a
+ * moderate number of emitters.
+ */
+template <typename Float, typename Spectrum>
+class MI_EXPORT_LIB LightCache : public Object {
+public:
+    MI_IMPORT_TYPES(Emitter)
+
+    using FloatStorage = DynamicBuffer<Float>;
+
+    /**
+     * \brief Create an empty cache for the given list of emitters
+     *
+     * \param bbox
+     *    Bounding box of the scene, which is subdivided into
+     *    <tt>resolution^3</tt> voxels.
+     *
+     * \param cell_count
+     *    Number of cells of the hash grid.
+     *
+     * \param fallback
+     *    Probability of selecting emitters proportionally to their power
+     *    instead of using the learned distribution.
+     */
+    LightCache(const std::vector<ref<Emitter>> &emitters,
+               const ScalarBoundingBox3f &bbox, uint32_t resolution = 16,
+               uint32_t cell_count = 4096, ScalarFloat fallback = .2f);
+
+    /**
+     * \brief Sample an emitter according to the distribution learned in the
+     * cell of the given reference point
+     *
+     * \return
+     *    The index of the chosen emitter, its discrete probability and the
+     *    transformed random sample for reuse.
+     */
+    std::tuple<UInt32, Float, Float>
+    sample_emitter(const Interaction3f &ref, Float sample,
+                   Mask active = true) const;
+
+    /**
+     * \brief Evaluate the discrete probability with which \ref
+     * sample_emitter() selects the emitter with the given index from the
+     * given reference point
+     */
+    Float pdf_emitter(const Interaction3f &ref, UInt32 index,
+                      Mask active = true) const;
+
+    /**
+     * \brief Record the observed contribution of the emitter with the given
+     * index at the given reference point
+     *
+     * The contribution should be an unbiased estimate of the emitter's
+     * contribution, i.e. already divided by its selection probability, and
+     * zero if the emitter sample was occluded.
+     */
+    void record(const Interaction3f &ref, UInt32 index, Float contribution,
+                Mask active = true) const;
+
+    /// Merge the recorded contributions into the learned distribution
+    void update();
+
+    /// Discard everything that has been learned so far
+    void reset();
+
+    /// Return the index of the cell of the given reference point
+    UInt32 cell(const Interaction3f &ref, Mask active = true) const;
+
+    /// Return the number of cells of the hash grid
+    size_t cell_count() const { return m_cell_count; }
+
+    /// Return the number of emitters tracked by each cell
+    size_t emitter_count() const { return m_emitter_count; }
+
+    /// Return the probability of falling back to power-based selection
+    ScalarFloat fallback() const { return m_fallback; }
+
+    std::string to_string() const override;
+
+    MI_DECLARE_CLASS()
+
+protected:
+    ~LightCache();
+
+    /// Evaluate the mixture pmf given the cell index and its learned sum
+    Float eval_pmf(UInt32 cell_index, Float sum, UInt32 index,
+                   Mask active) const;
+
+protected:
+    ScalarBoundingBox3f m_bbox;
+    uint32_t m_resolution;
+    size_t m_cell_count;
+    size_t m_emitter_count;
+    ScalarFloat m_fallback;
+
+    /// Defensive distribution proportional to the emitters' power
+    AliasDistribution<Float> m_fallback_distr;
+
+    /// Per cell and emitter: learned contribution (row-major, one row per cell)
+    FloatStorage m_learned;
+
+    /// Per cell: sum of the learned contributions
+    FloatStorage m_learned_sum;
+
+    /// Contributions recorded since the last call to \ref update()
+    mutable FloatStorage m_recorded;
+    mutable FloatStorage m_recorded_sum;
+
+    /// Serializes recording in scalar variants
+    mutable std::mutex m_mutex;
+};
+
+MI_EXTERN_CLASS(LightCache)
+NAMESPACE_END(mitsuba)
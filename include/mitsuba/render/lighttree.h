@@ -0,0 +1,402 @@
+#pragma once
+
+#include <mitsuba/core/bbox.h>
+#include <mitsuba/core/object.h>
+#include <mitsuba/render/fwd.h>
+#include <mitsuba/render/interaction.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**
+ * \brief Bounds of the emission of a light primitive (or of a cluster of
+ * light primitives) used to build and traverse a \ref LightTree
+ *
+ * Besides a spatial bounding box and the total emitted power, the bounds
+ * store an orientation cone: all surface normals of the primitive lie within
+ * an angle <tt>theta_o</tt> of \c axis, and light is emitted within an angle
+ * <tt>theta_e</tt> around each of these normals. Only the cosines of both
+ * angles are stored.
+ */
+template <typename Float> struct LightBounds {
+    using ScalarFloat          = dr::scalar_t<Float>;
+    using ScalarVector3f       = Vector<ScalarFloat, 3>;
+    using ScalarBoundingBox3f  = BoundingBox<Point<ScalarFloat, 3>>;
+
+    /// Spatial extent of the primitive(s)
+    ScalarBoundingBox3f bbox;
+
+    /// Central direction of the orientation cone
+    ScalarVector3f axis = ScalarVector3f(0.f, 0.f, 1.f);
+
+    /// Total emitted power
+    ScalarFloat power = 0.f;
+
+    /// Cosine of the spread of the surface normals around \c axis
+    ScalarFloat cos_theta_o = -1.f;
+
+    /// Cosine of the spread of the emission around each surface normal
+    ScalarFloat cos_theta_e = 0.f;
+
+    LightBounds() = default;
+
+    LightBounds(const ScalarBoundingBox3f &bbox, const ScalarVector3f &axis,
+                ScalarFloat power, ScalarFloat cos_theta_o,
+                ScalarFloat cos_theta_e)
+        : bbox(bbox), axis(axis), power(power), cos_theta_o(cos_theta_o),
+          cos_theta_e(cos_theta_e) { }
+
+    /// Return the union of two light bounds
+    static LightBounds merge(const LightBounds &a, const LightBounds &b) {
+        if (a.power == 0.f)
+            return b;
+        else if (b.power == 0.f)
+            return a;
+
+        LightBounds result;
+        result.bbox = a.bbox;
+        result.bbox.expand(b.bbox);
+        result.power = a.power + b.power;
+        result.cos_theta_e = dr::minimum(a.cos_theta_e, b.cos_theta_e);
+
+        // Smallest cone containing both orientation cones
+        ScalarFloat theta_a = dr::safe_acos(a.cos_theta_o),
+                    theta_b = dr::safe_acos(b.cos_theta_o),
+                    theta_d = dr::unit_angle(a.axis, b.axis),
+                    pi      = dr::Pi<ScalarFloat>;
+
+        if (dr::minimum(theta_d + theta_b, pi) <= theta_a) {
+            result.axis = a.axis;
+            result.cos_theta_o = a.cos_theta_o;
+        } else if (dr::minimum(theta_d + theta_a, pi) <= theta_b) {
+            result.axis = b.axis;
+            result.cos_theta_o = b.cos_theta_o;
+        } else {
+            ScalarFloat theta_o = .5f * (theta_a + theta_d + theta_b);
+            ScalarVector3f w_r = dr::cross(a.axis, b.axis);
+
+            if (theta_o >= pi || dr::squared_norm(w_r) == 0.f) {
+                result.axis = a.axis;
+                result.cos_theta_o = -1.f;
+            } else {
+                // Rotate 'a.axis' by 'theta_o - theta_a' around 'w_r'
+                w_r = dr::normalize(w_r);
+                auto [s, c] = dr::sincos(theta_o - theta_a);
+                result.axis = dr::normalize(
+                    a.axis * c + dr::cross(w_r, a.axis) * s +
+                    w_r * dr::dot(w_r, a.axis) * (1.f - c));
+                result.cos_theta_o = dr::cos(theta_o);
+            }
+        }
+
+        return result;
+    }
+
+    /**
+     * \brief Return the measure of the set of directions into which the
+     * bounded primitives may emit (used by the tree construction heuristic)
+     */
+    ScalarFloat orientation_measure() const {
+        ScalarFloat pi      = dr::Pi<ScalarFloat>,
+                    theta_o = dr::safe_acos(cos_theta_o),
+                    theta_e = dr::safe_acos(cos_theta_e),
+                    theta_w = dr::minimum(theta_o + theta_e, pi),
+                    sin_theta_o = dr::safe_sqrt(1.f - dr::sqr(cos_theta_o));
+
+        return 2.f * pi * (1.f - cos_theta_o) +
+               .5f * pi * (2.f * theta_w * sin_theta_o -
+                           dr::cos(theta_o - 2.f * theta_w) -
+                           2.f * theta_o * sin_theta_o + cos_theta_o);
+    }
+};
+
+/**
+ * \brief Light tree (also known as light BVH) for spatially-aware emitter
+ * selection
+ *
+ * This data structure hierarchically clusters the finite emitters of a
+ * scene based on their position, orientation and power. Given a reference
+ * point, an emitter is selected by stochastically traversing the tree from
+ * the root, choosing each child proportionally to a conservative estimate
+ * of its contribution at that point. The discrete probability of any
+ * emitter can then be evaluated by walking up the tree from its leaf, which
+ * is required for multiple importance sampling.
+ *
+ * Infinite emitters (and emitters without a valid bounding box) cannot be
+ * clustered meaningfully and are instead chosen uniformly with a fixed
+ * probability.
+ *
+ * By default, each finite emitter forms a single leaf of the tree. When
+ * emitters are split, the leaves instead hold the individual light
+ * primitives reported by \ref Emitter::primitive_bounds() (e.g. the
+ * triangles of an emissive mesh), so that the interior nodes of the tree
+ * act as spatially coherent clusters of primitives.
+ *
+ * The tree is built on the CPU, and then stored in flat arrays so that its
+ * traversal works in scalar, LLVM and CUDA variants alike.
+ */
+template <typename Float, typename Spectrum>
+class MI_EXPORT_LIB LightTree : public Object {
+public:
+    MI_IMPORT_TYPES(Emitter)
+
+    using FloatStorage  = DynamicBuffer<Float>;
+    using UInt32Storage = DynamicBuffer<UInt32>;
+    using LightBounds   = mitsuba::LightBounds<Float>;
+
+    /// Lower bound of the weight of nodes outside of a BSDF lobe
+    static constexpr float MinLobeDiffuse = .05f;
+
+    /**
+     * \brief Build a light tree over the given list of emitters
+     *
+     * \param split_emitters
+     *    If set, the tree stores the individual light primitives of each
+     *    emitter (see \ref Emitter::primitive_bounds()) instead of a single
+     *    leaf per emitter.
+     */
+    LightTree(const std::vector<ref<Emitter>> &emitters,
+              bool split_emitters = false);
+
+    /**
+     * \brief Sample an emitter proportionally to its estimated contribution
+     * at the given reference point
+     *
+     * \param ref
+     *    Reference interaction. Its normal is used to account for the
+     *    foreshortening at the receiver unless it is zero (e.g. within
+     *    participating media).
+     *
+     * \param sample
+     *    A uniformly distributed number in [0, 1).
+     *
+     * \return
+     *    The index of the chosen emitter, the index of the chosen primitive
+     *    of this emitter (zero unless emitters are split), the discrete
+     *    probability of the choice (zero if no emitter could be chosen), and
+     *    the transformed random sample for reuse.
+     */
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_emitter(const Interaction3f &ref, Float sample,
+                   Mask active = true) const;
+
+    /**
+     * \brief Sample an emitter proportionally to its estimated contribution
+     * at the given reference point, including a bound of the BSDF lobe at
+     * that point
+     *
+     * The importance of every node is additionally weighted by the overlap
+     * of its bounds with the cone of the given lobe (see \ref BSDF::lobe()),
+     * which favours emitters that lie in the reflection lobe of glossy
+     * materials. The weight of the nodes outside of the lobe is clamped to
+     * \ref MinLobeDiffuse, so that every emitter remains selectable.
+     */
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_emitter(const Interaction3f &ref, const BSDFLobe3f &lobe,
+                   Float sample, Mask active = true) const;
+
+    /**
+     * \brief Sample a light primitive within the subtree rooted at the given
+     * node proportionally to its estimated contribution at the given
+     * reference point
+     *
+     * This performs the same traversal as \ref sample_emitter(), but starts
+     * at an arbitrary node (e.g. a node of a light cut) and ignores infinite
+     * emitters.
+     *
+     * \return
+     *    The index of the chosen emitter, the index of the chosen primitive
+     *    of this emitter, the discrete probability of the choice among the
+     *    primitives of the subtree, and the transformed random sample for
+     *    reuse.
+     */
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_subtree(const Interaction3f &ref, UInt32 node, Float sample,
+                   Mask active = true) const;
+
+    /**
+     * \brief Evaluate the discrete probability with which \ref
+     * sample_emitter() selects the given primitive of the emitter with the
+     * given index from the given reference point
+     *
+     * The primitive index is ignored for emitters that consist of a single
+     * primitive.
+     */
+    Float pdf_emitter(const Interaction3f &ref, UInt32 index,
+                      UInt32 prim_index = 0, Mask active = true) const;
+
+    /**
+     * \brief Evaluate the discrete probability with which the lobe-aware
+     * variant of \ref sample_emitter() selects the given primitive of the
+     * emitter with the given index
+     */
+    Float pdf_emitter(const Interaction3f &ref, const BSDFLobe3f &lobe,
+                      UInt32 index, UInt32 prim_index = 0,
+                      Mask active = true) const;
+
+    /**
+     * \brief Sample an emitter proportionally to its estimated contribution
+     * along the given ray segment
+     *
+     * This is the counterpart of \ref sample_emitter() for reference
+     * locations that are distributed along a segment (e.g. the possible
+     * scattering locations of a ray within participating media). Each node is
+     * evaluated from the point of the segment <tt>[0, ray.maxt]</tt> that is
+     * closest to the center of its bounds (see \ref importance_segment()).
+     *
+     * \return
+     *    The same quantities as \ref sample_emitter().
+     */
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_emitter_segment(const Ray3f &ray, Float sample,
+                           Mask active = true) const;
+
+    /**
+     * \brief Evaluate the discrete probability with which \ref
+     * sample_emitter_segment() selects the given primitive of the emitter
+     * with the given index for the given ray segment
+     */
+    Float pdf_emitter_segment(const Ray3f &ray, UInt32 index,
+                              UInt32 prim_index = 0,
+                              Mask active = true) const;
+
+    /**
+     * \brief Evaluate the importance of a tree node as seen from a reference
+     * point with the given normal (which may be zero)
+     */
+    Float importance(UInt32 node, const Point3f &p, const Normal3f &n,
+                     Mask active = true) const;
+
+    /**
+     * \brief Evaluate the importance of a tree node as seen from a reference
+     * point with the given normal, weighted by its overlap with a BSDF lobe
+     */
+    Float importance(UInt32 node, const Point3f &p, const Normal3f &n,
+                     const BSDFLobe3f &lobe, Mask active = true) const;
+
+    /**
+     * \brief Evaluate the importance of a tree node as seen from the point of
+     * the ray segment <tt>[0, ray.maxt]</tt> that is closest to the center of
+     * its bounds (without foreshortening)
+     */
+    Float importance_segment(UInt32 node, const Ray3f &ray,
+                             Mask active = true) const;
+
+    /// Return the indices of the two children of the given interior node
+    std::pair<UInt32, UInt32> node_children(UInt32 node,
+                                            Mask active = true) const;
+
+    /// Return the index of the parent of the given node (zero for the root)
+    UInt32 node_parent(UInt32 node, Mask active = true) const;
+
+    /// Return whether the given node is a leaf
+    Mask is_leaf(UInt32 node, Mask active = true) const;
+
+    /**
+     * \brief Return the index of the leaf storing the given primitive of the
+     * emitter with the given index, or <tt>-1</tt> if it is not part of the
+     * tree (e.g. infinite emitters and emitters without power)
+     */
+    UInt32 emitter_leaf(UInt32 index, UInt32 prim_index = 0,
+                        Mask active = true) const;
+
+    /// Return the scene index of the <tt>i</tt>-th infinite emitter
+    UInt32 infinite_emitter(UInt32 i, Mask active = true) const;
+
+    /// Return the number of nodes of the tree
+    size_t node_count() const { return m_node_count; }
+
+    /// Return the number of light primitives stored in the leaves of the tree
+    size_t finite_count() const { return m_finite_count; }
+
+    /// Return the number of emitters that are sampled outside of the tree
+    size_t infinite_count() const { return m_infinite_count; }
+
+    /// Return the bounds of the given tree node
+    LightBounds node_bounds(size_t index) const { return m_nodes[index]; }
+
+    std::string to_string() const override;
+
+    MI_DECLARE_CLASS()
+
+protected:
+    ~LightTree();
+
+    /// Evaluate the importance of a node, with an optional BSDF lobe bound
+    Float eval_importance(UInt32 node, const Point3f &p, const Normal3f &n,
+                          const BSDFLobe3f *lobe, Mask active) const;
+
+    /**
+     * \brief Select an infinite emitter or traverse the tree from its root
+     * using the given node importance function
+     */
+    template <typename ImportanceFn>
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_root(const ImportanceFn &importance_fn, Float sample,
+                Mask active) const;
+
+    /// Traverse the subtree rooted at \c node using the given importance function
+    template <typename ImportanceFn>
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_node(const ImportanceFn &importance_fn, UInt32 node, Float sample,
+                Mask active) const;
+
+    /// Evaluate the probability of a primitive using the given importance function
+    template <typename ImportanceFn>
+    Float pdf_leaf(const ImportanceFn &importance_fn, UInt32 index,
+                   UInt32 prim_index, Mask active) const;
+
+    /// Recursively build the subtree over <tt>prims[start, end)</tt>
+    uint32_t build(std::vector<std::pair<LightBounds, uint32_t>> &prims,
+                   size_t start, size_t end, uint32_t parent,
+                   std::vector<uint32_t> &children,
+                   std::vector<uint32_t> &parents,
+                   std::vector<uint32_t> &prim_leaf);
+
+protected:
+    /// Bounds of all nodes (kept on the host for inspection)
+    std::vector<LightBounds> m_nodes;
+
+    /**
+     * Per node: the indices of the two children, or the index of the light
+     * primitive followed by zero for leaves (the root is never a child)
+     */
+    UInt32Storage m_node_children;
+    UInt32Storage m_node_parent;
+    FloatStorage m_node_bbox_min;
+    FloatStorage m_node_bbox_max;
+    FloatStorage m_node_axis;
+    FloatStorage m_node_power;
+    FloatStorage m_node_cos_theta_o;
+    FloatStorage m_node_cos_theta_e;
+
+    /// Per light primitive: index of the emitter it belongs to
+    UInt32Storage m_prim_emitter;
+
+    /// Per light primitive: index of the primitive within its emitter
+    UInt32Storage m_prim_index;
+
+    /// Per light primitive: index of its leaf node, or -1 if it isn't in the tree
+    UInt32Storage m_prim_leaf;
+
+    /// Per emitter: index of its first light primitive
+    UInt32Storage m_emitter_offset;
+
+    /// Per emitter: number of light primitives (zero for infinite emitters)
+    UInt32Storage m_emitter_prim_count;
+
+    /// Per emitter: selection probability of infinite emitters, zero otherwise
+    FloatStorage m_emitter_infinite_pmf;
+
+    /// Indices of the emitters that are sampled outside of the tree
+    UInt32Storage m_infinite_index;
+
+    /// Probability of selecting one of the infinite emitters
+    ScalarFloat m_infinite_prob = 0.f;
+
+    size_t m_node_count = 0;
+    size_t m_finite_count = 0;
+    size_t m_infinite_count = 0;
+};
+
+MI_EXTERN_CLASS(LightTree)
+NAMESPACE_END(mitsuba)
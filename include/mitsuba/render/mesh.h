@@ -125,6 +125,9 @@ public:
     /// Does this mesh use face normals?
     bool has_face_normals() const { return m_face_normals; }
 
+    /// Are the normals of this mesh flipped?
+    bool flip_normals() const { return m_flip_normals; }
+
     /// @}
     // =========================================================================
 
@@ -173,6 +176,20 @@ public:
 
     virtual Float pdf_position(const PositionSample3f &ps, Mask active = true) const override;
 
+    /**
+     * \brief Sample a point uniformly on the triangle with index \c face_idx
+     *
+     * The returned position sample stores the face index in
+     * <tt>ps.prim_index</tt>, and its density (per unit area) is the inverse
+     * of the triangle's area.
+     */
+    PositionSample3f sample_face_position(Float time, UInt32 face_idx,
+                                          const Point2f &sample,
+                                          Mask active = true) const;
+
+    /// Return the surface area of the triangle with index \c face_idx
+    Float face_area(UInt32 face_idx, Mask active = true) const;
+
     virtual Point3f
     barycentric_coordinates(const SurfaceInteraction3f &si,
                             Mask active = true) const;
@@ -125,6 +125,9 @@ public:
     /// Set the number of samples per pixel per pass in wavefront modes (default is 1)
     void set_samples_per_wavefront(uint32_t samples_per_wavefront);
 
+    /// Return the number of samples per pixel per pass in wavefront modes
+    uint32_t samples_per_wavefront() const { return m_samples_per_wavefront; }
+
     /// dr::schedule() variables that represent the internal sampler state
     virtual void schedule_state();
 
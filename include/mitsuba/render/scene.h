@@ -1,10 +1,14 @@
 #pragma once
 
+#include <mitsuba/core/distr_1d.h>
 #include <mitsuba/core/spectrum.h>
 #include <mitsuba/render/emitter.h>
 #include <mitsuba/render/shapegroup.h>
 #include <mitsuba/render/fwd.h>
+#include <mitsuba/render/lightcache.h>
+#include <mitsuba/render/lighttree.h>
 #include <mitsuba/render/sensor.h>
+#include <atomic>
 
 NAMESPACE_BEGIN(mitsuba)
 
@@ -36,7 +40,8 @@ template <typename Float, typename Spectrum>
 class MI_EXPORT_LIB Scene : public Object {
 public:
     MI_IMPORT_TYPES(BSDF, Emitter, EmitterPtr, Film, Sampler, Shape, ShapePtr,
-                    ShapeGroup, Sensor, Integrator, Medium, MediumPtr, Mesh)
+                    ShapeGroup, Sensor, Integrator, Medium, MediumPtr, Mesh,
+                    LightTree, LightCache)
 
     /// Instantiate a scene from a \ref Properties object
     Scene(const Properties &props);
@@ -278,8 +283,11 @@ public:
      * \brief Sample one emitter in the scene and rescale the input sample
      * for reuse.
      *
-     * Currently, the sampling scheme implemented by the \ref Scene class is
-     * very simplistic (uniform).
+     * The sampling scheme is controlled by the scene's \c emitter_sampling
+     * parameter: emitters are either chosen uniformly (\c "uniform", the
+     * default), or proportionally to their estimated total power (\c
+     * "power", see \ref Emitter::estimate_power()) using an alias table,
+     * which takes constant time irrespective of the number of emitters.
      *
      * \param sample
      *    A uniformly distributed number in [0, 1).
@@ -294,9 +302,63 @@ public:
     /**
      * \brief Evaluate the discrete probability of the \ref
      * sample_emitter() technique for the given a emitter index.
+     *
+     * The emitter index of a \ref DirectionSample3f can be obtained using
+     * <tt>ds.emitter->scene_index()</tt>.
      */
     Float pdf_emitter(UInt32 index, Mask active = true) const;
 
+    /**
+     * \brief Evaluate the discrete probability with which \ref
+     * sample_emitter_direction() selects the given primitive of the emitter
+     * with the given index from the given reference point
+     *
+     * Unlike \ref pdf_emitter_direction(), this does not include the density
+     * of the direction sampled on the emitter, and is thus also meaningful
+     * for emitters with a Dirac delta emission profile.
+     */
+    Float pdf_emitter_selection(const Interaction3f &ref, UInt32 index,
+                                UInt32 prim_index = 0,
+                                Mask active = true) const;
+
+    /**
+     * \brief Evaluate the discrete probability with which the BSDF-aware
+     * variant of \ref sample_emitter_direction() selects the given primitive
+     * of the emitter with the given index
+     */
+    Float pdf_emitter_selection(const Interaction3f &ref,
+                                const BSDFLobe3f &lobe, UInt32 index,
+                                UInt32 prim_index = 0,
+                                Mask active = true) const;
+
+    /**
+     * \brief Sample one emitter (and one of its primitives) according to its
+     * estimated contribution along a ray segment
+     *
+     * This is intended for techniques that subsequently choose a reference
+     * point along the segment <tt>[0, ray.maxt]</tt>, such as equiangular
+     * sampling in participating media. When the scene's \c emitter_sampling
+     * parameter is set to \c "tree", the selection accounts for the distance
+     * of emitters to the segment (see \ref LightTree::sample_emitter_segment()).
+     * Other strategies select emitters as in \ref sample_emitter().
+     *
+     * \return
+     *    The index of the chosen emitter, the index of the chosen primitive
+     *    (zero unless emitters are split), the discrete probability of the
+     *    choice, and the transformed random sample for reuse.
+     */
+    std::tuple<UInt32, UInt32, Float, Float>
+    sample_emitter_segment(const Ray3f &ray, Float sample,
+                           Mask active = true) const;
+
+    /**
+     * \brief Evaluate the discrete probability of the \ref
+     * sample_emitter_segment() technique for the given emitter primitive
+     */
+    Float pdf_emitter_segment(const Ray3f &ray, UInt32 index,
+                              UInt32 prim_index = 0,
+                              Mask active = true) const;
+
     /**
      * \brief Sample a ray according to the emission profile of scene emitters
      *
@@ -350,6 +412,23 @@ public:
      * the sampled emitter position. However, approximations are acceptable as
      * long as these are reflected in the returned Monte Carlo sampling weight.
      *
+     * When the scene's \c emitter_sampling parameter is set to \c "tree",
+     * the emitter is chosen by traversing a \ref LightTree, which accounts
+     * for the distance and orientation of emitters relative to \c ref.
+     * If the scene's \c split_emitters parameter is additionally set, the
+     * tree selects individual primitives of emitters (e.g. the triangles of
+     * emissive meshes), and directions are sampled using \ref
+     * Emitter::sample_direction_primitive().
+     *
+     * When it is set to \c "learned", the emitter is instead chosen using
+     * a \ref LightCache, which learns the contribution of each emitter to
+     * the region around \c ref from previous visibility-tested samples.
+     * Every call with \c test_visibility set records its outcome in the
+     * cache, and the recorded contributions take effect once \ref
+     * LightCache::update() is called (at the start of every call to \ref
+     * SamplingIntegrator::render(), and between its passes in JIT
+     * variants).
+     *
      * \param ref
      *    A 3D reference location within the scene, which may influence the
      *    sampling process.
@@ -380,6 +459,25 @@ public:
                              bool test_visibility = true,
                              Mask active = true) const;
 
+    /**
+     * \brief Direct illumination sampling that accounts for the BSDF at the
+     * reference point
+     *
+     * This variant of \ref sample_emitter_direction() takes a coarse bound
+     * of the BSDF lobe at the reference point (see \ref BSDF::lobe()), which
+     * the \c "tree" emitter selection strategy uses to favour emitters that
+     * lie within the lobe of glossy materials (see \ref
+     * LightTree::sample_emitter()). Other strategies ignore the lobe. The
+     * density of the resulting samples must be evaluated with the matching
+     * variant of \ref pdf_emitter_direction().
+     */
+    std::pair<DirectionSample3f, Spectrum>
+    sample_emitter_direction(const Interaction3f &ref,
+                             const BSDFLobe3f &lobe,
+                             const Point2f &sample,
+                             bool test_visibility = true,
+                             Mask active = true) const;
+
     /**
      * \brief Evaluate the PDF of direct illumination sampling
      *
@@ -403,6 +501,15 @@ public:
                                 const DirectionSample3f &ds,
                                 Mask active = true) const;
 
+    /**
+     * \brief Evaluate the PDF of the BSDF-aware variant of \ref
+     * sample_emitter_direction() for the given BSDF lobe bound
+     */
+    Float pdf_emitter_direction(const Interaction3f &ref,
+                                const BSDFLobe3f &lobe,
+                                const DirectionSample3f &ds,
+                                Mask active = true) const;
+
     /**
      * \brief Re-evaluate the incident direct radiance of the \ref
      * sample_emitter_direction() method.
@@ -478,17 +585,70 @@ public:
     /// Return the list of emitters as an Dr.Jit array
     const DynamicBuffer<EmitterPtr> &emitters_dr() const { return m_emitters_dr; }
 
+    /// Return the light tree used to select emitters (if any)
+    const LightTree *light_tree() const { return m_light_tree.get(); }
+
+    /// Return whether emitters are split into primitives for selection
+    bool split_emitters() const { return m_split_emitters; }
+
+    /**
+     * \brief Return an identifier of the current state of the emitters
+     *
+     * It changes whenever the emitters are updated (see \ref
+     * parameters_changed()), and is unique across scenes. Data structures
+     * built over the emitters of a scene can compare it to detect that they
+     * are stale.
+     */
+    uint32_t emitter_generation() const { return m_emitter_generation; }
+
+    /// Return the light cache used to select emitters (if any)
+    LightCache *light_cache() { return m_light_cache.get(); }
+    /// Return the light cache used to select emitters (if any)
+    const LightCache *light_cache() const { return m_light_cache.get(); }
+
     /// Return the list of shapes as an Dr.Jit array
     const DynamicBuffer<ShapePtr> &shapes_dr() const { return m_shapes_dr; }
 
     //! @}
     // =============================================================
 
+    // =============================================================
+    //! @{ \name Ray statistics
+    // =============================================================
+
+    /**
+     * \brief Enable or disable counting of the rays traced through this scene
+     *
+     * When enabled, every active lane of \ref ray_intersect() and \ref
+     * ray_intersect_preliminary() counts as one ray, and every active lane
+     * of \ref ray_test() as one shadow ray. Counting adds an atomic update
+     * per query, hence it is disabled by default and should not be enabled
+     * while measuring performance. Changing this setting resets the counters.
+     */
+    void set_ray_statistics(bool enabled);
+
+    /// Return whether rays traced through this scene are being counted
+    bool ray_statistics_enabled() const { return m_ray_statistics; }
+
+    /**
+     * \brief Return the number of rays and shadow rays traced since
+     * statistics were enabled or last reset
+     *
+     * In JIT variants, this evaluates all pending computation.
+     */
+    std::pair<uint64_t, uint64_t> ray_statistics() const;
+
+    /// Reset the ray counters to zero
+    void reset_ray_statistics();
+
+    //! @}
+    // =============================================================
+
     /// Traverse the scene graph and invoke the given callback for each object
     void traverse(TraversalCallback *callback) override;
 
     /// Update internal state following a parameter update
-    void parameters_changed(const std::vector<std::string> &/*keys*/ = {}) override;
+    void parameters_changed(const std::vector<std::string> &keys = {}) override;
 
     /**
      * \brief Specifies whether any of the scene's shape parameters have
@@ -520,6 +680,17 @@ protected:
     /// Unmarks all shapes as dirty
     void clear_shapes_dirty();
 
+    /**
+     * \brief Return the sorted indices of the shapes whose geometry changed
+     * since the last update of the acceleration data structure
+     *
+     * Instances are included whenever the content of a shape group changed.
+     */
+    std::vector<uint32_t> dirty_shapes() const;
+
+    /// (Re-)build the discrete distribution used to select emitters
+    void update_emitter_sampling();
+
     /// Create the ray-intersection acceleration data structure
     void accel_init_cpu(const Properties &props);
     void accel_init_gpu(const Properties &props);
@@ -554,6 +725,48 @@ protected:
 
     using ShapeKDTree = mitsuba::ShapeKDTree<Float, Spectrum>;
 
+    /// Emitter selection probability with an optional BSDF lobe bound
+    Float pdf_emitter_selection_impl(const Interaction3f &ref,
+                                     const BSDFLobe3f *lobe, UInt32 index,
+                                     UInt32 prim_index, Mask active) const;
+
+    /// Direct illumination sampling with an optional BSDF lobe bound
+    std::pair<DirectionSample3f, Spectrum>
+    sample_emitter_direction_impl(const Interaction3f &ref,
+                                  const BSDFLobe3f *lobe,
+                                  const Point2f &sample, bool test_visibility,
+                                  Mask active) const;
+
+    /// Direct illumination density with an optional BSDF lobe bound
+    Float pdf_emitter_direction_impl(const Interaction3f &ref,
+                                     const BSDFLobe3f *lobe,
+                                     const DirectionSample3f &ds,
+                                     Mask active) const;
+
+    /// Strategies available to select an emitter in \ref sample_emitter()
+    enum class EmitterSampling : uint32_t {
+        /// Every emitter is equally likely to be chosen
+        Uniform,
+
+        /// Emitters are chosen proportionally to their estimated power
+        Power,
+
+        /**
+         * Emitters are chosen by traversing a light tree from the reference
+         * point in \ref sample_emitter_direction(). Other queries fall back
+         * to power-based selection.
+         */
+        Tree,
+
+        /**
+         * Emitters are chosen using the distribution learned by a light
+         * cache around the reference point in \ref
+         * sample_emitter_direction(). Other queries fall back to power-based
+         * selection.
+         */
+        Learned
+    };
+
 protected:
     /// Acceleration data structure (IAS) (type depends on implementation)
     void *m_accel = nullptr;
@@ -572,8 +785,42 @@ protected:
     ref<Integrator> m_integrator;
     ref<Emitter> m_environment;
     ScalarFloat m_emitter_pmf;
+    EmitterSampling m_emitter_sampling;
+    AliasDistribution<Float> m_emitter_distr;
+    ref<LightTree> m_light_tree;
+    ref<LightCache> m_light_cache;
+    uint32_t m_cache_resolution;
+    uint32_t m_cache_size;
+    ScalarFloat m_cache_fallback;
+    bool m_split_emitters;
+    uint32_t m_emitter_generation = 0;
 
     bool m_shapes_grad_enabled;
+
+    /// Entry of \ref m_dirty_shapes denoting a change within a shape group
+    static constexpr uint32_t DirtyShapeGroup = (uint32_t) -1;
+
+    /**
+     * Indices (in \ref m_shapes) of the shapes whose geometry changed since
+     * the last update of the acceleration data structure. Shapes append
+     * themselves to this list in \ref Shape::mark_dirty().
+     */
+    std::vector<uint32_t> m_dirty_shapes;
+
+    /// Add the number of active lanes to the given ray counter (0: rays, 1: shadow rays)
+    void count_rays(uint32_t counter, Mask active) const;
+
+    /// Whether \ref count_rays() is enabled
+    bool m_ray_statistics = false;
+
+    /// Ray counters of JIT variants (rays, shadow rays)
+    mutable DynamicBuffer<UInt64> m_ray_counts;
+
+    /// Ray counters of scalar variants (rays, shadow rays)
+    mutable std::atomic<uint64_t> m_ray_counts_scalar[2] { 0, 0 };
+
+    /// Shapes append themselves to \ref m_dirty_shapes
+    friend class Shape<Float, Spectrum>;
 };
 
 /// Dummy function which can be called to ensure that the librender shared library is loaded
@@ -536,8 +536,14 @@ public:
     /// Return whether the shape's geometry has changed
     bool dirty() const { return m_dirty; }
 
-    /// Mark that the shape's geometry has changed
-    void mark_dirty() { m_dirty = true; }
+    /**
+     * \brief Mark that the shape's geometry has changed
+     *
+     * The first call after the scene's last acceleration data structure
+     * update appends the shape to the dirty list of every scene that contains
+     * it, so that only the modified geometry needs to be updated.
+     */
+    void mark_dirty();
 
     // Mark that shape as an instance
     void mark_as_instance() { m_is_instance = true; }
@@ -586,6 +592,9 @@ protected:
 protected:
     /// True if the shape's geometry has changed
     bool m_dirty = true;
+
+    /// Scenes containing this shape, along with its index in each of them
+    std::vector<std::pair<Scene<Float, Spectrum> *, uint32_t>> m_parent_scenes;
 };
 
 MI_EXTERN_CLASS(Shape)
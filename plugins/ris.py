@@ -6,9 +6,11 @@ mi.set_log_level(mi.LogLevel.Info)
 import drjit as dr
 import matplotlib.pyplot as plt
 from argparse import ArgumentParser
-from utils.render import render_multi_pass, linear_to_srgb
+from utils.render import render_multi_pass, render_adaptive, linear_to_srgb
 from utils.parser import add_common_args
 from utils.reservoir import Reservoir
+from utils.emitter_selector import EmitterSelector, load_emitter_selector
+from utils.transforms import world_to_film, film_to_pixel
 
 EPS = dr.epsilon(mi.Float)
 
@@ -17,7 +19,183 @@ class ReSTIR(mi.SamplingIntegrator):
         super().__init__(props)
 
         self.m = props.get("num_proposals", 32)
-    
+
+        # Strategy used to pick the emitter of each candidate (see
+        # utils/emitter_selector.py). Any 'EmitterSelector' can also be
+        # assigned to 'self.selector' directly.
+        self.selector_name = props.get("emitter_selector", "scene")
+        self.selector = None
+        self.selector_scene = None
+
+        # Let the selector account for a coarse bound of the BSDF lobe at the
+        # shading point (see mi.BSDF.lobe()), which favours the emitters
+        # within the reflection lobe of glossy materials
+        self.lobe_selection = props.get("lobe_selection", False)
+
+        # Temporal reuse: merge the reservoirs of the previous frame found at
+        # the reprojected location of each shading point
+        self.temporal_reuse = props.get("temporal_reuse", False)
+        # Maximum number of candidates carried over from the previous frame,
+        # in multiples of 'num_proposals'
+        self.max_history = props.get("max_history", 20)
+        # Reprojected reservoirs are discarded when the surface normals or
+        # the relative depths differ by more than these thresholds
+        self.normal_threshold = props.get("normal_threshold", 0.9)
+        self.depth_threshold = props.get("depth_threshold", 0.1)
+
+        # Spatial reuse: merge the reservoirs of 'spatial_samples' random
+        # pixels within 'spatial_radius' pixels of each pixel
+        self.spatial_reuse = props.get("spatial_reuse", False)
+        self.spatial_samples = props.get("spatial_samples", 5)
+        self.spatial_radius = props.get("spatial_radius", 30.0)
+        # Normalize the merged reservoirs by the number of candidates that
+        # could have produced the chosen sample (unbiased) instead of the
+        # total number of candidates (biased, but with less noise)
+        self.spatial_unbiased = props.get("spatial_unbiased", True)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discard the reservoirs of the previous frame (e.g. after a camera cut)
+        """
+        self.history = None
+
+    def sample_state_size(self) -> int:
+        """
+        Spatial reuse evaluates the reservoirs in the middle of each sample,
+        which stores the shading point and reservoir of every sample
+        """
+        size = super().sample_state_size()
+        if self.spatial_reuse:
+            size += 4 * (64 + sum(Reservoir.CHANNELS.values()))
+        return size
+
+    def get_selector(self, scene: mi.Scene) -> EmitterSelector:
+        """
+        Return the emitter selector, building it for the given scene if needed
+        """
+        if self.selector is None or (self.selector_scene is not None and self.selector_scene is not scene):
+            self.selector = load_emitter_selector(self.selector_name, scene)
+            self.selector_scene = scene
+        return self.selector
+
+    def target(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, bsdf: mi.BSDF, ctx: mi.BSDFContext,
+               ds: mi.DirectionSample3f, active: mi.Bool) -> Tuple[mi.Color3f, mi.Float]:
+        """
+        Evaluate the unshadowed contribution of a light sample, and the RIS
+        target function (its norm)
+        """
+        emitter_val = scene.eval_emitter_direction(si, ds, active)
+        bsdf_val = bsdf.eval(ctx, si, si.to_local(ds.d), active)
+        contrib = bsdf_val * emitter_val
+        return contrib, dr.norm(contrib)
+
+    def reuse(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, bsdf: mi.BSDF, ctx: mi.BSDFContext,
+              buffer: Reservoir, gbuffer: dict, idx: mi.UInt32, valid: mi.Bool, depth: mi.Float,
+              M_max: int, rand: mi.Float, reservoir: Reservoir) -> Tuple[mi.Bool, mi.UInt32]:
+        """
+        Merge the reservoir stored at index `idx` of a reservoir buffer into
+        the current reservoir, unless the two shading points are too
+        dissimilar. Returns the validity mask and the merged sample count.
+        """
+        other: Reservoir = dr.gather(Reservoir, buffer, idx, valid)
+        valid &= other.M > 0
+
+        # Reject reservoirs across geometric discontinuities
+        normal = dr.gather(mi.Normal3f, gbuffer["normal"], idx, valid)
+        depth_other = dr.gather(mi.Float, gbuffer["depth"], idx, valid)
+        valid &= dr.dot(normal, si.n) > self.normal_threshold
+        valid &= dr.abs(depth - depth_other) < self.depth_threshold * depth
+
+        # Cap the sample count so that no single reservoir dominates
+        other.renormalize(dr.minimum(other.M, M_max))
+
+        ds = other.direction_sample(scene, si, valid)
+        _, p_hat = self.target(scene, si, bsdf, ctx, ds, valid)
+        reservoir.merge(other, p_hat, rand, valid)
+
+        return valid, dr.select(valid, other.M, 0)
+
+    def temporal_resample(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, bsdf: mi.BSDF,
+                          ctx: mi.BSDFContext, sampler: mi.Sampler, reservoir: Reservoir,
+                          active: mi.Bool) -> None:
+        """
+        Merge the reservoir of the previous frame found at the reprojected
+        location of the shading point into the current reservoir
+        """
+        history = self.history
+        if history is None:
+            return
+
+        idx, valid = film_to_pixel(history["world_to_film"] @ si.p, history["film_size"])
+        depth = dr.norm(si.p - history["camera_pos"])
+        self.reuse(scene, si, bsdf, ctx, history["reservoirs"], history["gbuffer"], idx, valid & active,
+                   depth, self.max_history * self.m, sampler.next_1d(active), reservoir)
+
+    def spatial_resample(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, bsdf: mi.BSDF,
+                         ctx: mi.BSDFContext, sampler: mi.Sampler, reservoir: Reservoir,
+                         buffer: Reservoir, gbuffer: dict, film_size: mi.ScalarVector2u,
+                         pixel_idx: mi.UInt32, depth: mi.Float, active: mi.Bool) -> mi.Float:
+        """
+        Merge the reservoirs of random neighbouring pixels of the current
+        frame into the current reservoir. Returns the number of candidates
+        by which the reservoir's weight must be normalized.
+        """
+        pixel = mi.Vector2i(mi.Int32(pixel_idx % film_size.x), mi.Int32(pixel_idx // film_size.x))
+        neighbours = []
+
+        for _ in range(self.spatial_samples):
+            offset = mi.warp.square_to_uniform_disk(sampler.next_2d(active)) * self.spatial_radius
+            other = pixel + mi.Vector2i(dr.round(offset))
+            valid = active & (other.x >= 0) & (other.x < film_size.x) & (other.y >= 0) & (other.y < film_size.y)
+            idx = mi.UInt32(other.y) * film_size.x + mi.UInt32(other.x)
+            valid &= dr.neq(idx, pixel_idx)
+
+            valid, M = self.reuse(scene, si, bsdf, ctx, buffer, gbuffer, idx, valid, depth,
+                                  self.max_history * self.m, sampler.next_1d(active), reservoir)
+            neighbours.append((idx, valid, M))
+
+        if not self.spatial_unbiased:
+            return mi.Float(reservoir.M)
+
+        # Only count the candidates of the pixels at which the chosen light
+        # sample could have been generated (i.e. where its target is nonzero)
+        ds = reservoir.direction_sample(scene, si, active)
+        is_infinite = mi.has_flag(ds.emitter.flags(), mi.EmitterFlags.Infinite)
+        is_surface = mi.has_flag(ds.emitter.flags(), mi.EmitterFlags.Surface)
+        Z = mi.Float(reservoir.M)
+        for idx, valid, M in neighbours:
+            Z -= mi.Float(M)
+            position = dr.gather(mi.Point3f, gbuffer["position"], idx, valid)
+            normal = dr.gather(mi.Normal3f, gbuffer["normal"], idx, valid)
+            d = dr.select(is_infinite, ds.d, ds.p - position)
+            in_domain = dr.dot(d, normal) > 0
+            in_domain &= ~is_surface | (dr.dot(d, ds.n) < 0)
+            Z += dr.select(valid & in_domain, mi.Float(M), 0)
+
+        return Z
+
+    def scatter_reservoirs(self, si: mi.SurfaceInteraction3f, reservoir: Reservoir, camera_pos: mi.Point3f,
+                           idx: mi.UInt32, valid: mi.Bool, n_pixels: int) -> Tuple[Reservoir, dict]:
+        """
+        Store reservoirs (one per pixel) and the geometry of their shading
+        points (G-buffer) in buffers of flat arrays
+        """
+        buffer = dr.zeros(Reservoir, n_pixels)
+        dr.scatter(buffer, reservoir, idx, valid)
+
+        gbuffer = {
+            "position": dr.zeros(mi.Point3f, n_pixels),
+            "normal": dr.zeros(mi.Normal3f, n_pixels),
+            "depth": dr.zeros(mi.Float, n_pixels),
+        }
+        dr.scatter(gbuffer["position"], si.p, idx, valid)
+        dr.scatter(gbuffer["normal"], si.n, idx, valid)
+        dr.scatter(gbuffer["depth"], dr.norm(si.p - camera_pos), idx, valid)
+
+        return buffer, gbuffer
+
     def sample(self, scene: mi.Scene, sampler, ray: mi.RayDifferential3f, medium: mi.Medium = None, active: bool = True) -> Tuple[mi.Color3f, bool]:
         si = scene.ray_intersect(ray, active)
 
@@ -32,33 +210,85 @@ class ReSTIR(mi.SamplingIntegrator):
         # Show emmiters
         result += si.emitter(scene, active).eval(si, active)
 
+        selector = self.get_selector(scene)
+        lobe = bsdf.lobe(ctx, si, active) if self.lobe_selection else None
+
         i = mi.UInt(0)
-        reservoir = Reservoir(mi.DirectionSample3f)
-        loop = mi.Loop("RIS", lambda: (i, reservoir.sample, reservoir.w_sum, sampler))
+        reservoir = dr.zeros(Reservoir, dr.width(si.t))
+        loop = mi.Loop("RIS", lambda: (i, reservoir, sampler))
         while loop(i < self.m):
-            ds, emitter_val = scene.sample_emitter_direction(si, sampler.next_2d(active), active=active, test_visibility=False)
+            # 'emitter_val' and 'ds.pdf' account for the emitter selection probability
+            ds, emitter_val = selector.sample_direction(scene, si, sampler.next_2d(active), active, lobe)
 
             # Evaluate BSDF
             wo = si.to_local(ds.d)
             bsdf_val: mi.Color3f = bsdf.eval(ctx, si, wo, active)
 
-            # Calculate RIS weight
-            p_hat = dr.norm(bsdf_val * emitter_val)
-            w = dr.select(ds.pdf > EPS, p_hat, 0)
+            # Calculate RIS weight ('emitter_val' is already divided by the source pdf)
+            ratio = dr.norm(bsdf_val * emitter_val)
+            w = dr.select(ds.pdf > EPS, ratio, 0)
 
-            reservoir.update(w, ds, sampler.next_1d(active))
+            reservoir.update(w, ds, ratio * ds.pdf, sampler.next_1d(active))
 
             i += 1
 
-        intersected = ~scene.ray_test(si.spawn_ray_to(reservoir.sample.p), active)
-        emitter_val = scene.eval_emitter_direction(si, reservoir.sample, active)
-        wo = si.to_local(reservoir.sample.d)
-        bsdf_val = bsdf.eval(ctx, si, wo)
+        if self.temporal_reuse or self.spatial_reuse:
+            # Locate the pixel of each sample: 'ray.o + ray.d' always projects onto it
+            sensor: mi.Sensor = scene.sensors()[0]
+            if sensor.class_().name() != "PerspectiveCamera":
+                raise ValueError(f"Temporal and spatial reuse reproject the shading points onto the film, which "
+                                 f"requires a perspective sensor (not {sensor.class_().name()})")
+            film_size = sensor.film().crop_size()
+            n_pixels = dr.prod(film_size)
+            world_to_film_ = world_to_film(sensor)
+            camera_pos = mi.Point3f(sensor.world_transform().translation())
+            pixel_idx, pixel_valid = film_to_pixel(world_to_film_ @ (ray.o + ray.d), film_size)
+            pixel_valid &= active
+            depth = dr.norm(si.p - camera_pos)
+
+            # Wavefronts store the samples of each pixel consecutively. Only
+            # the first one publishes its reservoir, as the fields scattered
+            # by several samples to the same pixel could otherwise mix.
+            spp = max(sampler.samples_per_wavefront(), 1)
+            writer = pixel_valid & dr.eq(dr.arange(mi.UInt32, dr.width(si.t)) % spp, 0)
+
+        if self.temporal_reuse:
+            self.temporal_resample(scene, si, bsdf, ctx, sampler, reservoir, active)
+
+        Z = mi.Float(reservoir.M)
+        if self.spatial_reuse:
+            # Publish the reservoirs of all pixels, then merge those of neighbouring pixels
+            buffer, gbuffer = self.scatter_reservoirs(si, reservoir, camera_pos, pixel_idx, writer, n_pixels)
+            dr.eval(buffer, gbuffer)
+
+            Z = self.spatial_resample(scene, si, bsdf, ctx, sampler, reservoir, buffer, gbuffer,
+                                      film_size, pixel_idx, depth, active)
+
+        ds = reservoir.direction_sample(scene, si, active)
+        intersected = ~scene.ray_test(si.spawn_ray_to(ds.p), active)
+        contrib, p_hat = self.target(scene, si, bsdf, ctx, ds, active)
+        reservoir.p_hat = p_hat
+        W = reservoir.weight(Z)
+
+        result += dr.select(intersected & active, contrib * W, 0)
+
+        if self.temporal_reuse:
+            # Keep the reservoirs for the next frame, such that their weight
+            # matches the one used for shading. Occluded samples are not worth reusing.
+            reservoir.w_sum = dr.select(intersected, W * mi.Float(reservoir.M) * p_hat, 0)
+            reservoir.renormalize(dr.minimum(reservoir.M, self.max_history * self.m))
+            buffer, gbuffer = self.scatter_reservoirs(si, reservoir, camera_pos, pixel_idx, writer, n_pixels)
 
-        p_hat = dr.norm(bsdf_val * emitter_val)
-        W = dr.select(p_hat > EPS, dr.rcp(p_hat) * reservoir.w_sum * dr.rcp(self.m), 0)
+            # Evaluate the history along with the current frame
+            dr.schedule(buffer, gbuffer)
 
-        result += dr.select(intersected & active, bsdf_val * emitter_val * W, 0)
+            self.history = {
+                "reservoirs": buffer,
+                "gbuffer": gbuffer,
+                "world_to_film": world_to_film_,
+                "film_size": film_size,
+                "camera_pos": camera_pos,
+            }
 
         return result, active, []
 
@@ -77,14 +307,25 @@ if __name__ == "__main__":
     # Define integrators
     integrators = {
         "restir": mi.load_dict({ "type": "restir", "num_proposals": 32 }),
+        "restir_temporal": mi.load_dict({ "type": "restir", "num_proposals": 4, "temporal_reuse": True }),
+        "restir_spatial": mi.load_dict({ "type": "restir", "num_proposals": 4, "spatial_reuse": True }),
+        "restir_tree": mi.load_dict({ "type": "restir", "num_proposals": 4, "emitter_selector": "tree" }),
+        "restir_tree_lobe": mi.load_dict({ "type": "restir", "num_proposals": 4, "emitter_selector": "tree",
+                                           "lobe_selection": True }),
         "mis": mi.load_dict({ "type": "direct" }),
         "emitter": mi.load_dict({ "type": "direct", "bsdf_samples": 0 }),
         "bsdf": mi.load_dict({ "type": "direct", "emitter_samples": 0 })
     }
 
     for int_name, integrator in integrators.items():
-        render_func = lambda scene, seed, spp: mi.render(scene, spp=spp, integrator=integrator, seed=seed)
-        res = render_multi_pass(render_func, args.resolution, args.resolution, scene, args.spp, f"{int_name}.exr")
+        if args.target_error is not None:
+            res = render_adaptive(scene, args.spp, args.target_error, integrator, f"{int_name}.exr")
+        else:
+            render_func = lambda scene, seed, spp: mi.render(scene, spp=spp, integrator=integrator, seed=seed)
+            res = render_multi_pass(render_func, args.resolution, args.resolution, scene, args.spp, f"{int_name}.exr",
+                                    sample_state_size=integrator.sample_state_size(),
+                                    checkpoint_path=f"{int_name}.ckpt.npz" if args.checkpoint else None,
+                                    checkpoint_interval=args.checkpoint_interval)
         if args.show_render:
             plt.imshow(linear_to_srgb(res))
             plt.show()
\ No newline at end of file
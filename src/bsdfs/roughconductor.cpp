@@ -495,6 +495,18 @@ public:
         return { F * value & active, dr::select(active, pdf, 0.f) };
     }
 
+    BSDFLobe3f lobe(const BSDFContext & /* ctx */,
+                    const SurfaceInteraction3f &si,
+                    Mask active) const override {
+        Float alpha = dr::maximum(m_alpha_u->eval_1(si, active),
+                                  m_alpha_v->eval_1(si, active));
+
+        /* Bound the reflected directions of the microfacets whose slope is
+           below twice the roughness (the bulk of the distribution) */
+        Float theta = dr::minimum(2.f * dr::atan(2.f * alpha), dr::Pi<Float>);
+        return BSDFLobe3f(si.to_world(reflect(si.wi)), dr::cos(theta), .1f);
+    }
+
     std::string to_string() const override {
         std::ostringstream oss;
         oss << "RoughConductor[" << std::endl
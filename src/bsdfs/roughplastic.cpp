@@ -506,6 +506,24 @@ public:
         return m_diffuse_reflectance->eval(si, active);
     }
 
+    BSDFLobe3f lobe(const BSDFContext & /* ctx */,
+                    const SurfaceInteraction3f &si,
+                    Mask active) const override {
+        Float cos_theta_i = Frame3f::cos_theta(si.wi);
+        Float t_i = lerp_gather(m_external_transmittance, cos_theta_i,
+                                MI_ROUGH_TRANSMITTANCE_RES, active);
+
+        // Glossy lobe as in 'roughconductor', weighted against the diffuse base
+        Float prob_specular = (1.f - t_i) * m_specular_sampling_weight,
+              prob_diffuse  = t_i * (1.f - m_specular_sampling_weight);
+        Float diffuse = dr::select(prob_specular + prob_diffuse > 0.f,
+                                   prob_diffuse / (prob_specular + prob_diffuse), 1.f);
+
+        Float theta = dr::minimum(2.f * dr::atan(2.f * m_alpha), dr::Pi<Float>);
+        return BSDFLobe3f(si.to_world(reflect(si.wi)), dr::cos(theta),
+                          dr::clamp(diffuse, .1f, 1.f));
+    }
+
     std::string to_string() const override {
         std::ostringstream oss;
         oss << "RoughPlastic[" << std::endl
@@ -45,6 +45,48 @@ MI_PY_EXPORT(DiscreteDistribution) {
         .def_repr(DiscreteDistribution);
 }
 
+MI_PY_EXPORT(AliasDistribution) {
+    MI_PY_IMPORT_TYPES()
+
+    using AliasDistribution = mitsuba::AliasDistribution<Float>;
+    using FloatStorage = DynamicBuffer<Float>;
+
+    MI_PY_STRUCT(AliasDistribution, py::module_local())
+        .def(py::init<>(), D(AliasDistribution))
+        .def(py::init<const AliasDistribution &>(), "Copy constructor")
+        .def(py::init<const FloatStorage &>(), "pmf"_a,
+             D(AliasDistribution, AliasDistribution, 2))
+        .def("__len__", &AliasDistribution::size)
+        .def("size", &AliasDistribution::size, D(AliasDistribution, size))
+        .def("empty", &AliasDistribution::empty, D(AliasDistribution, empty))
+        .def("pmf", py::overload_cast<>(&AliasDistribution::pmf),
+             D(AliasDistribution, pmf), py::return_value_policy::reference_internal)
+        .def("prob", &AliasDistribution::prob,
+             D(AliasDistribution, prob), py::return_value_policy::reference_internal)
+        .def("alias", &AliasDistribution::alias,
+             D(AliasDistribution, alias), py::return_value_policy::reference_internal)
+        .def("eval_pmf", &AliasDistribution::eval_pmf,
+             "index"_a, "active"_a = true, D(AliasDistribution, eval_pmf))
+        .def("eval_pmf_normalized", &AliasDistribution::eval_pmf_normalized,
+             "index"_a, "active"_a = true, D(AliasDistribution, eval_pmf_normalized))
+        .def_method(AliasDistribution, update)
+        .def_method(AliasDistribution, normalization)
+        .def_method(AliasDistribution, sum)
+        .def("sample",
+            &AliasDistribution::sample,
+            "value"_a, "active"_a = true, D(AliasDistribution, sample))
+        .def("sample_pmf",
+            &AliasDistribution::sample_pmf,
+            "value"_a, "active"_a = true, D(AliasDistribution, sample_pmf))
+        .def("sample_reuse",
+            &AliasDistribution::sample_reuse,
+            "value"_a, "active"_a = true, D(AliasDistribution, sample_reuse))
+        .def("sample_reuse_pmf",
+            &AliasDistribution::sample_reuse_pmf,
+            "value"_a, "active"_a = true, D(AliasDistribution, sample_reuse_pmf))
+        .def_repr(AliasDistribution);
+}
+
 MI_PY_EXPORT(ContinuousDistribution) {
     MI_PY_IMPORT_TYPES()
 
@@ -7,5 +7,6 @@ MI_PY_EXPORT(util) {
     util.def_method(util, core_count)
         .def_method(util, time_string, "time"_a, "precise"_a = false)
         .def_method(util, mem_string, "size"_a, "precise"_a = false)
+        .def_method(util, available_memory)
         .def_method(util, trap_debugger);
 }
@@ -268,3 +268,62 @@ def test18_irrcont_simple_function(variants_vec_backends_once):
                 0.48734, 0.654313, 0.786607, 0.899653, 1.])
          * d.normalization())
     )
+
+
+def test19_alias_empty(variants_all_backends_once):
+    # Test that operations involving empty/zero/negative distributions throw
+    d = mi.AliasDistribution()
+    assert d.empty()
+
+    with pytest.raises(RuntimeError) as excinfo:
+        d.update()
+    assert 'empty distribution' in str(excinfo.value)
+
+    with pytest.raises(RuntimeError) as excinfo:
+        mi.AliasDistribution([0, 0, 0])
+    assert "no probability mass found" in str(excinfo.value)
+
+    with pytest.raises(RuntimeError) as excinfo:
+        mi.AliasDistribution([1, -1, 1])
+    assert "entries must be non-negative" in str(excinfo.value)
+
+
+def test20_alias_basic(variants_vec_backends_once):
+    x = mi.AliasDistribution([1, 3, 2, 0])
+    assert len(x) == 4
+
+    assert x.sum() == 6
+    assert dr.allclose(x.normalization(), 1.0 / 6.0)
+    assert x.pmf() == [1, 3, 2, 0]
+    assert dr.allclose(
+        x.eval_pmf_normalized([1, 2, 0, 3]),
+        mi.Float([3, 2, 1, 0]) / 6.0
+    )
+
+    # Each bin carries 1/N of the mass, split between itself and its alias
+    prob, alias = x.prob().numpy(), x.alias().numpy()
+    n, pmf = len(x), [1, 3, 2, 0]
+    mass = [0.0] * n
+    for i in range(n):
+        mass[i] += prob[i] / n
+        mass[alias[i]] += (1 - prob[i]) / n
+    assert dr.allclose(mi.Float(mass), mi.Float(pmf) / 6.0)
+
+
+def test21_alias_sample(variants_vec_backends_once):
+    x = mi.AliasDistribution([1, 3, 2, 0, 4])
+    sample = dr.linspace(mi.Float, 0, 1, 100000, False)
+
+    index, pmf = x.sample_pmf(sample)
+    assert dr.all(dr.neq(index, 3))
+    assert dr.allclose(pmf, x.eval_pmf_normalized(index))
+
+    counts = dr.zeros(mi.Float, len(x))
+    dr.scatter_reduce(dr.ReduceOp.Add, counts, 1.0, index)
+    assert dr.allclose(counts / 100000, mi.Float([1, 3, 2, 0, 4]) / 10.0,
+                       atol=1e-3)
+
+    index2, reused, pmf2 = x.sample_reuse_pmf(sample)
+    assert dr.all(dr.eq(index, index2))
+    assert dr.allclose(pmf, pmf2)
+    assert dr.all((reused >= 0) & (reused < 1))
@@ -5,6 +5,7 @@
 #include <mitsuba/core/string.h>
 #include <mitsuba/core/filesystem.h>
 #include <mitsuba/core/vector.h>
+#include <fstream>
 
 #if defined(__linux__)
 #  if !defined(_GNU_SOURCE)
@@ -199,6 +200,37 @@ std::string mem_string(size_t size, bool precise) {
     return tfm::format(precise ? "%.5g %s" : "%.3g %s", value, orders[i]);
 }
 
+size_t available_memory() {
+#if defined(_WIN32)
+    MEMORYSTATUSEX status;
+    status.dwLength = sizeof(status);
+    if (!GlobalMemoryStatusEx(&status))
+        return 0;
+    return (size_t) status.ullAvailPhys;
+#elif defined(__APPLE__)
+    uint64_t size = 0;
+    size_t size_len = sizeof(size);
+    if (sysctlbyname("hw.memsize", &size, &size_len, NULL, 0))
+        return 0;
+    return (size_t) size;
+#else
+    // 'MemAvailable' accounts for reclaimable caches, unlike _SC_AVPHYS_PAGES
+    std::ifstream meminfo("/proc/meminfo");
+    std::string key, unit;
+    size_t value;
+    while (meminfo >> key >> value) {
+        std::getline(meminfo, unit);
+        if (key == "MemAvailable:")
+            return value * 1024;
+    }
+
+    long pages = sysconf(_SC_AVPHYS_PAGES), page_size = sysconf(_SC_PAGESIZE);
+    if (pages < 0 || page_size < 0)
+        return 0;
+    return (size_t) pages * (size_t) page_size;
+#endif
+}
+
 #if defined(_WIN32) || defined(__linux__)
     void MI_EXPORT __dummySymbol() { }
 #endif
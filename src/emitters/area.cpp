@@ -3,6 +3,7 @@
 #include <mitsuba/core/spectrum.h>
 #include <mitsuba/render/emitter.h>
 #include <mitsuba/render/medium.h>
+#include <mitsuba/render/mesh.h>
 #include <mitsuba/render/shape.h>
 #include <mitsuba/render/texture.h>
 
@@ -59,7 +60,7 @@ template <typename Float, typename Spectrum>
 class AreaLight final : public Emitter<Float, Spectrum> {
 public:
     MI_IMPORT_BASE(Emitter, m_flags, m_shape, m_medium)
-    MI_IMPORT_TYPES(Scene, Shape, Texture)
+    MI_IMPORT_TYPES(Scene, Shape, Mesh, Texture)
 
     AreaLight(const Properties &props) : Base(props) {
         if (props.has_property("to_world"))
@@ -227,6 +228,162 @@ public:
             si, math::sample_shifted<Wavelength>(sample), active);
     }
 
+    ScalarFloat estimate_power() const override {
+        if (!m_shape)
+            return 0.f;
+        // Lambertian emission from one side of the surface
+        return dr::Pi<ScalarFloat> *
+               dr::slice(m_shape->surface_area() * m_radiance->mean());
+    }
+
+    std::vector<LightBounds<Float>> primitive_bounds() const override {
+        if (!m_shape || !m_shape->is_mesh())
+            return Base::primitive_bounds();
+
+        const Mesh *mesh = static_cast<const Mesh *>(m_shape);
+        size_t face_count = mesh->face_count();
+        ScalarFloat mean_radiance = dr::slice(m_radiance->mean());
+
+        /* Relative brightness of each triangle, estimated by averaging the
+           radiance texture at the centroid and at the vertices */
+        std::vector<ScalarFloat> brightness(face_count, 1.f);
+        if (m_radiance->is_spatially_varying() && face_count > 0) {
+            // Barycentric sample positions of the vertices and the centroid
+            const ScalarPoint2f samples[4] = { { 0.f, 0.f }, { 1.f, 0.f },
+                                               { 0.f, 1.f }, { 5.f / 9.f, .5f } };
+
+            auto eval_face = [&](const UInt32 &face_idx) {
+                Float value = 0.f;
+                for (size_t k = 0; k < 4; ++k) {
+                    SurfaceInteraction3f si(
+                        mesh->sample_face_position(0.f, face_idx, Point2f(samples[k])),
+                        dr::zeros<Wavelength>());
+                    value += m_radiance->eval_1(si);
+                }
+                return dr::detach(value) * .25f;
+            };
+
+            if constexpr (dr::is_jit_v<Float>) {
+                auto &&value = dr::migrate(
+                    eval_face(dr::arange<UInt32>(face_count)), AllocType::Host);
+                dr::sync_thread();
+                for (size_t i = 0; i < face_count; ++i)
+                    brightness[i] = value.data()[i];
+            } else {
+                for (size_t i = 0; i < face_count; ++i)
+                    brightness[i] = eval_face((uint32_t) i);
+            }
+        }
+
+        auto &&vertices = dr::migrate(mesh->vertex_positions_buffer(), AllocType::Host);
+        auto &&normals  = dr::migrate(mesh->vertex_normals_buffer(), AllocType::Host);
+        auto &&faces    = dr::migrate(mesh->faces_buffer(), AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+
+        const auto *v_ptr = vertices.data();
+        const auto *n_ptr = normals.data();
+        const auto *f_ptr = faces.data();
+        bool has_normals = mesh->has_vertex_normals();
+        ScalarFloat flip = mesh->flip_normals() ? -1.f : 1.f;
+
+        // Normalize the brightness so that the total power is preserved
+        std::vector<ScalarFloat> area(face_count);
+        double weighted_area = 0.0, total_area = 0.0;
+        for (size_t i = 0; i < face_count; ++i) {
+            ScalarPoint3f p[3];
+            for (size_t k = 0; k < 3; ++k)
+                p[k] = dr::load<typename Mesh::InputPoint3f>(v_ptr + 3 * f_ptr[3 * i + k]);
+            area[i] = .5f * dr::norm(dr::cross(p[1] - p[0], p[2] - p[0]));
+            weighted_area += (double) area[i] * brightness[i];
+            total_area += area[i];
+        }
+
+        ScalarFloat scale = weighted_area > 0.0
+            ? ScalarFloat(total_area / weighted_area) : 1.f;
+
+        std::vector<LightBounds<Float>> bounds(face_count);
+        for (size_t i = 0; i < face_count; ++i) {
+            ScalarPoint3f p[3];
+            ScalarBoundingBox3f bbox;
+            for (size_t k = 0; k < 3; ++k) {
+                p[k] = dr::load<typename Mesh::InputPoint3f>(v_ptr + 3 * f_ptr[3 * i + k]);
+                bbox.expand(p[k]);
+            }
+
+            ScalarVector3f axis = dr::cross(p[1] - p[0], p[2] - p[0]);
+            if (dr::squared_norm(axis) == 0.f)
+                continue; // Degenerate triangle, leave the power at zero
+            axis = dr::normalize(axis) * flip;
+
+            // Account for the interpolated shading normals
+            ScalarFloat cos_theta_o = 1.f;
+            if (has_normals) {
+                for (size_t k = 0; k < 3; ++k) {
+                    ScalarVector3f n = dr::normalize(ScalarVector3f(
+                        dr::load<typename Mesh::InputVector3f>(n_ptr + 3 * f_ptr[3 * i + k]))) * flip;
+                    cos_theta_o = dr::minimum(cos_theta_o, dr::dot(axis, n));
+                }
+            }
+
+            /* Never assign a zero power to an emitting triangle, as the light
+               tree would then be unable to sample it */
+            ScalarFloat rel_brightness =
+                dr::maximum(brightness[i] * scale, 1e-3f);
+
+            bounds[i] = LightBounds<Float>(
+                bbox, axis,
+                dr::Pi<ScalarFloat> * area[i] * mean_radiance * rel_brightness,
+                cos_theta_o, 0.f);
+        }
+
+        return bounds;
+    }
+
+    std::pair<DirectionSample3f, Spectrum>
+    sample_direction_primitive(const Interaction3f &it, UInt32 prim_index,
+                               const Point2f &sample,
+                               Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleDirection, active);
+        if (!m_shape || !m_shape->is_mesh())
+            return sample_direction(it, sample, active);
+
+        const Mesh *mesh = static_cast<const Mesh *>(m_shape);
+        DirectionSample3f ds(mesh->sample_face_position(it.time, prim_index,
+                                                        sample, active));
+        ds.d = ds.p - it.p;
+
+        Float dist_squared = dr::squared_norm(ds.d);
+        ds.dist = dr::sqrt(dist_squared);
+        ds.d /= ds.dist;
+
+        Float dp = dr::dot(ds.d, ds.n);
+        active &= dp < 0.f;
+        ds.pdf = dr::select(active, ds.pdf * dist_squared / -dp, 0.f);
+        ds.emitter = this;
+
+        SurfaceInteraction3f si(ds, it.wavelengths);
+        UnpolarizedSpectrum spec = m_radiance->eval(si, active) / ds.pdf;
+        return { ds, depolarizer<Spectrum>(spec) & active };
+    }
+
+    Float pdf_direction_primitive(const Interaction3f &it,
+                                  const DirectionSample3f &ds,
+                                  Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointEvaluate, active);
+        if (!m_shape || !m_shape->is_mesh())
+            return pdf_direction(it, ds, active);
+
+        const Mesh *mesh = static_cast<const Mesh *>(m_shape);
+        Float dp = dr::dot(ds.d, ds.n);
+        active &= dp < 0.f;
+
+        Float value = dr::sqr(ds.dist) /
+                      (mesh->face_area(ds.prim_index, active) * -dp);
+
+        return dr::select(active, value, 0.f);
+    }
+
     ScalarBoundingBox3f bbox() const override { return m_shape->bbox(); }
 
     std::string to_string() const override {
@@ -177,6 +177,11 @@ public:
         }
     }
 
+    ScalarFloat estimate_power() const override {
+        // Radiance entering the scene's bounding sphere from all directions
+        return m_surface_area * dr::Pi<ScalarFloat> * dr::slice(m_radiance->mean());
+    }
+
     /// This emitter does not occupy any particular region of space, return an invalid bounding box
     ScalarBoundingBox3f bbox() const override {
         return ScalarBoundingBox3f();
@@ -211,6 +211,12 @@ public:
         }
     }
 
+    ScalarFloat estimate_power() const override {
+        // Irradiance crossing the disk that covers the scene's bounding sphere
+        return dr::Pi<ScalarFloat> * dr::sqr(m_bsphere.radius) *
+               dr::slice(m_irradiance->mean());
+    }
+
     ScalarBoundingBox3f bbox() const override {
         /* This emitter does not occupy any particular region
            of space, return an invalid bounding box */
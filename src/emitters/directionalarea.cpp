@@ -150,6 +150,10 @@ public:
         return 0.f;
     }
 
+    ScalarFloat estimate_power() const override {
+        return dr::slice(m_area * m_radiance->mean());
+    }
+
     ScalarBoundingBox3f bbox() const override { return m_shape->bbox(); }
 
     std::string to_string() const override {
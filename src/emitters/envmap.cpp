@@ -54,6 +54,16 @@ Environment emitter (:monosp:`envmap`)
    - Tensor array containing the radiance-valued data.
    - |exposed|, |differentiable|, |discontinuous|
 
+ * - (Nested plugin)
+   - :paramtype:`shape`
+   - Optional :monosp:`rectangle` shapes acting as portals, i.e. openings
+     (windows, doors) through which the environment illuminates the
+     scene. The normal of each rectangle must face the interior of the scene.
+
+ * - portal_resolution
+   - |int|
+   - Resolution of the tables used to sample directions through the portals. (Default: 128)
+
 This plugin provides a HDRI (high dynamic range imaging) environment map,
 which is a type of light source that is well-suited for representing "natural"
 illumination.
@@ -92,6 +102,48 @@ High quality free light probes are available on
         'type': 'envmap',
         'filename': 'textures/museum.exr'
 
+When the scene is an interior that only receives environment illumination
+through a few openings, most directions of the sphere are occluded and
+importance sampling the full environment map wastes the majority of its
+samples. Portals restrict the sampled directions to those that pass through
+one of the given rectangles, as seen from the reference point ("Portal-Masked
+Environment Map Sampling", Bitterli et al. 2015). For every portal, the
+environment map is tabulated in a rectified parameterization of the
+directions through the portal's plane, in which the set of directions visible
+through the portal from any reference point is an axis-aligned rectangle.
+Directions are then sampled from the restricted table of a portal chosen
+proportionally to its visible contribution, and :monosp:`pdf_direction`
+evaluates the matching density so that the sampled directions can be combined
+with BSDF sampling via MIS. Directions that do not pass through any portal
+are never sampled from reference points that see a portal; they remain
+accounted for by BSDF sampling. Reference points that do not see any portal
+(e.g. points outside of the building) fall back to sampling the full
+environment map. Sampling emitted rays (:monosp:`sample_ray`) is not
+affected by portals.
+
+.. tabs::
+    .. code-tab:: xml
+
+        <emitter type="envmap">
+            <string name="filename" value="textures/museum.exr"/>
+            <shape type="rectangle">
+                <transform name="to_world">
+                    <lookat origin="0, 0, 2" target="0, 0, 0" up="0, 1, 0"/>
+                </transform>
+            </shape>
+        </emitter>
+
+    .. code-tab:: python
+
+        'type': 'envmap',
+        'filename': 'textures/museum.exr',
+        'window': {
+            'type': 'rectangle',
+            'to_world': mi.ScalarTransform4f.look_at(origin=[0, 0, 2],
+                                                     target=[0, 0, 0],
+                                                     up=[0, 1, 0])
+        }
+
  */
 
 template <typename Float, typename Spectrum>
@@ -106,6 +158,14 @@ public:
        In spectral variants: 4-channel array for polynomial coefficients & scale */
     using PixelData = dr::Array<Float, is_spectral_v<Spectrum> ? 4 : 3>;
     using ScalarPixelData = dr::Array<ScalarFloat, is_spectral_v<Spectrum> ? 4 : 3>;
+    using FloatStorage = DynamicBuffer<Float>;
+
+    /// Rectangular portal, the normal \c n faces the interior of the scene
+    struct Portal {
+        ScalarPoint3f center;
+        ScalarVector3f s, t, n;
+        ScalarFloat half_x, half_y;
+    };
 
     EnvironmentMapEmitter(const Properties &props) : Base(props) {
         /* Until `set_scene` is called, we have no information
@@ -185,6 +245,7 @@ public:
         }
 
         size_t pixel_width = is_spectral_v<Spectrum> ? 4 : 3;
+        double lum_accum = 0.0, sin_theta_accum = 0.0;
         for (size_t y = 0; y < bitmap->size().y(); ++y) {
             ScalarFloat sin_theta = dr::sin(y * theta_scale);
 
@@ -192,6 +253,8 @@ public:
                 ScalarColor3f rgb = dr::load<ScalarVector3f>(in_ptr);
 
                 ScalarFloat lum = mitsuba::luminance(rgb);
+                lum_accum += (double) (lum * sin_theta);
+                sin_theta_accum += (double) sin_theta;
 
                 ScalarPixelData coeff;
                 if constexpr (is_monochromatic_v<Spectrum>) {
@@ -230,10 +293,26 @@ public:
         m_data = TensorXf(bitmap_2->data(), 3, shape);
 
         m_scale = props.get<ScalarFloat>("scale", 1.f);
+        m_mean_luminance = (ScalarFloat) (lum_accum / sin_theta_accum);
         m_warp = Warp(luminance.get(), res);
         m_d65 = Texture::D65(1.f);
         m_flags = EmitterFlags::Infinite | EmitterFlags::SpatiallyVarying;
         dr::set_attr(this, "flags", m_flags);
+
+        for (auto &[name, obj] : props.objects(false)) {
+            Shape *shape = dynamic_cast<Shape *>(obj.get());
+            if (!shape)
+                continue;
+            if (shape->class_()->name() != "Rectangle")
+                Throw("Portal \"%s\": only rectangle shapes are supported!", name);
+            props.mark_queried(name);
+            m_portals.push_back(make_portal(shape));
+        }
+
+        m_portal_res = props.get<uint32_t>("portal_resolution", 128);
+        if (m_portal_res == 0)
+            Throw("The portal resolution must be positive!");
+        update_portals();
     }
 
     void traverse(TraversalCallback *callback) override {
@@ -272,6 +351,7 @@ public:
             size_t pixel_width = is_spectral_v<Spectrum> ? 4 : 3;
 
             ScalarFloat theta_scale = 1.f / (res.y() - 1) * dr::Pi<Float>;
+            double lum_accum = 0.0, sin_theta_accum = 0.0;
             for (size_t y = 0; y < res.y(); ++y) {
                 ScalarFloat sin_theta = dr::sin(y * theta_scale);
 
@@ -286,25 +366,24 @@ public:
                 }
 
                 for (size_t x = 0; x < res.x(); ++x) {
-                    ScalarPixelData coeff = dr::load_aligned<ScalarPixelData>(ptr);
-                    ScalarFloat lum;
-
-                    if constexpr (is_monochromatic_v<Spectrum>) {
-                        lum = coeff.x();
-                    } else if constexpr (is_rgb_v<Spectrum>) {
-                        lum = mitsuba::luminance(ScalarColor3f(coeff));
-                    } else {
-                        static_assert(is_spectral_v<Spectrum>);
-                        lum = srgb_model_mean(dr::head<3>(coeff)) * coeff.w();
-                    }
+                    ScalarFloat lum =
+                        pixel_luminance(dr::load_aligned<ScalarPixelData>(ptr));
 
                     *lum_ptr++ = lum * sin_theta;
+                    lum_accum += (double) (lum * sin_theta);
+                    sin_theta_accum += (double) sin_theta;
                     ptr += pixel_width;
                 }
             }
 
+            m_mean_luminance = (ScalarFloat) (lum_accum / sin_theta_accum);
             m_warp = Warp(luminance.get(), res);
         }
+
+        if (keys.empty() || string::contains(keys, "data") ||
+            string::contains(keys, "to_world"))
+            update_portals();
+
         Base::parameters_changed(keys);
     }
 
@@ -386,9 +465,14 @@ public:
                      Mask active) const override {
         MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleDirection, active);
 
-        auto [uv, pdf] = m_warp.sample(sample, nullptr, active);
+        // Sample through the portals visible from the reference point (if any)
+        Mask portal = false;
+        Vector3f d_portal(0.f);
+        if (!m_portals.empty())
+            std::tie(d_portal, portal) = sample_portals(it.p, sample, active);
+
+        auto [uv, pdf] = m_warp.sample(sample, nullptr, active && !portal);
         uv.x() += .5f / (m_data.shape(1) - 1);
-        active &= pdf > 0.f;
 
         Float theta = uv.y() * dr::Pi<Float>,
               phi   = uv.x() * dr::TwoPi<Float>;
@@ -404,17 +488,22 @@ public:
             dr::sqr(d.x()) + dr::sqr(d.z()), dr::sqr(dr::Epsilon<Float>)));
 
         d = m_to_world.value().transform_affine(d);
+        pdf *= inv_sin_theta * (1.f / (2.f * dr::sqr(dr::Pi<Float>)));
+
+        if (!m_portals.empty() && dr::any_or<true>(portal)) {
+            dr::masked(d, portal) = d_portal;
+            dr::masked(uv, portal) = direction_to_uv(d_portal);
+            dr::masked(pdf, portal) = pdf_portals(it.p, d_portal, portal).first;
+        }
+
+        active &= pdf > 0.f;
 
         DirectionSample3f ds;
         ds.p       = it.p + d * dist;
         ds.n       = -d;
         ds.uv      = uv;
         ds.time    = it.time;
-        ds.pdf     = dr::select(
-            active,
-            pdf * inv_sin_theta * (1.f / (2.f * dr::sqr(dr::Pi<Float>))),
-            0.f
-        );
+        ds.pdf     = dr::select(active, pdf, 0.f);
         ds.delta   = false;
         ds.emitter = this;
         ds.d       = d;
@@ -427,7 +516,7 @@ public:
         return { ds, weight & active };
     }
 
-    Float pdf_direction(const Interaction3f & /*it*/, const DirectionSample3f &ds,
+    Float pdf_direction(const Interaction3f &it, const DirectionSample3f &ds,
                         Mask active) const override {
         MI_MASKED_FUNCTION(ProfilerPhase::EndpointEvaluate, active);
 
@@ -442,7 +531,16 @@ public:
         Float inv_sin_theta = dr::safe_rsqrt(dr::maximum(
             dr::sqr(d.x()) + dr::sqr(d.z()), dr::sqr(dr::Epsilon<Float>)));
 
-        return m_warp.eval(uv) * inv_sin_theta * (1.f / (2.f * dr::sqr(dr::Pi<Float>)));
+        Float pdf = m_warp.eval(uv) * inv_sin_theta *
+                    (1.f / (2.f * dr::sqr(dr::Pi<Float>)));
+
+        // Reference points that see a portal only sample through the portals
+        if (!m_portals.empty()) {
+            auto [pdf_portal, visible] = pdf_portals(it.p, ds.d, active);
+            pdf = dr::select(visible > 0.f, pdf_portal, pdf);
+        }
+
+        return pdf;
     }
 
     Spectrum eval_direction(const Interaction3f &it,
@@ -476,6 +574,12 @@ public:
         }
     }
 
+    ScalarFloat estimate_power() const override {
+        // Radiance entering the scene's bounding sphere from all directions
+        return 4.f * dr::sqr(dr::Pi<ScalarFloat> * m_bsphere.radius) *
+               m_mean_luminance * dr::slice(m_scale);
+    }
+
     ScalarBoundingBox3f bbox() const override {
         /* This emitter does not occupy any particular region
            of space, return an invalid bounding box */
@@ -489,6 +593,8 @@ public:
         if (!m_filename.empty())
             oss << "  filename = \"" << m_filename << "\"," << std::endl;
         oss << "  res = \"" << res << "\"," << std::endl
+            << "  portals = " << m_portals.size() << "," << std::endl
+            << "  portal_resolution = " << m_portal_res << "," << std::endl
             << "  bsphere = " << string::indent(m_bsphere) << std::endl
             << "]";
         return oss.str();
@@ -555,6 +661,325 @@ protected:
         }
     }
 
+    /// Luminance of a texel of \ref m_data
+    static ScalarFloat pixel_luminance(const ScalarPixelData &coeff) {
+        if constexpr (is_monochromatic_v<Spectrum>) {
+            return coeff.x();
+        } else if constexpr (is_rgb_v<Spectrum>) {
+            return mitsuba::luminance(ScalarColor3f(coeff));
+        } else {
+            static_assert(is_spectral_v<Spectrum>);
+            return srgb_model_mean(dr::head<3>(coeff)) * coeff.w();
+        }
+    }
+
+    /// Convert a world space direction to latitude-longitude texture coordinates
+    Point2f direction_to_uv(const Vector3f &d) const {
+        Vector3f v = m_to_world.value().inverse().transform_affine(d);
+        return Point2f(dr::atan2(v.x(), -v.z()) * dr::InvTwoPi<Float>,
+                       dr::safe_acos(v.y()) * dr::InvPi<Float>);
+    }
+
+    // =============================================================
+    //! @{ \name Portal sampling
+    // =============================================================
+
+    /// Extract the frame and extents of a rectangle shape
+    Portal make_portal(const Shape *shape) const {
+        auto corner = [&](ScalarFloat u, ScalarFloat v) {
+            PositionSample3f ps = shape->sample_position(0.f, Point2f(u, v));
+            return ScalarPoint3f(dr::slice(ps.p.x()), dr::slice(ps.p.y()),
+                                 dr::slice(ps.p.z()));
+        };
+
+        ScalarPoint3f p00 = corner(0.f, 0.f),
+                      p10 = corner(1.f, 0.f),
+                      p01 = corner(0.f, 1.f);
+        ScalarVector3f dx = .5f * (p10 - p00),
+                       dy = .5f * (p01 - p00);
+
+        Portal portal;
+        portal.center = p00 + dx + dy;
+        portal.half_x = dr::norm(dx);
+        portal.half_y = dr::norm(dy);
+        if (!(portal.half_x > 0.f && portal.half_y > 0.f))
+            Throw("Portals must have a nonzero area!");
+        portal.s = dx / portal.half_x;
+        portal.t = dy / portal.half_y;
+        if (dr::abs(dr::dot(portal.s, portal.t)) > 1e-4f)
+            Throw("Portals must not be sheared!");
+        portal.n = dr::normalize(dr::cross(portal.s, portal.t));
+        return portal;
+    }
+
+    /**
+     * \brief Tabulate the environment map in the rectified parameterization
+     * of every portal
+     *
+     * Cell <tt>(x, y)</tt> of a table covers the directions <tt>-n + tan(a)
+     * s + tan(b) t</tt> with <tt>(a, b)</tt> in an interval of size <tt>pi /
+     * res</tt> of <tt>(-pi/2, pi/2)</tt>. Its value is the luminance of the
+     * environment map times the Jacobian of the parameterization, and the
+     * tables are stored as summed-area tables so that the mass of any
+     * rectangle can be evaluated with four lookups.
+     */
+    void update_portals() {
+        if (m_portals.empty())
+            return;
+
+        ScalarVector2u res = { m_data.shape(1), m_data.shape(0) };
+        size_t pixel_width = is_spectral_v<Spectrum> ? 4 : 3;
+
+        auto&& data = dr::migrate(m_data.array(), AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+        const ScalarFloat *ptr = (const ScalarFloat *) data.data();
+
+        // Nearest texel lookup, with the conventions of eval_spectrum()
+        ScalarTransform4f to_local = m_to_world.scalar().inverse();
+        auto lookup = [&](const ScalarVector3f &d) {
+            ScalarVector3f v = to_local.transform_affine(d);
+            ScalarPoint2f uv(dr::atan2(v.x(), -v.z()) * dr::InvTwoPi<ScalarFloat>,
+                             dr::safe_acos(v.y()) * dr::InvPi<ScalarFloat>);
+            uv.x() -= .5f / (res.x() - 1u);
+            uv -= dr::floor(uv);
+            uv *= ScalarVector2f(res - 1u);
+            ScalarPoint2u pos = dr::minimum(ScalarPoint2u(uv + .5f), res - 1u);
+            return pixel_luminance(dr::load<ScalarPixelData>(
+                ptr + (pos.y() * res.x() + pos.x()) * pixel_width));
+        };
+
+        /* Keep every direction through a portal samplable, even where the
+           nearest texel lookup misses small bright features */
+        ScalarFloat min_lum = 1e-3f * m_mean_luminance;
+
+        uint32_t n = m_portal_res, width = n + 1;
+        ScalarFloat delta = dr::Pi<ScalarFloat> / n;
+        std::vector<ScalarFloat> sat(m_portals.size() * width * width, 0.f);
+
+        for (size_t k = 0; k < m_portals.size(); ++k) {
+            const Portal &portal = m_portals[k];
+            ScalarFloat *table = sat.data() + k * width * width;
+
+            for (uint32_t y = 0; y < n; ++y) {
+                ScalarFloat b = dr::tan((y + .5f) * delta - .5f * dr::Pi<ScalarFloat>);
+                double row = 0.0;
+
+                for (uint32_t x = 0; x < n; ++x) {
+                    ScalarFloat a = dr::tan((x + .5f) * delta - .5f * dr::Pi<ScalarFloat>);
+                    ScalarVector3f d = dr::normalize(a * portal.s + b * portal.t - portal.n);
+
+                    row += (double) (dr::maximum(lookup(d), min_lum) *
+                                     rectified_jacobian(a, b));
+                    table[(y + 1) * width + x + 1] =
+                        table[y * width + x + 1] + (ScalarFloat) row;
+                }
+            }
+        }
+
+        m_portal_sat = dr::load<FloatStorage>(sat.data(), sat.size());
+    }
+
+    /// Solid angle to rectified parameterization Jacobian, see \ref update_portals()
+    template <typename Value>
+    static Value rectified_jacobian(const Value &a, const Value &b) {
+        Value r2 = 1.f + dr::sqr(a) + dr::sqr(b);
+        return (1.f + dr::sqr(a)) * (1.f + dr::sqr(b)) * dr::rsqrt(r2) / r2;
+    }
+
+    /**
+     * \brief Return the rectangle of table coordinates corresponding to the
+     * directions from \c p that pass through a portal, and whether it is
+     * nonempty
+     */
+    std::tuple<Point2f, Point2f, Mask> portal_window(const Portal &portal,
+                                                     const Point3f &p) const {
+        Vector3f rel = p - Point3f(portal.center);
+        Float px = dr::dot(rel, Vector3f(portal.s)),
+              py = dr::dot(rel, Vector3f(portal.t)),
+              pz = dr::dot(rel, Vector3f(portal.n));
+        Float inv_pz = dr::rcp(pz);
+
+        ScalarFloat res = (ScalarFloat) m_portal_res,
+                    scale = res * dr::InvPi<ScalarFloat>;
+        Point2f lo = dr::atan(Point2f(-portal.half_x - px, -portal.half_y - py) * inv_pz),
+                hi = dr::atan(Point2f(portal.half_x - px, portal.half_y - py) * inv_pz);
+        lo = dr::clamp(dr::fmadd(lo, scale, .5f * res), 0.f, res);
+        hi = dr::clamp(dr::fmadd(hi, scale, .5f * res), 0.f, res);
+
+        return { lo, hi, pz > 0.f && dr::all(hi > lo) };
+    }
+
+    /// Bilinearly interpolated summed-area table of a portal
+    Float portal_sat(uint32_t portal, const Point2f &pos, Mask active) const {
+        uint32_t res = m_portal_res, width = res + 1;
+
+        Point2u cell = dr::minimum(Point2u(pos), res - 1);
+        Point2f w1 = pos - Point2f(cell),
+                w0 = 1.f - w1;
+
+        UInt32 index = dr::fmadd(cell.y(), width, cell.x()) + portal * width * width;
+        Float v00 = dr::gather<Float>(m_portal_sat, index, active),
+              v10 = dr::gather<Float>(m_portal_sat, index + 1, active),
+              v01 = dr::gather<Float>(m_portal_sat, index + width, active),
+              v11 = dr::gather<Float>(m_portal_sat, index + width + 1, active);
+
+        return dr::fmadd(w0.y(), dr::fmadd(w0.x(), v00, w1.x() * v10),
+                         w1.y() * dr::fmadd(w0.x(), v01, w1.x() * v11));
+    }
+
+    /// Mass of the table of a portal over the rectangle <tt>[lo, hi]</tt>
+    Float portal_mass(uint32_t portal, const Point2f &lo, const Point2f &hi,
+                      Mask active) const {
+        return portal_sat(portal, hi, active) -
+               portal_sat(portal, Point2f(lo.x(), hi.y()), active) -
+               portal_sat(portal, Point2f(hi.x(), lo.y()), active) +
+               portal_sat(portal, lo, active);
+    }
+
+    /**
+     * \brief Sample table coordinates within the rectangle <tt>[lo, hi]</tt>
+     * of the table of a portal, whose mass is \c mass
+     */
+    Point2f sample_window(uint32_t portal, const Point2f &lo, const Point2f &hi,
+                          Float mass, const Point2f &sample, Mask active) const {
+        uint32_t res = m_portal_res;
+
+        // 1. Sample a row proportionally to its mass within the window
+        auto rows = [&](const Float &y) {
+            return portal_mass(portal, lo,
+                               Point2f(hi.x(), dr::clamp(y, lo.y(), hi.y())), active);
+        };
+
+        Float target_y = sample.y() * mass;
+        UInt32 row = dr::binary_search<UInt32>(
+            1, res, [&](UInt32 i) DRJIT_INLINE_LAMBDA {
+                return rows(Float(i)) < target_y;
+            }) - 1u;
+
+        Float y0 = dr::maximum(Float(row), lo.y()),
+              y1 = dr::minimum(Float(row + 1u), hi.y()),
+              r0 = rows(y0), r1 = rows(y1);
+        Float y = dr::fmadd(dr::select(r1 > r0, (target_y - r0) / (r1 - r0), 0.f),
+                            y1 - y0, y0);
+
+        // 2. Sample a column within the row (the table is constant along it)
+        auto cols = [&](const Float &x) {
+            return portal_mass(portal, Point2f(lo.x(), y0),
+                               Point2f(dr::clamp(x, lo.x(), hi.x()), y1), active);
+        };
+
+        Float target_x = sample.x() * (r1 - r0);
+        UInt32 col = dr::binary_search<UInt32>(
+            1, res, [&](UInt32 i) DRJIT_INLINE_LAMBDA {
+                return cols(Float(i)) < target_x;
+            }) - 1u;
+
+        Float x0 = dr::maximum(Float(col), lo.x()),
+              x1 = dr::minimum(Float(col + 1u), hi.x()),
+              c0 = cols(x0), c1 = cols(x1);
+        Float x = dr::fmadd(dr::select(c1 > c0, (target_x - c0) / (c1 - c0), 0.f),
+                            x1 - x0, x0);
+
+        return dr::clamp(Point2f(x, y), lo, hi);
+    }
+
+    /**
+     * \brief Sample a world space direction from \c p through one of the
+     * portals, which is chosen proportionally to its visible mass
+     *
+     * \return
+     *    The sampled direction and a mask of the lanes that see a portal.
+     */
+    std::pair<Vector3f, Mask> sample_portals(const Point3f &p, const Point2f &sample,
+                                             Mask active) const {
+        size_t count = m_portals.size();
+        std::vector<std::tuple<Point2f, Point2f, Float>> windows;
+        windows.reserve(count);
+
+        Float total = 0.f;
+        for (uint32_t k = 0; k < count; ++k) {
+            auto [lo, hi, valid] = portal_window(m_portals[k], p);
+            valid &= active;
+            Float mass = dr::select(valid, portal_mass(k, lo, hi, valid), 0.f);
+            total += mass;
+            windows.emplace_back(lo, hi, mass);
+        }
+
+        /* Accumulating the masses in the same order as above guarantees that
+           exactly one portal is selected by lanes with a nonzero total */
+        Float target = sample.x() * total, cdf = 0.f;
+        Vector3f d(0.f);
+        Mask found = false;
+        for (uint32_t k = 0; k < count; ++k) {
+            auto &[lo, hi, mass] = windows[k];
+            Mask pick = active && !found && mass > 0.f && cdf + mass > target;
+
+            if (dr::any_or<true>(pick)) {
+                Float sample_re = dr::minimum((target - cdf) / mass,
+                                              dr::OneMinusEpsilon<Float>);
+                Point2f pos = sample_window(k, lo, hi, mass,
+                                            Point2f(sample_re, sample.y()), pick);
+                dr::masked(d, pick) = portal_direction(m_portals[k], pos);
+            }
+
+            found |= pick;
+            cdf += mass;
+        }
+
+        return { d, found };
+    }
+
+    /**
+     * \brief Evaluate the solid angle density of \ref sample_portals()
+     *
+     * \return
+     *    The density and the total visible mass of the portals, which is
+     *    zero for lanes that do not see any portal.
+     */
+    std::pair<Float, Float> pdf_portals(const Point3f &p, const Vector3f &d,
+                                        Mask active) const {
+        uint32_t res = m_portal_res;
+        Float pdf = 0.f, total = 0.f;
+
+        for (uint32_t k = 0; k < m_portals.size(); ++k) {
+            const Portal &portal = m_portals[k];
+            auto [lo, hi, valid] = portal_window(portal, p);
+            valid &= active;
+            total += dr::select(valid, portal_mass(k, lo, hi, valid), 0.f);
+
+            // Table coordinates of the direction
+            Float dz = -dr::dot(d, Vector3f(portal.n));
+            Float a = dr::dot(d, Vector3f(portal.s)) / dz,
+                  b = dr::dot(d, Vector3f(portal.t)) / dz;
+            Point2f pos = dr::fmadd(dr::atan(Point2f(a, b)),
+                                    res * dr::InvPi<ScalarFloat>, .5f * res);
+
+            Mask inside = valid && dz > 0.f && dr::all(pos >= lo && pos <= hi);
+            if (dr::any_or<true>(inside)) {
+                Point2f cell = Point2f(dr::minimum(Point2u(pos), res - 1));
+                dr::masked(pdf, inside) +=
+                    portal_mass(k, cell, cell + 1.f, inside) /
+                    rectified_jacobian(a, b);
+            }
+        }
+
+        // Convert from table coordinates (cells of size pi/res) to radians
+        pdf *= dr::sqr(res * dr::InvPi<ScalarFloat>);
+        return { dr::select(total > 0.f, pdf / total, 0.f), total };
+    }
+
+    /// Map table coordinates of a portal to a world space direction
+    Vector3f portal_direction(const Portal &portal, const Point2f &pos) const {
+        Point2f ab = dr::tan(dr::fmadd(pos, dr::Pi<ScalarFloat> / m_portal_res,
+                                       -.5f * dr::Pi<ScalarFloat>));
+        return dr::normalize(ab.x() * Vector3f(portal.s) +
+                             ab.y() * Vector3f(portal.t) - Vector3f(portal.n));
+    }
+
+    //! @}
+    // =============================================================
+
     MI_DECLARE_CLASS()
 protected:
     std::string m_filename;
@@ -563,6 +988,15 @@ protected:
     Warp m_warp;
     ref<Texture> m_d65;
     Float m_scale;
+    /// Solid-angle weighted average luminance (used for power estimates)
+    ScalarFloat m_mean_luminance;
+
+    /// Portals through which the environment is visible (world space)
+    std::vector<Portal> m_portals;
+    /// Resolution of the rectified tables of the portals
+    uint32_t m_portal_res;
+    /// Per portal: summed-area table of the rectified environment map
+    FloatStorage m_portal_sat;
 };
 
 MI_IMPLEMENT_CLASS_VARIANT(EnvironmentMapEmitter, Emitter)
@@ -187,6 +187,10 @@ public:
         return 0.f;
     }
 
+    ScalarFloat estimate_power() const override {
+        return 4.f * dr::Pi<ScalarFloat> * dr::slice(m_intensity->mean());
+    }
+
     ScalarBoundingBox3f bbox() const override {
         return ScalarBoundingBox3f(m_position.scalar());
     }
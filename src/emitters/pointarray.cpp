@@ -0,0 +1,184 @@
+#include <mitsuba/core/properties.h>
+#include <mitsuba/core/warp.h>
+#include <mitsuba/render/lightarray.h>
+#include <mitsuba/render/lighttree.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**!
+
+.. _emitter-pointarray:
+
+Point light array (:monosp:`pointarray`)
+----------------------------------------
+
+.. pluginparameters::
+
+ * - filename
+   - |string|
+   - Filename of a floating point image (e.g. in OpenEXR or PFM format)
+     containing one row per light source.
+
+ * - data
+   - :monosp:`Bitmap object`
+   - Alternatively, a bitmap (e.g. created from a NumPy array) containing
+     one row per light source. Only one of the parameters :monosp:`filename`
+     and :monosp:`data` can be specified at a time.
+
+ * - to_world
+   - |transform|
+   - Specifies an optional transformation that is applied to all light
+     positions. (Default: none)
+
+This plugin represents a large number of point light sources using a single
+emitter. Each row of the input data contains 6 values: the position
+:math:`(x, y, z)` of the light source followed by its linear RGB radiant
+intensity in units of power per unit steradian. The light sources are stored
+in flat buffers, which avoids creating one plugin instance (and one virtual
+function call target) per light, and are selected proportionally to their
+power using an alias table.
+
+When the scene is loaded with the :monosp:`split_emitters` parameter and the
+:monosp:`tree` emitter sampling strategy, every light source becomes a
+separate leaf of the scene's light tree.
+
+The light positions are exposed as the flat :monosp:`position` parameter,
+and the scene's emitter sampling data structures are rebuilt when they are
+updated.
+
+.. tabs::
+    .. code-tab:: python
+
+        import numpy as np
+
+        lights = np.zeros((1000000, 6), dtype=np.float32)
+        lights[:, 0:3] = np.random.uniform(-10, 10, (1000000, 3))
+        lights[:, 3:6] = 1.0
+
+        'type': 'pointarray',
+        'data': mi.Bitmap(lights)
+
+ */
+
+template <typename Float, typename Spectrum>
+class PointLightArray final : public LightArray<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(LightArray, m_needs_sample_3, m_to_world, m_light_count,
+                   m_position, m_light_distr, m_power, m_bbox, m_d65,
+                   load_data, init_lights, intensity_coefficients,
+                   eval_intensity, estimate_power)
+    MI_IMPORT_TYPES()
+
+    using typename Base::IntensityData;
+
+    /// Number of values per light source in the input data
+    static constexpr size_t ColumnCount = 6;
+
+    PointLightArray(const Properties &props) : Base(props) {
+        ref<Bitmap> bitmap = load_data(props, ColumnCount);
+
+        const ScalarFloat *in_ptr = (const ScalarFloat *) bitmap->data();
+        ScalarTransform4f to_world = m_to_world.scalar();
+
+        std::unique_ptr<ScalarFloat[]> position(new ScalarFloat[3 * m_light_count]),
+                                       intensity(new ScalarFloat[IntensityData::Size * m_light_count]);
+        m_power = std::vector<ScalarFloat>(m_light_count);
+
+        for (size_t i = 0; i < m_light_count; ++i, in_ptr += ColumnCount) {
+            ScalarPoint3f p = to_world * dr::load<ScalarPoint3f>(in_ptr);
+            ScalarColor3f rgb = dr::load<ScalarColor3f>(in_ptr + 3);
+
+            dr::store(position.get() + 3 * i, p);
+            dr::store(intensity.get() + IntensityData::Size * i,
+                      intensity_coefficients(rgb));
+
+            ScalarFloat power = 4.f * dr::Pi<ScalarFloat> * dr::mean(rgb);
+            m_power[i] = (std::isfinite(power) && power > 0.f) ? power : 0.f;
+        }
+
+        init_lights(position.get(), intensity.get());
+        m_needs_sample_3 = false;
+    }
+
+    std::pair<Ray3f, Spectrum> sample_ray(Float time, Float wavelength_sample,
+                                          const Point2f &pos_sample,
+                                          const Point2f &dir_sample,
+                                          Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleRay, active);
+
+        auto [index, pmf] = m_light_distr.sample_pmf(pos_sample.x(), active);
+
+        auto [wavelengths, weight] = m_d65->sample_spectrum(
+            dr::zeros<SurfaceInteraction3f>(),
+            math::sample_shifted<Wavelength>(wavelength_sample), active);
+        weight *= eval_intensity(index, wavelengths, active, false) *
+                  (4.f * dr::Pi<Float> / pmf);
+
+        Ray3f ray(dr::gather<Point3f>(m_position, index, active),
+                  warp::square_to_uniform_sphere(dir_sample), time,
+                  wavelengths);
+
+        return { ray, depolarizer<Spectrum>(weight) & active };
+    }
+
+    Spectrum eval_direction(const Interaction3f &it,
+                            const DirectionSample3f &ds,
+                            Mask active) const override {
+        Point3f p = dr::gather<Point3f>(m_position, ds.prim_index, active);
+        UnpolarizedSpectrum spec =
+            eval_intensity(ds.prim_index, it.wavelengths, active) *
+            dr::rcp(dr::squared_norm(p - it.p));
+
+        return depolarizer<Spectrum>(spec) & active;
+    }
+
+    std::pair<PositionSample3f, Float>
+    sample_position(Float time, const Point2f &sample,
+                    Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSamplePosition, active);
+
+        auto [index, pmf] = m_light_distr.sample_pmf(sample.x(), active);
+
+        PositionSample3f ps = dr::zeros<PositionSample3f>();
+        ps.p = dr::gather<Point3f>(m_position, index, active);
+        ps.time = time;
+        ps.pdf = pmf;
+        ps.delta = true;
+        ps.prim_index = index;
+
+        return { ps, dr::rcp(pmf) };
+    }
+
+    std::vector<LightBounds<Float>> primitive_bounds() const override {
+        auto &&position = dr::migrate(m_position, AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+        const ScalarFloat *ptr = position.data();
+
+        std::vector<LightBounds<Float>> bounds(m_light_count);
+        for (size_t i = 0; i < m_light_count; ++i) {
+            ScalarPoint3f p = dr::load<ScalarPoint3f>(ptr + 3 * i);
+            bounds[i] = LightBounds<Float>(ScalarBoundingBox3f(p),
+                                           ScalarVector3f(0.f, 0.f, 1.f),
+                                           m_power[i], -1.f, 0.f);
+        }
+        return bounds;
+    }
+
+    std::string to_string() const override {
+        std::ostringstream oss;
+        oss << "PointLightArray[" << std::endl
+            << "  light_count = " << m_light_count << "," << std::endl
+            << "  bbox = " << string::indent(m_bbox) << "," << std::endl
+            << "  power = " << estimate_power() << std::endl
+            << "]";
+        return oss.str();
+    }
+
+    MI_DECLARE_CLASS()
+};
+
+
+MI_IMPLEMENT_CLASS_VARIANT(PointLightArray, Emitter)
+MI_EXPORT_PLUGIN(PointLightArray, "Point light array emitter")
+NAMESPACE_END(mitsuba)
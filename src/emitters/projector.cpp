@@ -276,6 +276,11 @@ public:
         return 0.f;
     }
 
+    ScalarFloat estimate_power() const override {
+        return dr::Pi<ScalarFloat> *
+               dr::slice(m_sensor_area * m_intensity_scale * m_irradiance->mean());
+    }
+
     ScalarBoundingBox3f bbox() const override {
         /* This emitter does not occupy any particular region
            of space, return an invalid bounding box */
@@ -254,6 +254,24 @@ public:
         return 0.f;
     }
 
+    ScalarFloat estimate_power() const override {
+        // Full intensity within the beam, linear falloff approximated by its midpoint
+        ScalarFloat cos_beam   = dr::slice(m_cos_beam_width),
+                    cos_cutoff = dr::slice(m_cos_cutoff_angle);
+        ScalarFloat solid_angle = 2.f * dr::Pi<ScalarFloat> *
+            ((1.f - cos_beam) + .5f * (cos_beam - cos_cutoff));
+        return solid_angle * dr::slice(m_intensity->mean() * m_texture->mean());
+    }
+
+    std::tuple<ScalarVector3f, ScalarFloat, ScalarFloat>
+    emission_cone() const override {
+        ScalarFloat beam_width = dr::slice(m_beam_width),
+                    cutoff_angle = dr::slice(m_cutoff_angle);
+        ScalarVector3f axis =
+            dr::normalize(m_to_world.scalar() * ScalarVector3f(0.f, 0.f, 1.f));
+        return { axis, dr::cos(beam_width), dr::cos(cutoff_angle - beam_width) };
+    }
+
     ScalarBoundingBox3f bbox() const override {
         ScalarPoint3f p = m_to_world.scalar() * ScalarPoint3f(0.f);
         return ScalarBoundingBox3f(p, p);
@@ -0,0 +1,285 @@
+#include <mitsuba/core/frame.h>
+#include <mitsuba/core/properties.h>
+#include <mitsuba/core/warp.h>
+#include <mitsuba/render/lightarray.h>
+#include <mitsuba/render/lighttree.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**!
+
+.. _emitter-spotarray:
+
+Spot light array (:monosp:`spotarray`)
+--------------------------------------
+
+.. pluginparameters::
+
+ * - filename
+   - |string|
+   - Filename of a floating point image (e.g. in OpenEXR or PFM format)
+     containing one row per light source.
+
+ * - data
+   - :monosp:`Bitmap object`
+   - Alternatively, a bitmap (e.g. created from a NumPy array) containing
+     one row per light source. Only one of the parameters :monosp:`filename`
+     and :monosp:`data` can be specified at a time.
+
+ * - to_world
+   - |transform|
+   - Specifies an optional transformation that is applied to all light
+     positions and directions. (Default: none)
+
+This plugin represents a large number of spot light sources using a single
+emitter, analogous to the :ref:`pointarray <emitter-pointarray>` plugin.
+Each row of the input data contains 11 values: the position
+:math:`(x, y, z)` of the light source, the direction of its central axis,
+its maximum linear RGB radiant intensity, and finally its cutoff angle and
+beam width in degrees (see the :ref:`spot <emitter-spot>` plugin for the
+definition of the falloff profile).
+
+The light positions and directions are exposed as the flat
+:monosp:`position` and :monosp:`direction` parameters. Updated directions
+are normalized, and the scene's emitter sampling data structures are
+rebuilt.
+
+.. tabs::
+    .. code-tab:: python
+
+        import numpy as np
+
+        lights = np.zeros((1000000, 11), dtype=np.float32)
+        lights[:, 0:3] = np.random.uniform(-10, 10, (1000000, 3))
+        lights[:, 3:6] = [0, 0, -1]
+        lights[:, 6:9] = 1.0
+        lights[:, 9:11] = [20, 15]
+
+        'type': 'spotarray',
+        'data': mi.Bitmap(lights)
+
+ */
+template <typename Float, typename Spectrum>
+class SpotLightArray final : public LightArray<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(LightArray, m_to_world, m_light_count, m_position,
+                   m_light_distr, m_power, m_bbox, m_d65, load_data,
+                   init_lights, intensity_coefficients, eval_intensity,
+                   estimate_power)
+    MI_IMPORT_TYPES()
+
+    using typename Base::FloatStorage;
+    using typename Base::IntensityData;
+
+    /// Number of values per light source in the input data
+    static constexpr size_t ColumnCount = 11;
+
+    SpotLightArray(const Properties &props) : Base(props) {
+        ref<Bitmap> bitmap = load_data(props, ColumnCount);
+
+        const ScalarFloat *in_ptr = (const ScalarFloat *) bitmap->data();
+        ScalarTransform4f to_world = m_to_world.scalar();
+
+        std::unique_ptr<ScalarFloat[]> position(new ScalarFloat[3 * m_light_count]),
+                                       direction(new ScalarFloat[3 * m_light_count]),
+                                       cone(new ScalarFloat[4 * m_light_count]),
+                                       intensity(new ScalarFloat[IntensityData::Size * m_light_count]);
+        m_power = std::vector<ScalarFloat>(m_light_count);
+
+        for (size_t i = 0; i < m_light_count; ++i, in_ptr += ColumnCount) {
+            ScalarPoint3f p = to_world * dr::load<ScalarPoint3f>(in_ptr);
+            ScalarVector3f d = dr::normalize(to_world * dr::load<ScalarVector3f>(in_ptr + 3));
+            ScalarColor3f rgb = dr::load<ScalarColor3f>(in_ptr + 6);
+            ScalarFloat cutoff_angle = dr::deg_to_rad(in_ptr[9]),
+                        beam_width   = dr::deg_to_rad(in_ptr[10]);
+
+            if (!dr::all(dr::isfinite(d)))
+                Throw("Light %zu: invalid direction!", i);
+            if (!(beam_width >= 0.f && beam_width <= cutoff_angle &&
+                  cutoff_angle <= dr::Pi<ScalarFloat>))
+                Throw("Light %zu: expected 0 <= beam_width <= cutoff_angle <= 180!", i);
+
+            ScalarFloat cos_cutoff = dr::cos(cutoff_angle),
+                        cos_beam   = dr::cos(beam_width);
+
+            dr::store(position.get() + 3 * i, p);
+            dr::store(direction.get() + 3 * i, d);
+            dr::store(cone.get() + 4 * i,
+                      ScalarVector4f(cos_cutoff, cos_beam, cutoff_angle,
+                                     dr::rcp(dr::maximum(cutoff_angle - beam_width,
+                                                         dr::Epsilon<ScalarFloat>))));
+            dr::store(intensity.get() + IntensityData::Size * i,
+                      intensity_coefficients(rgb));
+
+            // Full intensity within the beam, linear falloff approximated by its midpoint
+            ScalarFloat solid_angle = 2.f * dr::Pi<ScalarFloat> *
+                ((1.f - cos_beam) + .5f * (cos_beam - cos_cutoff));
+            ScalarFloat power = solid_angle * dr::mean(rgb);
+            m_power[i] = (std::isfinite(power) && power > 0.f) ? power : 0.f;
+        }
+
+        m_direction = dr::load<FloatStorage>(direction.get(), 3 * m_light_count);
+        m_cone = dr::load<FloatStorage>(cone.get(), 4 * m_light_count);
+        init_lights(position.get(), intensity.get());
+    }
+
+    void traverse(TraversalCallback *callback) override {
+        Base::traverse(callback);
+        callback->put_parameter("direction", m_direction, +ParamFlags::NonDifferentiable);
+    }
+
+    void parameters_changed(const std::vector<std::string> &keys) override {
+        if (keys.empty() || string::contains(keys, "direction")) {
+            if (dr::width(m_direction) != 3 * m_light_count)
+                Throw("The number of light sources cannot be changed!");
+
+            // Normalize the updated directions
+            auto &&direction = dr::migrate(m_direction, AllocType::Host);
+            if constexpr (dr::is_jit_v<Float>)
+                dr::sync_thread();
+
+            std::unique_ptr<ScalarFloat[]> normalized(new ScalarFloat[3 * m_light_count]);
+            for (size_t i = 0; i < m_light_count; ++i) {
+                ScalarVector3f d = dr::normalize(
+                    dr::load<ScalarVector3f>(direction.data() + 3 * i));
+                if (!dr::all(dr::isfinite(d)))
+                    Throw("Light %zu: invalid direction!", i);
+                dr::store(normalized.get() + 3 * i, d);
+            }
+            m_direction = dr::load<FloatStorage>(normalized.get(), 3 * m_light_count);
+        }
+        Base::parameters_changed(keys);
+    }
+
+    std::pair<Ray3f, Spectrum> sample_ray(Float time, Float wavelength_sample,
+                                          const Point2f &pos_sample,
+                                          const Point2f &dir_sample,
+                                          Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleRay, active);
+
+        auto [index, pmf] = m_light_distr.sample_pmf(pos_sample.x(), active);
+        Vector4f cone = dr::gather<Vector4f>(m_cone, index, active);
+
+        // Sample a direction within the cone of the chosen light
+        Vector3f local_dir = warp::square_to_uniform_cone(dir_sample, cone.x());
+        Float pdf_dir = warp::square_to_uniform_cone_pdf(local_dir, cone.x());
+        Frame3f frame(dr::gather<Vector3f>(m_direction, index, active));
+
+        auto [wavelengths, weight] = m_d65->sample_spectrum(
+            dr::zeros<SurfaceInteraction3f>(),
+            math::sample_shifted<Wavelength>(wavelength_sample), active);
+        weight *= eval_intensity(index, wavelengths, active, false) *
+                  (falloff_curve(local_dir.z(), cone) / (pdf_dir * pmf));
+
+        Ray3f ray(dr::gather<Point3f>(m_position, index, active),
+                  frame.to_world(local_dir), time, wavelengths);
+
+        return { ray, depolarizer<Spectrum>(weight) & active };
+    }
+
+    Spectrum eval_direction(const Interaction3f &it,
+                            const DirectionSample3f &ds,
+                            Mask active) const override {
+        Point3f p = dr::gather<Point3f>(m_position, ds.prim_index, active);
+        Vector3f d = it.p - p;
+        Float dist2 = dr::squared_norm(d);
+        Float falloff = falloff_curve(
+            dr::dot(dr::gather<Vector3f>(m_direction, ds.prim_index, active), d) *
+                dr::rsqrt(dist2),
+            dr::gather<Vector4f>(m_cone, ds.prim_index, active));
+
+        UnpolarizedSpectrum spec =
+            eval_intensity(ds.prim_index, it.wavelengths, active) *
+            (falloff / dist2);
+
+        return depolarizer<Spectrum>(spec) & active;
+    }
+
+    std::pair<PositionSample3f, Float>
+    sample_position(Float time, const Point2f &sample,
+                    Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSamplePosition, active);
+
+        auto [index, pmf] = m_light_distr.sample_pmf(sample.x(), active);
+
+        PositionSample3f ps = dr::zeros<PositionSample3f>();
+        ps.p = dr::gather<Point3f>(m_position, index, active);
+        ps.n = dr::gather<Vector3f>(m_direction, index, active);
+        ps.time = time;
+        ps.pdf = pmf;
+        ps.delta = true;
+        ps.prim_index = index;
+
+        return { ps, dr::rcp(pmf) };
+    }
+
+    std::vector<LightBounds<Float>> primitive_bounds() const override {
+        auto &&position  = dr::migrate(m_position, AllocType::Host);
+        auto &&direction = dr::migrate(m_direction, AllocType::Host);
+        auto &&cone      = dr::migrate(m_cone, AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+        const ScalarFloat *pos_ptr  = position.data(),
+                          *dir_ptr  = direction.data(),
+                          *cone_ptr = cone.data();
+
+        std::vector<LightBounds<Float>> bounds(m_light_count);
+        for (size_t i = 0; i < m_light_count; ++i) {
+            ScalarPoint3f p = dr::load<ScalarPoint3f>(pos_ptr + 3 * i);
+            ScalarVector3f d = dr::load<ScalarVector3f>(dir_ptr + 3 * i);
+            ScalarVector4f c = dr::load<ScalarVector4f>(cone_ptr + 4 * i);
+            ScalarFloat beam_width = dr::acos(c.y());
+            bounds[i] = LightBounds<Float>(ScalarBoundingBox3f(p), d, m_power[i],
+                                           c.y(), dr::cos(c.z() - beam_width));
+        }
+        return bounds;
+    }
+
+    std::string to_string() const override {
+        std::ostringstream oss;
+        oss << "SpotLightArray[" << std::endl
+            << "  light_count = " << m_light_count << "," << std::endl
+            << "  bbox = " << string::indent(m_bbox) << "," << std::endl
+            << "  power = " << estimate_power() << std::endl
+            << "]";
+        return oss.str();
+    }
+
+    MI_DECLARE_CLASS()
+private:
+    /**
+     * Returns a factor in [0, 1] accounting for the falloff profile of a spot
+     * light, given the cosine of the angle to its axis and its cone
+     * parameters <tt>(cos_cutoff, cos_beam, cutoff, 1 / (cutoff - beam))</tt>
+     */
+    Float falloff_curve(const Float &cos_theta, const Vector4f &cone) const {
+        Float beam_res = dr::select(
+            cos_theta >= cone.y(), 1.f,
+            (cone.z() - dr::safe_acos(cos_theta)) * cone.w());
+
+        return dr::select(cos_theta > cone.x(), beam_res, 0.f);
+    }
+
+    /// Sample the light with the given index, accounting for its falloff profile
+    std::pair<DirectionSample3f, Spectrum>
+    sample_light(const Interaction3f &it, const UInt32 &index, Mask active) const override {
+        auto [ds, spec] = Base::sample_light(it, index, active);
+
+        // Evaluate the falloff profile in the direction of the reference point
+        Float falloff = falloff_curve(
+            -dr::dot(dr::gather<Vector3f>(m_direction, index, active), ds.d),
+            dr::gather<Vector4f>(m_cone, index, active));
+
+        return { ds, dr::select(falloff > 0.f, spec * falloff, 0.f) };
+    }
+
+private:
+    FloatStorage m_direction;
+    /// Per light: cos(cutoff), cos(beam width), cutoff, 1 / (cutoff - beam width)
+    FloatStorage m_cone;
+};
+
+
+MI_IMPLEMENT_CLASS_VARIANT(SpotLightArray, Emitter)
+MI_EXPORT_PLUGIN(SpotLightArray, "Spot light array emitter")
+NAMESPACE_END(mitsuba)
@@ -116,3 +116,40 @@ def test03_load_bitmap(variants_all_rgb):
     w2 = emitter_2.eval(si)
 
     assert dr.allclose(w1, w2, rtol=1e-3)
+
+
+def test04_portals(variants_vec_backends_once_rgb):
+    # Constant environment, only visible through a 2x2 window in the z=0 plane
+    emitter = mi.load_dict({
+        'type': 'envmap',
+        'bitmap': mi.Bitmap(dr.full(mi.TensorXf, 1, [16, 32, 3])),
+        'window': {'type': 'rectangle'},
+    })
+
+    rng = mi.PCG32(size=102400)
+    sample = mi.Point2f(rng.next_float32(), rng.next_float32())
+
+    si = dr.zeros(mi.SurfaceInteraction3f)
+    si.p = mi.Point3f(0, 0, 1)
+    ds, w = emitter.sample_direction(si, sample)
+
+    # All directions pass through the window
+    t = -1 / ds.d.z
+    assert dr.all(ds.d.z < 0)
+    assert dr.all((dr.abs(t * ds.d.x) <= 1 + 1e-4) & (dr.abs(t * ds.d.y) <= 1 + 1e-4))
+
+    # The sampling density is consistent with pdf_direction()
+    assert dr.allclose(emitter.pdf_direction(si, ds), ds.pdf, rtol=1e-3)
+
+    # Unbiased estimate of the solid angle subtended by the window
+    assert dr.allclose(dr.mean(w[0]), 2 * dr.pi / 3, rtol=1e-2)
+
+    # Directions that miss the window are never sampled
+    ds.d = dr.normalize(mi.Vector3f(2, 0, -1))
+    assert dr.all(emitter.pdf_direction(si, ds) == 0)
+
+    # Points that do not see the window sample the full sphere
+    si.p = mi.Point3f(0, 0, -1)
+    ds, w = emitter.sample_direction(si, sample)
+    assert dr.any(ds.d.z > 0)
+    assert dr.allclose(emitter.pdf_direction(si, ds), ds.pdf, rtol=1e-3)
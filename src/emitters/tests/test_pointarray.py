@@ -0,0 +1,141 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def light_data():
+    import numpy as np
+    return np.array([
+        [0, 0, 1, 1, 1, 1],
+        [1, -1, 2, 4, 2, 0],
+        [-2, 3, 0, .5, .5, 2],
+    ], dtype=np.float32)
+
+
+def test01_load(variants_vec_rgb):
+    data = light_data()
+    emitter = mi.load_dict({'type': 'pointarray', 'data': mi.Bitmap(data)})
+
+    assert dr.allclose(emitter.estimate_power(),
+                       4 * dr.pi * data[:, 3:6].mean(axis=1).sum())
+    assert dr.allclose(emitter.bbox().min, data[:, 0:3].min(axis=0))
+    assert dr.allclose(emitter.bbox().max, data[:, 0:3].max(axis=0))
+
+    # Every light source becomes a separate leaf of the scene's light tree
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter_sampling': 'tree',
+        'split_emitters': True,
+        'lights': {'type': 'pointarray', 'data': mi.Bitmap(data)},
+    })
+    assert scene.light_tree().finite_count() == len(data)
+
+    with pytest.raises(RuntimeError, match='values per light source'):
+        mi.load_dict({'type': 'pointarray', 'data': mi.Bitmap(data[:, :5].copy())})
+
+
+def test02_sample_direction(variants_vec_rgb):
+    data = light_data()
+    emitter = mi.load_dict({'type': 'pointarray', 'data': mi.Bitmap(data)})
+
+    it = dr.zeros(mi.SurfaceInteraction3f)
+    it.p = [.5, .2, -1]
+
+    # Each primitive behaves like the corresponding point light
+    for i, row in enumerate(data):
+        point = mi.load_dict({
+            'type': 'point',
+            'position': row[0:3].tolist(),
+            'intensity': {'type': 'rgb', 'value': row[3:6].tolist()},
+        })
+        ds_ref, spec_ref = point.sample_direction(it, mi.Point2f(.5))
+        ds, spec = emitter.sample_direction_primitive(it, i, mi.Point2f(.5))
+
+        assert dr.allclose(ds.p, ds_ref.p)
+        assert dr.allclose(ds.d, ds_ref.d)
+        assert dr.allclose(ds.pdf, 1)
+        assert dr.all(ds.delta)
+        assert dr.allclose(spec, spec_ref)
+
+    # Lights are selected proportionally to their power
+    power = data[:, 3:6].mean(axis=1)
+    sample_count = 100
+    sample = mi.Point2f(dr.linspace(mi.Float, 0, 1, sample_count, False), .5)
+    ds, spec = emitter.sample_direction(it, sample)
+    pmf = dr.gather(mi.Float, mi.Float(power / power.sum()), ds.prim_index)
+    assert dr.allclose(ds.pdf, pmf)
+    assert dr.allclose(dr.mean(mi.Float(dr.eq(ds.prim_index, 1))),
+                       power[1] / power.sum(), atol=2e-2)
+
+
+def test03_render_matches_point_lights(variants_vec_rgb):
+    data = light_data()
+
+    def render(emitters):
+        scene = mi.load_dict({
+            'type': 'scene',
+            'integrator': {'type': 'direct'},
+            'sensor': {
+                'type': 'perspective',
+                'to_world': mi.ScalarTransform4f.look_at(
+                    origin=(0, 0, -5), target=(0, 0, 0), up=(0, 1, 0)),
+                'sampler': {'type': 'independent'},
+                'film': {'type': 'hdrfilm', 'width': 8, 'height': 8,
+                         'rfilter': {'type': 'box'}},
+            },
+            'receiver': {
+                'type': 'rectangle',
+                'to_world': mi.ScalarTransform4f.translate([0, 0, -1]).scale(4),
+                'bsdf': {'type': 'diffuse'},
+            },
+            **emitters
+        })
+        return scene.integrator().render(scene, seed=0, spp=256)
+
+    image = render({'lights': {'type': 'pointarray', 'data': mi.Bitmap(data)}})
+    image_ref = render({
+        f'light_{i}': {
+            'type': 'point',
+            'position': row[0:3].tolist(),
+            'intensity': {'type': 'rgb', 'value': row[3:6].tolist()},
+        } for i, row in enumerate(data)
+    })
+
+    assert dr.allclose(dr.mean(image.array), dr.mean(image_ref.array), rtol=2e-2)
+
+
+def test04_update_position(variants_vec_rgb):
+    """
+    Moving the lights through the scene parameters updates the bounds and
+    the scene's light tree
+    """
+    data = light_data()
+    moved = data.copy()
+    moved[:, 0:3] += [1, -2, .5]
+    moved[1, 2] = 4
+
+    def load(data):
+        return mi.load_dict({
+            'type': 'scene',
+            'emitter_sampling': 'tree',
+            'split_emitters': True,
+            'lights': {'type': 'pointarray', 'data': mi.Bitmap(data)},
+        })
+
+    scene, scene_ref = load(data), load(moved)
+    params = mi.traverse(scene)
+    params['lights.position'] = mi.Float(moved[:, 0:3].ravel())
+    params.update()
+
+    emitter = scene.emitters()[0]
+    assert dr.allclose(emitter.bbox().min, moved[:, 0:3].min(axis=0))
+    assert dr.allclose(emitter.bbox().max, moved[:, 0:3].max(axis=0))
+
+    it = dr.zeros(mi.SurfaceInteraction3f)
+    it.p = [.5, .2, -1]
+    sample = mi.Point2f(dr.linspace(mi.Float, 0, 1, 64, False), .5)
+    ds, spec = scene.sample_emitter_direction(it, sample, False)
+    ds_ref, spec_ref = scene_ref.sample_emitter_direction(it, sample, False)
+    assert dr.allclose(ds.p, ds_ref.p)
+    assert dr.allclose(ds.pdf, ds_ref.pdf)
+    assert dr.allclose(spec, spec_ref)
@@ -0,0 +1,101 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def light_data():
+    import numpy as np
+    return np.array([
+        [0, 0, 1, 0, 0, -1, 1, 1, 1, 30, 20],
+        [1, -1, 2, -.5, .5, -1, 4, 2, 0, 60, 60],
+        [-2, 3, 0, 1, -1, -1, .5, .5, 2, 45, 0],
+    ], dtype=np.float32)
+
+
+def test01_load(variants_vec_rgb):
+    data = light_data()
+    emitter = mi.load_dict({'type': 'spotarray', 'data': mi.Bitmap(data)})
+
+    # Every light source becomes a separate leaf of the scene's light tree
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter_sampling': 'tree',
+        'split_emitters': True,
+        'lights': {'type': 'spotarray', 'data': mi.Bitmap(data)},
+    })
+    assert scene.light_tree().finite_count() == len(data)
+
+    invalid = data.copy()
+    invalid[0, 10] = 40
+    with pytest.raises(RuntimeError, match='beam_width'):
+        mi.load_dict({'type': 'spotarray', 'data': mi.Bitmap(invalid)})
+
+
+@pytest.mark.parametrize('it_pos', [[.5, .2, -1], [3, 0, 5]])
+def test02_sample_direction(variants_vec_rgb, it_pos):
+    data = light_data()
+    emitter = mi.load_dict({'type': 'spotarray', 'data': mi.Bitmap(data)})
+
+    it = dr.zeros(mi.SurfaceInteraction3f)
+    it.p = it_pos
+
+    # Each primitive behaves like the corresponding spot light
+    for i, row in enumerate(data):
+        spot = mi.load_dict({
+            'type': 'spot',
+            'to_world': mi.ScalarTransform4f.look_at(
+                origin=row[0:3].tolist(),
+                target=(row[0:3] + row[3:6]).tolist(),
+                up=[0, 1, 0] if abs(row[4]) < .9 else [1, 0, 0]),
+            'intensity': {'type': 'rgb', 'value': row[6:9].tolist()},
+            'cutoff_angle': float(row[9]),
+            'beam_width': float(row[10]),
+        })
+        ds_ref, spec_ref = spot.sample_direction(it, mi.Point2f(.5))
+        ds, spec = emitter.sample_direction_primitive(it, i, mi.Point2f(.5))
+
+        assert dr.allclose(ds.p, ds_ref.p)
+        assert dr.allclose(ds.d, ds_ref.d)
+        assert dr.allclose(spec, spec_ref, atol=1e-6)
+
+
+def test03_update_position_direction(variants_vec_rgb):
+    """
+    Moving and turning the lights through the scene parameters updates the
+    bounds and the scene's light tree
+    """
+    import numpy as np
+    data = light_data()
+    moved = data.copy()
+    moved[:, 0:3] += [1, -2, .5]
+    moved[:, 3:6] = [[0, 1, -1], [1, 0, 0], [0, 0, -1]]
+
+    def load(data):
+        return mi.load_dict({
+            'type': 'scene',
+            'emitter_sampling': 'tree',
+            'split_emitters': True,
+            'lights': {'type': 'spotarray', 'data': mi.Bitmap(data)},
+        })
+
+    scene, scene_ref = load(data), load(moved)
+    params = mi.traverse(scene)
+    params['lights.position'] = mi.Float(moved[:, 0:3].ravel())
+    # Directions are normalized after the update
+    params['lights.direction'] = mi.Float(2 * moved[:, 3:6].ravel())
+    params.update()
+
+    emitter = scene.emitters()[0]
+    assert dr.allclose(emitter.bbox().min, moved[:, 0:3].min(axis=0))
+    assert dr.allclose(emitter.bbox().max, moved[:, 0:3].max(axis=0))
+    direction = moved[:, 3:6] / np.linalg.norm(moved[:, 3:6], axis=1, keepdims=True)
+    assert dr.allclose(mi.traverse(scene)['lights.direction'], direction.ravel())
+
+    it = dr.zeros(mi.SurfaceInteraction3f)
+    it.p = [.5, .2, -1]
+    sample = mi.Point2f(dr.linspace(mi.Float, 0, 1, 64, False), .5)
+    ds, spec = scene.sample_emitter_direction(it, sample, False)
+    ds_ref, spec_ref = scene_ref.sample_emitter_direction(it, sample, False)
+    assert dr.allclose(ds.p, ds_ref.p)
+    assert dr.allclose(ds.pdf, ds_ref.pdf)
+    assert dr.allclose(spec, spec_ref, atol=1e-6)
@@ -36,6 +36,13 @@ Direct illumination integrator (:monosp:`direct`)
    - Hide directly visible emitters.
      (Default: no, i.e. |false|)
 
+ * - lobe_selection
+   - |bool|
+   - Account for a coarse bound of the BSDF lobe at the shading point when
+     selecting emitters, which favours emitters within the reflection lobe of
+     glossy materials. This only has an effect with the scene's
+     :monosp:`tree` emitter sampling strategy. (Default: |false|)
+
 .. subfigstart::
 .. subfigure:: ../../resources/data/docs/images/render/integrator_direct_bsdf.jpg
    :caption: (**a**) BSDF sampling only
@@ -109,6 +116,8 @@ public:
         m_weight_lum  = 1.f / (ScalarFloat) m_emitter_samples;
         m_frac_bsdf   = m_bsdf_samples / (ScalarFloat) sum;
         m_frac_lum    = m_emitter_samples / (ScalarFloat) sum;
+
+        m_lobe_selection = props.get<bool>("lobe_selection", false);
     }
 
     std::pair<Spectrum, Mask> sample(const Scene *scene,
@@ -144,13 +153,22 @@ public:
         auto flags = bsdf->flags();
         Mask sample_emitter = active && has_flag(flags, BSDFFlags::Smooth);
 
+        // Coarse bound of the BSDF lobe used to select emitters
+        BSDFLobe3f lobe;
+        if (m_lobe_selection)
+            lobe = bsdf->lobe(ctx, si, active);
+
         if (dr::any_or<true>(sample_emitter)) {
             for (size_t i = 0; i < m_emitter_samples; ++i) {
                 Mask active_e = sample_emitter;
                 DirectionSample3f ds;
                 Spectrum emitter_val;
-                std::tie(ds, emitter_val) = scene->sample_emitter_direction(
-                    si, sampler->next_2d(active_e), true, active_e);
+                if (m_lobe_selection)
+                    std::tie(ds, emitter_val) = scene->sample_emitter_direction(
+                        si, lobe, sampler->next_2d(active_e), true, active_e);
+                else
+                    std::tie(ds, emitter_val) = scene->sample_emitter_direction(
+                        si, sampler->next_2d(active_e), true, active_e);
                 active_e &= dr::neq(ds.pdf, 0.f);
                 if (dr::none_or<false>(active_e))
                     continue;
@@ -194,8 +212,10 @@ public:
                    direction using Emitter sampling. */
                 DirectionSample3f ds(scene, si_bsdf, si);
 
-                Float emitter_pdf =
-                    dr::select(delta, 0.f, scene->pdf_emitter_direction(si, ds, active_b));
+                Float emitter_pdf = m_lobe_selection
+                    ? scene->pdf_emitter_direction(si, lobe, ds, active_b)
+                    : scene->pdf_emitter_direction(si, ds, active_b);
+                emitter_pdf = dr::select(delta, 0.f, emitter_pdf);
 
                 result[active_b] +=
                     bsdf_val * emitter_val *
@@ -211,7 +231,8 @@ public:
         std::ostringstream oss;
         oss << "DirectIntegrator[" << std::endl
             << "  emitter_samples = " << m_emitter_samples << "," << std::endl
-            << "  bsdf_samples = " << m_bsdf_samples << std::endl
+            << "  bsdf_samples = " << m_bsdf_samples << "," << std::endl
+            << "  lobe_selection = " << m_lobe_selection << std::endl
             << "]";
         return oss.str();
     }
@@ -229,6 +250,7 @@ private:
     size_t m_bsdf_samples;
     ScalarFloat m_frac_bsdf, m_frac_lum;
     ScalarFloat m_weight_bsdf, m_weight_lum;
+    bool m_lobe_selection;
 };
 
 MI_IMPLEMENT_CLASS_VARIANT(DirectIntegrator, SamplingIntegrator)
@@ -0,0 +1,428 @@
+#include <mitsuba/render/integrator.h>
+#include <mitsuba/render/bsdf.h>
+#include <mitsuba/render/emitter.h>
+#include <mitsuba/render/lighttree.h>
+#include <mitsuba/core/properties.h>
+#include <mutex>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**!
+
+.. _integrator-lightcuts:
+
+Stochastic lightcuts integrator (:monosp:`lightcuts`)
+-----------------------------------------------------
+
+.. pluginparameters::
+
+ * - max_cut_size
+   - |int|
+   - Maximum number of clusters of the light cut chosen at each shading point. Each cluster
+     costs one shadow ray, which bounds the cost of the integrator regardless of the number of
+     emitters in the scene. (Default: 16)
+
+ * - error_threshold
+   - |float|
+   - The cut is refined until the error bound of every cluster falls below this fraction of the
+     total estimated illumination, or until it reaches :monosp:`max_cut_size` clusters.
+     (Default: 0.02)
+
+ * - bsdf_samples
+   - |int|
+   - Number of samples that should be generated using the BSDF sampling strategies implemented
+     by the scene's surfaces. These are combined with the light cut using the power heuristic.
+     (Default: 1)
+
+ * - split_emitters
+   - |bool|
+   - Cluster the individual triangles of emissive meshes instead of treating each emitter as a
+     single light. (Default: |false|)
+
+ * - hide_emitters
+   - |bool|
+   - Hide directly visible emitters.
+     (Default: no, i.e. |false|)
+
+This integrator computes direct illumination from scenes with a very large number of emitters
+(e.g. hundreds of thousands of point or spot lights) using *stochastic lightcuts*. All finite
+emitters are clustered into a binary light tree (see :monosp:`emitter_sampling`). At each
+shading point, the integrator selects a *cut* through this tree, starting from the root and
+repeatedly splitting the cluster with the largest error bound, i.e. the largest estimated
+contribution that is not resolved into individual lights. Every cluster of the final cut is
+then represented by a single light that is sampled within the cluster proportionally to its
+estimated contribution, which yields an unbiased estimate with a bounded number of shadow rays.
+
+Infinite emitters are not part of the tree and are handled with one additional sample. The
+light cut is combined with BSDF sampling using multiple importance sampling, as in the
+:ref:`direct <integrator-direct>` integrator.
+
+.. note:: This integrator does not handle participating media or indirect illumination.
+
+.. tabs::
+    .. code-tab::  xml
+        :name: lightcuts-integrator
+
+        <integrator type="lightcuts">
+            <integer name="max_cut_size" value="32"/>
+        </integrator>
+
+    .. code-tab:: python
+
+        'type': 'lightcuts',
+        'max_cut_size': 32
+
+ */
+
+template <typename Float, typename Spectrum>
+class LightcutsIntegrator : public SamplingIntegrator<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(SamplingIntegrator, m_hide_emitters)
+    MI_IMPORT_TYPES(Scene, Sampler, Medium, Emitter, EmitterPtr, BSDF, BSDFPtr,
+                    LightTree)
+
+    LightcutsIntegrator(const Properties &props) : Base(props) {
+        m_max_cut_size = props.get<size_t>("max_cut_size", 16);
+        if (m_max_cut_size == 0)
+            Throw("The light cut must contain at least 1 cluster!");
+
+        m_error_threshold = props.get<ScalarFloat>("error_threshold", .02f);
+        if (m_error_threshold < 0.f)
+            Throw("The error threshold must be non-negative!");
+
+        m_bsdf_samples   = props.get<size_t>("bsdf_samples", 1);
+        m_split_emitters = props.get<bool>("split_emitters", false);
+        m_weight_bsdf    = 1.f / (ScalarFloat) m_bsdf_samples;
+    }
+
+    std::pair<Spectrum, Mask> sample(const Scene *scene,
+                                     Sampler *sampler,
+                                     const RayDifferential3f &ray,
+                                     const Medium * /* medium */,
+                                     Float * /* aovs */,
+                                     Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::SamplingIntegratorSample, active);
+
+        const LightTree *tree = light_tree(scene);
+
+        SurfaceInteraction3f si = scene->ray_intersect(
+            ray, +RayFlags::All, /* coherent = */ true, active);
+        Mask valid_ray = active && si.is_valid();
+
+        Spectrum result(0.f);
+
+        // ----------------------- Visible emitters -----------------------
+
+        if (!m_hide_emitters) {
+            EmitterPtr emitter_vis = si.emitter(scene, active);
+            if (dr::any_or<true>(dr::neq(emitter_vis, nullptr)))
+                result += emitter_vis->eval(si, active);
+        }
+
+        active &= si.is_valid();
+        if (dr::none_or<false>(active))
+            return { result, valid_ray };
+
+        BSDFContext ctx;
+        BSDFPtr bsdf = si.bsdf(ray);
+        auto flags = bsdf->flags();
+        Mask sample_emitter = active && has_flag(flags, BSDFFlags::Smooth);
+
+        // ---------------------- Light cut selection ---------------------
+
+        std::vector<UInt32> cut;
+        std::vector<Mask> cut_valid;
+        if (tree->node_count() > 0)
+            std::tie(cut, cut_valid) = select_cut(tree, si, sample_emitter);
+
+        // ----------------------- Emitter sampling -----------------------
+
+        /* Every cluster of the cut (and the set of infinite emitters) is
+           sampled exactly once, so the cut acts as a collection of emitter
+           sampling strategies over disjoint sets of lights. */
+        auto shade = [&](const DirectionSample3f &ds_, const Spectrum &emitter_val,
+                         Float pmf, Mask active_e) {
+            DirectionSample3f ds = ds_;
+            active_e &= dr::neq(ds.pdf, 0.f) && pmf > 0.f;
+            active_e &= !scene->ray_test(si.spawn_ray_to(ds.p), active_e);
+            if (dr::none_or<false>(active_e))
+                return;
+
+            // Query the BSDF for that emitter-sampled direction
+            Vector3f wo = si.to_local(ds.d);
+
+            /* Determine BSDF value and probability of having sampled
+               that same direction using BSDF sampling. */
+            auto [bsdf_val, bsdf_pdf] = bsdf->eval_pdf(ctx, si, wo, active_e);
+            bsdf_val = si.to_world_mueller(bsdf_val, -wo, si.wi);
+
+            Float mis = dr::select(ds.delta, Float(1.f), mis_weight(
+                ds.pdf * pmf, bsdf_pdf * (ScalarFloat) m_bsdf_samples));
+            result[active_e] += mis * bsdf_val * emitter_val / pmf;
+        };
+
+        if (dr::any_or<true>(sample_emitter)) {
+            for (size_t i = 0; i < cut.size(); ++i) {
+                Mask active_e = sample_emitter && cut_valid[i];
+                Float sample_1 = sampler->next_1d(active_e);
+                Point2f sample_2 = sampler->next_2d(active_e);
+                if (dr::none_or<false>(active_e))
+                    continue;
+
+                // Stochastically pick the light that represents the cluster
+                auto [index, prim_index, pmf, sample_re] =
+                    tree->sample_subtree(si, cut[i], sample_1, active_e);
+                active_e &= pmf > 0.f;
+                sample_2.x() = sample_re;
+
+                EmitterPtr emitter =
+                    dr::gather<EmitterPtr>(scene->emitters_dr(), index, active_e);
+                auto [ds, emitter_val] =
+                    m_split_emitters
+                        ? emitter->sample_direction_primitive(si, prim_index, sample_2, active_e)
+                        : emitter->sample_direction(si, sample_2, active_e);
+                shade(ds, emitter_val, pmf, active_e);
+            }
+
+            if (tree->infinite_count() > 0) {
+                Mask active_e = sample_emitter;
+                ScalarFloat count = (ScalarFloat) tree->infinite_count();
+                Float sample_1 = sampler->next_1d(active_e) * count;
+                Point2f sample_2 = sampler->next_2d(active_e);
+
+                UInt32 i = dr::minimum(UInt32(sample_1),
+                                       (uint32_t) tree->infinite_count() - 1u);
+                EmitterPtr emitter = dr::gather<EmitterPtr>(
+                    scene->emitters_dr(), tree->infinite_emitter(i, active_e), active_e);
+                auto [ds, emitter_val] = emitter->sample_direction(si, sample_2, active_e);
+                shade(ds, emitter_val, Float(1.f / count), active_e);
+            }
+        }
+
+        // ------------------------ BSDF sampling -------------------------
+
+        for (size_t i = 0; i < m_bsdf_samples; ++i) {
+            auto [bs, bsdf_val] = bsdf->sample(ctx, si, sampler->next_1d(active),
+                                               sampler->next_2d(active), active);
+            bsdf_val = si.to_world_mueller(bsdf_val, -bs.wo, si.wi);
+
+            Mask active_b = active && dr::any(dr::neq(unpolarized_spectrum(bsdf_val), 0.f));
+
+            // Trace the ray in the sampled direction and intersect against the scene
+            SurfaceInteraction3f si_bsdf =
+                scene->ray_intersect(si.spawn_ray(si.to_world(bs.wo)), active_b);
+
+            // Retain only rays that hit an emitter
+            EmitterPtr emitter = si_bsdf.emitter(scene, active_b);
+            active_b &= dr::neq(emitter, nullptr);
+
+            if (dr::any_or<true>(active_b)) {
+                Spectrum emitter_val = emitter->eval(si_bsdf, active_b);
+                Mask delta = has_flag(bs.sampled_type, BSDFFlags::Delta);
+
+                /* Determine probability of having sampled that same
+                   direction using the light cut. */
+                DirectionSample3f ds(scene, si_bsdf, si);
+                Mask active_p = active_b && !delta && sample_emitter;
+
+                Float emitter_pdf = 0.f;
+                if (dr::any_or<true>(active_p)) {
+                    Float pdf_dir = m_split_emitters
+                                        ? emitter->pdf_direction_primitive(si, ds, active_p)
+                                        : emitter->pdf_direction(si, ds, active_p);
+                    Float pmf = pdf_cut(tree, si, cut, cut_valid,
+                                        emitter->scene_index(active_p),
+                                        ds.prim_index, active_p);
+                    dr::masked(pmf, active_p && has_flag(emitter->flags(active_p),
+                                                         EmitterFlags::Infinite)) =
+                        1.f / (ScalarFloat) std::max(tree->infinite_count(), (size_t) 1);
+                    emitter_pdf = dr::select(active_p, pdf_dir * pmf, 0.f);
+                }
+
+                result[active_b] +=
+                    bsdf_val * emitter_val *
+                    mis_weight(bs.pdf * (ScalarFloat) m_bsdf_samples, emitter_pdf) *
+                    m_weight_bsdf;
+            }
+        }
+
+        return { result, valid_ray };
+    }
+
+    /**
+     * \brief Select the light cut of the given shading point
+     *
+     * Starting from the root, the interior node with the largest estimated
+     * contribution is split into its two children until the largest
+     * remaining bound falls below the error threshold, or the cut reaches
+     * its maximum size. Leaves are already exact and are never split.
+     *
+     * \return
+     *    The nodes of the cut and, for each slot, whether it is occupied.
+     */
+    std::pair<std::vector<UInt32>, std::vector<Mask>>
+    select_cut(const LightTree *tree, const SurfaceInteraction3f &si,
+               Mask active) const {
+        Point3f p  = dr::detach(si.p);
+        Normal3f n = dr::detach(si.n);
+
+        std::vector<UInt32> cut(m_max_cut_size, UInt32(0u));
+        std::vector<Mask> cut_valid(m_max_cut_size, Mask(false));
+        std::vector<Float> estimate(m_max_cut_size, Float(0.f)),
+                           bound(m_max_cut_size, Float(0.f));
+
+        estimate[0]  = tree->importance(cut[0], p, n, active);
+        bound[0]     = dr::select(tree->is_leaf(cut[0], active), 0.f, estimate[0]);
+        cut_valid[0] = active;
+        Float total  = estimate[0];
+
+        Mask refine = active;
+        for (size_t k = 0; k + 1 < m_max_cut_size; ++k) {
+            // Find the cluster with the largest error bound
+            Float best_bound = bound[0], best_estimate = estimate[0];
+            UInt32 best_slot = 0u, node = cut[0];
+            for (size_t j = 1; j <= k; ++j) {
+                Mask larger = bound[j] > best_bound;
+                best_bound    = dr::select(larger, bound[j], best_bound);
+                best_estimate = dr::select(larger, estimate[j], best_estimate);
+                best_slot     = dr::select(larger, UInt32((uint32_t) j), best_slot);
+                node          = dr::select(larger, cut[j], node);
+            }
+
+            /* Stop refining for good once the cut is accurate enough, so
+               that the occupied slots remain contiguous */
+            refine &= (best_bound > 0.f) && (best_bound > m_error_threshold * total);
+            if (dr::none_or<false>(refine))
+                break;
+
+            auto [left, right] = tree->node_children(node, refine);
+            Float estimate_left  = tree->importance(left, p, n, refine),
+                  estimate_right = tree->importance(right, p, n, refine),
+                  bound_left  = dr::select(tree->is_leaf(left, refine), 0.f, estimate_left),
+                  bound_right = dr::select(tree->is_leaf(right, refine), 0.f, estimate_right);
+
+            // The left child replaces its parent, the right one takes a new slot
+            for (size_t j = 0; j <= k; ++j) {
+                Mask replace = refine && dr::eq(best_slot, (uint32_t) j);
+                dr::masked(cut[j], replace)      = left;
+                dr::masked(estimate[j], replace) = estimate_left;
+                dr::masked(bound[j], replace)    = bound_left;
+            }
+
+            dr::masked(cut[k + 1], refine)      = right;
+            dr::masked(estimate[k + 1], refine) = estimate_right;
+            dr::masked(bound[k + 1], refine)    = bound_right;
+            cut_valid[k + 1] = refine;
+
+            dr::masked(total, refine) += estimate_left + estimate_right - best_estimate;
+        }
+
+        return { cut, cut_valid };
+    }
+
+    /**
+     * \brief Evaluate the probability of choosing the given light primitive
+     * when sampling the cluster of the cut that contains it
+     *
+     * This walks up the tree from the primitive's leaf until reaching a node
+     * of the cut, accumulating the probabilities of the traversal decisions
+     * made by \ref LightTree::sample_subtree().
+     */
+    Float pdf_cut(const LightTree *tree, const SurfaceInteraction3f &si,
+                  const std::vector<UInt32> &cut,
+                  const std::vector<Mask> &cut_valid, UInt32 index,
+                  UInt32 prim_index, Mask active) const {
+        if (cut.empty())
+            return 0.f;
+
+        Point3f p  = dr::detach(si.p);
+        Normal3f n = dr::detach(si.n);
+
+        auto in_cut = [&](const UInt32 &node) {
+            Mask result = false;
+            for (size_t j = 0; j < cut.size(); ++j)
+                result |= cut_valid[j] && dr::eq(cut[j], node);
+            return result;
+        };
+
+        UInt32 node = tree->emitter_leaf(index, prim_index, active);
+        active &= dr::neq(node, (uint32_t) -1);
+        Float pmf = 1.f;
+
+        Mask active_loop = active && !in_cut(node);
+        dr::Loop<Mask> loop("Lightcuts::pdf_cut", node, pmf, active_loop);
+        while (loop(active_loop)) {
+            UInt32 parent = tree->node_parent(node, active_loop);
+            auto [left, right] = tree->node_children(parent, active_loop);
+
+            Float importance_left  = tree->importance(left, p, n, active_loop),
+                  importance_right = tree->importance(right, p, n, active_loop),
+                  importance_total = importance_left + importance_right;
+
+            Float importance_node =
+                dr::select(dr::eq(node, left), importance_left, importance_right);
+
+            pmf = dr::select(importance_total > 0.f,
+                             pmf * (importance_node / importance_total), 0.f);
+            node = parent;
+
+            // The root is an ancestor of every node of the cut
+            active_loop &= !in_cut(node) && dr::neq(node, 0u) && (pmf > 0.f);
+        }
+
+        return dr::select(active && in_cut(node), pmf, 0.f);
+    }
+
+    /**
+     * Return the light tree over the emitters of the given scene. The scene's
+     * own tree is shared when it splits emitters the same way, otherwise one
+     * is built here and rebuilt whenever the scene's emitters change.
+     */
+    const LightTree *light_tree(const Scene *scene) const {
+        if (scene->light_tree() && scene->split_emitters() == m_split_emitters)
+            return scene->light_tree();
+
+        std::lock_guard<std::mutex> guard(m_tree_mutex);
+        if (!m_light_tree || m_tree_generation != scene->emitter_generation()) {
+            m_light_tree = new LightTree(scene->emitters(), m_split_emitters);
+            m_tree_generation = scene->emitter_generation();
+        }
+        return m_light_tree.get();
+    }
+
+    std::string to_string() const override {
+        std::ostringstream oss;
+        oss << "LightcutsIntegrator[" << std::endl
+            << "  max_cut_size = " << m_max_cut_size << "," << std::endl
+            << "  error_threshold = " << m_error_threshold << "," << std::endl
+            << "  bsdf_samples = " << m_bsdf_samples << "," << std::endl
+            << "  split_emitters = " << m_split_emitters << std::endl
+            << "]";
+        return oss.str();
+    }
+
+    Float mis_weight(Float pdf_a, Float pdf_b) const {
+        pdf_a *= pdf_a;
+        pdf_b *= pdf_b;
+        Float w = pdf_a / (pdf_a + pdf_b);
+        return dr::select(dr::isfinite(w), w, 0.f);
+    }
+
+    MI_DECLARE_CLASS()
+private:
+    size_t m_max_cut_size;
+    ScalarFloat m_error_threshold;
+    size_t m_bsdf_samples;
+    bool m_split_emitters;
+    ScalarFloat m_weight_bsdf;
+
+    /// Light tree built lazily when the scene does not provide a suitable one
+    mutable ref<LightTree> m_light_tree;
+    /// Emitter generation of the scene that \ref m_light_tree was built for
+    mutable uint32_t m_tree_generation = 0;
+    mutable std::mutex m_tree_mutex;
+};
+
+MI_IMPLEMENT_CLASS_VARIANT(LightcutsIntegrator, SamplingIntegrator)
+MI_EXPORT_PLUGIN(LightcutsIntegrator, "Stochastic lightcuts integrator");
+NAMESPACE_END(mitsuba)
@@ -35,6 +35,13 @@ Path tracer (:monosp:`path`)
    - |bool|
    - Hide directly visible emitters. (Default: no, i.e. |false|)
 
+ * - lobe_selection
+   - |bool|
+   - Account for a coarse bound of the BSDF lobe at each path vertex when
+     selecting emitters, which favours emitters within the reflection lobe of
+     glossy materials. This only has an effect with the scene's
+     :monosp:`tree` emitter sampling strategy. (Default: |false|)
+
 This integrator implements a basic path tracer and is a **good default choice**
 when there is no strong reason to prefer another method.
 
@@ -90,7 +97,9 @@ public:
     MI_IMPORT_BASE(MonteCarloIntegrator, m_max_depth, m_rr_depth, m_hide_emitters)
     MI_IMPORT_TYPES(Scene, Sampler, Medium, Emitter, EmitterPtr, BSDF, BSDFPtr)
 
-    PathIntegrator(const Properties &props) : Base(props) { }
+    PathIntegrator(const Properties &props) : Base(props) {
+        m_lobe_selection = props.get<bool>("lobe_selection", false);
+    }
 
     std::pair<Spectrum, Bool> sample(const Scene *scene,
                                      Sampler *sampler,
@@ -118,6 +127,7 @@ public:
         Interaction3f prev_si         = dr::zeros<Interaction3f>();
         Float         prev_bsdf_pdf   = 1.f;
         Bool          prev_bsdf_delta = true;
+        BSDFLobe3f    prev_lobe;
         BSDFContext   bsdf_ctx;
 
         /* Set up a Dr.Jit loop. This optimizes away to a normal loop in scalar
@@ -132,7 +142,7 @@ public:
            lead to undefined behavior. */
         dr::Loop<Bool> loop("Path Tracer", sampler, ray, throughput, result,
                             eta, depth, valid_ray, prev_si, prev_bsdf_pdf,
-                            prev_bsdf_delta, active);
+                            prev_bsdf_delta, prev_lobe, active);
 
         /* Inform the loop about the maximum number of loop iterations.
            This accelerates wavefront-style rendering by avoiding costly
@@ -159,9 +169,14 @@ public:
                 DirectionSample3f ds(scene, si, prev_si);
                 Float em_pdf = 0.f;
 
-                if (dr::any_or<true>(!prev_bsdf_delta))
-                    em_pdf = scene->pdf_emitter_direction(prev_si, ds,
-                                                          !prev_bsdf_delta);
+                if (dr::any_or<true>(!prev_bsdf_delta)) {
+                    if (m_lobe_selection)
+                        em_pdf = scene->pdf_emitter_direction(
+                            prev_si, prev_lobe, ds, !prev_bsdf_delta);
+                    else
+                        em_pdf = scene->pdf_emitter_direction(prev_si, ds,
+                                                              !prev_bsdf_delta);
+                }
 
                 // Compute MIS weight for emitter sample from previous bounce
                 Float mis_bsdf = mis_weight(prev_bsdf_pdf, em_pdf);
@@ -190,10 +205,19 @@ public:
             Spectrum em_weight = dr::zeros<Spectrum>();
             Vector3f wo = dr::zeros<Vector3f>();
 
+            // Coarse bound of the BSDF lobe used to select emitters
+            BSDFLobe3f lobe;
+            if (m_lobe_selection)
+                lobe = bsdf->lobe(bsdf_ctx, si, active_next);
+
             if (dr::any_or<true>(active_em)) {
                 // Sample the emitter
-                std::tie(ds, em_weight) = scene->sample_emitter_direction(
-                    si, sampler->next_2d(), true, active_em);
+                if (m_lobe_selection)
+                    std::tie(ds, em_weight) = scene->sample_emitter_direction(
+                        si, lobe, sampler->next_2d(), true, active_em);
+                else
+                    std::tie(ds, em_weight) = scene->sample_emitter_direction(
+                        si, sampler->next_2d(), true, active_em);
                 active_em &= dr::neq(ds.pdf, 0.f);
 
                 /* Given the detached emitter sample, recompute its contribution
@@ -260,6 +284,7 @@ public:
             prev_si = si;
             prev_bsdf_pdf = bsdf_sample.pdf;
             prev_bsdf_delta = has_flag(bsdf_sample.sampled_type, BSDFFlags::Delta);
+            prev_lobe = lobe;
 
             // -------------------- Stopping criterion ---------------------
 
@@ -292,8 +317,9 @@ public:
     std::string to_string() const override {
         return tfm::format("PathIntegrator[\n"
             "  max_depth = %u,\n"
-            "  rr_depth = %u\n"
-            "]", m_max_depth, m_rr_depth);
+            "  rr_depth = %u,\n"
+            "  lobe_selection = %s\n"
+            "]", m_max_depth, m_rr_depth, m_lobe_selection);
     }
 
     /// Compute a multiple importance sampling weight using the power heuristic
@@ -317,6 +343,8 @@ public:
     }
 
     MI_DECLARE_CLASS()
+private:
+    bool m_lobe_selection;
 };
 
 MI_IMPLEMENT_CLASS_VARIANT(PathIntegrator, MonteCarloIntegrator)
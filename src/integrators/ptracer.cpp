@@ -1,10 +1,13 @@
+#include <mitsuba/core/distr_1d.h>
 #include <mitsuba/core/properties.h>
 #include <mitsuba/core/ray.h>
+#include <mitsuba/core/warp.h>
 #include <mitsuba/render/integrator.h>
 #include <mitsuba/render/bsdf.h>
 #include <mitsuba/render/emitter.h>
 #include <mitsuba/render/records.h>
 #include <mitsuba/render/sampler.h>
+#include <mutex>
 
 NAMESPACE_BEGIN(mitsuba)
 
@@ -37,6 +40,25 @@ Particle tracer (:monosp:`ptracer`)
    - If specified, divides the workload in successive passes with :paramtype:`samples_per_pass`
      samples per pixel.
 
+ * - pilot_samples
+   - |int|
+   - Number of samples per pixel of a pilot pass that learns which emitters and emission
+     directions contribute to the image (see below). (Default: 0, i.e. no pilot pass)
+
+ * - guide_resolution
+   - |int|
+   - Number of direction bins per axis of the importance map of each emitter. (Default: 4)
+
+ * - guide_candidates
+   - |int|
+   - Number of candidate rays drawn from the chosen emitter, among which one is resampled
+     according to the importance map. (Default: 4)
+
+ * - guide_fallback
+   - |float|
+   - Defensive probability, in :math:`(0, 1]`, of selecting emitters and directions
+     regardless of the importance map. (Default: 0.2)
+
 This integrator traces rays starting from light sources and attempts to connect them
 to the sensor at each bounce.
 It does not support media (volumes).
@@ -50,6 +72,19 @@ possible to divide the workload in image-space tiles. The :paramtype:`samples_pe
 allows splitting work in successive passes of the given sample count per pixel. It is particularly
 useful in wavefront mode.
 
+In scenes with many emitters, most particles are usually emitted where the camera never sees
+them. When :paramtype:`pilot_samples` is positive, the first call to ``render()`` for a scene
+renders a pilot pass whose particles record their contribution to the film in an importance map,
+indexed by emitter and by (equal-area) bin of the emission direction. The particles of every
+following pass also record their contribution, which keeps refining the map across calls (e.g.
+of progressive renderings). Calling ``parameters_changed()`` on the integrator discards the map,
+which should be done after modifying the scene. Each pass selects emitters from a mixture of the
+scene's emitter sampling strategy and of the learned contribution of each emitter. It then draws :paramtype:`guide_candidates` rays from the chosen emitter, and
+keeps one of them with probability proportional to its learned directional importance
+(resampled importance sampling). Particles are weighted accordingly, so the result stays
+unbiased, and the defensive :paramtype:`guide_fallback` probability ensures that emitters and
+directions that did not contribute during the pilot pass can still be sampled.
+
 .. tabs::
     .. code-tab::  xml
 
@@ -72,7 +107,137 @@ public:
     MI_IMPORT_TYPES(Scene, Sensor, Film, Sampler, ImageBlock, Emitter,
                      EmitterPtr, BSDF, BSDFPtr)
 
-    ParticleTracerIntegrator(const Properties &props) : Base(props) { }
+    using FloatStorage = DynamicBuffer<Float>;
+
+    ParticleTracerIntegrator(const Properties &props) : Base(props) {
+        m_pilot_samples    = props.get<uint32_t>("pilot_samples", 0);
+        m_guide_resolution = props.get<uint32_t>("guide_resolution", 4);
+        m_guide_candidates = props.get<uint32_t>("guide_candidates", 4);
+        m_guide_fallback   = props.get<ScalarFloat>("guide_fallback", .2f);
+
+        if (m_guide_resolution == 0 || m_guide_candidates == 0)
+            Throw("The guide resolution and number of candidates must be positive!");
+        if (!(m_guide_fallback > 0.f && m_guide_fallback <= 1.f))
+            Throw("The guide fallback probability must be in (0, 1]!");
+    }
+
+    using Base::render;
+
+    TensorXf render(Scene *scene,
+                    Sensor *sensor,
+                    uint32_t seed = 0,
+                    uint32_t spp = 0,
+                    bool develop = true,
+                    bool evaluate = true) override {
+        if (m_pilot_samples == 0 || scene->emitters().empty())
+            return Base::render(scene, sensor, seed, spp, develop, evaluate);
+
+        // The pilot pass overrides the sample count of the sampler
+        if (spp == 0)
+            spp = sensor->sampler()->sample_count();
+
+        // Only learn from a pilot pass if no map was learned for this scene
+        size_t size = scene->emitters().size() * (size_t) dr::sqr(m_guide_resolution);
+        if (m_guide_scene != scene || m_guide_totals.size() != size)
+            render_pilot(scene, sensor, seed);
+
+        // Keep refining the importance map with the particles of this pass
+        begin_guide_recording();
+        TensorXf result = Base::render(scene, sensor, seed, spp, develop, evaluate);
+        end_guide_recording();
+
+        return result;
+    }
+
+    /// Discard the learned importance map, which is learned again by the next render() call
+    void parameters_changed(const std::vector<std::string> &keys = {}) override {
+        Base::parameters_changed(keys);
+        m_guide_scene = nullptr;
+        m_guide_totals.clear();
+        m_guide_emitters   = AliasDistribution<Float>();
+        m_guide_directions = FloatStorage();
+    }
+
+    /**
+     * \brief Render the pilot pass, recording the contribution of each
+     * emitter and emission direction, and build the importance map from it
+     */
+    void render_pilot(Scene *scene, Sensor *sensor, uint32_t seed) {
+        size_t emitter_count = scene->emitters().size(),
+               bin_count     = (size_t) dr::sqr(m_guide_resolution);
+
+        m_guide_scene = scene;
+        m_guide_totals.assign(emitter_count * bin_count, 0.f);
+        m_guide_emitters   = AliasDistribution<Float>();
+        m_guide_directions = FloatStorage();
+
+        // Decorrelate the pilot pass from the pass that uses its result
+        begin_guide_recording();
+        Base::render(scene, sensor, seed ^ 0x9e3779b9u, m_pilot_samples,
+                     /* develop = */ false, /* evaluate = */ true);
+
+        if (!end_guide_recording()) {
+            Log(Warn, "The pilot pass did not record any contribution, emitted "
+                      "rays will not be guided.");
+            return;
+        }
+
+        Log(Debug, "Learned the emission of %zu emitters over %zu direction "
+                   "bins from %u pilot samples per pixel.",
+            emitter_count, bin_count, m_pilot_samples);
+    }
+
+    /// Start recording the contribution of the particles of the next pass
+    void begin_guide_recording() {
+        m_guide_recorded = dr::zeros<FloatStorage>(m_guide_totals.size());
+        dr::make_opaque(m_guide_recorded);
+        m_guide_recording = true;
+    }
+
+    /**
+     * \brief Accumulate the recorded contributions and rebuild the
+     * importance map from everything recorded so far
+     *
+     * \return Whether any contribution was recorded so far
+     */
+    bool end_guide_recording() {
+        m_guide_recording = false;
+
+        auto &&recorded = dr::migrate(m_guide_recorded, AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+        for (size_t i = 0; i < m_guide_totals.size(); ++i)
+            m_guide_totals[i] += recorded.data()[i];
+        m_guide_recorded = FloatStorage();
+
+        size_t bin_count     = (size_t) dr::sqr(m_guide_resolution),
+               emitter_count = m_guide_totals.size() / bin_count;
+
+        // Normalize the direction bins of each emitter to a mean of one
+        std::vector<ScalarFloat> directions(emitter_count * bin_count, 1.f),
+                                 marginal(emitter_count, 0.f);
+        bool has_data = false;
+        for (size_t i = 0; i < emitter_count; ++i) {
+            const ScalarFloat *row = m_guide_totals.data() + i * bin_count;
+            for (size_t j = 0; j < bin_count; ++j)
+                marginal[i] += row[j];
+            if (!(marginal[i] > 0.f) || !std::isfinite(marginal[i])) {
+                marginal[i] = 0.f;
+                continue;
+            }
+            for (size_t j = 0; j < bin_count; ++j)
+                directions[i * bin_count + j] =
+                    row[j] * (ScalarFloat) bin_count / marginal[i];
+            has_data = true;
+        }
+
+        if (has_data) {
+            m_guide_directions = dr::load<FloatStorage>(directions.data(), directions.size());
+            m_guide_emitters   = AliasDistribution<Float>(marginal.data(), marginal.size());
+        }
+
+        return has_data;
+    }
 
     void sample(const Scene *scene, const Sensor *sensor, Sampler *sampler,
                 ImageBlock *block, ScalarFloat sample_scale) const override {
@@ -81,8 +246,13 @@ public:
             sample_visible_emitters(scene, sensor, sampler, block, sample_scale);
 
         // Primary & further bounces illumination
-        auto [ray, throughput] = prepare_ray(scene, sensor, sampler);
-        trace_light_ray(ray, scene, sensor, sampler, throughput, block, sample_scale);
+        auto [ray, throughput, emitter_idx] = prepare_ray(scene, sensor, sampler);
+        auto [contribution, alpha] = trace_light_ray(
+            ray, scene, sensor, sampler, throughput, block, sample_scale);
+        DRJIT_MARK_USED(alpha);
+
+        if (m_guide_recording)
+            record_guide(emitter_idx, ray.d, contribution);
     }
 
     /**
@@ -164,14 +334,22 @@ public:
         connect_sensor(scene, si, sensor_ds, nullptr, weight, block, sample_scale, active);
     }
 
-    /// Samples a ray from a random emitter in the scene.
-    std::pair<Ray3f, Spectrum> prepare_ray(const Scene *scene,
-                                           const Sensor *sensor,
-                                           Sampler *sampler) const {
+    /**
+     * Samples a ray from a random emitter in the scene.
+     *
+     * \return The ray, its weight and the index of the emitter (only
+     * meaningful when the emission is guided).
+     */
+    std::tuple<Ray3f, Spectrum, UInt32> prepare_ray(const Scene *scene,
+                                                    const Sensor *sensor,
+                                                    Sampler *sampler) const {
         Float time = sensor->shutter_open();
         if (sensor->shutter_open_time() > 0)
             time += sampler->next_1d() * sensor->shutter_open_time();
 
+        if (m_pilot_samples > 0 && !scene->emitters().empty())
+            return prepare_guided_ray(scene, time, sampler);
+
         // Prepare random samples.
         Float wavelength_sample  = sampler->next_1d();
         Point2f direction_sample = sampler->next_2d(),
@@ -181,7 +359,106 @@ public:
         auto [ray, ray_weight, emitter] = scene->sample_emitter_ray(
             time, wavelength_sample, direction_sample, position_sample);
 
-        return { ray, ray_weight };
+        return { ray, ray_weight, 0u };
+    }
+
+    /**
+     * Samples a ray according to the importance map learned during the
+     * pilot pass, or from the scene's emitter sampling strategy while the
+     * pilot pass is being rendered.
+     */
+    std::tuple<Ray3f, Spectrum, UInt32>
+    prepare_guided_ray(const Scene *scene, Float time, Sampler *sampler) const {
+        bool learned = !m_guide_emitters.empty();
+
+        /* 1. Emitter selection from a mixture of the scene's strategy and of
+              the learned contribution of each emitter */
+        ScalarFloat alpha = learned ? m_guide_fallback : 1.f;
+        Float sample = sampler->next_1d();
+        Mask pick_scene = sample < alpha;
+
+        UInt32 index = 0;
+        auto [index_s, weight_s, sample_s] = scene->sample_emitter(
+            dr::minimum(sample / alpha, dr::OneMinusEpsilon<Float>), pick_scene);
+        DRJIT_MARK_USED(weight_s);
+        DRJIT_MARK_USED(sample_s);
+        dr::masked(index, pick_scene) = index_s;
+
+        Float pmf = alpha * scene->pdf_emitter(index);
+        if (learned) {
+            dr::masked(index, !pick_scene) = m_guide_emitters.sample(
+                dr::minimum((sample - alpha) / (1.f - alpha),
+                            dr::OneMinusEpsilon<Float>), !pick_scene);
+            pmf = alpha * scene->pdf_emitter(index) +
+                  (1.f - alpha) * m_guide_emitters.eval_pmf_normalized(index);
+        }
+
+        EmitterPtr emitter = dr::gather<EmitterPtr>(scene->emitters_dr(), index);
+
+        /* 2. Streaming resampled importance sampling of the emitted ray among
+              several candidates, targeting the learned directional
+              importance times the candidate's weight */
+        uint32_t candidates = learned ? m_guide_candidates : 1;
+        Ray3f ray = dr::zeros<Ray3f>();
+        Spectrum weight = 0.f;
+        Float target_sum = 0.f, target_chosen = 0.f;
+
+        for (uint32_t i = 0; i < candidates; ++i) {
+            Float wavelength_sample  = sampler->next_1d();
+            Point2f direction_sample = sampler->next_2d(),
+                    position_sample  = sampler->next_2d();
+
+            auto [ray_i, weight_i] = emitter->sample_ray(
+                time, wavelength_sample, position_sample, direction_sample);
+
+            Float target = dr::mean(unpolarized_spectrum(weight_i));
+            if (learned)
+                target *= guide_importance(index, ray_i.d);
+            target = dr::select(dr::isfinite(target) && target > 0.f, target, 0.f);
+
+            target_sum += target;
+            Mask replace = (target > 0.f) && (sampler->next_1d() * target_sum < target);
+            dr::masked(ray, replace)           = ray_i;
+            dr::masked(weight, replace)        = weight_i;
+            dr::masked(target_chosen, replace) = target;
+        }
+
+        weight *= dr::select(target_chosen > 0.f,
+                             target_sum / ((ScalarFloat) candidates * target_chosen), 0.f);
+
+        return { ray, weight * dr::select(pmf > 0.f, dr::rcp(pmf), 0.f), index };
+    }
+
+    /// Index of the direction bin of the importance map of each emitter
+    UInt32 guide_bin(const Vector3f &d) const {
+        Point2f uv = warp::uniform_sphere_to_square(d) * (ScalarFloat) m_guide_resolution;
+        UInt32 x = dr::minimum(UInt32(dr::maximum(uv.x(), 0.f)), m_guide_resolution - 1),
+               y = dr::minimum(UInt32(dr::maximum(uv.y(), 0.f)), m_guide_resolution - 1);
+        return y * m_guide_resolution + x;
+    }
+
+    /// Learned relative importance of the given emission direction
+    Float guide_importance(const UInt32 &index, const Vector3f &d) const {
+        UInt32 offset = index * dr::sqr(m_guide_resolution) + guide_bin(d);
+        return m_guide_fallback + (1.f - m_guide_fallback) *
+               dr::gather<Float>(m_guide_directions, offset);
+    }
+
+    /// Record the contribution of a particle emitted in direction `d`
+    void record_guide(const UInt32 &index, const Vector3f &d,
+                      const Spectrum &contribution) const {
+        Float value = dr::detach(dr::mean(unpolarized_spectrum(contribution)));
+        Mask active = dr::isfinite(value) && value > 0.f;
+        if (dr::none_or<false>(active))
+            return;
+
+        UInt32 offset = index * dr::sqr(m_guide_resolution) + guide_bin(d);
+
+        std::unique_lock<std::mutex> guard(m_guide_mutex, std::defer_lock);
+        if constexpr (!dr::is_jit_v<Float>)
+            guard.lock();
+
+        dr::scatter_reduce(ReduceOp::Add, m_guide_recorded, value, offset, active);
     }
 
     /**
@@ -195,7 +472,8 @@ public:
      * they require a direct connection from the emitter to the sensor. See
      * \ref sample_visible_emitters.
      *
-     * \return The radiance along the ray and an alpha value.
+     * \return The total contribution of the light path splatted to the
+     * block, and an alpha value.
      */
     std::pair<Spectrum, Float>
     trace_light_ray(Ray3f ray, const Scene *scene, const Sensor *sensor,
@@ -206,6 +484,9 @@ public:
 
         Int32 depth = 1;
 
+        // Accumulates the contributions splatted to the block
+        Spectrum result = 0.f;
+
         /* ---------------------- Path construction ------------------------- */
         // First intersection from the emitter to the scene
         SurfaceInteraction3f si = scene->ray_intersect(ray, active);
@@ -218,7 +499,7 @@ public:
            generates wavefront or megakernel renderer based on configuration).
            Register everything that changes as part of the loop here */
         dr::Loop<Mask> loop("Particle Tracer Integrator", active, depth, ray,
-                            throughput, si, eta, sampler);
+                            throughput, result, si, eta, sampler);
 
         // Incrementally build light path using BSDF sampling.
         while (loop(active)) {
@@ -228,9 +509,9 @@ public:
                from the sensor to the current surface point. */
             auto [sensor_ds, sensor_weight] =
                 sensor->sample_direction(si, sampler->next_2d(), active);
-            connect_sensor(scene, si, sensor_ds, bsdf,
-                           throughput * sensor_weight, block, sample_scale,
-                           active);
+            result += connect_sensor(scene, si, sensor_ds, bsdf,
+                                     throughput * sensor_weight, block,
+                                     sample_scale, active);
 
             /* ----------------------- BSDF sampling ------------------------ */
             // Sample BSDF * cos(theta).
@@ -276,7 +557,7 @@ public:
             }
         }
 
-        return { throughput, 1.f };
+        return { result, 1.f };
     }
 
     /**
@@ -371,12 +652,45 @@ public:
     std::string to_string() const override {
         return tfm::format("ParticleTracerIntegrator[\n"
                            "  max_depth = %i,\n"
-                           "  rr_depth = %i\n"
+                           "  rr_depth = %i,\n"
+                           "  pilot_samples = %u,\n"
+                           "  guide_resolution = %u,\n"
+                           "  guide_candidates = %u,\n"
+                           "  guide_fallback = %f\n"
                            "]",
-                           m_max_depth, m_rr_depth);
+                           m_max_depth, m_rr_depth, m_pilot_samples,
+                           m_guide_resolution, m_guide_candidates,
+                           m_guide_fallback);
     }
 
     MI_DECLARE_CLASS()
+
+private:
+    uint32_t m_pilot_samples;
+    uint32_t m_guide_resolution;
+    uint32_t m_guide_candidates;
+    ScalarFloat m_guide_fallback;
+
+    /// Whether the contribution of the particles is currently being recorded
+    bool m_guide_recording = false;
+
+    /// Per emitter and direction bin: contribution recorded by the current pass
+    mutable FloatStorage m_guide_recorded;
+
+    /// Per emitter and direction bin: contribution recorded by all passes so far
+    std::vector<ScalarFloat> m_guide_totals;
+
+    /// Scene for which the importance map was learned (only compared, never dereferenced)
+    const Scene *m_guide_scene = nullptr;
+
+    /// Serializes recording in scalar variants
+    mutable std::mutex m_guide_mutex;
+
+    /// Per emitter and direction bin: relative importance (mean of one per emitter)
+    FloatStorage m_guide_directions;
+
+    /// Learned contribution of each emitter (empty if guiding is inactive)
+    AliasDistribution<Float> m_guide_emitters;
 };
 
 MI_IMPLEMENT_CLASS_VARIANT(ParticleTracerIntegrator, AdjointIntegrator);
@@ -0,0 +1,113 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def create_test_scene(integrator, light_count=16, envmap=False):
+    scene = {
+        'type': 'scene',
+        'integrator': integrator,
+        'sensor': {
+            'type': 'perspective',
+            'to_world': mi.ScalarTransform4f.look_at(
+                origin=(0, 0, 3),
+                target=(0, 0, 0),
+                up=(0, 1, 0),
+            ),
+            'sampler': {'type': 'independent'},
+            'film': {
+                'type': 'hdrfilm',
+                'width': 8, 'height': 8,
+                'rfilter': {'type': 'box'}
+            },
+        },
+        'receiver': {
+            'type': 'rectangle',
+            'bsdf': {'type': 'diffuse'},
+        },
+    }
+
+    # A grid of point lights with varying intensities above the receiver
+    side = int(light_count ** .5)
+    for i in range(light_count):
+        x, y = i % side, i // side
+        scene[f'light_{i}'] = {
+            'type': 'point',
+            'position': [(x + .5) / side * 2 - 1, (y + .5) / side * 2 - 1, .5],
+            'intensity': {'type': 'spectrum', 'value': 1 + (i % 3)},
+        }
+
+    if envmap:
+        scene['envmap'] = {'type': 'constant', 'radiance': {'type': 'rgb', 'value': .5}}
+
+    return mi.load_dict(scene)
+
+
+@pytest.mark.parametrize('max_cut_size', [1, 4, 64])
+@pytest.mark.parametrize('envmap', [False, True])
+def test01_lightcuts_matches_direct(variants_all_rgb, max_cut_size, envmap):
+    """
+    Stochastic lightcuts are unbiased, so their average over many samples
+    should match the direct illumination integrator regardless of the cut size.
+    """
+    integrator = {'type': 'lightcuts', 'max_cut_size': max_cut_size}
+    scene = create_test_scene(integrator, envmap=envmap)
+    image = scene.integrator().render(scene, seed=0, spp=256)
+
+    scene_ref = create_test_scene({'type': 'direct'}, envmap=envmap)
+    image_ref = scene_ref.integrator().render(scene_ref, seed=0, spp=256)
+
+    mean, mean_ref = dr.mean(image.array), dr.mean(image_ref.array)
+    assert dr.allclose(mean, mean_ref, rtol=2e-2)
+
+
+def test02_lightcuts_exact_cut(variant_scalar_rgb):
+    """
+    A cut that resolves every point light is noise-free
+    """
+    integrator = {'type': 'lightcuts', 'max_cut_size': 16,
+                  'error_threshold': 0, 'bsdf_samples': 0}
+    scene = create_test_scene(integrator, light_count=16)
+    ray = mi.RayDifferential3f(o=[.1, .2, 3], d=[0, 0, -1])
+
+    results = []
+    for seed in range(4):
+        sampler = mi.load_dict({'type': 'independent'})
+        sampler.seed(seed)
+        result, valid, _ = scene.integrator().sample(scene, sampler, ray)
+        assert valid
+        results.append(result)
+
+    assert dr.all(results[0] > 0)
+    for result in results[1:]:
+        assert dr.allclose(result, results[0])
+
+
+def test03_lightcuts_emitter_update(variants_vec_rgb):
+    """
+    The light tree follows the emitters when they are moved after a render
+    """
+    integrator = {'type': 'lightcuts', 'max_cut_size': 4}
+    scene = create_test_scene(integrator)
+    params = mi.traverse(scene)
+
+    # Start with every light below the receiver, which is then unlit
+    positions = {}
+    for i in range(16):
+        key = f'light_{i}.position'
+        positions[key] = mi.Point3f(params[key])
+        params[key] = mi.Point3f(positions[key].x, positions[key].y, -.5)
+    params.update()
+    image = scene.integrator().render(scene, seed=0, spp=4)
+    assert dr.all(image.array == 0)
+
+    for key, position in positions.items():
+        params[key] = position
+    params.update()
+    image = scene.integrator().render(scene, seed=0, spp=256)
+
+    scene_ref = create_test_scene({'type': 'direct'})
+    image_ref = scene_ref.integrator().render(scene_ref, seed=0, spp=256)
+
+    mean, mean_ref = dr.mean(image.array), dr.mean(image_ref.array)
+    assert dr.allclose(mean, mean_ref, rtol=2e-2)
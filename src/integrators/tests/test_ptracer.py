@@ -236,3 +236,61 @@ def test07_adjoint_integrator_trampoline(variants_all_ad_rgb):
     mi.load_dict({
         'type': 'myptracer'
     })
+
+
+@pytest.mark.parametrize('emitter', ['directionalarea', 'directional'])
+def test08_render_guided(variants_vec_rgb, emitter):
+    """
+    Guiding the emission with a pilot pass should not change the expected
+    value of the image
+    """
+    scene, integrator = create_test_scene(emitter=emitter)
+    reference = integrator.render(scene, seed=0, spp=64, develop=True)
+
+    integrator = mi.load_dict({
+        'type': 'ptracer',
+        'samples_per_pass': 16,
+        'rr_depth': 9,
+        'max_depth': 4,
+        'pilot_samples': 16,
+    })
+    image = integrator.render(scene, seed=1, spp=64, develop=True)
+
+    assert dr.all(dr.isfinite(dr.ravel(image)))
+    assert dr.allclose(dr.mean(dr.ravel(image)), dr.mean(dr.ravel(reference)),
+                       rtol=5e-2)
+
+
+def test09_render_guided_progressive(variants_vec_rgb):
+    """
+    The importance map is only learned by a pilot pass on the first call, and
+    refined by the following ones
+    """
+    scene, integrator = create_test_scene(emitter='directionalarea')
+    reference = integrator.render(scene, seed=0, spp=64, develop=True)
+
+    integrator = mi.load_dict({
+        'type': 'ptracer',
+        'rr_depth': 9,
+        'max_depth': 4,
+        'pilot_samples': 16,
+    })
+
+    pilot_size = 8 * 8 * 16
+    images = []
+    for i in range(16):
+        with dr.scoped_set_flag(dr.JitFlag.KernelHistory, True):
+            images.append(integrator.render(scene, seed=i, spp=4, develop=True))
+            history = dr.kernel_history([dr.KernelType.JIT])
+        pilot = any(k['size'] == pilot_size for k in history)
+        assert pilot == (i == 0)
+
+    # Discarding the map runs the pilot pass again
+    integrator.parameters_changed()
+    with dr.scoped_set_flag(dr.JitFlag.KernelHistory, True):
+        integrator.render(scene, seed=16, spp=4, develop=True)
+        history = dr.kernel_history([dr.KernelType.JIT])
+    assert any(k['size'] == pilot_size for k in history)
+
+    image = sum(dr.mean(dr.ravel(img)) for img in images) / len(images)
+    assert dr.allclose(image, dr.mean(dr.ravel(reference)), rtol=5e-2)
@@ -0,0 +1,88 @@
+import importlib
+import os
+import sys
+
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+@pytest.fixture
+def Reservoir(variants_vec_rgb):
+    """
+    The reservoirs of utils/reservoir.py, whose fields use the types of the
+    variant that was active when the module was imported
+    """
+    root = os.path.realpath(os.path.join(os.path.dirname(__file__), '../../..'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    reservoir = importlib.import_module('utils.reservoir')
+    if reservoir.Reservoir.DRJIT_STRUCT['w_sum'] is not mi.Float:
+        reservoir = importlib.reload(reservoir)
+    return reservoir.Reservoir
+
+
+def create_reservoir(Reservoir, light_idx, w_sum, p_hat, M):
+    size = len(w_sum)
+    r = Reservoir(size)
+    r.light_idx = mi.UInt32(light_idx)
+    r.p = mi.Point3f(dr.arange(mi.Float, size), 1, 2)
+    r.n = mi.Normal3f(0, 0, 1)
+    r.uv = mi.Point2f(.25, dr.arange(mi.Float, size) / size)
+    r.p_hat = mi.Float(p_hat)
+    r.w_sum = mi.Float(w_sum)
+    r.M = mi.UInt32(M)
+    return r
+
+
+def test01_merge(Reservoir):
+    """
+    Merging reservoirs of the same shading point sums their weights and
+    candidate counts
+    """
+    a = create_reservoir(Reservoir, [0, 1, 2], [1, 2, 0], [.5, 1, 0], [1, 4, 0])
+    b = create_reservoir(Reservoir, [3, 4, 5], [3, 0, 2], [2, 0, 4], [2, 3, 5])
+
+    a.merge(b, b.p_hat, mi.Float(.5, .5, .5))
+    assert dr.allclose(a.w_sum, [4, 2, 2])
+    assert dr.all(dr.eq(a.M, mi.UInt32(3, 7, 5)))
+
+    # The sample of the other reservoir is taken with probability 3/4, never
+    # if it is empty, and always if this one is
+    assert dr.all(dr.eq(a.light_idx, mi.UInt32(3, 1, 5)))
+    assert dr.allclose(a.p_hat, [2, 1, 4])
+
+    # Inactive lanes are left unchanged
+    c = create_reservoir(Reservoir, [0, 1, 2], [1, 2, 0], [.5, 1, 0], [1, 4, 0])
+    c.merge(b, b.p_hat, mi.Float(0, 0, 0), mi.Bool(False))
+    assert dr.allclose(c.w_sum, [1, 2, 0])
+    assert dr.all(dr.eq(c.M, mi.UInt32(1, 4, 0)))
+    assert dr.all(dr.eq(c.light_idx, mi.UInt32(0, 1, 2)))
+
+
+def test02_renormalize(Reservoir):
+    """
+    Capping the candidate count keeps the contribution weight
+    """
+    r = create_reservoir(Reservoir, [0, 1, 2], [6, 3, 0], [2, .5, 0], [30, 20, 0])
+    weight = r.weight()
+
+    r.renormalize(10)
+    assert dr.all(dr.eq(r.M, 10))
+    assert dr.allclose(r.weight(), weight)
+    assert dr.allclose(r.w_sum, [2, 1.5, 0])
+
+
+def test03_tensor_round_trip(Reservoir):
+    """
+    Reservoirs are serialized into 12 channels without loss, and integer
+    fields are stored bit-for-bit
+    """
+    r = create_reservoir(Reservoir, [0, 7, 2**31 + 5], [1.5, 1e-30, 3e30],
+                         [.1, 7, 0], [1, 2**24 + 1, 2**32 - 1])
+    tensor = r.to_tensor()
+    assert tensor.shape == (3, 12)
+
+    r2 = Reservoir.from_tensor(tensor)
+    for name in Reservoir.DRJIT_STRUCT.keys():
+        assert dr.all_nested(dr.eq(getattr(r2, name), getattr(r, name))), name
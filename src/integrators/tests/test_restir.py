@@ -0,0 +1,76 @@
+import importlib
+import os
+import sys
+
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+@pytest.fixture
+def restir(variants_vec_rgb):
+    """
+    Register the ReSTIR integrator of plugins/ris.py, which is defined for the
+    first available non-AD RGB JIT variant
+    """
+    variant = mi.variant()
+    if variant not in ('cuda_rgb', 'llvm_rgb'):
+        pytest.skip('plugins/ris.py only supports the cuda_rgb and llvm_rgb variants')
+    pytest.importorskip('matplotlib')
+
+    root = os.path.realpath(os.path.join(os.path.dirname(__file__), '../../..'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    ris = importlib.import_module('plugins.ris')
+
+    mi.set_variant(variant)
+    if ris.ReSTIR.__bases__[0] is not mi.SamplingIntegrator:
+        pytest.skip('plugins/ris.py was loaded for another variant')
+    mi.register_integrator('restir', lambda props: ris.ReSTIR(props))
+
+
+def create_test_scene(integrator):
+    scene_dict = mi.cornell_box()
+    scene_dict['integrator'] = integrator
+    scene_dict['sensor']['film']['width'] = 16
+    scene_dict['sensor']['film']['height'] = 16
+    scene_dict['sensor']['film']['rfilter'] = {'type': 'box'}
+    return mi.load_dict(scene_dict)
+
+
+@pytest.mark.parametrize('reuse', ['spatial_reuse', 'temporal_reuse'])
+def test01_reuse_multiple_spp(restir, reuse):
+    """
+    With several samples per pixel in a wavefront, the reused reservoirs must
+    each come from a single sample, which keeps the estimate consistent with
+    direct illumination
+    """
+    scene = create_test_scene({'type': 'direct', 'bsdf_samples': 0})
+    ref = mi.render(scene, spp=1024, seed=0)
+
+    scene = create_test_scene({'type': 'restir', 'num_proposals': 4, reuse: True})
+    # Let temporal reuse start from the reservoirs of a previous frame
+    image = mi.render(scene, spp=16, seed=0)
+    image = mi.render(scene, spp=16, seed=1)
+
+    assert dr.all(dr.isfinite(image.array))
+    assert dr.allclose(dr.mean(image.array), dr.mean(ref.array), rtol=0.05)
+
+
+@pytest.mark.parametrize('reuse', ['spatial_reuse', 'temporal_reuse'])
+def test02_reuse_requires_perspective(restir, reuse):
+    """
+    Reuse reprojects shading points onto the film, which other sensors do
+    not support
+    """
+    scene_dict = mi.cornell_box()
+    scene_dict['integrator'] = {'type': 'restir', 'num_proposals': 4, reuse: True}
+    scene_dict['sensor']['type'] = 'orthographic'
+    del scene_dict['sensor']['fov'], scene_dict['sensor']['fov_axis']
+    scene_dict['sensor']['film']['width'] = 16
+    scene_dict['sensor']['film']['height'] = 16
+    scene_dict['sensor']['film']['rfilter'] = {'type': 'box'}
+    scene = mi.load_dict(scene_dict)
+
+    with pytest.raises(ValueError, match='perspective sensor'):
+        mi.render(scene, spp=1)
@@ -0,0 +1,57 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def create_test_scene(equiangular, emitter_sampling='tree'):
+    T = mi.ScalarTransform4f
+    scene = {
+        'type': 'scene',
+        'emitter_sampling': emitter_sampling,
+        'integrator': {
+            'type': 'volpath',
+            'max_depth': 2,
+            'equiangular': equiangular,
+        },
+        'sensor': {
+            'type': 'perspective',
+            'fov': 30,
+            'to_world': T.look_at(origin=(0, 0, 4), target=(0, 0, 0), up=(0, 1, 0)),
+            'medium': {'type': 'ref', 'id': 'fog'},
+            'sampler': {'type': 'independent'},
+            'film': {
+                'type': 'hdrfilm',
+                'width': 8, 'height': 8,
+                'rfilter': {'type': 'box'}
+            },
+        },
+        'fog': {
+            'type': 'homogeneous',
+            'albedo': 0.9,
+            'sigma_t': 0.2,
+        },
+    }
+    # Street lights in a thin medium, without any surface
+    for i in range(4):
+        scene[f'light_{i}'] = {
+            'type': 'point',
+            'position': [i - 1.5, 0.5, 0],
+            'intensity': {'type': 'spectrum', 'value': 1.0 + i},
+        }
+    return mi.load_dict(scene)
+
+
+@pytest.mark.parametrize('emitter_sampling', ['uniform', 'tree'])
+def test01_equiangular_unbiased(variants_vec_rgb, emitter_sampling):
+    """
+    Equiangular sampling reduces noise, but should not change the expected
+    value of single scattering from point lights
+    """
+    scene = create_test_scene(False, emitter_sampling)
+    reference = scene.integrator().render(scene, seed=0, spp=1024)
+
+    scene = create_test_scene(True, emitter_sampling)
+    image = scene.integrator().render(scene, seed=1, spp=256)
+
+    assert dr.all(dr.isfinite(image.array))
+    assert dr.allclose(dr.mean(image.array), dr.mean(reference.array), rtol=5e-2)
@@ -0,0 +1,99 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def create_test_scene(integrator):
+    T = mi.ScalarTransform4f
+    return mi.load_dict({
+        'type': 'scene',
+        'integrator': integrator,
+        'sensor': {
+            'type': 'perspective',
+            'fov': 30,
+            'to_world': T.look_at(origin=(0, 0, .5), target=(0, 0, 2), up=(0, 1, 0)),
+            'sampler': {'type': 'independent'},
+            'film': {
+                'type': 'hdrfilm',
+                'width': 8, 'height': 8,
+                'rfilter': {'type': 'box'}
+            },
+        },
+        'floor': {
+            'type': 'rectangle',
+            'to_world': T.scale(2),
+            'bsdf': {'type': 'diffuse'},
+        },
+        'ceiling': {
+            'type': 'rectangle',
+            'to_world': T.translate([0, 0, 2]).rotate([1, 0, 0], 180).scale(2),
+            'bsdf': {'type': 'diffuse'},
+        },
+        # The spot light only illuminates the floor
+        'light': {
+            'type': 'spot',
+            'to_world': T.look_at(origin=(0, 0, 1), target=(0, 0, 0), up=(0, 1, 0)),
+            'cutoff_angle': 20,
+            'intensity': {'type': 'spectrum', 'value': 10},
+        },
+    })
+
+
+@pytest.mark.parametrize('vpl_samples', [0, 16])
+@pytest.mark.parametrize('bias_compensation', [False, True])
+def test01_render_indirect(variants_all_rgb, vpl_samples, bias_compensation):
+    """
+    The ceiling is only lit indirectly through the floor, which the VPLs
+    should account for
+    """
+    scene = create_test_scene({'type': 'direct'})
+    image = scene.integrator().render(scene, seed=0, spp=4)
+    assert dr.all(image.array == 0)
+
+    scene = create_test_scene({'type': 'vpl', 'light_paths': 256,
+                               'vpl_samples': vpl_samples,
+                               'bias_compensation': bias_compensation})
+    image = scene.integrator().render(scene, seed=0, spp=4)
+    assert dr.all(dr.isfinite(image.array))
+    assert dr.all(image.array > 0)
+
+
+def test02_render_indirect_unclamped(variants_vec_rgb):
+    """
+    Without clamping, the VPLs of the floor give an unbiased estimate of the
+    single bounce of indirect illumination that reaches the ceiling
+    """
+    # VPLs are only created on the floor, which the path tracer reaches
+    # after one bounce
+    scene = create_test_scene({'type': 'path', 'max_depth': 3})
+    mean_ref = dr.mean(scene.integrator().render(scene, seed=0, spp=1024).array)
+
+    scene = create_test_scene({'type': 'vpl', 'light_paths': 4096, 'max_depth': 1,
+                               'clamp_radius': 0})
+    mean = dr.mean(scene.integrator().render(scene, seed=0, spp=64).array)
+
+    assert mean_ref > 0
+    assert dr.allclose(mean, mean_ref, rtol=0.05)
+
+
+def test03_bias_compensation(variants_vec_rgb):
+    """
+    Clamping every VPL darkens the ceiling, and the bias compensation
+    recovers the lost energy
+    """
+    scene = create_test_scene({'type': 'path', 'max_depth': 3})
+    mean_ref = dr.mean(scene.integrator().render(scene, seed=0, spp=1024).array)
+
+    # The floor and ceiling are further apart than the clamping radius
+    means = []
+    for bias_compensation in [False, True]:
+        scene = create_test_scene({'type': 'vpl', 'light_paths': 4096, 'max_depth': 1,
+                                   'clamp_radius': 3,
+                                   'bias_compensation': bias_compensation})
+        image = scene.integrator().render(scene, seed=0, spp=64)
+        means.append(dr.mean(image.array))
+    mean_clamped, mean_compensated = means
+
+    assert mean_clamped < 0.9 * mean_ref
+    assert dr.abs(mean_compensated - mean_ref) < 0.5 * dr.abs(mean_clamped - mean_ref)
+    assert dr.allclose(mean_compensated, mean_ref, rtol=0.1)
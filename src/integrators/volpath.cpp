@@ -35,6 +35,12 @@ Volumetric path tracer (:monosp:`volpath`)
    - |bool|
    - Hide directly visible emitters. (Default: no, i.e. |false|)
 
+ * - equiangular
+   - |bool|
+   - Additionally estimate single scattering from emitters with a Dirac delta position
+     (e.g. :ref:`point <emitter-point>` and :ref:`spot <emitter-spot>` lights) using
+     equiangular distance sampling. (Default: no, i.e. |false|)
+
 This plugin provides a volumetric path tracer that can be used to compute approximate solutions
 of the radiative transfer equation. Its implementation makes use of multiple importance sampling
 to combine BSDF and phase function sampling with direct illumination sampling strategies. On
@@ -47,6 +53,18 @@ has a :ref:`null <bsdf-null>` or :ref:`thin dielectric <bsdf-thindielectric>` BS
 to it (as compared to, say, a :ref:`dielectric <bsdf-dielectric>` or
 :ref:`roughdielectric <bsdf-roughdielectric>` BSDF).
 
+Free-flight distance sampling ignores where the light comes from, which makes single scattering
+from small light sources in thin media very noisy. When :paramtype:`equiangular` is enabled,
+every ray segment through a homogeneous medium without spectrally varying extinction
+additionally selects an emitter based on its estimated contribution along the whole segment
+(see the scene's :monosp:`emitter_sampling` parameter), and samples a scattering location
+proportionally to the inverse squared distance to that emitter (equiangular sampling, [Kulla and
+Fajardo 2012]). For emitters with a Dirac delta position, this estimate is combined with next
+event estimation at free-flight scattering locations using multiple importance sampling, so
+that the contribution of such emitters is counted exactly once. Combined with the light tree
+(:monosp:`emitter_sampling="tree"`), this considerably reduces the noise of scenes with many
+point or spot lights in fog.
+
 .. note:: This integrator does not implement good sampling strategies to render
     participating media with a spectrally varying extinction coefficient. For these cases,
     it is better to use the more advanced :ref:`volumetric path tracer with
@@ -77,6 +95,7 @@ public:
                      Medium, MediumPtr, PhaseFunctionContext)
 
     VolumetricPathIntegrator(const Properties &props) : Base(props) {
+        m_equiangular = props.get<bool>("equiangular", false);
     }
 
     MI_INLINE
@@ -165,14 +184,33 @@ public:
                 not_spectral = !is_spectral && active_medium;
             }
 
+            /* Segments on which equiangular sampling applies need to know
+               the distance to the next surface */
+            Mask active_eq = false;
+            Ray3f segment = ray;
+            if (m_equiangular && dr::any_or<true>(active_medium))
+                active_eq = active_medium && !is_spectral &&
+                            medium->is_homogeneous() &&
+                            medium->use_emitter_sampling() &&
+                            (depth + 1 < (uint32_t) m_max_depth);
+
             if (dr::any_or<true>(active_medium)) {
                 mei = medium->sample_interaction(ray, sampler->next_1d(active_medium), channel, active_medium);
-                dr::masked(ray.maxt, active_medium && medium->is_homogeneous() && mei.is_valid()) = mei.t;
+                dr::masked(ray.maxt, active_medium && medium->is_homogeneous() && mei.is_valid() && !active_eq) = mei.t;
                 Mask intersect = needs_intersection && active_medium;
                 if (dr::any_or<true>(intersect))
                     dr::masked(si, intersect) = scene->ray_intersect(ray, intersect);
                 needs_intersection &= !active_medium;
 
+                // ------------------ Equiangular sampling ------------------
+                if (dr::any_or<true>(active_eq)) {
+                    segment = ray;
+                    segment.maxt = si.t;
+                    dr::masked(result, active_eq) +=
+                        throughput * sample_equiangular(scene, sampler, segment, mei.mint,
+                                                        medium, channel, active_eq);
+                }
+
                 dr::masked(mei.t, active_medium && (si.t < mei.t)) = dr::Infinity<Float>;
                 if (dr::any_or<true>(is_spectral)) {
                     auto [tr, free_flight_pdf] = medium->eval_tr_and_pdf(mei, si, is_spectral);
@@ -227,8 +265,22 @@ public:
                 if (dr::any_or<true>(active_e)) {
                     auto [emitted, ds] = sample_emitter(mei, scene, sampler, medium, channel, active_e);
                     Float phase_val = phase->eval(phase_ctx, mei, ds.d, active_e);
-                    dr::masked(result, active_e) += throughput * phase_val * emitted *
-                                                    mis_weight(ds.pdf, dr::select(ds.delta, 0.f, phase_val));
+                    Float weight = mis_weight(ds.pdf, dr::select(ds.delta, 0.f, phase_val));
+
+                    // Emitters with a delta position may also be reached by equiangular sampling
+                    Mask active_mis = active_e && active_eq && ds.delta;
+                    if (dr::any_or<true>(active_mis)) {
+                        active_mis &= has_flag(ds.emitter->flags(active_mis), EmitterFlags::DeltaPosition);
+                        UInt32 index = ds.emitter->scene_index(active_mis);
+                        Float sigma = index_spectrum(mei.combined_extinction, channel),
+                              pdf_ff = sigma * dr::exp(-sigma * (mei.t - mei.mint)) *
+                                       scene->pdf_emitter_selection(mei, index, ds.prim_index, active_mis),
+                              pdf_eq = scene->pdf_emitter_segment(segment, index, ds.prim_index, active_mis) *
+                                       pdf_equiangular(segment, mei.mint, ds.p, mei.t);
+                        dr::masked(weight, active_mis) = mis_weight(pdf_ff, pdf_eq);
+                    }
+
+                    dr::masked(result, active_e) += throughput * phase_val * emitted * weight;
                 }
 
                 // ------------------ Phase function sampling -----------------
@@ -329,8 +381,6 @@ public:
     sample_emitter(const Interaction &ref_interaction, const Scene *scene,
                    Sampler *sampler, MediumPtr medium,
                    UInt32 channel, Mask active) const {
-        Spectrum transmittance(1.0f);
-
         auto [ds, emitter_val] = scene->sample_emitter_direction(ref_interaction, sampler->next_2d(active), false, active);
         dr::masked(emitter_val, dr::eq(ds.pdf, 0.f)) = 0.f;
         active &= dr::neq(ds.pdf, 0.f);
@@ -339,6 +389,21 @@ public:
             return { emitter_val, ds };
         }
 
+        return { eval_transmittance(ref_interaction, ds, scene, sampler, medium, channel, active) * emitter_val, ds };
+    }
+
+    /**
+     * Evaluates the transmittance between the reference interaction and the
+     * emitter position of the given direction sample, accounting for media
+     * and null interfaces along the way
+     */
+    template <typename Interaction>
+    Spectrum eval_transmittance(const Interaction &ref_interaction,
+                                const DirectionSample3f &ds,
+                                const Scene *scene, Sampler *sampler,
+                                MediumPtr medium, UInt32 channel,
+                                Mask active) const {
+        Spectrum transmittance(1.0f);
         Ray3f ray = ref_interaction.spawn_ray(ds.d);
 
         // Potentially escaping the medium if this is the current medium's boundary
@@ -438,7 +503,107 @@ public:
                 dr::masked(medium, has_medium_trans) = si.target_medium(ray.d);
             }
         }
-        return { transmittance * emitter_val, ds };
+        return transmittance;
+    }
+
+    /**
+     * Estimates single scattering along a segment of a homogeneous medium
+     * from an emitter with a Dirac delta position. The emitter is chosen
+     * based on the whole segment, and the scattering location is sampled
+     * proportionally to the inverse squared distance to it. The result is
+     * MIS-weighted against free-flight sampling followed by next event
+     * estimation, and does not include the path throughput.
+     */
+    Spectrum sample_equiangular(const Scene *scene, Sampler *sampler,
+                                const Ray3f &segment, Float mint,
+                                MediumPtr medium, UInt32 channel,
+                                Mask active) const {
+        // 1. Select an emitter according to its contribution along the segment
+        auto [index, prim_index, emitter_pmf, sample_re] =
+            scene->sample_emitter_segment(segment, sampler->next_1d(active), active);
+        DRJIT_MARK_USED(sample_re);
+        active &= emitter_pmf > 0.f;
+
+        EmitterPtr emitter = dr::gather<EmitterPtr>(scene->emitters_dr(), index, active);
+        active &= has_flag(emitter->flags(active), EmitterFlags::DeltaPosition);
+
+        /* 2. Choose the position of the emitter. It does not depend on the
+              reference point, and 'ds.pdf' holds the discrete probability of
+              the chosen primitive within the emitter (one if it was split) */
+        Point2f ds_sample = sampler->next_2d(active);
+        Interaction3f it  = dr::zeros<Interaction3f>();
+        it.p           = segment.o;
+        it.time        = segment.time;
+        it.wavelengths = segment.wavelengths;
+
+        DirectionSample3f ds;
+        if (scene->split_emitters())
+            std::tie(ds, std::ignore) = emitter->sample_direction_primitive(
+                it, prim_index, ds_sample, active);
+        else
+            std::tie(ds, std::ignore) = emitter->sample_direction(it, ds_sample, active);
+        active &= ds.pdf > 0.f;
+
+        // 3. Equiangular sampling of the scattering location
+        Float sample_t = sampler->next_1d(active);
+        Float delta    = dr::dot(ds.p - segment.o, segment.d),
+              dist     = dr::norm(ds.p - segment(delta)),
+              theta_a  = dr::atan2(mint - delta, dist),
+              theta_b  = dr::atan2(segment.maxt - delta, dist);
+        Float t        = delta + dist * dr::tan(dr::fmadd(sample_t, theta_b - theta_a, theta_a));
+        Float pdf_t    = pdf_equiangular(segment, mint, ds.p, t);
+        active &= pdf_t > 0.f;
+
+        if (dr::none_or<false>(active))
+            return 0.f;
+
+        MediumInteraction3f mei = dr::zeros<MediumInteraction3f>();
+        mei.t           = t;
+        mei.p           = segment(t);
+        mei.wi          = -segment.d;
+        mei.sh_frame    = Frame3f(mei.wi);
+        mei.time        = segment.time;
+        mei.wavelengths = segment.wavelengths;
+        mei.medium      = medium;
+        mei.mint        = mint;
+        std::tie(mei.sigma_s, mei.sigma_n, mei.sigma_t) =
+            medium->get_scattering_coefficients(mei, active);
+        mei.combined_extinction = medium->get_majorant(mei, active);
+
+        // 4. Connect the scattering location to the emitter
+        auto [ds_mei, emitted] = emitter->sample_direction_primitive(
+            mei, ds.prim_index, ds_sample, active);
+        active &= ds_mei.pdf > 0.f;
+        emitted *= eval_transmittance(mei, ds_mei, scene, sampler, medium, channel, active);
+
+        PhaseFunctionContext phase_ctx(sampler);
+        Float phase_val = medium->phase_function()->eval(phase_ctx, mei, ds_mei.d, active);
+        UnpolarizedSpectrum tr = dr::exp(-(t - mint) * mei.sigma_t);
+
+        // 5. MIS with free-flight sampling followed by next event estimation
+        Float sigma  = index_spectrum(mei.combined_extinction, channel),
+              pdf_eq = emitter_pmf * pdf_t,
+              pdf_ff = sigma * dr::exp(-sigma * (t - mint)) *
+                       scene->pdf_emitter_selection(mei, index, ds.prim_index, active);
+
+        Spectrum result = tr * mei.sigma_s * phase_val * emitted *
+                          (mis_weight(pdf_eq, pdf_ff) / (pdf_eq * ds.pdf));
+        return dr::select(active, result, 0.f);
+    }
+
+    /**
+     * Density of sampling the distance \c t in <tt>[mint, ray.maxt]</tt>
+     * proportionally to the inverse squared distance to the point \c p
+     */
+    Float pdf_equiangular(const Ray3f &ray, Float mint, const Point3f &p,
+                          Float t) const {
+        Float delta   = dr::dot(p - ray.o, ray.d),
+              dist    = dr::norm(p - ray(delta)),
+              theta_a = dr::atan2(mint - delta, dist),
+              theta_b = dr::atan2(ray.maxt - delta, dist);
+        Float pdf = dist / ((theta_b - theta_a) * (dr::sqr(dist) + dr::sqr(t - delta)));
+        Mask valid = (dist > 0.f) && (theta_b > theta_a) && (t >= mint) && (t <= ray.maxt);
+        return dr::select(valid && dr::isfinite(pdf), pdf, 0.f);
     }
 
     //! @}
@@ -447,9 +612,10 @@ public:
     std::string to_string() const override {
         return tfm::format("VolumetricSimplePathIntegrator[\n"
                            "  max_depth = %i,\n"
-                           "  rr_depth = %i\n"
+                           "  rr_depth = %i,\n"
+                           "  equiangular = %s\n"
                            "]",
-                           m_max_depth, m_rr_depth);
+                           m_max_depth, m_rr_depth, m_equiangular);
     }
 
     Float mis_weight(Float pdf_a, Float pdf_b) const {
@@ -460,6 +626,9 @@ public:
     };
 
     MI_DECLARE_CLASS()
+
+private:
+    bool m_equiangular;
 };
 
 MI_IMPLEMENT_CLASS_VARIANT(VolumetricPathIntegrator, MonteCarloIntegrator);
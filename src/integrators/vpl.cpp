@@ -0,0 +1,417 @@
+#include <mitsuba/render/integrator.h>
+#include <mitsuba/render/bsdf.h>
+#include <mitsuba/render/emitter.h>
+#include <mitsuba/render/sensor.h>
+#include <mitsuba/core/distr_1d.h>
+#include <mitsuba/core/plugin.h>
+#include <mitsuba/core/properties.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**!
+
+.. _integrator-vpl:
+
+Virtual point light integrator (:monosp:`vpl`)
+----------------------------------------------
+
+.. pluginparameters::
+
+ * - light_paths
+   - |int|
+   - Number of light paths traced by the pre-pass that creates the virtual point lights (VPLs).
+     (Default: 1024)
+
+ * - max_depth
+   - |int|
+   - Number of surface interactions of each light path. A VPL is created at each of them,
+     hence indirect illumination is accounted for up to :monosp:`max_depth` bounces.
+     (Default: 2)
+
+ * - vpl_samples
+   - |int|
+   - Number of VPLs sampled proportionally to their power at each shading point. If set to 0,
+     the integrator instead loops over all VPLs. (Default: 32)
+
+ * - clamp_radius
+   - |float|
+   - The inverse squared distance to each VPL is clamped to that of this radius, which removes
+     the bright singularities that VPLs produce close to surfaces. (Default: 1% of the radius of
+     the bounding sphere of the scene)
+
+ * - bias_compensation
+   - |bool|
+   - Recover the energy lost to clamping by tracing one BSDF sample towards the neighbouring
+     surfaces, and evaluating their illumination there. (Default: |false|)
+
+ * - hide_emitters
+   - |bool|
+   - Hide directly visible emitters.
+     (Default: no, i.e. |false|)
+
+This integrator implements *instant radiosity*: before rendering, a light tracing pre-pass
+follows :monosp:`light_paths` paths from the emitters (using
+:code:`Scene::sample_emitter_ray()`) and stores a virtual point light at each of their
+surface interactions. The VPLs only consist of a position, a normal and an outgoing power,
+and are stored in compact arrays.
+
+At each shading point, direct illumination is computed using emitter sampling, while indirect
+illumination is gathered from the VPLs. Since each VPL is approximated as a diffuse emitter,
+and the whole VPL set is shared by all pixels, the result is biased but free of high-frequency
+noise, which makes this integrator well suited for fast previews of indirect illumination in
+scenes that otherwise require many samples with the :ref:`path <integrator-path>` integrator.
+Like emitters in the scene's :monosp:`power` sampling strategy, VPLs are selected
+proportionally to their power using an alias table, so that the cost of each shading point
+does not grow with the number of VPLs.
+
+.. note:: This integrator does not handle participating media, and only supports RGB and
+   monochromatic variants. Surfaces without a smooth BSDF component only show emission.
+
+.. tabs::
+    .. code-tab::  xml
+        :name: vpl-integrator
+
+        <integrator type="vpl">
+            <integer name="light_paths" value="4096"/>
+        </integrator>
+
+    .. code-tab:: python
+
+        'type': 'vpl',
+        'light_paths': 4096
+
+ */
+
+template <typename Float, typename Spectrum>
+class VPLIntegrator : public SamplingIntegrator<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(SamplingIntegrator, m_hide_emitters)
+    MI_IMPORT_TYPES(Scene, Sensor, Sampler, Medium, Emitter, EmitterPtr, BSDF,
+                    BSDFPtr)
+
+    using FloatStorage = DynamicBuffer<Float>;
+
+    /// VPLs store unpolarized RGB or monochromatic power
+    static constexpr bool Supported =
+        !is_spectral_v<Spectrum> && !is_polarized_v<Spectrum>;
+
+    VPLIntegrator(const Properties &props) : Base(props) {
+        if constexpr (!Supported)
+            Throw("The VPL integrator only supports RGB and monochromatic variants!");
+
+        m_light_paths = props.get<size_t>("light_paths", 1024);
+        m_max_depth   = props.get<size_t>("max_depth", 2);
+        if (m_light_paths == 0 || m_max_depth == 0)
+            Throw("Must trace at least 1 light path with at least 1 bounce!");
+
+        m_vpl_samples       = props.get<size_t>("vpl_samples", 32);
+        m_clamp_radius      = props.get<ScalarFloat>("clamp_radius", -1.f);
+        m_bias_compensation = props.get<bool>("bias_compensation", false);
+    }
+
+    using Base::render;
+
+    TensorXf render(Scene *scene,
+                    Sensor *sensor,
+                    uint32_t seed = 0,
+                    uint32_t spp = 0,
+                    bool develop = true,
+                    bool evaluate = true) override {
+        if constexpr (Supported)
+            generate_vpls(scene, sensor, seed);
+        return Base::render(scene, sensor, seed, spp, develop, evaluate);
+    }
+
+    /**
+     * \brief Trace the light paths of the pre-pass, and store the VPLs
+     * created at their surface interactions
+     */
+    void generate_vpls(const Scene *scene, const Sensor *sensor, uint32_t seed) {
+        m_vpl_count = 0;
+        m_vpl_p = m_vpl_n = m_vpl_power = FloatStorage();
+        m_vpl_distr = AliasDistribution<Float>();
+
+        ScalarFloat radius = m_clamp_radius;
+        if (radius < 0.f)
+            radius = .01f * scene->bbox().bounding_sphere().radius;
+        m_clamp_radius2 = dr::sqr(radius);
+
+        if (scene->emitters().empty())
+            return;
+
+        /* Trace all paths in a single wavefront in JIT variants, and one
+           path after the other otherwise */
+        size_t wavefront_size = dr::is_jit_v<Float> ? m_light_paths : 1,
+               n_passes = m_light_paths / wavefront_size,
+               capacity = m_light_paths * m_max_depth;
+
+        FloatStorage p     = dr::zeros<FloatStorage>(3 * capacity),
+                     n     = dr::zeros<FloatStorage>(3 * capacity),
+                     power = dr::zeros<FloatStorage>(Channels * capacity);
+
+        ref<Sampler> sampler =
+            PluginManager::instance()->create_object<Sampler>(Properties("independent"));
+        sampler->seed(seed, (uint32_t) wavefront_size);
+
+        for (size_t i = 0; i < n_passes; ++i) {
+            UInt32 path;
+            if constexpr (dr::is_jit_v<Float>)
+                path = dr::arange<UInt32>((uint32_t) wavefront_size);
+            else
+                path = (uint32_t) i;
+
+            trace_light_path(scene, sampler, sensor->shutter_open(), path, p, n, power);
+            sampler->advance();
+        }
+
+        // Discard the slots of paths that terminated early
+        auto &&p_host     = dr::migrate(p, AllocType::Host);
+        auto &&n_host     = dr::migrate(n, AllocType::Host);
+        auto &&power_host = dr::migrate(power, AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+
+        std::vector<ScalarFloat> vpl_p, vpl_n, vpl_power, weight;
+        for (size_t i = 0; i < capacity; ++i) {
+            ScalarFloat value = 0.f;
+            for (size_t k = 0; k < Channels; ++k)
+                value += power_host.data()[Channels * i + k];
+            value /= (ScalarFloat) Channels;
+            if (!(value > 0.f) || !std::isfinite(value))
+                continue;
+
+            for (size_t k = 0; k < 3; ++k) {
+                vpl_p.push_back(p_host.data()[3 * i + k]);
+                vpl_n.push_back(n_host.data()[3 * i + k]);
+            }
+            for (size_t k = 0; k < Channels; ++k)
+                vpl_power.push_back(power_host.data()[Channels * i + k]);
+            weight.push_back(value);
+        }
+
+        m_vpl_count = weight.size();
+        if (m_vpl_count == 0) {
+            Log(Warn, "The light paths did not create any virtual point light, "
+                      "only direct illumination will be rendered.");
+            return;
+        }
+
+        m_vpl_p     = dr::load<FloatStorage>(vpl_p.data(), vpl_p.size());
+        m_vpl_n     = dr::load<FloatStorage>(vpl_n.data(), vpl_n.size());
+        m_vpl_power = dr::load<FloatStorage>(vpl_power.data(), vpl_power.size());
+        m_vpl_distr = AliasDistribution<Float>(weight.data(), weight.size());
+
+        Log(Debug, "Created %zu virtual point lights from %zu light paths.",
+            m_vpl_count, m_light_paths);
+    }
+
+    std::pair<Spectrum, Mask> sample(const Scene *scene,
+                                     Sampler *sampler,
+                                     const RayDifferential3f &ray,
+                                     const Medium * /* medium */,
+                                     Float * /* aovs */,
+                                     Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::SamplingIntegratorSample, active);
+
+        SurfaceInteraction3f si = scene->ray_intersect(
+            ray, +RayFlags::All, /* coherent = */ true, active);
+        Mask valid_ray = active && si.is_valid();
+
+        Spectrum result(0.f);
+
+        if constexpr (Supported) {
+            // ----------------------- Visible emitters -----------------------
+
+            if (!m_hide_emitters) {
+                EmitterPtr emitter_vis = si.emitter(scene, active);
+                if (dr::any_or<true>(dr::neq(emitter_vis, nullptr)))
+                    result += emitter_vis->eval(si, active);
+            }
+
+            BSDFPtr bsdf = si.bsdf(ray);
+            active &= si.is_valid() && has_flag(bsdf->flags(), BSDFFlags::Smooth);
+            if (dr::none_or<false>(active))
+                return { result, valid_ray };
+
+            // --------------- Direct and VPL illumination ---------------
+
+            result[active] += shade(scene, sampler, si, bsdf, active);
+
+            // -------------------- Bias compensation --------------------
+
+            /* The energy removed by clamping the VPLs is recovered by
+               sampling the BSDF, and weighting the illumination of the
+               surface that is hit by the fraction that was clamped away */
+            if (m_bias_compensation && m_vpl_count > 0 && m_clamp_radius2 > 0.f) {
+                BSDFContext ctx;
+                auto [bs, bsdf_weight] = bsdf->sample(
+                    ctx, si, sampler->next_1d(active), sampler->next_2d(active), active);
+
+                Mask active_c = active && !has_flag(bs.sampled_type, BSDFFlags::Delta);
+                SurfaceInteraction3f si_c =
+                    scene->ray_intersect(si.spawn_ray(si.to_world(bs.wo)), active_c);
+
+                Float residual = dr::maximum(1.f - dr::sqr(si_c.t) / m_clamp_radius2, 0.f);
+                BSDFPtr bsdf_c = si_c.bsdf();
+                active_c &= si_c.is_valid() && residual > 0.f &&
+                            has_flag(bsdf_c->flags(), BSDFFlags::Smooth);
+
+                if (dr::any_or<true>(active_c))
+                    result[active_c] += bsdf_weight * residual *
+                                        shade(scene, sampler, si_c, bsdf_c, active_c);
+            }
+        }
+
+        return { result, valid_ray };
+    }
+
+    /// Compute the direct and (clamped) VPL illumination reflected at \c si
+    Spectrum shade(const Scene *scene, Sampler *sampler,
+                   const SurfaceInteraction3f &si, const BSDFPtr &bsdf,
+                   Mask active) const {
+        BSDFContext ctx;
+        Spectrum result(0.f);
+
+        // Direct illumination using emitter sampling
+        auto [ds, emitter_val] = scene->sample_emitter_direction(
+            si, sampler->next_2d(active), true, active);
+        Mask active_e = active && dr::neq(ds.pdf, 0.f);
+        Spectrum bsdf_val = bsdf->eval(ctx, si, si.to_local(ds.d), active_e);
+        result[active_e] += bsdf_val * emitter_val;
+
+        if (m_vpl_count == 0)
+            return result;
+
+        // Indirect illumination from the VPLs
+        auto eval_vpl = [&](const UInt32 &index, Mask active_v) {
+            Point3f p  = dr::gather<Point3f>(m_vpl_p, index, active_v);
+            Normal3f n = dr::gather<Normal3f>(m_vpl_n, index, active_v);
+            Spectrum power = dr::gather<Spectrum>(m_vpl_power, index, active_v);
+
+            Vector3f d  = p - si.p;
+            Float dist2 = dr::squared_norm(d);
+            d *= dr::rsqrt(dist2);
+
+            Float cos_vpl = -dr::dot(n, d);
+            active_v &= dist2 > 0.f && cos_vpl > 0.f;
+            active_v &= !scene->ray_test(si.spawn_ray_to(p), active_v);
+
+            Spectrum vpl_val = bsdf->eval(ctx, si, si.to_local(d), active_v);
+            return dr::select(active_v,
+                              vpl_val * power * cos_vpl /
+                                  dr::maximum(dist2, m_clamp_radius2),
+                              0.f);
+        };
+
+        if (m_vpl_samples == 0) {
+            UInt32 index = 0;
+            Spectrum result_vpl(0.f);
+            Mask active_loop = active;
+            dr::Loop<Mask> loop("VPL::shade", index, result_vpl, active_loop);
+            while (loop(active_loop)) {
+                result_vpl += eval_vpl(index, active_loop);
+                index++;
+                active_loop &= index < (uint32_t) m_vpl_count;
+            }
+            result[active] += result_vpl;
+        } else {
+            for (size_t i = 0; i < m_vpl_samples; ++i) {
+                auto [index, pmf] =
+                    m_vpl_distr.sample_pmf(sampler->next_1d(active), active);
+                Mask active_v = active && pmf > 0.f;
+                result[active_v] += eval_vpl(index, active_v) /
+                                    (pmf * (ScalarFloat) m_vpl_samples);
+            }
+        }
+
+        return result;
+    }
+
+    std::string to_string() const override {
+        std::ostringstream oss;
+        oss << "VPLIntegrator[" << std::endl
+            << "  light_paths = " << m_light_paths << "," << std::endl
+            << "  max_depth = " << m_max_depth << "," << std::endl
+            << "  vpl_samples = " << m_vpl_samples << "," << std::endl
+            << "  clamp_radius = " << m_clamp_radius << "," << std::endl
+            << "  bias_compensation = " << m_bias_compensation << "," << std::endl
+            << "  vpl_count = " << m_vpl_count << std::endl
+            << "]";
+        return oss.str();
+    }
+
+    MI_DECLARE_CLASS()
+protected:
+    static constexpr size_t Channels = dr::size_v<UnpolarizedSpectrum>;
+
+    /**
+     * \brief Trace one light path per lane, and scatter the VPL created at
+     * each of its surface interactions to slot
+     * <tt>depth * light_paths + path</tt> of the output arrays
+     */
+    void trace_light_path(const Scene *scene, Sampler *sampler,
+                          ScalarFloat time, const UInt32 &path,
+                          FloatStorage &p, FloatStorage &n,
+                          FloatStorage &power) const {
+        BSDFContext ctx(TransportMode::Importance);
+        Mask active = true;
+
+        auto [ray, weight, emitter] = scene->sample_emitter_ray(
+            time, sampler->next_1d(), sampler->next_2d(), sampler->next_2d(),
+            active);
+        weight /= (ScalarFloat) m_light_paths;
+        DRJIT_MARK_USED(emitter);
+
+        for (size_t depth = 0; depth < m_max_depth; ++depth) {
+            SurfaceInteraction3f si = scene->ray_intersect(ray, active);
+            active &= si.is_valid() && dr::any(dr::neq(weight, 0.f));
+
+            BSDFPtr bsdf = si.bsdf();
+            Mask store = active && has_flag(bsdf->flags(), BSDFFlags::Smooth);
+
+            /* The VPL is approximated as a diffuse emitter, whose outgoing
+               radiance is the incident power times albedo / pi */
+            Spectrum vpl_power = weight * dr::InvPi<Float> *
+                                 bsdf->eval_diffuse_reflectance(si, store);
+
+            // Orient the normal towards the side that receives light
+            Normal3f vpl_n = dr::mulsign(si.sh_frame.n, Frame3f::cos_theta(si.wi));
+
+            UInt32 slot = (uint32_t) (depth * m_light_paths) + path;
+            dr::scatter(p, si.p, slot, store);
+            dr::scatter(n, vpl_n, slot, store);
+            dr::scatter(power, vpl_power, slot, store);
+
+            if (depth + 1 == m_max_depth)
+                break;
+
+            auto [bs, bsdf_weight] = bsdf->sample(
+                ctx, si, sampler->next_1d(active), sampler->next_2d(active), active);
+            weight *= bsdf_weight;
+            ray = si.spawn_ray(si.to_world(bs.wo));
+        }
+    }
+
+private:
+    size_t m_light_paths;
+    size_t m_max_depth;
+    size_t m_vpl_samples;
+    ScalarFloat m_clamp_radius;
+    ScalarFloat m_clamp_radius2 = 0.f;
+    bool m_bias_compensation;
+
+    /// Number of VPLs created by the last pre-pass
+    size_t m_vpl_count = 0;
+
+    /// Flat arrays storing the position, normal and power of each VPL
+    FloatStorage m_vpl_p;
+    FloatStorage m_vpl_n;
+    FloatStorage m_vpl_power;
+
+    /// Distribution used to select VPLs proportionally to their power
+    AliasDistribution<Float> m_vpl_distr;
+};
+
+MI_IMPLEMENT_CLASS_VARIANT(VPLIntegrator, SamplingIntegrator)
+MI_EXPORT_PLUGIN(VPLIntegrator, "Virtual point light integrator");
+NAMESPACE_END(mitsuba)
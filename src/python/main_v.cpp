@@ -62,6 +62,7 @@ MI_PY_DECLARE(BoundingSphere);
 MI_PY_DECLARE(Frame);
 MI_PY_DECLARE(Ray);
 MI_PY_DECLARE(DiscreteDistribution);
+MI_PY_DECLARE(AliasDistribution);
 MI_PY_DECLARE(DiscreteDistribution2D);
 MI_PY_DECLARE(ContinuousDistribution);
 MI_PY_DECLARE(IrregularContinuousDistribution);
@@ -83,6 +84,7 @@ MI_PY_DECLARE(quad);
 
 // render
 MI_PY_DECLARE(BSDFSample);
+MI_PY_DECLARE(BSDFLobe);
 MI_PY_DECLARE(BSDF);
 MI_PY_DECLARE(Emitter);
 MI_PY_DECLARE(Endpoint);
@@ -94,6 +96,8 @@ MI_PY_DECLARE(Interaction);
 MI_PY_DECLARE(SurfaceInteraction);
 MI_PY_DECLARE(MediumInteraction);
 MI_PY_DECLARE(PreliminaryIntersection);
+MI_PY_DECLARE(LightCache);
+MI_PY_DECLARE(LightTree);
 MI_PY_DECLARE(Medium);
 MI_PY_DECLARE(mueller);
 MI_PY_DECLARE(MicrofacetDistribution);
@@ -156,6 +160,7 @@ PYBIND11_MODULE(MODULE_NAME, m) {
     MI_PY_IMPORT(BoundingSphere);
     MI_PY_IMPORT(Frame);
     MI_PY_IMPORT(DiscreteDistribution);
+    MI_PY_IMPORT(AliasDistribution);
     MI_PY_IMPORT(DiscreteDistribution2D);
     MI_PY_IMPORT(ContinuousDistribution);
     MI_PY_IMPORT(IrregularContinuousDistribution);
@@ -187,11 +192,14 @@ PYBIND11_MODULE(MODULE_NAME, m) {
     MI_PY_IMPORT(PositionSample);
     MI_PY_IMPORT(DirectionSample);
     MI_PY_IMPORT(BSDFSample);
+    MI_PY_IMPORT(BSDFLobe);
     MI_PY_IMPORT(BSDF);
     MI_PY_IMPORT(Film);
     MI_PY_IMPORT(fresnel);
     MI_PY_IMPORT(ImageBlock);
     MI_PY_IMPORT(Integrator);
+    MI_PY_IMPORT(LightCache);
+    MI_PY_IMPORT(LightTree);
     MI_PY_IMPORT_SUBMODULE(mueller);
     MI_PY_IMPORT(MicrofacetDistribution);
 #if defined(MI_ENABLE_CUDA)
@@ -40,6 +40,27 @@ MI_VARIANT Spectrum BSDF<Float, Spectrum>::eval_diffuse_reflectance(
     return eval(ctx, si, wo, active) * dr::Pi<Float>;
 }
 
+MI_VARIANT typename BSDF<Float, Spectrum>::BSDFLobe3f
+BSDF<Float, Spectrum>::lobe(const BSDFContext &ctx,
+                            const SurfaceInteraction3f &si,
+                            Mask active) const {
+    DRJIT_MARK_USED(ctx);
+    DRJIT_MARK_USED(active);
+
+    BSDFLobe3f result;
+    if (has_flag(m_flags, BSDFFlags::Diffuse) ||
+        has_flag(m_flags, BSDFFlags::Transmission) ||
+        !has_flag(m_flags, BSDFFlags::Reflection))
+        return result;
+
+    /* Purely glossy (or specular) reflection: without any knowledge about the
+       roughness, bound the lobe by a 60 degree cone around the mirror direction */
+    result.axis = si.to_world(Vector3f(-si.wi.x(), -si.wi.y(), si.wi.z()));
+    result.cos_theta = .5f;
+    result.diffuse = .25f;
+    return result;
+}
+
 template <typename Index>
 std::string type_mask_to_string(Index type_mask) {
     std::ostringstream oss;
@@ -8,6 +8,40 @@ MI_VARIANT Emitter<Float, Spectrum>::Emitter(const Properties &props)
     : Base(props) {}
 MI_VARIANT Emitter<Float, Spectrum>::~Emitter() { }
 
+MI_VARIANT typename Emitter<Float, Spectrum>::ScalarFloat
+Emitter<Float, Spectrum>::estimate_power() const {
+    return 1.f;
+}
+
+MI_VARIANT std::tuple<typename Emitter<Float, Spectrum>::ScalarVector3f,
+                      typename Emitter<Float, Spectrum>::ScalarFloat,
+                      typename Emitter<Float, Spectrum>::ScalarFloat>
+Emitter<Float, Spectrum>::emission_cone() const {
+    return { ScalarVector3f(0.f, 0.f, 1.f), -1.f, 0.f };
+}
+
+MI_VARIANT std::vector<LightBounds<Float>>
+Emitter<Float, Spectrum>::primitive_bounds() const {
+    auto [axis, cos_theta_o, cos_theta_e] = emission_cone();
+    return { LightBounds<Float>(bbox(), axis, estimate_power(), cos_theta_o,
+                                cos_theta_e) };
+}
+
+MI_VARIANT std::pair<typename Emitter<Float, Spectrum>::DirectionSample3f, Spectrum>
+Emitter<Float, Spectrum>::sample_direction_primitive(const Interaction3f &it,
+                                                     UInt32 /* prim_index */,
+                                                     const Point2f &sample,
+                                                     Mask active) const {
+    return sample_direction(it, sample, active);
+}
+
+MI_VARIANT Float
+Emitter<Float, Spectrum>::pdf_direction_primitive(const Interaction3f &it,
+                                                  const DirectionSample3f &ds,
+                                                  Mask active) const {
+    return pdf_direction(it, ds, active);
+}
+
 MI_IMPLEMENT_CLASS_VARIANT(Emitter, Endpoint, "emitter")
 MI_INSTANTIATE_CLASS(Emitter)
 NAMESPACE_END(mitsuba)
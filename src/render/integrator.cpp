@@ -71,10 +71,78 @@ MI_VARIANT SamplingIntegrator<Float, Spectrum>::SamplingIntegrator(const Propert
                   "Please leave it undefined; Mitsuba will then automatically "
                   "choose the necessary number of passes.");
     }
+
+    // Memory budget of a rendering pass (in MiB), automatic if zero
+    ScalarFloat memory_budget = props.get<ScalarFloat>("memory_budget", 0.f);
+    if (memory_budget < 0.f)
+        Throw("The memory budget must be nonnegative!");
+    m_memory_budget = (size_t) ((double) memory_budget * 1024 * 1024);
 }
 
 MI_VARIANT SamplingIntegrator<Float, Spectrum>::~SamplingIntegrator() { }
 
+MI_VARIANT size_t SamplingIntegrator<Float, Spectrum>::sample_state_size() const {
+    // Sampler state, sample index and image plane position
+    size_t size = 2 * sizeof(uint64_t) + 3 * sizeof(uint32_t);
+
+    // Values splatted to the film: color, alpha, weight and AOVs
+    size += (5 + aov_names().size()) * sizeof(ScalarFloat);
+
+    // Without recording, the ray, interactions and path state are stored
+    // between kernels
+    if (!jit_flag(JitFlag::LoopRecord) || !jit_flag(JitFlag::VCallRecord))
+        size += 128 * sizeof(ScalarFloat);
+
+    return size;
+}
+
+MI_VARIANT std::pair<uint32_t, uint32_t>
+SamplingIntegrator<Float, Spectrum>::plan_passes(const ScalarVector2u &film_size,
+                                                 uint32_t spp,
+                                                 uint32_t spp_per_pass) const {
+    size_t pixel_count = (size_t) film_size.x() * (size_t) film_size.y(),
+           sample_size = sample_state_size(),
+           budget      = m_memory_budget;
+
+    if (budget == 0 && dr::is_llvm_v<Float>)
+        budget = util::available_memory() / 2;
+
+    // Wavefronts are limited to 2^32 samples, and to the memory budget
+    size_t max_wavefront_size = 0xffffffffu;
+    if (budget > 0)
+        max_wavefront_size = std::min(max_wavefront_size, budget / sample_size);
+
+    uint32_t max_spp_per_pass = (uint32_t) std::max(
+        std::min(max_wavefront_size / pixel_count, (size_t) spp), (size_t) 1);
+
+    /* Fewest passes that fit into the budget, made equally large. This may
+       round the sample count up (e.g. when it is prime) */
+    spp_per_pass = std::min(spp_per_pass, max_spp_per_pass);
+    uint32_t n_passes = (spp + spp_per_pass - 1) / spp_per_pass;
+    spp_per_pass = (spp + n_passes - 1) / n_passes;
+    size_t wavefront_size = pixel_count * spp_per_pass;
+
+    if (spp_per_pass * n_passes != spp)
+        Log(Info, "Rounding the sample count up from %u to %u spp to render "
+                  "it in passes of equal size.", spp, spp_per_pass * n_passes);
+
+    if (wavefront_size > max_wavefront_size)
+        Log(Warn, "Rendering a single sample per pixel requires ~%s, which "
+                  "exceeds the memory budget of %s.",
+            util::mem_string(wavefront_size * sample_size),
+            util::mem_string(budget));
+
+    Log(n_passes > 1 ? Info : Debug,
+        "Rendering plan: %u pass%s of %u spp (%zu samples, ~%s per pass at "
+        "%s per sample, budget: %s).",
+        n_passes, n_passes == 1 ? "" : "es", spp_per_pass, wavefront_size,
+        util::mem_string(wavefront_size * sample_size),
+        util::mem_string(sample_size),
+        budget > 0 ? util::mem_string(budget) : std::string("none"));
+
+    return { spp_per_pass, n_passes };
+}
+
 MI_VARIANT typename SamplingIntegrator<Float, Spectrum>::TensorXf
 SamplingIntegrator<Float, Spectrum>::render(Scene *scene,
                                             Sensor *sensor,
@@ -85,6 +153,10 @@ SamplingIntegrator<Float, Spectrum>::render(Scene *scene,
     ScopedPhase sp(ProfilerPhase::Render);
     m_stop = false;
 
+    // Let the emitter contributions observed by previous passes take effect
+    if (scene->light_cache())
+        scene->light_cache()->update();
+
     // Render on a larger film if the 'high quality edges' feature is enabled
     Film *film = sensor->film();
     ScalarVector2u film_size = film->crop_size();
@@ -202,25 +274,22 @@ SamplingIntegrator<Float, Spectrum>::render(Scene *scene,
         if (develop)
             result = film->develop();
     } else {
-        size_t wavefront_size = (size_t) film_size.x() *
-                                (size_t) film_size.y() * (size_t) spp_per_pass,
-               wavefront_size_limit = 0xffffffffu;
-
-        if (wavefront_size > wavefront_size_limit) {
-            spp_per_pass /=
-                (uint32_t)((wavefront_size + wavefront_size_limit - 1) /
-                           wavefront_size_limit);
-            n_passes       = spp / spp_per_pass;
-            wavefront_size = (size_t) film_size.x() * (size_t) film_size.y() *
-                             (size_t) spp_per_pass;
+        /* With a timeout, render a single sample per pixel in each pass
+           (unless specified otherwise) so that it is checked regularly */
+        if (m_timeout > 0.f && m_samples_per_pass == (uint32_t) -1) {
+            spp_per_pass = 1;
+            n_passes = spp;
+        }
 
-            Log(Warn,
-                "The requested rendering task involves %zu Monte Carlo "
-                "samples, which exceeds the upper limit of 2^32 = 4294967296 "
-                "for this variant. Mitsuba will instead split the rendering "
-                "task into %zu smaller passes to avoid exceeding the limits.",
-                wavefront_size, n_passes);
+        // Split the rendering into passes that fit into the memory budget
+        std::tie(spp_per_pass, n_passes) =
+            plan_passes(film_size, spp, spp_per_pass);
+        if (spp_per_pass * n_passes != spp) {
+            spp = spp_per_pass * n_passes;
+            sampler->set_sample_count(spp);
         }
+        size_t wavefront_size = (size_t) film_size.x() *
+                                (size_t) film_size.y() * (size_t) spp_per_pass;
 
         dr::sync_thread(); // Separate from scene initialization (for timings)
 
@@ -228,6 +297,9 @@ SamplingIntegrator<Float, Spectrum>::render(Scene *scene,
             film_size.x(), film_size.y(), spp, spp == 1 ? "" : "s",
             n_passes > 1 ? tfm::format(", %u passes", n_passes) : "");
 
+        if (m_timeout > 0.f)
+            Log(Info, "Timeout specified: %.2f seconds.", m_timeout);
+
         if (n_passes > 1 && !evaluate) {
             Log(Warn, "render(): forcing 'evaluate=true' since multi-pass "
                       "rendering was requested.");
@@ -274,17 +346,37 @@ SamplingIntegrator<Float, Spectrum>::render(Scene *scene,
         std::unique_ptr<Float[]> aovs(new Float[n_channels]);
 
         // Potentially render multiple passes
+        uint32_t passes_done = 0;
         for (size_t i = 0; i < n_passes; i++) {
             render_sample(scene, sensor, sampler, block, aovs.get(), pos,
                           diff_scale_factor);
+            passes_done++;
 
             if (n_passes > 1) {
                 sampler->advance(); // Will trigger a kernel launch of size 1
                 sampler->schedule_state();
                 dr::eval(block->tensor());
+
+                /* Let the emitter contributions observed by this pass take
+                   effect in the next one (the distribution stays fixed
+                   within each pass) */
+                if (scene->light_cache())
+                    scene->light_cache()->update();
+
+                // Wait for the pass to finish to check the elapsed time
+                if (m_timeout > 0.f)
+                    dr::sync_thread();
+                if (should_stop())
+                    break;
             }
         }
 
+        /* The film normalizes the image by the accumulated sample weights,
+           which only account for the passes that were rendered */
+        if (passes_done < n_passes)
+            Log(Info, "Rendering stopped after %u/%u passes (%u spp).",
+                passes_done, n_passes, passes_done * spp_per_pass);
+
         film->put_block(block);
 
         if (n_passes == 1 && jit_flag(JitFlag::VCallRecord) &&
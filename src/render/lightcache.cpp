@@ -0,0 +1,214 @@
+#include <mitsuba/core/logger.h>
+#include <mitsuba/core/string.h>
+#include <mitsuba/core/util.h>
+#include <mitsuba/render/emitter.h>
+#include <mitsuba/render/lightcache.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+MI_VARIANT LightCache<Float, Spectrum>::LightCache(const std::vector<ref<Emitter>> &emitters,
+                                                  const ScalarBoundingBox3f &bbox,
+                                                  uint32_t resolution,
+                                                  uint32_t cell_count,
+                                                  ScalarFloat fallback)
+    : m_bbox(bbox), m_resolution(resolution), m_cell_count(cell_count),
+      m_emitter_count(emitters.size()), m_fallback(fallback) {
+    if (resolution == 0 || cell_count == 0)
+        Throw("LightCache: the resolution and cell count must be positive!");
+    if (!(fallback > 0.f && fallback <= 1.f))
+        Throw("LightCache: the fallback probability must be in (0, 1]!");
+    if (emitters.empty())
+        Throw("LightCache: the scene must contain at least one emitter!");
+
+    // Scenes without any shape still need a well-defined grid
+    if (!m_bbox.valid())
+        m_bbox = ScalarBoundingBox3f(ScalarPoint3f(0.f), ScalarPoint3f(1.f));
+
+    std::vector<ScalarFloat> power(m_emitter_count);
+    bool has_power = false;
+    for (size_t i = 0; i < m_emitter_count; ++i) {
+        ScalarFloat value = emitters[i]->estimate_power();
+        power[i] = (std::isfinite(value) && value > 0.f) ? value : 0.f;
+        has_power |= power[i] > 0.f;
+    }
+
+    // Without any power estimate, the fallback distribution is uniform
+    if (!has_power)
+        std::fill(power.begin(), power.end(), 1.f);
+
+    m_fallback_distr = AliasDistribution<Float>(power.data(), power.size());
+
+    reset();
+
+    Log(Debug, "Created light cache with %zu cells over %zu emitters (%s).",
+        m_cell_count, m_emitter_count,
+        util::mem_string(2 * m_cell_count * (m_emitter_count + 1) *
+                         sizeof(ScalarFloat)));
+}
+
+MI_VARIANT LightCache<Float, Spectrum>::~LightCache() { }
+
+MI_VARIANT typename LightCache<Float, Spectrum>::UInt32
+LightCache<Float, Spectrum>::cell(const Interaction3f &ref, Mask active) const {
+    DRJIT_MARK_USED(active);
+    Point3f p  = dr::detach(ref.p);
+    Normal3f n = dr::detach(ref.n);
+
+    // Quantize the position within the scene's bounding box
+    ScalarVector3f extents = dr::maximum(m_bbox.extents(), dr::Epsilon<ScalarFloat>);
+    Vector3f rel = (p - m_bbox.min) / extents * (ScalarFloat) m_resolution;
+    Int32 res = (int32_t) m_resolution;
+    UInt32 x = UInt32(dr::clamp(Int32(dr::floor(rel.x())), 0, res - 1)),
+           y = UInt32(dr::clamp(Int32(dr::floor(rel.y())), 0, res - 1)),
+           z = UInt32(dr::clamp(Int32(dr::floor(rel.z())), 0, res - 1));
+
+    // Quantize the normal to its dominant signed axis (or a 7th bin if it is zero)
+    Vector3f an = dr::abs(n);
+    UInt32 axis = dr::select(an.x() >= an.y() && an.x() >= an.z(), 0u,
+                             dr::select(an.y() >= an.z(), 1u, 2u));
+    Float component = dr::select(dr::eq(axis, 0u), n.x(),
+                                 dr::select(dr::eq(axis, 1u), n.y(), n.z()));
+    UInt32 normal_bin = dr::select(dr::squared_norm(n) > 0.f,
+                                   2u * axis + dr::select(component < 0.f, 1u, 0u), 6u);
+
+    UInt32 key = ((x * m_resolution + y) * m_resolution + z) * 7u + normal_bin;
+
+    // Integer hash ('lowbias32') to spread neighbouring keys over the table
+    key ^= (key >> 16);
+    key *= 0x7feb352du;
+    key ^= (key >> 15);
+    key *= 0x846ca68bu;
+    key ^= (key >> 16);
+
+    return key % (uint32_t) m_cell_count;
+}
+
+MI_VARIANT std::tuple<typename LightCache<Float, Spectrum>::UInt32, Float, Float>
+LightCache<Float, Spectrum>::sample_emitter(const Interaction3f &ref,
+                                            Float sample,
+                                            Mask active) const {
+    UInt32 cell_index = cell(ref, active);
+    Float sum = dr::gather<Float>(m_learned_sum, cell_index, active);
+
+    // Cells without any observation always use the fallback distribution
+    Float alpha = dr::select(sum > 0.f, m_fallback, 1.f);
+    Mask pick_fallback = sample < alpha;
+
+    UInt32 index = 0;
+    Float sample_re = 0.f;
+
+    Mask active_f = active && pick_fallback;
+    auto [index_f, sample_f] = m_fallback_distr.sample_reuse(
+        dr::minimum(sample / alpha, dr::OneMinusEpsilon<Float>), active_f);
+    dr::masked(index, active_f) = index_f;
+    dr::masked(sample_re, active_f) = sample_f;
+
+    Mask active_l = active && !pick_fallback;
+    if (dr::any_or<true>(active_l)) {
+        uint32_t count = (uint32_t) m_emitter_count;
+        UInt32 offset = cell_index * count, i = 0, index_l = count - 1;
+        Float target = (sample - alpha) / (1.f - alpha) * sum,
+              cdf = 0.f, sample_l = 0.f;
+
+        // Linear scan over the learned contributions of the cell
+        Mask active_loop = active_l;
+        dr::Loop<Mask> loop("LightCache::sample_emitter", i, cdf, index_l,
+                            sample_l, active_loop);
+        while (loop(active_loop)) {
+            Float value = dr::gather<Float>(m_learned, offset + i, active_loop);
+            Mask found = active_loop && ((cdf + value > target) || (i + 1u >= count));
+
+            dr::masked(index_l, found) = i;
+            dr::masked(sample_l, found) = dr::minimum(
+                dr::select(value > 0.f, (target - cdf) / value, 0.f),
+                dr::OneMinusEpsilon<Float>);
+
+            cdf += value;
+            i++;
+            active_loop &= !found;
+        }
+
+        dr::masked(index, active_l) = index_l;
+        dr::masked(sample_re, active_l) = sample_l;
+    }
+
+    return { index, eval_pmf(cell_index, sum, index, active), sample_re };
+}
+
+MI_VARIANT Float LightCache<Float, Spectrum>::pdf_emitter(const Interaction3f &ref,
+                                                          UInt32 index,
+                                                          Mask active) const {
+    UInt32 cell_index = cell(ref, active);
+    Float sum = dr::gather<Float>(m_learned_sum, cell_index, active);
+    return eval_pmf(cell_index, sum, index, active);
+}
+
+MI_VARIANT Float LightCache<Float, Spectrum>::eval_pmf(UInt32 cell_index,
+                                                       Float sum, UInt32 index,
+                                                       Mask active) const {
+    Mask learned = active && sum > 0.f;
+    Float pmf_fallback = m_fallback_distr.eval_pmf_normalized(index, active),
+          pmf_learned = dr::gather<Float>(
+              m_learned, cell_index * (uint32_t) m_emitter_count + index, learned) / sum;
+
+    return dr::select(active,
+                      dr::select(learned,
+                                 m_fallback * pmf_fallback +
+                                     (1.f - m_fallback) * pmf_learned,
+                                 pmf_fallback),
+                      0.f);
+}
+
+MI_VARIANT void LightCache<Float, Spectrum>::record(const Interaction3f &ref,
+                                                    UInt32 index,
+                                                    Float contribution,
+                                                    Mask active) const {
+    // Zero contributions (e.g. occluded samples) leave the cache unchanged
+    active &= dr::isfinite(contribution) && contribution > 0.f;
+    if (dr::none_or<false>(active))
+        return;
+
+    contribution = dr::detach(contribution);
+    UInt32 cell_index = cell(ref, active);
+
+    std::unique_lock<std::mutex> guard(m_mutex, std::defer_lock);
+    if constexpr (!dr::is_jit_v<Float>)
+        guard.lock();
+
+    dr::scatter_reduce(ReduceOp::Add, m_recorded, contribution,
+                       cell_index * (uint32_t) m_emitter_count + index, active);
+    dr::scatter_reduce(ReduceOp::Add, m_recorded_sum, contribution,
+                       cell_index, active);
+}
+
+MI_VARIANT void LightCache<Float, Spectrum>::update() {
+    m_learned = m_learned + m_recorded;
+    m_learned_sum = m_learned_sum + m_recorded_sum;
+    m_recorded = dr::zeros<FloatStorage>(m_cell_count * m_emitter_count);
+    m_recorded_sum = dr::zeros<FloatStorage>(m_cell_count);
+    dr::make_opaque(m_learned, m_learned_sum, m_recorded, m_recorded_sum);
+}
+
+MI_VARIANT void LightCache<Float, Spectrum>::reset() {
+    m_learned = dr::zeros<FloatStorage>(m_cell_count * m_emitter_count);
+    m_learned_sum = dr::zeros<FloatStorage>(m_cell_count);
+    m_recorded = dr::zeros<FloatStorage>(m_cell_count * m_emitter_count);
+    m_recorded_sum = dr::zeros<FloatStorage>(m_cell_count);
+    dr::make_opaque(m_learned, m_learned_sum, m_recorded, m_recorded_sum);
+}
+
+MI_VARIANT std::string LightCache<Float, Spectrum>::to_string() const {
+    std::ostringstream oss;
+    oss << "LightCache[" << std::endl
+        << "  bbox = " << string::indent(m_bbox) << "," << std::endl
+        << "  resolution = " << m_resolution << "," << std::endl
+        << "  cell_count = " << m_cell_count << "," << std::endl
+        << "  emitter_count = " << m_emitter_count << "," << std::endl
+        << "  fallback = " << m_fallback << std::endl
+        << "]";
+    return oss.str();
+}
+
+MI_IMPLEMENT_CLASS_VARIANT(LightCache, Object)
+MI_INSTANTIATE_CLASS(LightCache)
+NAMESPACE_END(mitsuba)
@@ -0,0 +1,594 @@
+#include <mitsuba/core/logger.h>
+#include <mitsuba/render/bsdf.h>
+#include <mitsuba/render/emitter.h>
+#include <mitsuba/render/lighttree.h>
+#include <algorithm>
+
+NAMESPACE_BEGIN(mitsuba)
+
+MI_VARIANT LightTree<Float, Spectrum>::LightTree(const std::vector<ref<Emitter>> &emitters,
+                                                bool split_emitters) {
+    std::vector<std::pair<LightBounds, uint32_t>> prims;
+    std::vector<uint32_t> infinite,
+                          prim_emitter, prim_index,
+                          emitter_offset(emitters.size(), 0),
+                          emitter_prim_count(emitters.size(), 1);
+
+    for (uint32_t i = 0; i < (uint32_t) emitters.size(); ++i) {
+        const Emitter *emitter = emitters[i].get();
+        ScalarBoundingBox3f bbox = emitter->bbox();
+
+        // Emitters without a meaningful position are sampled separately
+        if (has_flag(emitter->flags(), EmitterFlags::Infinite) ||
+            !bbox.valid() || !dr::all(dr::isfinite(bbox.min) &&
+                                      dr::isfinite(bbox.max))) {
+            infinite.push_back(i);
+            emitter_prim_count[i] = 0;
+            continue;
+        }
+
+        std::vector<LightBounds> bounds;
+        if (split_emitters) {
+            bounds = emitter->primitive_bounds();
+        } else {
+            auto [axis, cos_theta_o, cos_theta_e] = emitter->emission_cone();
+            bounds.emplace_back(bbox, axis, emitter->estimate_power(),
+                                cos_theta_o, cos_theta_e);
+        }
+
+        emitter_offset[i] = (uint32_t) prim_emitter.size();
+        emitter_prim_count[i] = (uint32_t) bounds.size();
+
+        for (uint32_t j = 0; j < (uint32_t) bounds.size(); ++j) {
+            uint32_t prim = (uint32_t) prim_emitter.size();
+            prim_emitter.push_back(i);
+            prim_index.push_back(j);
+
+            // Primitives without power can never be chosen by the tree
+            LightBounds &b = bounds[j];
+            if (!(b.power > 0.f) || !std::isfinite(b.power) || !b.bbox.valid())
+                continue;
+
+            b.axis = dr::normalize(b.axis);
+            prims.emplace_back(b, prim);
+        }
+    }
+
+    std::vector<uint32_t> prim_leaf(prim_emitter.size(), (uint32_t) -1);
+
+    m_finite_count = prims.size();
+    m_infinite_count = infinite.size();
+
+    std::vector<uint32_t> children, parents;
+    if (!prims.empty())
+        build(prims, 0, prims.size(), 0, children, parents, prim_leaf);
+    m_node_count = m_nodes.size();
+
+    /* Infinite emitters are chosen with the same probability as the entire
+       tree, and uniformly among themselves */
+    if (m_infinite_count > 0)
+        m_infinite_prob = (ScalarFloat) m_infinite_count /
+                          (ScalarFloat) (m_infinite_count + (m_node_count > 0 ? 1 : 0));
+
+    std::vector<ScalarFloat> infinite_pmf(emitters.size(), 0.f);
+    for (uint32_t i : infinite)
+        infinite_pmf[i] = m_infinite_prob / (ScalarFloat) m_infinite_count;
+
+    // Flatten the node bounds so that the tree can be traversed on the device
+    std::vector<ScalarFloat> bbox_min(3 * m_node_count), bbox_max(3 * m_node_count),
+                             axis(3 * m_node_count), power(m_node_count),
+                             cos_theta_o(m_node_count), cos_theta_e(m_node_count);
+    for (size_t i = 0; i < m_node_count; ++i) {
+        const LightBounds &b = m_nodes[i];
+        for (size_t k = 0; k < 3; ++k) {
+            bbox_min[3 * i + k] = b.bbox.min[k];
+            bbox_max[3 * i + k] = b.bbox.max[k];
+            axis[3 * i + k]     = b.axis[k];
+        }
+        power[i]       = b.power;
+        cos_theta_o[i] = b.cos_theta_o;
+        cos_theta_e[i] = b.cos_theta_e;
+    }
+
+    m_node_children    = dr::load<UInt32Storage>(children.data(), children.size());
+    m_node_parent      = dr::load<UInt32Storage>(parents.data(), parents.size());
+    m_node_bbox_min    = dr::load<FloatStorage>(bbox_min.data(), bbox_min.size());
+    m_node_bbox_max    = dr::load<FloatStorage>(bbox_max.data(), bbox_max.size());
+    m_node_axis        = dr::load<FloatStorage>(axis.data(), axis.size());
+    m_node_power       = dr::load<FloatStorage>(power.data(), power.size());
+    m_node_cos_theta_o = dr::load<FloatStorage>(cos_theta_o.data(), cos_theta_o.size());
+    m_node_cos_theta_e = dr::load<FloatStorage>(cos_theta_e.data(), cos_theta_e.size());
+
+    m_prim_emitter         = dr::load<UInt32Storage>(prim_emitter.data(), prim_emitter.size());
+    m_prim_index           = dr::load<UInt32Storage>(prim_index.data(), prim_index.size());
+    m_prim_leaf            = dr::load<UInt32Storage>(prim_leaf.data(), prim_leaf.size());
+    m_emitter_offset       = dr::load<UInt32Storage>(emitter_offset.data(), emitter_offset.size());
+    m_emitter_prim_count   = dr::load<UInt32Storage>(emitter_prim_count.data(), emitter_prim_count.size());
+    m_emitter_infinite_pmf = dr::load<FloatStorage>(infinite_pmf.data(), infinite_pmf.size());
+    m_infinite_index       = dr::load<UInt32Storage>(infinite.data(), infinite.size());
+
+    Log(Debug, "Built light tree over %zu light primitives (%zu nodes, %zu "
+        "infinite emitters).", m_finite_count, m_node_count, m_infinite_count);
+}
+
+MI_VARIANT LightTree<Float, Spectrum>::~LightTree() { }
+
+MI_VARIANT uint32_t LightTree<Float, Spectrum>::build(
+    std::vector<std::pair<LightBounds, uint32_t>> &prims, size_t start,
+    size_t end, uint32_t parent, std::vector<uint32_t> &children,
+    std::vector<uint32_t> &parents, std::vector<uint32_t> &prim_leaf) {
+    uint32_t index = (uint32_t) m_nodes.size();
+    m_nodes.emplace_back();
+    children.push_back(0u);
+    children.push_back(0u);
+    parents.push_back(parent);
+
+    if (end - start == 1) {
+        uint32_t prim = prims[start].second;
+        m_nodes[index] = prims[start].first;
+        children[2 * index] = prim;
+        prim_leaf[prim] = index;
+        return index;
+    }
+
+    LightBounds bounds;
+    ScalarBoundingBox3f centroid_bbox;
+    for (size_t i = start; i < end; ++i) {
+        bounds = LightBounds::merge(bounds, prims[i].first);
+        centroid_bbox.expand(prims[i].first.bbox.center());
+    }
+
+    /* Choose the split using the surface area orientation heuristic (SAOH),
+       which accounts for the spatial extent, the power and the orientation
+       cone of both children. */
+    constexpr size_t BucketCount = 12;
+    ScalarVector3f extents = bounds.bbox.extents(),
+                   centroid_extents = centroid_bbox.extents();
+
+    auto bucket_index = [&](const LightBounds &b, size_t dim) {
+        ScalarFloat rel = (b.bbox.center()[dim] - centroid_bbox.min[dim]) /
+                          centroid_extents[dim];
+        return std::min((size_t) (rel * BucketCount), BucketCount - 1);
+    };
+
+    auto cost = [](const LightBounds &b) {
+        return b.power * b.orientation_measure() * b.bbox.surface_area();
+    };
+
+    ScalarFloat best_cost = dr::Infinity<ScalarFloat>;
+    int best_dim = -1;
+    size_t best_bucket = 0;
+
+    for (int dim = 0; dim < 3; ++dim) {
+        if (centroid_extents[dim] == 0.f)
+            continue;
+
+        LightBounds buckets[BucketCount];
+        for (size_t i = start; i < end; ++i) {
+            LightBounds &bucket = buckets[bucket_index(prims[i].first, dim)];
+            bucket = LightBounds::merge(bucket, prims[i].first);
+        }
+
+        // Penalize thin slabs along the split dimension
+        ScalarFloat kr = dr::max(extents) / extents[dim];
+
+        for (size_t split = 0; split < BucketCount - 1; ++split) {
+            LightBounds below, above;
+            for (size_t k = 0; k <= split; ++k)
+                below = LightBounds::merge(below, buckets[k]);
+            for (size_t k = split + 1; k < BucketCount; ++k)
+                above = LightBounds::merge(above, buckets[k]);
+
+            if (below.power == 0.f || above.power == 0.f)
+                continue;
+
+            ScalarFloat split_cost = kr * (cost(below) + cost(above));
+            if (split_cost < best_cost) {
+                best_cost = split_cost;
+                best_dim = dim;
+                best_bucket = split;
+            }
+        }
+    }
+
+    auto first = prims.begin() + start, last = prims.begin() + end, mid = first;
+    if (best_dim >= 0 && best_cost > 0.f) {
+        mid = std::partition(first, last, [&](const auto &prim) {
+            return bucket_index(prim.first, best_dim) <= best_bucket;
+        });
+    } else if (best_dim >= 0) {
+        /* All candidate splits are degenerate (e.g. point lights, which have
+           a zero surface area): split at the spatial median instead */
+        int dim = 0;
+        for (int k = 1; k < 3; ++k)
+            if (centroid_extents[k] > centroid_extents[dim])
+                dim = k;
+        ScalarFloat split_pos = centroid_bbox.center()[dim];
+        mid = std::partition(first, last, [&](const auto &prim) {
+            return prim.first.bbox.center()[dim] < split_pos;
+        });
+    }
+
+    // Fall back to an equal split if the primitives could not be separated
+    if (mid == first || mid == last)
+        mid = first + (end - start) / 2;
+
+    size_t split_index = (size_t) (mid - prims.begin());
+    uint32_t left  = build(prims, start, split_index, index, children, parents, prim_leaf),
+             right = build(prims, split_index, end, index, children, parents, prim_leaf);
+
+    m_nodes[index] = bounds;
+    children[2 * index]     = left;
+    children[2 * index + 1] = right;
+
+    return index;
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::importance(UInt32 node,
+                                                        const Point3f &p,
+                                                        const Normal3f &n,
+                                                        Mask active) const {
+    return eval_importance(node, p, n, nullptr, active);
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::importance(UInt32 node,
+                                                        const Point3f &p,
+                                                        const Normal3f &n,
+                                                        const BSDFLobe3f &lobe,
+                                                        Mask active) const {
+    return eval_importance(node, p, n, &lobe, active);
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::eval_importance(UInt32 node,
+                                                             const Point3f &p,
+                                                             const Normal3f &n,
+                                                             const BSDFLobe3f *lobe,
+                                                             Mask active) const {
+    Point3f bbox_min  = dr::gather<Point3f>(m_node_bbox_min, node, active),
+            bbox_max  = dr::gather<Point3f>(m_node_bbox_max, node, active);
+    Vector3f axis     = dr::gather<Vector3f>(m_node_axis, node, active);
+    Float power       = dr::gather<Float>(m_node_power, node, active),
+          cos_theta_o = dr::gather<Float>(m_node_cos_theta_o, node, active),
+          cos_theta_e = dr::gather<Float>(m_node_cos_theta_e, node, active);
+
+    // cos(max(0, a - b)) and sin(max(0, a - b)) given the sines/cosines of a, b
+    auto cos_sub_clamped = [](Float sin_a, Float cos_a, Float sin_b, Float cos_b) {
+        return dr::select(cos_a > cos_b, 1.f, cos_a * cos_b + sin_a * sin_b);
+    };
+    auto sin_sub_clamped = [](Float sin_a, Float cos_a, Float sin_b, Float cos_b) {
+        return dr::select(cos_a > cos_b, 0.f, sin_a * cos_b - cos_a * sin_b);
+    };
+
+    Point3f center = .5f * (bbox_min + bbox_max);
+    Float radius   = .5f * dr::norm(bbox_max - bbox_min);
+
+    Vector3f d  = p - center;
+    Float dist2 = dr::squared_norm(d);
+    Mask valid  = dist2 > 0.f;
+    Vector3f wi = d * dr::rsqrt(dr::select(valid, dist2, 1.f));
+
+    // Cone of directions subtended by the node's bounding sphere
+    Mask inside      = dist2 < dr::sqr(radius);
+    Float sin2_b     = dr::select(valid, dr::sqr(radius) / dist2, 0.f),
+          cos_theta_b = dr::select(inside, -1.f, dr::safe_sqrt(1.f - sin2_b)),
+          sin_theta_b = dr::select(inside, 0.f, dr::safe_sqrt(sin2_b));
+
+    // Minimum angle between the emission cone and the direction towards 'p'
+    Float cos_theta_w = dr::dot(axis, wi),
+          sin_theta_w = dr::safe_sqrt(1.f - dr::sqr(cos_theta_w)),
+          sin_theta_o = dr::safe_sqrt(1.f - dr::sqr(cos_theta_o)),
+          cos_theta_x = cos_sub_clamped(sin_theta_w, cos_theta_w, sin_theta_o, cos_theta_o),
+          sin_theta_x = sin_sub_clamped(sin_theta_w, cos_theta_w, sin_theta_o, cos_theta_o),
+          cos_theta_p = cos_sub_clamped(sin_theta_x, cos_theta_x, sin_theta_b, cos_theta_b);
+
+    Float result = power * cos_theta_p / dr::maximum(dist2, radius);
+    valid &= cos_theta_p > cos_theta_e;
+
+    // Foreshortening at the receiver (skipped if it has no normal)
+    Mask has_normal = dr::squared_norm(n) > 0.f;
+    Float cos_theta_i = dr::abs_dot(wi, n),
+          sin_theta_i = dr::safe_sqrt(1.f - dr::sqr(cos_theta_i));
+    dr::masked(result, has_normal) *=
+        cos_sub_clamped(sin_theta_i, cos_theta_i, sin_theta_b, cos_theta_b);
+
+    /* Bound of the BSDF lobe at the receiver: full weight if the node may
+       overlap the cone of the lobe, decreasing with the angle in between */
+    if (lobe) {
+        Vector3f axis_l   = dr::detach(lobe->axis);
+        Float cos_theta_l = dr::detach(lobe->cos_theta),
+              sin_theta_l = dr::safe_sqrt(1.f - dr::sqr(cos_theta_l)),
+              diffuse     = dr::clamp(dr::detach(lobe->diffuse), MinLobeDiffuse, 1.f);
+
+        Float cos_theta_a = -dr::dot(wi, axis_l),
+              sin_theta_a = dr::safe_sqrt(1.f - dr::sqr(cos_theta_a)),
+              cos_theta_y = cos_sub_clamped(sin_theta_a, cos_theta_a, sin_theta_b, cos_theta_b),
+              sin_theta_y = sin_sub_clamped(sin_theta_a, cos_theta_a, sin_theta_b, cos_theta_b),
+              cos_theta_z = cos_sub_clamped(sin_theta_y, cos_theta_y, sin_theta_l, cos_theta_l);
+
+        result *= dr::lerp(diffuse, 1.f, dr::maximum(cos_theta_z, 0.f));
+    }
+
+    return dr::select(valid, dr::maximum(result, 0.f), 0.f);
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::importance_segment(UInt32 node,
+                                                                const Ray3f &ray,
+                                                                Mask active) const {
+    Point3f bbox_min = dr::gather<Point3f>(m_node_bbox_min, node, active),
+            bbox_max = dr::gather<Point3f>(m_node_bbox_max, node, active);
+    Point3f center   = .5f * (bbox_min + bbox_max);
+
+    // Closest point to the center of the node on the segment
+    Point3f o  = dr::detach(ray.o);
+    Vector3f d = dr::detach(ray.d);
+    Float t = dr::clamp(dr::dot(center - o, d), 0.f, dr::detach(ray.maxt));
+
+    return importance(node, dr::fmadd(d, t, o), Normal3f(0.f), active);
+}
+
+MI_VARIANT std::tuple<typename LightTree<Float, Spectrum>::UInt32,
+                      typename LightTree<Float, Spectrum>::UInt32, Float, Float>
+LightTree<Float, Spectrum>::sample_emitter(const Interaction3f &ref,
+                                           Float sample,
+                                           Mask active) const {
+    Point3f p  = dr::detach(ref.p);
+    Normal3f n = dr::detach(ref.n);
+    return sample_root(
+        [&](const UInt32 &node, const Mask &active_node) {
+            return eval_importance(node, p, n, nullptr, active_node);
+        },
+        sample, active);
+}
+
+MI_VARIANT std::tuple<typename LightTree<Float, Spectrum>::UInt32,
+                      typename LightTree<Float, Spectrum>::UInt32, Float, Float>
+LightTree<Float, Spectrum>::sample_emitter(const Interaction3f &ref,
+                                           const BSDFLobe3f &lobe,
+                                           Float sample,
+                                           Mask active) const {
+    Point3f p  = dr::detach(ref.p);
+    Normal3f n = dr::detach(ref.n);
+    return sample_root(
+        [&](const UInt32 &node, const Mask &active_node) {
+            return eval_importance(node, p, n, &lobe, active_node);
+        },
+        sample, active);
+}
+
+MI_VARIANT std::tuple<typename LightTree<Float, Spectrum>::UInt32,
+                      typename LightTree<Float, Spectrum>::UInt32, Float, Float>
+LightTree<Float, Spectrum>::sample_emitter_segment(const Ray3f &ray,
+                                                   Float sample,
+                                                   Mask active) const {
+    return sample_root(
+        [&](const UInt32 &node, const Mask &active_node) {
+            return importance_segment(node, ray, active_node);
+        },
+        sample, active);
+}
+
+MI_VARIANT std::tuple<typename LightTree<Float, Spectrum>::UInt32,
+                      typename LightTree<Float, Spectrum>::UInt32, Float, Float>
+LightTree<Float, Spectrum>::sample_subtree(const Interaction3f &ref,
+                                           UInt32 node, Float sample,
+                                           Mask active) const {
+    Point3f p  = dr::detach(ref.p);
+    Normal3f n = dr::detach(ref.n);
+    return sample_node(
+        [&](const UInt32 &node_, const Mask &active_node) {
+            return importance(node_, p, n, active_node);
+        },
+        node, sample, active);
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::pdf_emitter(const Interaction3f &ref,
+                                                         UInt32 index,
+                                                         UInt32 prim_index,
+                                                         Mask active) const {
+    Point3f p  = dr::detach(ref.p);
+    Normal3f n = dr::detach(ref.n);
+    return pdf_leaf(
+        [&](const UInt32 &node, const Mask &active_node) {
+            return eval_importance(node, p, n, nullptr, active_node);
+        },
+        index, prim_index, active);
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::pdf_emitter(const Interaction3f &ref,
+                                                         const BSDFLobe3f &lobe,
+                                                         UInt32 index,
+                                                         UInt32 prim_index,
+                                                         Mask active) const {
+    Point3f p  = dr::detach(ref.p);
+    Normal3f n = dr::detach(ref.n);
+    return pdf_leaf(
+        [&](const UInt32 &node, const Mask &active_node) {
+            return eval_importance(node, p, n, &lobe, active_node);
+        },
+        index, prim_index, active);
+}
+
+MI_VARIANT Float LightTree<Float, Spectrum>::pdf_emitter_segment(const Ray3f &ray,
+                                                                 UInt32 index,
+                                                                 UInt32 prim_index,
+                                                                 Mask active) const {
+    return pdf_leaf(
+        [&](const UInt32 &node, const Mask &active_node) {
+            return importance_segment(node, ray, active_node);
+        },
+        index, prim_index, active);
+}
+
+MI_VARIANT template <typename ImportanceFn>
+std::tuple<typename LightTree<Float, Spectrum>::UInt32,
+           typename LightTree<Float, Spectrum>::UInt32, Float, Float>
+LightTree<Float, Spectrum>::sample_root(const ImportanceFn &importance_fn,
+                                        Float sample, Mask active) const {
+    UInt32 index = 0, prim_index = 0;
+    Float pmf = 0.f,
+          sample_re = sample;
+
+    Mask pick_infinite = active && (sample < m_infinite_prob);
+
+    if (m_infinite_count > 0) {
+        ScalarFloat count = (ScalarFloat) m_infinite_count;
+        Float sample_scaled = sample / m_infinite_prob * count;
+        UInt32 i = dr::minimum(UInt32(sample_scaled), (uint32_t) m_infinite_count - 1u);
+
+        dr::masked(index, pick_infinite) =
+            dr::gather<UInt32>(m_infinite_index, i, pick_infinite);
+        dr::masked(pmf, pick_infinite) = m_infinite_prob / count;
+        dr::masked(sample_re, pick_infinite) = sample_scaled - Float(i);
+    }
+
+    if (m_node_count > 0) {
+        Mask active_tree = active && !pick_infinite;
+        Float sample_tree = dr::minimum(
+            (sample - m_infinite_prob) / (1.f - m_infinite_prob),
+            dr::OneMinusEpsilon<Float>);
+
+        auto [index_tree, prim_index_tree, pmf_tree, sample_re_tree] =
+            sample_node(importance_fn, 0u, sample_tree, active_tree);
+
+        dr::masked(index, active_tree) = index_tree;
+        dr::masked(prim_index, active_tree) = prim_index_tree;
+        dr::masked(pmf, active_tree) = (1.f - m_infinite_prob) * pmf_tree;
+        dr::masked(sample_re, active_tree) = sample_re_tree;
+    }
+
+    return { index, prim_index, dr::select(active, pmf, 0.f), sample_re };
+}
+
+MI_VARIANT template <typename ImportanceFn>
+std::tuple<typename LightTree<Float, Spectrum>::UInt32,
+           typename LightTree<Float, Spectrum>::UInt32, Float, Float>
+LightTree<Float, Spectrum>::sample_node(const ImportanceFn &importance_fn,
+                                        UInt32 node, Float sample,
+                                        Mask active) const {
+    Float pmf = 1.f;
+
+    // Descend from 'node', choosing children proportionally to their importance
+    Mask active_loop = active && !is_leaf(node, active);
+    dr::Loop<Mask> loop("LightTree::sample_subtree", node, pmf, sample,
+                        active_loop);
+    while (loop(active_loop)) {
+        auto [left, right] = node_children(node, active_loop);
+
+        Float importance_left  = importance_fn(left, active_loop),
+              importance_right = importance_fn(right, active_loop),
+              importance_total = importance_left + importance_right;
+
+        Mask valid = importance_total > 0.f;
+        Float prob_left  = importance_left / importance_total,
+              prob_right = importance_right / importance_total;
+
+        Mask pick_left = sample < prob_left;
+        node = dr::select(pick_left, left, right);
+        pmf = dr::select(valid, pmf * dr::select(pick_left, prob_left, prob_right), 0.f);
+        sample = dr::minimum(
+            dr::select(pick_left, sample / prob_left,
+                       (sample - prob_left) / prob_right),
+            dr::OneMinusEpsilon<Float>);
+
+        // Stop upon reaching a leaf, or if no child can contribute
+        active_loop &= valid && !is_leaf(node, active_loop);
+    }
+
+    /* The descent stops at an interior node (whose children are node and
+       not primitive indices) if none of its children can contribute */
+    Mask ok = active && is_leaf(node, active) && pmf > 0.f;
+    UInt32 prim = dr::gather<UInt32>(m_node_children, 2 * node, ok);
+    return { dr::gather<UInt32>(m_prim_emitter, prim, ok),
+             dr::gather<UInt32>(m_prim_index, prim, ok),
+             dr::select(ok, pmf, 0.f), dr::select(ok, sample, 0.f) };
+}
+
+MI_VARIANT template <typename ImportanceFn>
+Float LightTree<Float, Spectrum>::pdf_leaf(const ImportanceFn &importance_fn,
+                                           UInt32 index, UInt32 prim_index,
+                                           Mask active) const {
+    Float pmf = dr::gather<Float>(m_emitter_infinite_pmf, index, active);
+
+    if (m_node_count > 0) {
+        UInt32 node = emitter_leaf(index, prim_index, active);
+        Mask in_tree = active && dr::neq(node, (uint32_t) -1);
+
+        Float pmf_tree = 1.f - m_infinite_prob;
+
+        // Walk up from the leaf, accumulating the probabilities of all choices
+        Mask active_loop = in_tree && dr::neq(node, 0u);
+        dr::Loop<Mask> loop("LightTree::pdf_emitter", node, pmf_tree, active_loop);
+        while (loop(active_loop)) {
+            UInt32 parent = node_parent(node, active_loop);
+            auto [left, right] = node_children(parent, active_loop);
+
+            Float importance_left  = importance_fn(left, active_loop),
+                  importance_right = importance_fn(right, active_loop),
+                  importance_total = importance_left + importance_right;
+
+            Float importance_node =
+                dr::select(dr::eq(node, left), importance_left, importance_right);
+
+            pmf_tree = dr::select(importance_total > 0.f,
+                                  pmf_tree * (importance_node / importance_total), 0.f);
+            node = parent;
+
+            active_loop &= dr::neq(node, 0u) && (pmf_tree > 0.f);
+        }
+
+        dr::masked(pmf, in_tree) = pmf_tree;
+    }
+
+    return dr::select(active, pmf, 0.f);
+}
+
+MI_VARIANT std::pair<typename LightTree<Float, Spectrum>::UInt32,
+                     typename LightTree<Float, Spectrum>::UInt32>
+LightTree<Float, Spectrum>::node_children(UInt32 node, Mask active) const {
+    return { dr::gather<UInt32>(m_node_children, 2 * node, active),
+             dr::gather<UInt32>(m_node_children, 2 * node + 1, active) };
+}
+
+MI_VARIANT typename LightTree<Float, Spectrum>::UInt32
+LightTree<Float, Spectrum>::node_parent(UInt32 node, Mask active) const {
+    return dr::gather<UInt32>(m_node_parent, node, active);
+}
+
+MI_VARIANT typename LightTree<Float, Spectrum>::Mask
+LightTree<Float, Spectrum>::is_leaf(UInt32 node, Mask active) const {
+    return dr::eq(dr::gather<UInt32>(m_node_children, 2 * node + 1, active), 0u);
+}
+
+MI_VARIANT typename LightTree<Float, Spectrum>::UInt32
+LightTree<Float, Spectrum>::emitter_leaf(UInt32 index, UInt32 prim_index,
+                                         Mask active) const {
+    // Emitters that weren't split ignore the primitive index
+    UInt32 prim_count = dr::gather<UInt32>(m_emitter_prim_count, index, active);
+    Mask has_prims = active && prim_count > 0u;
+    UInt32 prim = dr::gather<UInt32>(m_emitter_offset, index, has_prims) +
+                  dr::select(prim_count > 1u,
+                             dr::minimum(prim_index, prim_count - 1u), 0u);
+    return dr::select(has_prims,
+                      dr::gather<UInt32>(m_prim_leaf, prim, has_prims),
+                      (uint32_t) -1);
+}
+
+MI_VARIANT typename LightTree<Float, Spectrum>::UInt32
+LightTree<Float, Spectrum>::infinite_emitter(UInt32 i, Mask active) const {
+    return dr::gather<UInt32>(m_infinite_index, i, active);
+}
+
+MI_VARIANT std::string LightTree<Float, Spectrum>::to_string() const {
+    std::ostringstream oss;
+    oss << "LightTree[" << std::endl
+        << "  node_count = " << m_node_count << "," << std::endl
+        << "  finite_count = " << m_finite_count << "," << std::endl
+        << "  infinite_count = " << m_infinite_count << "," << std::endl
+        << "  infinite_prob = " << m_infinite_prob << std::endl
+        << "]";
+    return oss.str();
+}
+
+MI_IMPLEMENT_CLASS_VARIANT(LightTree, Object)
+MI_INSTANTIATE_CLASS(LightTree)
+NAMESPACE_END(mitsuba)
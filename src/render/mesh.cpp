@@ -533,6 +533,18 @@ Mesh<Float, Spectrum>::sample_position(Float time, const Point2f &sample_, Mask
     std::tie(face_idx, sample.y()) =
         m_area_pmf.sample_reuse(sample.y(), active);
 
+    PositionSample3f ps = sample_face_position(time, face_idx, sample, active);
+    ps.pdf = m_area_pmf.normalization();
+
+    return ps;
+}
+
+MI_VARIANT typename Mesh<Float, Spectrum>::PositionSample3f
+Mesh<Float, Spectrum>::sample_face_position(Float time, UInt32 face_idx,
+                                            const Point2f &sample,
+                                            Mask active) const {
+    ensure_pmf_built();
+
     Vector3u fi = face_indices(face_idx, active);
 
     Point3f p0 = vertex_position(fi[0], active),
@@ -545,8 +557,9 @@ Mesh<Float, Spectrum>::sample_position(Float time, const Point2f &sample_, Mask
     PositionSample3f ps;
     ps.p     = dr::fmadd(e0, b.x(), dr::fmadd(e1, b.y(), p0));
     ps.time  = time;
-    ps.pdf   = m_area_pmf.normalization();
+    ps.pdf   = dr::rcp(m_area_pmf.eval_pmf(face_idx, active));
     ps.delta = false;
+    ps.prim_index = face_idx;
 
     if (has_vertex_texcoords()) {
         Point2f uv0 = vertex_texcoord(fi[0], active),
@@ -578,6 +591,11 @@ Mesh<Float, Spectrum>::sample_position(Float time, const Point2f &sample_, Mask
     return ps;
 }
 
+MI_VARIANT Float Mesh<Float, Spectrum>::face_area(UInt32 face_idx, Mask active) const {
+    ensure_pmf_built();
+    return m_area_pmf.eval_pmf(face_idx, active);
+}
+
 MI_VARIANT
 
 typename Mesh<Float, Spectrum>::SurfaceInteraction3f
@@ -23,6 +23,22 @@ MI_PY_EXPORT(BSDFSample) {
     MI_PY_DRJIT_STRUCT(bs, BSDFSample3f, wo, pdf, eta, sampled_type, sampled_component);
 }
 
+MI_PY_EXPORT(BSDFLobe) {
+    MI_PY_IMPORT_TYPES()
+
+    auto lobe = py::class_<BSDFLobe3f>(m, "BSDFLobe3f", D(BSDFLobe))
+        .def(py::init<>(), "Construct a lobe bound that does not favour any direction")
+        .def(py::init<const Vector3f &, const Float &, const Float &>(),
+             "axis"_a, "cos_theta"_a, "diffuse"_a, D(BSDFLobe, BSDFLobe))
+        .def(py::init<const BSDFLobe3f &>(), "lobe"_a, "Copy constructor")
+        .def_readwrite("axis", &BSDFLobe3f::axis, D(BSDFLobe, axis))
+        .def_readwrite("cos_theta", &BSDFLobe3f::cos_theta, D(BSDFLobe, cos_theta))
+        .def_readwrite("diffuse", &BSDFLobe3f::diffuse, D(BSDFLobe, diffuse))
+        .def_repr(BSDFLobe3f);
+
+    MI_PY_DRJIT_STRUCT(lobe, BSDFLobe3f, axis, cos_theta, diffuse);
+}
+
 /// Trampoline for derived types implemented in Python
 MI_VARIANT class PyBSDF : public BSDF<Float, Spectrum> {
 public:
@@ -65,6 +81,11 @@ public:
         PYBIND11_OVERRIDE_PURE(Spectrum, BSDF, eval_diffuse_reflectance, si, active);
     }
 
+    BSDFLobe3f lobe(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                    Mask active) const override {
+        PYBIND11_OVERRIDE(BSDFLobe3f, BSDF, lobe, ctx, si, active);
+    }
+
     std::string to_string() const override {
         PYBIND11_OVERRIDE_PURE(std::string, BSDF, to_string,);
     }
@@ -112,6 +133,10 @@ template <typename Ptr, typename Cls> void bind_bsdf_generic(Cls &cls) {
              [](Ptr bsdf, const SurfaceInteraction3f &si, Mask active) {
                  return bsdf->eval_diffuse_reflectance(si, active);
              }, "si"_a, "active"_a = true, D(BSDF, eval_diffuse_reflectance))
+        .def("lobe",
+             [](Ptr bsdf, const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                Mask active) { return bsdf->lobe(ctx, si, active);
+             }, "ctx"_a, "si"_a, "active"_a = true, D(BSDF, lobe))
         .def("flags", [](Ptr bsdf) { return bsdf->flags(); }, D(BSDF, flags))
         .def("needs_differentials",
              [](Ptr bsdf) { return bsdf->needs_differentials(); },
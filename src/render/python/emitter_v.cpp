@@ -64,6 +64,15 @@ public:
         PYBIND11_OVERRIDE_PURE(ScalarBoundingBox3f, Emitter, bbox,);
     }
 
+    ScalarFloat estimate_power() const override {
+        PYBIND11_OVERRIDE(ScalarFloat, Emitter, estimate_power,);
+    }
+
+    std::tuple<ScalarVector3f, ScalarFloat, ScalarFloat>
+    emission_cone() const override {
+        using Return = std::tuple<ScalarVector3f, ScalarFloat, ScalarFloat>;
+        PYBIND11_OVERRIDE(Return, Emitter, emission_cone,);
+    }
 
     std::string to_string() const override {
         PYBIND11_OVERRIDE_PURE(std::string, Emitter, to_string,);
@@ -85,6 +94,13 @@ MI_PY_EXPORT(Emitter) {
         .def(py::init<const Properties&>())
         .def_method(Emitter, is_environment)
         .def_method(Emitter, flags, "active"_a = true)
+        .def_method(Emitter, estimate_power)
+        .def_method(Emitter, emission_cone)
+        .def_method(Emitter, sample_direction_primitive, "it"_a, "prim_index"_a,
+                    "sample"_a, "active"_a = true)
+        .def_method(Emitter, pdf_direction_primitive, "it"_a, "ds"_a,
+                    "active"_a = true)
+        .def_method(Emitter, scene_index, "active"_a = true)
         .def_readwrite("m_needs_sample_2", &PyEmitter::m_needs_sample_2)
         .def_readwrite("m_needs_sample_3", &PyEmitter::m_needs_sample_3)
         .def_property("m_flags",
@@ -149,7 +165,21 @@ MI_PY_EXPORT(Emitter) {
                 },
                 "si"_a, "sample"_a, "active"_a = true,
                 D(Endpoint, sample_wavelengths))
+        .def("sample_direction_primitive",
+                [](EmitterPtr ptr, const Interaction3f &it, UInt32 prim_index,
+                   const Point2f &sample, Mask active) {
+                    return ptr->sample_direction_primitive(it, prim_index, sample, active);
+                },
+                "it"_a, "prim_index"_a, "sample"_a, "active"_a = true,
+                D(Emitter, sample_direction_primitive))
+        .def("pdf_direction_primitive",
+                [](EmitterPtr ptr, const Interaction3f &it, const DirectionSample3f &ds, Mask active) {
+                    return ptr->pdf_direction_primitive(it, ds, active);
+                },
+                "it"_a, "ds"_a, "active"_a = true,
+                D(Emitter, pdf_direction_primitive))
         .def("flags", [](EmitterPtr ptr) { return ptr->flags(); }, D(Emitter, flags))
+        .def("scene_index", [](EmitterPtr ptr) { return ptr->scene_index(); }, D(Emitter, scene_index))
         .def("shape", [](EmitterPtr ptr) { return ptr->shape(); }, D(Endpoint, shape))
         .def("is_environment",
              [](EmitterPtr ptr) { return ptr->is_environment(); },
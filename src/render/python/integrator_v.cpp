@@ -103,6 +103,10 @@ public:
         PYBIND11_OVERRIDE(std::vector<std::string>, SamplingIntegrator, aov_names, );
     }
 
+    size_t sample_state_size() const override {
+        PYBIND11_OVERRIDE(size_t, SamplingIntegrator, sample_state_size, );
+    }
+
     std::string to_string() const override {
         PYBIND11_OVERRIDE(std::string, SamplingIntegrator, to_string, );
     }
@@ -295,7 +299,8 @@ MI_PY_EXPORT(Integrator) {
                 return std::make_tuple(spec, mask, aovs);
             },
             "scene"_a, "sampler"_a, "ray"_a, "medium"_a = nullptr,
-            "active"_a = true, D(SamplingIntegrator, sample));
+            "active"_a = true, D(SamplingIntegrator, sample))
+        .def_method(SamplingIntegrator, sample_state_size);
 
     MI_PY_REGISTER_OBJECT("register_integrator", Integrator)
 
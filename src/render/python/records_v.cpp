@@ -16,9 +16,10 @@ MI_PY_EXPORT(PositionSample) {
         .def_readwrite("time",   &PositionSample3f::time,   D(PositionSample, time))
         .def_readwrite("pdf",    &PositionSample3f::pdf,    D(PositionSample, pdf))
         .def_readwrite("delta",  &PositionSample3f::delta,  D(PositionSample, delta))
+        .def_readwrite("prim_index", &PositionSample3f::prim_index, D(PositionSample, prim_index))
         .def_repr(PositionSample3f);
 
-    MI_PY_DRJIT_STRUCT(pos, PositionSample3f, p, n, uv, time, pdf, delta)
+    MI_PY_DRJIT_STRUCT(pos, PositionSample3f, p, n, uv, time, pdf, delta, prim_index)
 }
 
 MI_PY_EXPORT(DirectionSample) {
@@ -39,5 +40,6 @@ MI_PY_EXPORT(DirectionSample) {
         .def_readwrite("emitter", &DirectionSample3f::emitter, D(DirectionSample, emitter))
         .def_repr(DirectionSample3f);
 
-    MI_PY_DRJIT_STRUCT(pos, DirectionSample3f, p, n, uv, time, pdf, delta, emitter, d, dist)
+    MI_PY_DRJIT_STRUCT(pos, DirectionSample3f, p, n, uv, time, pdf, delta, prim_index,
+                       emitter, d, dist)
 }
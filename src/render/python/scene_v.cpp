@@ -1,5 +1,6 @@
 #include <mitsuba/core/bitmap.h>
 #include <mitsuba/core/properties.h>
+#include <mitsuba/render/bsdf.h>
 #include <mitsuba/render/integrator.h>
 #include <mitsuba/render/mesh.h>
 #include <mitsuba/render/scene.h>
@@ -40,6 +41,89 @@ MI_PY_EXPORT(ShapeKDTree) {
 #endif
 }
 
+MI_PY_EXPORT(LightTree) {
+    MI_PY_IMPORT_TYPES(LightTree, Emitter)
+    MI_PY_CLASS(LightTree, Object)
+        .def(py::init<const std::vector<ref<Emitter>> &, bool>(),
+             "emitters"_a, "split_emitters"_a = false, D(LightTree, LightTree))
+        .def("sample_emitter",
+             py::overload_cast<const Interaction3f &, Float, Mask>(
+                 &LightTree::sample_emitter, py::const_),
+             "ref"_a, "sample"_a, "active"_a = true, D(LightTree, sample_emitter))
+        .def("sample_emitter",
+             py::overload_cast<const Interaction3f &, const BSDFLobe3f &, Float, Mask>(
+                 &LightTree::sample_emitter, py::const_),
+             "ref"_a, "lobe"_a, "sample"_a, "active"_a = true,
+             D(LightTree, sample_emitter, 2))
+        .def("pdf_emitter",
+             py::overload_cast<const Interaction3f &, UInt32, UInt32, Mask>(
+                 &LightTree::pdf_emitter, py::const_),
+             "ref"_a, "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(LightTree, pdf_emitter))
+        .def("pdf_emitter",
+             py::overload_cast<const Interaction3f &, const BSDFLobe3f &, UInt32,
+                               UInt32, Mask>(&LightTree::pdf_emitter, py::const_),
+             "ref"_a, "lobe"_a, "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(LightTree, pdf_emitter, 2))
+        .def("sample_emitter_segment", &LightTree::sample_emitter_segment,
+             "ray"_a, "sample"_a, "active"_a = true,
+             D(LightTree, sample_emitter_segment))
+        .def("pdf_emitter_segment", &LightTree::pdf_emitter_segment,
+             "ray"_a, "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(LightTree, pdf_emitter_segment))
+        .def("importance",
+             py::overload_cast<UInt32, const Point3f &, const Normal3f &, Mask>(
+                 &LightTree::importance, py::const_),
+             "node"_a, "p"_a, "n"_a, "active"_a = true, D(LightTree, importance))
+        .def("importance",
+             py::overload_cast<UInt32, const Point3f &, const Normal3f &,
+                               const BSDFLobe3f &, Mask>(&LightTree::importance, py::const_),
+             "node"_a, "p"_a, "n"_a, "lobe"_a, "active"_a = true,
+             D(LightTree, importance, 2))
+        .def("importance_segment", &LightTree::importance_segment,
+             "node"_a, "ray"_a, "active"_a = true, D(LightTree, importance_segment))
+        .def("sample_subtree", &LightTree::sample_subtree,
+             "ref"_a, "node"_a, "sample"_a, "active"_a = true,
+             D(LightTree, sample_subtree))
+        .def("node_children", &LightTree::node_children,
+             "node"_a, "active"_a = true, D(LightTree, node_children))
+        .def("node_parent", &LightTree::node_parent,
+             "node"_a, "active"_a = true, D(LightTree, node_parent))
+        .def("is_leaf", &LightTree::is_leaf,
+             "node"_a, "active"_a = true, D(LightTree, is_leaf))
+        .def("emitter_leaf", &LightTree::emitter_leaf,
+             "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(LightTree, emitter_leaf))
+        .def("infinite_emitter", &LightTree::infinite_emitter,
+             "i"_a, "active"_a = true, D(LightTree, infinite_emitter))
+        .def_method(LightTree, node_count)
+        .def_method(LightTree, finite_count)
+        .def_method(LightTree, infinite_count);
+}
+
+MI_PY_EXPORT(LightCache) {
+    MI_PY_IMPORT_TYPES(LightCache, Emitter)
+    MI_PY_CLASS(LightCache, Object)
+        .def(py::init<const std::vector<ref<Emitter>> &, const ScalarBoundingBox3f &,
+                      uint32_t, uint32_t, ScalarFloat>(),
+             "emitters"_a, "bbox"_a, "resolution"_a = 16, "cell_count"_a = 4096,
+             "fallback"_a = .2f, D(LightCache, LightCache))
+        .def("sample_emitter", &LightCache::sample_emitter,
+             "ref"_a, "sample"_a, "active"_a = true, D(LightCache, sample_emitter))
+        .def("pdf_emitter", &LightCache::pdf_emitter,
+             "ref"_a, "index"_a, "active"_a = true, D(LightCache, pdf_emitter))
+        .def("record", &LightCache::record,
+             "ref"_a, "index"_a, "contribution"_a, "active"_a = true,
+             D(LightCache, record))
+        .def("cell", &LightCache::cell,
+             "ref"_a, "active"_a = true, D(LightCache, cell))
+        .def_method(LightCache, update)
+        .def_method(LightCache, reset)
+        .def_method(LightCache, cell_count)
+        .def_method(LightCache, emitter_count)
+        .def_method(LightCache, fallback);
+}
+
 MI_PY_EXPORT(Scene) {
     MI_PY_IMPORT_TYPES(Scene, Integrator, SamplingIntegrator, MonteCarloIntegrator, Sensor)
     MI_PY_CLASS(Scene, Object)
@@ -68,11 +152,42 @@ MI_PY_EXPORT(Scene) {
              "sample"_a, "active"_a = true, D(Scene, sample_emitter))
         .def("pdf_emitter", &Scene::pdf_emitter,
              "index"_a, "active"_a = true, D(Scene, pdf_emitter))
-        .def("sample_emitter_direction", &Scene::sample_emitter_direction,
+        .def("pdf_emitter_selection",
+             py::overload_cast<const Interaction3f &, UInt32, UInt32, Mask>(
+                 &Scene::pdf_emitter_selection, py::const_),
+             "ref"_a, "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(Scene, pdf_emitter_selection))
+        .def("pdf_emitter_selection",
+             py::overload_cast<const Interaction3f &, const BSDFLobe3f &, UInt32,
+                               UInt32, Mask>(&Scene::pdf_emitter_selection, py::const_),
+             "ref"_a, "lobe"_a, "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(Scene, pdf_emitter_selection, 2))
+        .def("sample_emitter_segment", &Scene::sample_emitter_segment,
+             "ray"_a, "sample"_a, "active"_a = true, D(Scene, sample_emitter_segment))
+        .def("pdf_emitter_segment", &Scene::pdf_emitter_segment,
+             "ray"_a, "index"_a, "prim_index"_a = 0, "active"_a = true,
+             D(Scene, pdf_emitter_segment))
+        .def("sample_emitter_direction",
+             py::overload_cast<const Interaction3f &, const Point2f &, bool, Mask>(
+                 &Scene::sample_emitter_direction, py::const_),
              "ref"_a, "sample"_a, "test_visibility"_a = true, "active"_a = true,
              D(Scene, sample_emitter_direction))
-        .def("pdf_emitter_direction", &Scene::pdf_emitter_direction,
+        .def("sample_emitter_direction",
+             py::overload_cast<const Interaction3f &, const BSDFLobe3f &,
+                               const Point2f &, bool, Mask>(
+                 &Scene::sample_emitter_direction, py::const_),
+             "ref"_a, "lobe"_a, "sample"_a, "test_visibility"_a = true,
+             "active"_a = true, D(Scene, sample_emitter_direction, 2))
+        .def("pdf_emitter_direction",
+             py::overload_cast<const Interaction3f &, const DirectionSample3f &, Mask>(
+                 &Scene::pdf_emitter_direction, py::const_),
              "ref"_a, "ds"_a, "active"_a = true, D(Scene, pdf_emitter_direction))
+        .def("pdf_emitter_direction",
+             py::overload_cast<const Interaction3f &, const BSDFLobe3f &,
+                               const DirectionSample3f &, Mask>(
+                 &Scene::pdf_emitter_direction, py::const_),
+             "ref"_a, "lobe"_a, "ds"_a, "active"_a = true,
+             D(Scene, pdf_emitter_direction, 2))
         .def("eval_emitter_direction", &Scene::eval_emitter_direction,
              "ref"_a, "ds"_a, "active"_a = true, D(Scene, eval_emitter_direction))
         .def("sample_emitter_ray", &Scene::sample_emitter_ray,
@@ -96,7 +211,15 @@ MI_PY_EXPORT(Scene) {
              D(Scene, sensors))
         .def("emitters", py::overload_cast<>(&Scene::emitters), D(Scene, emitters))
         .def("emitters_dr", &Scene::emitters_dr, D(Scene, emitters_dr))
+        .def("light_tree", &Scene::light_tree, D(Scene, light_tree))
+        .def_method(Scene, split_emitters)
+        .def_method(Scene, emitter_generation)
+        .def("light_cache", py::overload_cast<>(&Scene::light_cache), D(Scene, light_cache))
         .def("shapes_dr", &Scene::shapes_dr, D(Scene, shapes_dr))
+        .def_method(Scene, set_ray_statistics, "enabled"_a)
+        .def_method(Scene, ray_statistics_enabled)
+        .def_method(Scene, ray_statistics)
+        .def_method(Scene, reset_ray_statistics)
         .def_method(Scene, environment)
         .def("shapes",
              [](const Scene &scene) {
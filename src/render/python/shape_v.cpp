@@ -179,6 +179,9 @@ MI_PY_EXPORT(Shape) {
         .def_method(Mesh, face_count)
         .def_method(Mesh, has_vertex_normals)
         .def_method(Mesh, has_vertex_texcoords)
+        .def_method(Mesh, sample_face_position, "time"_a, "face_idx"_a,
+                    "sample"_a, "active"_a = true)
+        .def_method(Mesh, face_area, "face_idx"_a, "active"_a = true)
         .def("write_ply",
              py::overload_cast<const std::string &>(&Mesh::write_ply, py::const_),
              "filename"_a, D(Mesh, write_ply))
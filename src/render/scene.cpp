@@ -67,6 +67,12 @@ MI_VARIANT Scene<Float, Spectrum>::Scene(const Properties &props) {
     for (Sensor *sensor: m_sensors)
         sensor->set_scene(this);
 
+    // Shapes report geometry changes to the scene (see Shape::mark_dirty())
+    for (size_t i = 0; i < m_shapes.size(); ++i)
+        m_shapes[i]->m_parent_scenes.emplace_back(this, (uint32_t) i);
+    for (auto &s : m_shapegroups)
+        s->m_parent_scenes.emplace_back(this, DirtyShapeGroup);
+
     if constexpr (dr::is_cuda_v<Float>)
         accel_init_gpu(props);
     else
@@ -84,7 +90,38 @@ MI_VARIANT Scene<Float, Spectrum>::Scene(const Properties &props) {
     m_emitters_dr = dr::load<DynamicBuffer<EmitterPtr>>(
         m_emitters.data(), m_emitters.size());
 
-    m_emitter_pmf = m_emitters.empty() ? 0.f : (1.f / m_emitters.size());
+    for (size_t i = 0; i < m_emitters.size(); ++i)
+        m_emitters[i]->set_scene_index((uint32_t) i);
+
+    std::string emitter_sampling = props.string("emitter_sampling", "uniform");
+    if (emitter_sampling == "uniform")
+        m_emitter_sampling = EmitterSampling::Uniform;
+    else if (emitter_sampling == "power")
+        m_emitter_sampling = EmitterSampling::Power;
+    else if (emitter_sampling == "tree")
+        m_emitter_sampling = EmitterSampling::Tree;
+    else if (emitter_sampling == "learned")
+        m_emitter_sampling = EmitterSampling::Learned;
+    else
+        Throw("Invalid emitter sampling strategy \"%s\", must be one of: "
+              "\"uniform\", \"power\", \"tree\" or \"learned\"!",
+              emitter_sampling);
+
+    // Parameters of the light cache used by the "learned" strategy
+    m_cache_resolution = props.get<uint32_t>("cache_resolution", 16);
+    m_cache_size = props.get<uint32_t>("cache_size", 4096);
+    m_cache_fallback = props.get<ScalarFloat>("cache_fallback", .2f);
+
+    /* Expose the triangles of emissive meshes as individual light primitives
+       to the light tree */
+    m_split_emitters = props.get<bool>("split_emitters", false);
+    if (m_split_emitters && m_emitter_sampling != EmitterSampling::Tree) {
+        Log(Warn, "The \"split_emitters\" parameter only applies to the "
+                  "\"tree\" emitter sampling strategy and will be ignored.");
+        m_split_emitters = false;
+    }
+
+    update_emitter_sampling();
 
     m_shapes_grad_enabled = false;
 }
@@ -95,6 +132,17 @@ MI_VARIANT Scene<Float, Spectrum>::~Scene() {
     else
         accel_release_cpu();
 
+    auto unregister = [this](Shape *shape) {
+        auto &scenes = shape->m_parent_scenes;
+        scenes.erase(std::remove_if(scenes.begin(), scenes.end(),
+                                    [this](const auto &p) { return p.first == this; }),
+                     scenes.end());
+    };
+    for (auto &s : m_shapes)
+        unregister(s.get());
+    for (auto &s : m_shapegroups)
+        unregister(s.get());
+
     // Trigger deallocation of all instances
     m_emitters.clear();
     m_shapes.clear();
@@ -116,6 +164,7 @@ MI_VARIANT typename Scene<Float, Spectrum>::SurfaceInteraction3f
 Scene<Float, Spectrum>::ray_intersect(const Ray3f &ray, uint32_t ray_flags, Mask coherent, Mask active) const {
     MI_MASKED_FUNCTION(ProfilerPhase::RayIntersect, active);
     DRJIT_MARK_USED(coherent);
+    count_rays(0, active);
 
     if constexpr (dr::is_cuda_v<Float>)
         return ray_intersect_gpu(ray, ray_flags, active);
@@ -126,6 +175,8 @@ Scene<Float, Spectrum>::ray_intersect(const Ray3f &ray, uint32_t ray_flags, Mask
 MI_VARIANT typename Scene<Float, Spectrum>::PreliminaryIntersection3f
 Scene<Float, Spectrum>::ray_intersect_preliminary(const Ray3f &ray, Mask coherent, Mask active) const {
     DRJIT_MARK_USED(coherent);
+    count_rays(0, active);
+
     if constexpr (dr::is_cuda_v<Float>)
         return ray_intersect_preliminary_gpu(ray, active);
     else
@@ -136,6 +187,7 @@ MI_VARIANT typename Scene<Float, Spectrum>::Mask
 Scene<Float, Spectrum>::ray_test(const Ray3f &ray, Mask coherent, Mask active) const {
     MI_MASKED_FUNCTION(ProfilerPhase::RayTest, active);
     DRJIT_MARK_USED(coherent);
+    count_rays(1, active);
 
     if constexpr (dr::is_cuda_v<Float>)
         return ray_test_gpu(ray, active);
@@ -169,6 +221,12 @@ Scene<Float, Spectrum>::sample_emitter(Float index_sample, Mask active) const {
             return { UInt32(-1), 0.f, index_sample };
     }
 
+    if (!m_emitter_distr.empty()) {
+        auto [index, index_sample_re, pmf] =
+            m_emitter_distr.sample_reuse_pmf(index_sample, active);
+        return { index, dr::rcp(pmf), index_sample_re };
+    }
+
     uint32_t emitter_count = (uint32_t) m_emitters.size();
     ScalarFloat emitter_count_f = (ScalarFloat) emitter_count;
     Float index_sample_scaled = index_sample * emitter_count_f;
@@ -178,9 +236,68 @@ Scene<Float, Spectrum>::sample_emitter(Float index_sample, Mask active) const {
     return { index, emitter_count_f, index_sample_scaled - Float(index) };
 }
 
-MI_VARIANT Float Scene<Float, Spectrum>::pdf_emitter(UInt32 /*index*/,
-                                                      Mask /*active*/) const {
-    return m_emitter_pmf;
+MI_VARIANT Float Scene<Float, Spectrum>::pdf_emitter(UInt32 index,
+                                                      Mask active) const {
+    if (m_emitter_distr.empty())
+        return m_emitter_pmf;
+    return m_emitter_distr.eval_pmf_normalized(index, active);
+}
+
+MI_VARIANT Float Scene<Float, Spectrum>::pdf_emitter_selection(const Interaction3f &ref,
+                                                                UInt32 index,
+                                                                UInt32 prim_index,
+                                                                Mask active) const {
+    return pdf_emitter_selection_impl(ref, nullptr, index, prim_index, active);
+}
+
+MI_VARIANT Float Scene<Float, Spectrum>::pdf_emitter_selection(const Interaction3f &ref,
+                                                                const BSDFLobe3f &lobe,
+                                                                UInt32 index,
+                                                                UInt32 prim_index,
+                                                                Mask active) const {
+    return pdf_emitter_selection_impl(ref, &lobe, index, prim_index, active);
+}
+
+MI_VARIANT Float Scene<Float, Spectrum>::pdf_emitter_selection_impl(const Interaction3f &ref,
+                                                                     const BSDFLobe3f *lobe,
+                                                                     UInt32 index,
+                                                                     UInt32 prim_index,
+                                                                     Mask active) const {
+    if (m_light_tree && lobe)
+        return m_light_tree->pdf_emitter(ref, *lobe, index, prim_index, active);
+    else if (m_light_tree)
+        return m_light_tree->pdf_emitter(ref, index, prim_index, active);
+    else if (m_light_cache)
+        return m_light_cache->pdf_emitter(ref, index, active);
+    else
+        return dr::select(active, pdf_emitter(index, active), 0.f);
+}
+
+MI_VARIANT std::tuple<typename Scene<Float, Spectrum>::UInt32,
+                      typename Scene<Float, Spectrum>::UInt32, Float, Float>
+Scene<Float, Spectrum>::sample_emitter_segment(const Ray3f &ray, Float sample,
+                                               Mask active) const {
+    MI_MASK_ARGUMENT(active);
+
+    if (m_light_tree)
+        return m_light_tree->sample_emitter_segment(ray, sample, active);
+
+    auto [index, weight, sample_re] = sample_emitter(sample, active);
+    return { index, UInt32(0),
+             dr::select(active && weight > 0.f, dr::rcp(weight), 0.f),
+             sample_re };
+}
+
+MI_VARIANT Float Scene<Float, Spectrum>::pdf_emitter_segment(const Ray3f &ray,
+                                                              UInt32 index,
+                                                              UInt32 prim_index,
+                                                              Mask active) const {
+    if (m_light_tree)
+        return m_light_tree->pdf_emitter_segment(ray, index, prim_index, active);
+
+    DRJIT_MARK_USED(ray);
+    DRJIT_MARK_USED(prim_index);
+    return dr::select(active, pdf_emitter(index, active), 0.f);
 }
 
 MI_VARIANT std::tuple<typename Scene<Float, Spectrum>::Ray3f, Spectrum,
@@ -223,8 +340,25 @@ Scene<Float, Spectrum>::sample_emitter_ray(Float time, Float sample1,
 }
 
 MI_VARIANT std::pair<typename Scene<Float, Spectrum>::DirectionSample3f, Spectrum>
-Scene<Float, Spectrum>::sample_emitter_direction(const Interaction3f &ref, const Point2f &sample_,
+Scene<Float, Spectrum>::sample_emitter_direction(const Interaction3f &ref, const Point2f &sample,
                                                  bool test_visibility, Mask active) const {
+    return sample_emitter_direction_impl(ref, nullptr, sample, test_visibility, active);
+}
+
+MI_VARIANT std::pair<typename Scene<Float, Spectrum>::DirectionSample3f, Spectrum>
+Scene<Float, Spectrum>::sample_emitter_direction(const Interaction3f &ref,
+                                                 const BSDFLobe3f &lobe,
+                                                 const Point2f &sample,
+                                                 bool test_visibility, Mask active) const {
+    return sample_emitter_direction_impl(ref, &lobe, sample, test_visibility, active);
+}
+
+MI_VARIANT std::pair<typename Scene<Float, Spectrum>::DirectionSample3f, Spectrum>
+Scene<Float, Spectrum>::sample_emitter_direction_impl(const Interaction3f &ref,
+                                                      const BSDFLobe3f *lobe,
+                                                      const Point2f &sample_,
+                                                      bool test_visibility,
+                                                      Mask active) const {
     MI_MASKED_FUNCTION(ProfilerPhase::SampleEmitterDirection, active);
 
     Point2f sample(sample_);
@@ -237,18 +371,39 @@ Scene<Float, Spectrum>::sample_emitter_direction(const Interaction3f &ref, const
          vcall_inline = jit_flag(JitFlag::VCallInline);
 
     size_t emitter_count = m_emitters.size();
-    if (emitter_count > 1 || (emitter_count == 1 && !vcall_inline)) {
-        // Randomly pick an emitter
-        auto [index, emitter_weight, sample_x_re] = sample_emitter(sample.x(), active);
-        sample.x() = sample_x_re;
+    if (emitter_count > 1 || (emitter_count == 1 && (!vcall_inline || m_light_tree))) {
+        // Randomly pick an emitter (and one of its primitives)
+        UInt32 index, prim_index = 0;
+        Float emitter_pmf;
+        if (m_light_tree) {
+            if (lobe)
+                std::tie(index, prim_index, emitter_pmf, sample.x()) =
+                    m_light_tree->sample_emitter(ref, *lobe, sample.x(), active);
+            else
+                std::tie(index, prim_index, emitter_pmf, sample.x()) =
+                    m_light_tree->sample_emitter(ref, sample.x(), active);
+            active &= emitter_pmf > 0.f;
+        } else if (m_light_cache) {
+            std::tie(index, emitter_pmf, sample.x()) =
+                m_light_cache->sample_emitter(ref, sample.x(), active);
+            active &= emitter_pmf > 0.f;
+        } else {
+            std::tie(index, std::ignore, sample.x()) =
+                sample_emitter(sample.x(), active);
+            emitter_pmf = pdf_emitter(index, active);
+        }
 
         // Sample a direction towards the emitter
         EmitterPtr emitter = dr::gather<EmitterPtr>(m_emitters_dr, index, active);
-        std::tie(ds, spec) = emitter->sample_direction(ref, sample, active);
+        if (m_split_emitters)
+            std::tie(ds, spec) = emitter->sample_direction_primitive(
+                ref, prim_index, sample, active);
+        else
+            std::tie(ds, spec) = emitter->sample_direction(ref, sample, active);
 
         // Account for the discrete probability of sampling this emitter
-        ds.pdf *= pdf_emitter(index, active);
-        spec *= emitter_weight;
+        ds.pdf *= emitter_pmf;
+        spec *= dr::select(active, dr::rcp(emitter_pmf), 0.f);
 
         active &= dr::neq(ds.pdf, 0.f);
 
@@ -257,6 +412,16 @@ Scene<Float, Spectrum>::sample_emitter_direction(const Interaction3f &ref, const
             Mask occluded = ray_test(ref.spawn_ray_to(ds.p), active);
             dr::masked(spec, occluded) = 0.f;
             dr::masked(ds.pdf, occluded) = 0.f;
+
+            /* Teach the light cache about the observed contribution,
+               including the foreshortening at the reference point */
+            if (m_light_cache) {
+                Float cos_theta = dr::select(dr::squared_norm(ref.n) > 0.f,
+                                             dr::abs_dot(ds.d, ref.n), 1.f);
+                m_light_cache->record(
+                    ref, index, dr::mean(unpolarized_spectrum(spec)) * cos_theta,
+                    active && !occluded);
+            }
         }
     } else if (emitter_count == 1) {
         // Sample a direction towards the (single) emitter
@@ -282,8 +447,35 @@ MI_VARIANT Float
 Scene<Float, Spectrum>::pdf_emitter_direction(const Interaction3f &ref,
                                               const DirectionSample3f &ds,
                                               Mask active) const {
+    return pdf_emitter_direction_impl(ref, nullptr, ds, active);
+}
+
+MI_VARIANT Float
+Scene<Float, Spectrum>::pdf_emitter_direction(const Interaction3f &ref,
+                                              const BSDFLobe3f &lobe,
+                                              const DirectionSample3f &ds,
+                                              Mask active) const {
+    return pdf_emitter_direction_impl(ref, &lobe, ds, active);
+}
+
+MI_VARIANT Float
+Scene<Float, Spectrum>::pdf_emitter_direction_impl(const Interaction3f &ref,
+                                                   const BSDFLobe3f *lobe,
+                                                   const DirectionSample3f &ds,
+                                                   Mask active) const {
     MI_MASK_ARGUMENT(active);
-    return ds.emitter->pdf_direction(ref, ds, active) * m_emitter_pmf;
+
+    Float emitter_pmf;
+    if (m_light_tree || m_light_cache || !m_emitter_distr.empty())
+        emitter_pmf = pdf_emitter_selection_impl(
+            ref, lobe, ds.emitter->scene_index(active), ds.prim_index, active);
+    else
+        emitter_pmf = m_emitter_pmf;
+
+    if (m_split_emitters)
+        return ds.emitter->pdf_direction_primitive(ref, ds, active) * emitter_pmf;
+    else
+        return ds.emitter->pdf_direction(ref, ds, active) * emitter_pmf;
 }
 
 MI_VARIANT Spectrum Scene<Float, Spectrum>::eval_emitter_direction(
@@ -301,32 +493,39 @@ MI_VARIANT void Scene<Float, Spectrum>::traverse(TraversalCallback *callback) {
     }
 }
 
-MI_VARIANT void Scene<Float, Spectrum>::parameters_changed(const std::vector<std::string> &/*keys*/) {
+MI_VARIANT void Scene<Float, Spectrum>::parameters_changed(const std::vector<std::string> &keys) {
     if (m_environment)
         m_environment->set_scene(this); // TODO use parameters_changed({"scene"})
 
-    bool accel_is_dirty = false;
-    for (auto &s : m_shapes) {
-        if (s->dirty()) {
-            accel_is_dirty = true;
-            break;
-        }
-    }
-
-    for (auto &s : m_shapegroups) {
-        if (s->dirty()) {
-            accel_is_dirty = true;
-            break;
-        }
-    }
-
-    if (accel_is_dirty) {
+    // Shapes whose geometry changed added themselves to 'm_dirty_shapes'
+    bool geometry_changed = !m_dirty_shapes.empty();
+    if (geometry_changed) {
         if constexpr (dr::is_cuda_v<Float>)
             accel_parameters_changed_gpu();
         else
             accel_parameters_changed_cpu();
     }
 
+    /* Only rebuild the emitter sampling data structures when emitters (e.g.
+       intensities, shapes) or the geometry changed. Other updates (e.g. of
+       BSDFs) keep them, and in particular what the light cache learned. */
+    bool emitters_changed = keys.empty() || geometry_changed;
+    for (size_t i = 0; i < m_children.size() && !emitters_changed; ++i) {
+        Object *child = m_children[i].get();
+        std::string id = child->id();
+        if (id.empty() || string::starts_with(id, "_unnamed_"))
+            id = child->class_()->name();
+        if (std::find(keys.begin(), keys.end(), id) == keys.end())
+            continue;
+
+        Shape *shape = dynamic_cast<Shape *>(child);
+        emitters_changed = dynamic_cast<Emitter *>(child) != nullptr ||
+                           (shape && shape->emitter());
+    }
+
+    if (emitters_changed)
+        update_emitter_sampling();
+
     // Check whether any shape parameters have gradient tracking enabled
     m_shapes_grad_enabled = false;
     for (auto &s : m_shapes) {
@@ -336,6 +535,45 @@ MI_VARIANT void Scene<Float, Spectrum>::parameters_changed(const std::vector<std
     }
 }
 
+MI_VARIANT void Scene<Float, Spectrum>::set_ray_statistics(bool enabled) {
+    m_ray_statistics = enabled;
+    reset_ray_statistics();
+}
+
+MI_VARIANT std::pair<uint64_t, uint64_t>
+Scene<Float, Spectrum>::ray_statistics() const {
+    if constexpr (dr::is_jit_v<Float>) {
+        if (m_ray_counts.size() != 2)
+            return { 0, 0 };
+        dr::eval(m_ray_counts);
+        return { (uint64_t) dr::slice(m_ray_counts, 0),
+                 (uint64_t) dr::slice(m_ray_counts, 1) };
+    } else {
+        return { m_ray_counts_scalar[0].load(), m_ray_counts_scalar[1].load() };
+    }
+}
+
+MI_VARIANT void Scene<Float, Spectrum>::reset_ray_statistics() {
+    if constexpr (dr::is_jit_v<Float>) {
+        m_ray_counts = dr::zeros<DynamicBuffer<UInt64>>(2);
+        dr::make_opaque(m_ray_counts);
+    } else {
+        m_ray_counts_scalar[0] = 0;
+        m_ray_counts_scalar[1] = 0;
+    }
+}
+
+MI_VARIANT void Scene<Float, Spectrum>::count_rays(uint32_t counter, Mask active) const {
+    if (!m_ray_statistics)
+        return;
+
+    if constexpr (dr::is_jit_v<Float>)
+        dr::scatter_reduce(ReduceOp::Add, m_ray_counts, UInt64(1),
+                           UInt32(counter), active);
+    else if (active)
+        m_ray_counts_scalar[counter]++;
+}
+
 MI_VARIANT std::string Scene<Float, Spectrum>::to_string() const {
     std::ostringstream oss;
     oss << "Scene[" << std::endl
@@ -370,6 +608,75 @@ MI_VARIANT void Scene<Float, Spectrum>::clear_shapes_dirty() {
         s->m_dirty = false;
     for (auto &s : m_shapegroups)
         s->m_dirty = false;
+    m_dirty_shapes.clear();
+}
+
+MI_VARIANT std::vector<uint32_t> Scene<Float, Spectrum>::dirty_shapes() const {
+    std::vector<uint32_t> result;
+    result.reserve(m_dirty_shapes.size());
+    bool shapegroup_dirty = false;
+    for (uint32_t index : m_dirty_shapes) {
+        if (index == DirtyShapeGroup)
+            shapegroup_dirty = true;
+        else
+            result.push_back(index);
+    }
+
+    // Instances reference the (rebuilt) acceleration data structure of their shape group
+    if (shapegroup_dirty) {
+        for (size_t i = 0; i < m_shapes.size(); ++i) {
+            if (m_shapes[i]->is_instance())
+                result.push_back((uint32_t) i);
+        }
+    }
+
+    std::sort(result.begin(), result.end());
+    result.erase(std::unique(result.begin(), result.end()), result.end());
+    return result;
+}
+
+MI_VARIANT void Scene<Float, Spectrum>::update_emitter_sampling() {
+    // Unique across scenes, so that a new scene never matches a stale state
+    static std::atomic<uint32_t> emitter_generation_counter { 0 };
+    m_emitter_generation = ++emitter_generation_counter;
+
+    m_emitter_pmf = m_emitters.empty() ? 0.f : (1.f / m_emitters.size());
+    m_emitter_distr = AliasDistribution<Float>();
+    m_light_tree = nullptr;
+    m_light_cache = nullptr;
+
+    /* A single emitter only benefits from the light tree if its primitives
+       can be selected individually */
+    if (m_emitter_sampling == EmitterSampling::Uniform || m_emitters.empty() ||
+        (m_emitters.size() < 2 && !m_split_emitters))
+        return;
+
+    if (m_emitter_sampling == EmitterSampling::Tree)
+        m_light_tree = new LightTree(m_emitters, m_split_emitters);
+    else if (m_emitter_sampling == EmitterSampling::Learned)
+        m_light_cache = new LightCache(m_emitters, m_bbox, m_cache_resolution,
+                                       m_cache_size, m_cache_fallback);
+
+    std::vector<ScalarFloat> power(m_emitters.size());
+    bool has_power = false;
+    for (size_t i = 0; i < m_emitters.size(); ++i) {
+        ScalarFloat value = m_emitters[i]->estimate_power();
+        if (!std::isfinite(value) || value < 0.f) {
+            Log(Warn, "Emitter \"%s\" reported an invalid power estimate (%f), "
+                "it will not be sampled.", m_emitters[i]->id(), value);
+            value = 0.f;
+        }
+        power[i] = value;
+        has_power |= value > 0.f;
+    }
+
+    if (!has_power) {
+        Log(Warn, "None of the emitters reported a positive power estimate, "
+                  "falling back to uniform emitter sampling.");
+        return;
+    }
+
+    m_emitter_distr = AliasDistribution<Float>(power.data(), power.size());
 }
 
 MI_VARIANT void Scene<Float, Spectrum>::static_accel_initialization_cpu() { }
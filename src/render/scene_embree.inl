@@ -15,6 +15,8 @@ struct EmbreeState {
     std::vector<int> geometries;
     DynamicBuffer<UInt32> shapes_registry_ids;
     bool is_nested_scene = false;
+    /// Whether the scene uses Embree's two-level structure for partial updates
+    bool is_dynamic = false;
 };
 
 static void embree_error_callback(void * /*user_ptr */, RTCError code, const char *str) {
@@ -133,16 +135,51 @@ MI_VARIANT void Scene<Float, Spectrum>::accel_parameters_changed_cpu() {
 
     EmbreeState<Float> &s = *(EmbreeState<Float> *) m_accel;
 
-    for (int geo : s.geometries)
-        rtcDetachGeometry(s.accel, geo);
-    s.geometries.clear();
+    /* After the initial build, only the geometries of the shapes that changed
+       are recreated. The geometry ID of each shape remains its index in
+       'm_shapes', which is how intersections are mapped back to shapes. */
+    std::vector<uint32_t> updated;
+    if (s.geometries.size() != m_shapes.size()) {
+        for (int geo : s.geometries)
+            rtcDetachGeometry(s.accel, geo);
+        s.geometries.clear();
+
+        updated.resize(m_shapes.size());
+        for (size_t i = 0; i < m_shapes.size(); ++i)
+            updated[i] = (uint32_t) i;
+    } else {
+        updated = dirty_shapes();
+
+        /* The first partial update switches Embree to its two-level structure,
+           which keeps a separate BVH per geometry and only rebuilds the ones
+           of modified geometries (and the top level) on commit. Scenes that
+           are never modified keep the single high-quality BVH. */
+        if (!s.is_dynamic && !updated.empty()) {
+            Log(Debug, "Embree: switching to two-level acceleration data "
+                       "structure for partial updates.");
+            rtcSetSceneBuildQuality(s.accel, RTC_BUILD_QUALITY_LOW);
+            rtcSetSceneFlags(s.accel, RTC_SCENE_FLAG_DYNAMIC);
+            s.is_dynamic = true;
+        }
+
+        for (uint32_t i : updated)
+            rtcDetachGeometry(s.accel, s.geometries[i]);
+    }
 
-    for (Shape *shape : m_shapes) {
-        RTCGeometry geom = shape->embree_geometry(embree_device);
-        s.geometries.push_back(rtcAttachGeometry(s.accel, geom));
+    for (uint32_t i : updated) {
+        RTCGeometry geom = m_shapes[i]->embree_geometry(embree_device);
+        rtcAttachGeometryByID(s.accel, geom, i);
         rtcReleaseGeometry(geom);
     }
 
+    if (s.geometries.empty()) {
+        for (size_t i = 0; i < m_shapes.size(); ++i)
+            s.geometries.push_back((int) i);
+    }
+
+    Log(Debug, "Embree: updated %zu/%zu geometries.", updated.size(),
+        m_shapes.size());
+
     // Ensure shape data pointers are fully evaluated before building the BVH
     if constexpr (dr::is_llvm_v<Float>)
         dr::sync_thread();
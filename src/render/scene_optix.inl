@@ -33,6 +33,8 @@ struct OptixSceneState {
     size_t config_index;
     uint32_t sbt_jit_index;
     bool own_sbt;
+    /// Whether the geometry acceleration structures of the scene's shapes exist
+    bool gas_built = false;
 };
 
 /**
@@ -440,8 +442,17 @@ MI_VARIANT void Scene<Float, Spectrum>::accel_parameters_changed_gpu() {
         const OptixConfig &config = optix_configs[s.config_index];
 
         if (!m_shapes.empty()) {
-            // Build geometry acceleration structures for all the shapes
-            build_gas(config.context, m_shapes, s.accel);
+            /* Build geometry acceleration structures for all the shapes,
+               unless only instances changed: their transforms only enter the
+               instance acceleration structure built below */
+            bool gas_dirty = !s.gas_built;
+            for (uint32_t i : dirty_shapes())
+                gas_dirty |= !m_shapes[i]->is_instance();
+
+            if (gas_dirty) {
+                build_gas(config.context, m_shapes, s.accel);
+                s.gas_built = true;
+            }
             for (auto& shapegroup: m_shapegroups)
                 shapegroup->optix_build_gas(config.context);
 
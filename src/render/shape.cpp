@@ -5,6 +5,7 @@
 #include <mitsuba/render/bsdf.h>
 #include <mitsuba/render/sensor.h>
 #include <mitsuba/render/medium.h>
+#include <mitsuba/render/scene.h>
 #include <mitsuba/core/plugin.h>
 
 #if defined(MI_ENABLE_EMBREE)
@@ -565,6 +566,14 @@ void Shape<Float, Spectrum>::parameters_changed(const std::vector<std::string> &
     }
 }
 
+MI_VARIANT void Shape<Float, Spectrum>::mark_dirty() {
+    if (!m_dirty) {
+        for (auto &[scene, index] : m_parent_scenes)
+            scene->m_dirty_shapes.push_back(index);
+    }
+    m_dirty = true;
+}
+
 MI_VARIANT bool Shape<Float, Spectrum>::parameters_grad_enabled() const {
     return false;
 }
@@ -104,7 +104,7 @@ MI_VARIANT void ShapeGroup<Float, Spectrum>::parameters_changed(const std::vecto
     if constexpr (!dr::is_cuda_v<Float>) {
         for (auto &s : m_shapes) {
             if (s->dirty()) {
-                m_dirty = true;
+                mark_dirty();
                 break;
             }
         }
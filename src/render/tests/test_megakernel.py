@@ -250,3 +250,81 @@ def test03_kernel_launches_optimization(variants_all_ad_rgb):
         # Make sure that kernels are reused after the 2nd iteration
         for k in range(len(histories[1])):
             assert histories[1][k]['hash'] == histories[2][k]['hash']
+
+
+def test04_memory_budget_passes(variants_vec_rgb):
+    """
+    Tests that a small memory budget splits the rendering into several passes
+    without changing the expected result
+    """
+    scene_dict = mi.cornell_box()
+    scene_dict['sensor']['film']['width'] = 16
+    scene_dict['sensor']['film']['height'] = 16
+    scene_dict['integrator']['max_depth'] = 3
+    scene = mi.load_dict(scene_dict)
+    ref = mi.render(scene, spp=64, seed=0)
+
+    # Budget that fits 4 samples per pixel
+    sample_size = scene.integrator().sample_state_size()
+    assert sample_size > 0
+    scene_dict['integrator']['memory_budget'] = 16 * 16 * 4 * sample_size / 2**20
+    scene = mi.load_dict(scene_dict)
+
+    with dr.scoped_set_flag(dr.JitFlag.KernelHistory, True):
+        image = mi.render(scene, spp=64, seed=0)
+        history = dr.kernel_history([dr.KernelType.JIT])
+
+    assert dr.all(dr.isfinite(image.array))
+    assert sum(1 for k in history if k['size'] == 16 * 16 * 4) >= 16
+    assert dr.allclose(dr.mean(image.array), dr.mean(ref.array), rtol=0.1)
+
+
+def test05_timeout_passes(variants_vec_rgb):
+    """
+    Tests that a timeout stops wavefront rendering between passes and that
+    the image is normalized by the samples actually taken
+    """
+    scene_dict = mi.cornell_box()
+    scene_dict['sensor']['film']['width'] = 16
+    scene_dict['sensor']['film']['height'] = 16
+    scene_dict['integrator']['max_depth'] = 3
+    scene_dict['integrator']['timeout'] = 1e-6
+    scene = mi.load_dict(scene_dict)
+
+    with dr.scoped_set_flag(dr.JitFlag.KernelHistory, True):
+        image = mi.render(scene, spp=256, seed=0)
+        history = dr.kernel_history([dr.KernelType.JIT])
+
+    # Only the first pass (one sample per pixel) fits into the time budget
+    assert sum(1 for k in history if k['size'] == 16 * 16) == 1
+
+    del scene_dict['integrator']['timeout']
+    ref = mi.render(mi.load_dict(scene_dict), spp=256, seed=0)
+    assert dr.all(dr.isfinite(image.array))
+    assert dr.allclose(dr.mean(image.array), dr.mean(ref.array), rtol=0.25)
+
+
+def test06_memory_budget_prime_spp(variants_vec_rgb):
+    """
+    Tests that a prime sample count is rounded up to passes of equal size
+    rather than split into passes of a single sample per pixel
+    """
+    scene_dict = mi.cornell_box()
+    scene_dict['sensor']['film']['width'] = 16
+    scene_dict['sensor']['film']['height'] = 16
+    scene_dict['integrator']['max_depth'] = 3
+
+    # Budget that fits 4 samples per pixel
+    scene = mi.load_dict(scene_dict)
+    sample_size = scene.integrator().sample_state_size()
+    scene_dict['integrator']['memory_budget'] = 16 * 16 * 4 * sample_size / 2**20
+    scene = mi.load_dict(scene_dict)
+
+    with dr.scoped_set_flag(dr.JitFlag.KernelHistory, True):
+        image = mi.render(scene, spp=67, seed=0)
+        history = dr.kernel_history([dr.KernelType.JIT])
+
+    # 17 passes of 4 spp
+    assert dr.all(dr.isfinite(image.array))
+    assert sum(1 for k in history if k['size'] == 16 * 16 * 4) >= 17
+    assert scene.sensors()[0].sampler().sample_count() == 68
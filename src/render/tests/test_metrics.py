@@ -0,0 +1,51 @@
+import importlib
+import os
+import sys
+
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+@pytest.fixture
+def metrics(variants_vec_rgb):
+    """
+    The image metrics of utils/metrics.py
+    """
+    pytest.importorskip('numpy')
+    root = os.path.realpath(os.path.join(os.path.dirname(__file__), '../../..'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return importlib.import_module('utils.metrics')
+
+
+def image_pair():
+    """
+    A 12x12 sRGB gradient, and a copy with a colored square and a darkened
+    column
+    """
+    import numpy as np
+    y, x = np.mgrid[0:12, 0:12].astype(np.float32)
+    ref = np.stack([x / 11, y / 11, np.full_like(x, .5)], -1)
+    test = ref.copy()
+    test[4:8, 4:8] = [1, .2, .1]
+    test[:, 10] *= .5
+    return ref, test
+
+
+def test01_flip_identical(metrics):
+    ref, _ = image_pair()
+    error = metrics.flip_error(mi.TensorXf(ref[None]), mi.TensorXf(ref[None]))
+    assert error.shape == (1, 12, 12, 1)
+    assert dr.all(error.array == 0)
+
+
+def test02_flip_reference_value(metrics):
+    """
+    Compare against the mean error computed by the reference implementation
+    (flip-evaluator 1.7, LDR mode) with the same number of pixels per degree
+    """
+    ref, test = image_pair()
+    mean, error = metrics.flip(ref, test, use_srgb=False)
+    assert dr.allclose(mean, 0.2821463, rtol=1e-3)
+    assert dr.all((error.array >= 0) & (error.array <= 1))
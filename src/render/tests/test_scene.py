@@ -154,3 +154,447 @@ def test04_scene_destruction_and_pending_raytracing(variants_vec_rgb, shadow):
 
     import drjit as dr
     dr.eval(pi)
+
+
+def test05_emitter_sampling_power(variants_vec_rgb):
+    def make_scene(strategy):
+        return mi.load_dict({
+            'type': 'scene',
+            'emitter_sampling': strategy,
+            'light_0': { 'type': 'point', 'intensity': 1.0 },
+            'light_1': { 'type': 'point', 'intensity': 3.0 },
+            'light_2': { 'type': 'point', 'intensity': 4.0 },
+        })
+
+    scene = make_scene('uniform')
+    assert dr.allclose(scene.pdf_emitter(mi.UInt32([0, 1, 2])), 1.0 / 3.0)
+
+    scene = make_scene('power')
+    pdf = scene.pdf_emitter(mi.UInt32([0, 1, 2]))
+    assert dr.allclose(pdf, mi.Float([1, 3, 4]) / 8.0)
+
+    sample = dr.linspace(mi.Float, 0, 1, 1000, False)
+    index, weight, reused = scene.sample_emitter(sample)
+    assert dr.allclose(weight, dr.rcp(scene.pdf_emitter(index)))
+    assert dr.all((reused >= 0) & (reused < 1))
+
+    # The emitter index stored on each emitter matches its scene position
+    for i, emitter in enumerate(scene.emitters()):
+        assert emitter.scene_index() == i
+
+    with pytest.raises(RuntimeError, match='.*emitter sampling strategy.*'):
+        make_scene('foo')
+
+
+def test06_emitter_sampling_tree(variants_vec_rgb):
+    scene_dict = {
+        'type': 'scene',
+        'emitter_sampling': 'tree',
+        'env': { 'type': 'constant' }
+    }
+    for i in range(16):
+        scene_dict[f'light_{i}'] = {
+            'type': 'point',
+            'position': [i % 4, i // 4, 0],
+            'intensity': 1.0 + i
+        }
+    scene = mi.load_dict(scene_dict)
+
+    tree = scene.light_tree()
+    assert tree.finite_count() == 16
+    assert tree.infinite_count() == 1
+    assert tree.node_count() == 31
+
+    # Trees can also be built independently of the scene's strategy
+    assert mi.LightTree(scene.emitters()).node_count() == 31
+
+    # The discrete probabilities of all emitters sum up to one
+    count = len(scene.emitters())
+    it = dr.zeros(mi.SurfaceInteraction3f, count)
+    it.p = mi.Point3f(1.5, 1.5, 2.0)
+    it.n = mi.Normal3f(0, 0, -1)
+    pmf = tree.pdf_emitter(it, dr.arange(mi.UInt32, count))
+    assert dr.allclose(dr.sum(pmf), 1.0)
+
+    # Sampled emitters and their probabilities agree with 'pdf_emitter'
+    sample_count = 1000
+    it = dr.zeros(mi.SurfaceInteraction3f, sample_count)
+    it.p = mi.Point3f(1.5, 1.5, 2.0)
+    it.n = mi.Normal3f(0, 0, -1)
+    sample = dr.linspace(mi.Float, 0, 1, sample_count, False)
+    index, prim_index, pmf, sample_re = tree.sample_emitter(it, sample)
+    assert dr.all(dr.eq(prim_index, 0))
+    assert dr.all(pmf > 0)
+    assert dr.allclose(pmf, tree.pdf_emitter(it, index))
+    assert dr.all((sample_re >= 0) & (sample_re < 1))
+
+    # The scene uses the tree for (and consistently with) MIS
+    ds, _ = scene.sample_emitter_direction(
+        it, mi.Point2f(sample, 0.5), test_visibility=False)
+    pdf = scene.pdf_emitter_direction(it, ds)
+    assert dr.allclose(dr.select(ds.delta, 0, ds.pdf), dr.select(ds.delta, 0, pdf))
+
+
+@fresolver_append_path
+def test07_emitter_sampling_tree_split(variants_vec_rgb):
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter_sampling': 'tree',
+        'split_emitters': True,
+        'mesh': {
+            'type': 'obj',
+            'filename': 'resources/data/common/meshes/rectangle.obj',
+            'emitter': {
+                'type': 'area',
+                'radiance': { 'type': 'checkerboard' }
+            }
+        }
+    })
+
+    # Each triangle of the emissive mesh is a separate light primitive
+    tree = scene.light_tree()
+    mesh = scene.shapes()[0]
+    assert tree.finite_count() == mesh.face_count()
+    assert tree.node_count() == 2 * mesh.face_count() - 1
+
+    it = dr.zeros(mi.SurfaceInteraction3f, mesh.face_count())
+    it.p = mi.Point3f(0.5, 0.2, 1.0)
+    it.n = mi.Normal3f(0, 0, -1)
+    pmf = tree.pdf_emitter(it, 0, dr.arange(mi.UInt32, mesh.face_count()))
+    assert dr.allclose(dr.sum(pmf), 1.0)
+
+    # Sampled directions and their densities agree with 'pdf_emitter_direction'
+    sample_count = 1000
+    it = dr.zeros(mi.SurfaceInteraction3f, sample_count)
+    it.p = mi.Point3f(0.5, 0.2, 1.0)
+    it.n = mi.Normal3f(0, 0, -1)
+    sample = dr.linspace(mi.Float, 0, 1, sample_count, False)
+    ds, spec = scene.sample_emitter_direction(
+        it, mi.Point2f(sample, 0.5), test_visibility=False)
+    assert dr.all(ds.pdf > 0)
+    assert dr.allclose(ds.pdf, scene.pdf_emitter_direction(it, ds))
+
+    # The primitive index of a ray intersection selects the same triangle
+    si = scene.ray_intersect(it.spawn_ray(ds.d))
+    assert dr.all(dr.eq(si.prim_index, ds.prim_index))
+
+
+def test08_emitter_sampling_learned(variants_vec_rgb):
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter_sampling': 'learned',
+        'cache_fallback': 0.25,
+        'light1': {
+            'type': 'point',
+            'position': [-1, 0, 1],
+            'intensity': {'type': 'spectrum', 'value': 1},
+        },
+        'light2': {
+            'type': 'point',
+            'position': [1, 0, 1],
+            'intensity': {'type': 'spectrum', 'value': 3},
+        },
+    })
+
+    cache = scene.light_cache()
+    assert cache is not None
+    assert cache.emitter_count() == 2
+    assert dr.allclose(cache.fallback(), 0.25)
+
+    it = dr.zeros(mi.SurfaceInteraction3f, 2)
+    it.p = mi.Point3f(0, 0, 0)
+    it.n = mi.Normal3f(0, 0, 1)
+    index = dr.arange(mi.UInt32, 2)
+
+    # Without any observation, emitters are selected proportionally to power
+    assert dr.allclose(cache.pdf_emitter(it, index), [0.25, 0.75])
+
+    # Recorded contributions only take effect after an update
+    cache.record(it, mi.UInt32(0), mi.Float(1.0))
+    assert dr.allclose(cache.pdf_emitter(it, index), [0.25, 0.75])
+    cache.update()
+    assert dr.allclose(cache.pdf_emitter(it, index),
+                       [0.25 * 0.25 + 0.75, 0.25 * 0.75])
+
+    # Sampled indices and probabilities agree with 'pdf_emitter'
+    sample_count = 1000
+    it = dr.zeros(mi.SurfaceInteraction3f, sample_count)
+    it.p = mi.Point3f(0, 0, 0)
+    it.n = mi.Normal3f(0, 0, 1)
+    sample = dr.linspace(mi.Float, 0, 1, sample_count, False)
+    index, pmf, _ = cache.sample_emitter(it, sample)
+    assert dr.allclose(pmf, cache.pdf_emitter(it, index))
+    assert dr.allclose(dr.mean(mi.Float(dr.eq(index, 0))), 0.25 * 0.25 + 0.75,
+                       atol=1e-2)
+
+    cache.reset()
+    assert dr.allclose(cache.pdf_emitter(it, dr.zeros(mi.UInt32, sample_count)), 0.25)
+
+
+@fresolver_append_path
+def test09_partial_accel_update(variants_all_rgb):
+    T = mi.ScalarTransform4f
+    scene = mi.load_dict({
+        'type': 'scene',
+        'static': {'type': 'rectangle', 'to_world': T.translate([-2, 0, 0])},
+        'moving': {'type': 'obj', 'filename': 'resources/data/common/meshes/rectangle.obj'},
+        'instanced': {
+            'type': 'shapegroup',
+            'shape': {'type': 'rectangle'},
+        },
+        'instance': {
+            'type': 'instance',
+            'to_world': T.translate([2, 0, 0]),
+            'shapegroup': {'type': 'ref', 'id': 'instanced'},
+        },
+    })
+
+    def hit(x):
+        ray = mi.Ray3f(o=mi.Point3f(x, 0, 5), d=mi.Vector3f(0, 0, -1))
+        si = scene.ray_intersect(ray)
+        return dr.all(si.is_valid()), si.t
+
+    assert hit(-2)[0] and hit(0)[0] and hit(2)[0]
+
+    # Only move the mesh: the other shapes remain intersectable
+    params = mi.traverse(scene)
+    positions = dr.unravel(mi.Point3f, params['moving.vertex_positions'])
+    positions.z += 1
+    params['moving.vertex_positions'] = dr.ravel(positions)
+    params.update()
+
+    assert dr.allclose(hit(0)[1], 4)
+    assert dr.allclose(hit(-2)[1], 5)
+    assert dr.allclose(hit(2)[1], 5)
+
+    # Only move the instance
+    params['instance.to_world'] = mi.Transform4f.translate([2, 0, 2])
+    params.update()
+
+    assert dr.allclose(hit(2)[1], 3)
+    assert dr.allclose(hit(0)[1], 4)
+    assert dr.allclose(hit(-2)[1], 5)
+
+
+def test10_emitter_sampling_segment(variants_vec_rgb):
+    scene_dict = {
+        'type': 'scene',
+        'emitter_sampling': 'tree',
+    }
+    for i in range(8):
+        scene_dict[f'light_{i}'] = {
+            'type': 'point',
+            'position': [4 * i, 1, 0],
+            'intensity': 1.0,
+        }
+    scene = mi.load_dict(scene_dict)
+    count = len(scene.emitters())
+
+    # Segment passing below the first two lights
+    sample_count = 1000
+    ray = mi.Ray3f(mi.Point3f(-1, 0, 0), mi.Vector3f(1, 0, 0))
+    ray.maxt = 6.0
+
+    # The discrete probabilities of all emitters sum up to one
+    ray_all = dr.zeros(mi.Ray3f, count)
+    ray_all.o, ray_all.d, ray_all.maxt = ray.o, ray.d, ray.maxt
+    pmf = scene.pdf_emitter_segment(ray_all, dr.arange(mi.UInt32, count))
+    assert dr.allclose(dr.sum(pmf), 1.0)
+
+    # Lights close to the segment are much more likely to be chosen
+    assert pmf[0] > pmf[3] and pmf[1] > pmf[3]
+
+    # Sampled emitters and their probabilities agree with 'pdf_emitter_segment'
+    ray_s = dr.zeros(mi.Ray3f, sample_count)
+    ray_s.o, ray_s.d, ray_s.maxt = ray.o, ray.d, ray.maxt
+    sample = dr.linspace(mi.Float, 0, 1, sample_count, False)
+    index, prim_index, pmf, sample_re = scene.sample_emitter_segment(ray_s, sample)
+    assert dr.all(pmf > 0)
+    assert dr.allclose(pmf, scene.pdf_emitter_segment(ray_s, index, prim_index))
+    assert dr.all((sample_re >= 0) & (sample_re < 1))
+
+    # Point queries remain consistent with the tree
+    it = dr.zeros(mi.SurfaceInteraction3f, count)
+    it.p = mi.Point3f(0, 0, 0)
+    assert dr.allclose(scene.pdf_emitter_selection(it, dr.arange(mi.UInt32, count)),
+                       scene.light_tree().pdf_emitter(it, dr.arange(mi.UInt32, count)))
+
+
+def test11_emitter_sampling_tree_lobe(variants_vec_rgb):
+    scene_dict = {
+        'type': 'scene',
+        'emitter_sampling': 'tree',
+    }
+    for i in range(8):
+        scene_dict[f'light_{i}'] = {
+            'type': 'point',
+            'position': [2 * i - 7, 0, 2],
+            'intensity': 1.0,
+        }
+    scene = mi.load_dict(scene_dict)
+    tree = scene.light_tree()
+    count = len(scene.emitters())
+
+    # Narrow lobe pointing towards the first light
+    it = dr.zeros(mi.SurfaceInteraction3f, count)
+    it.n = mi.Normal3f(0, 0, 1)
+    lobe = mi.BSDFLobe3f(dr.normalize(mi.Vector3f(-7, 0, 2)), 0.99, 0.1)
+
+    # The discrete probabilities of all emitters sum up to one
+    index = dr.arange(mi.UInt32, count)
+    pmf = tree.pdf_emitter(it, lobe, index, 0)
+    assert dr.allclose(dr.sum(pmf), 1.0)
+
+    # Lights within the lobe are favoured over the mirrored ones
+    pmf_ref = tree.pdf_emitter(it, index, 0)
+    assert dr.allclose(pmf_ref[0], pmf_ref[count - 1])
+    assert pmf[0] > pmf[count - 1]
+    assert pmf[0] > pmf_ref[0]
+
+    # Sampled emitters and their probabilities agree with 'pdf_emitter'
+    sample_count = 1000
+    it = dr.zeros(mi.SurfaceInteraction3f, sample_count)
+    it.n = mi.Normal3f(0, 0, 1)
+    lobe = mi.BSDFLobe3f(dr.normalize(mi.Vector3f(-7, 0, 2)), 0.99, 0.1)
+    sample = dr.linspace(mi.Float, 0, 1, sample_count, False)
+    index, prim_index, pmf, sample_re = tree.sample_emitter(it, lobe, sample)
+    assert dr.all(pmf > 0)
+    assert dr.allclose(pmf, tree.pdf_emitter(it, lobe, index, prim_index))
+    assert dr.all((sample_re >= 0) & (sample_re < 1))
+
+    # The scene forwards the lobe consistently
+    ds, _ = scene.sample_emitter_direction(
+        it, lobe, mi.Point2f(sample, 0.5), test_visibility=False)
+    assert dr.allclose(ds.pdf, pmf)
+    assert dr.allclose(scene.pdf_emitter_selection(it, lobe, index, prim_index), pmf)
+
+
+def test12_ray_statistics(variants_all_rgb):
+    scene = mi.load_dict({
+        'type': 'scene',
+        'shape': { 'type': 'rectangle' }
+    })
+
+    # Counting is disabled by default
+    ray = mi.Ray3f(mi.Point3f(0, 0, 1), mi.Vector3f(0, 0, -1))
+    scene.ray_intersect(ray)
+    assert scene.ray_statistics() == (0, 0)
+
+    scene.set_ray_statistics(True)
+    assert scene.ray_statistics_enabled()
+    for i in range(3):
+        scene.ray_intersect(ray)
+    scene.ray_intersect_preliminary(ray)
+    scene.ray_test(ray)
+    scene.ray_test(ray, active=False)
+    assert scene.ray_statistics() == (4, 1)
+
+    scene.reset_ray_statistics()
+    assert scene.ray_statistics() == (0, 0)
+
+
+def test13_emitter_sampling_learned_parameters_changed(variants_vec_rgb):
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter_sampling': 'learned',
+        'cache_fallback': 0.25,
+        'floor': {'type': 'rectangle', 'bsdf': {'type': 'diffuse'}},
+        'light1': {
+            'type': 'point',
+            'position': [-1, 0, 1],
+            'intensity': {'type': 'spectrum', 'value': 1},
+        },
+        'light2': {
+            'type': 'point',
+            'position': [1, 0, 1],
+            'intensity': {'type': 'spectrum', 'value': 3},
+        },
+    })
+
+    it = dr.zeros(mi.SurfaceInteraction3f, 2)
+    it.p = mi.Point3f(0, 0, 0)
+    it.n = mi.Normal3f(0, 0, 1)
+    index = dr.arange(mi.UInt32, 2)
+
+    scene.light_cache().record(it, mi.UInt32(0), mi.Float(1.0))
+    scene.light_cache().update()
+    learned = [0.25 * 0.25 + 0.75, 0.25 * 0.75]
+    assert dr.allclose(scene.light_cache().pdf_emitter(it, index), learned)
+
+    # Updating a BSDF keeps what the cache has learned
+    params = mi.traverse(scene)
+    params['floor.bsdf.reflectance.value'] = 0.2
+    params.update()
+    assert dr.allclose(scene.light_cache().pdf_emitter(it, index), learned)
+
+    # Updating an emitter rebuilds the cache
+    params['light1.intensity.value'] = 3
+    params.update()
+    assert dr.allclose(scene.light_cache().pdf_emitter(it, index), [0.5, 0.5])
+
+
+def test14_emitter_sampling_learned_passes(variants_vec_rgb):
+    T = mi.ScalarTransform4f
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter_sampling': 'learned',
+        'integrator': {'type': 'direct', 'samples_per_pass': 1},
+        'sensor': {
+            'type': 'perspective',
+            'to_world': T.look_at(origin=[0, 0, 3], target=[0, 0, 0], up=[0, 1, 0]),
+            'film': {'type': 'hdrfilm', 'width': 32, 'height': 32},
+        },
+        'floor': {'type': 'rectangle', 'bsdf': {'type': 'diffuse'}},
+        'blocker': {'type': 'rectangle', 'to_world': T.translate([0, 0, -0.5]).scale(2)},
+        'light1': {
+            'type': 'point',
+            'position': [-0.5, 0, 1],
+            'intensity': {'type': 'spectrum', 'value': 1},
+        },
+        # Hidden by the blocker, never contributes
+        'light2': {
+            'type': 'point',
+            'position': [0.5, 0, -1],
+            'intensity': {'type': 'spectrum', 'value': 1},
+        },
+    })
+
+    it = dr.zeros(mi.SurfaceInteraction3f, 2)
+    it.p = mi.Point3f(0, 0, 0)
+    it.n = mi.Normal3f(0, 0, 1)
+    index = dr.arange(mi.UInt32, 2)
+    assert dr.allclose(scene.light_cache().pdf_emitter(it, index), [0.5, 0.5])
+
+    # The passes of a single render() call learn from the previous ones
+    mi.render(scene, spp=8)
+    fallback = scene.light_cache().fallback()
+    assert dr.allclose(scene.light_cache().pdf_emitter(it, index),
+                       [fallback * 0.5 + (1 - fallback), fallback * 0.5])
+
+
+def test15_emitter_sampling_tree_facing_away(variants_vec_rgb):
+    T = mi.ScalarTransform4f
+    scene_dict = {'type': 'scene', 'emitter_sampling': 'tree'}
+    for i in range(16):
+        # One-sided area lights emitting towards +z
+        scene_dict[f'light_{i}'] = {
+            'type': 'rectangle',
+            'to_world': T.translate([i % 4, i // 4, 0]).scale(0.25),
+            'emitter': {'type': 'area', 'radiance': 1.0},
+        }
+    scene = mi.load_dict(scene_dict)
+    tree = scene.light_tree()
+
+    # Every light faces away from the reference points below them
+    sample_count = 100
+    it = dr.zeros(mi.SurfaceInteraction3f, sample_count)
+    it.p = mi.Point3f(1.5, 1.5, -2.0)
+    it.n = mi.Normal3f(0, 0, 1)
+    sample = dr.linspace(mi.Float, 0, 1, sample_count, False)
+    index, prim_index, pmf, _ = tree.sample_emitter(it, sample)
+    assert dr.all(dr.eq(pmf, 0))
+    assert dr.all(dr.eq(index, 0) & dr.eq(prim_index, 0))
+
+    ds, weight = scene.sample_emitter_direction(
+        it, mi.Point2f(sample, 0.5), test_visibility=False)
+    assert dr.all(dr.isfinite(weight)) and dr.all(dr.eq(weight, 0))
@@ -0,0 +1,401 @@
+import mitsuba as mi
+import drjit as dr
+import numpy as np
+import csv
+import json
+import multiprocessing
+import os
+import subprocess
+import time
+from argparse import ArgumentParser
+from typing import Any, Dict, List
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+LIGHT_TYPES = ["point", "spot", "rectangle", "mesh"]
+LAYOUTS = ["grid", "clustered", "street"]
+
+# Emitter selection strategies, as scene parameters
+STRATEGIES = {
+    "uniform": { "emitter_sampling": "uniform" },
+    "power": { "emitter_sampling": "power" },
+    "tree": { "emitter_sampling": "tree", "split_emitters": True },
+    "learned": { "emitter_sampling": "learned" },
+}
+
+INTEGRATORS = {
+    "direct": { "type": "direct", "emitter_samples": 1, "bsdf_samples": 1 },
+    "path": { "type": "path", "max_depth": 4 },
+}
+
+def light_positions(
+    count: int,
+    layout: str,
+    rng: np.random.Generator,
+    up: int=1,
+) -> np.ndarray:
+    """
+    Generate `count` light positions in [0, 1]^3 following the given layout.
+    The axis `up` is treated as the vertical one
+    """
+    # Layouts are generated in (x, height, z) and reordered at the end
+    if layout == "grid":
+        # Regular lattice on a horizontal plane close to the top
+        n = int(np.ceil(np.sqrt(count)))
+        i = np.arange(count)
+        pos = np.stack([(i % n + 0.5) / n, np.full(count, 0.9), (i // n + 0.5) / n], axis=1)
+    elif layout == "clustered":
+        # Gaussian clusters around uniformly distributed centers
+        n_clusters = max(1, int(np.sqrt(count) / 4))
+        centers = rng.uniform(0.15, 0.85, (n_clusters, 3))
+        pos = centers[rng.integers(0, n_clusters, count)] + rng.normal(0, 0.03, (count, 3))
+    elif layout == "street":
+        # Rows of street lamps on both sides of parallel streets, with some
+        # jitter to mimic lit windows
+        n_streets = max(1, int(np.ceil(np.sqrt(count / 64))))
+        per_row = int(np.ceil(count / (2 * n_streets)))
+        i = np.arange(count)
+        row, lamp = i // per_row, i % per_row
+        street, side = row // 2, row % 2
+        width = 0.25 / n_streets
+        pos = np.stack([
+            (lamp + 0.5) / per_row,
+            0.5 + rng.uniform(-0.05, 0.05, count),
+            (street + 0.5) / n_streets + (side - 0.5) * width,
+        ], axis=1)
+    else:
+        raise ValueError(f"Unknown light layout '{layout}', must be one of {LAYOUTS}")
+
+    pos = np.clip(pos, 0, 1)
+    if up != 1:
+        order = [0, 2, 1] if up == 2 else [1, 0, 2]
+        pos = pos[:, order]
+    return pos
+
+def generate_lights(
+    count: int,
+    light_type: str="point",
+    layout: str="grid",
+    bbox: mi.ScalarBoundingBox3f=None,
+    power: float=100.0,
+    seed: int=0,
+    up: int=1,
+    use_arrays: bool=True,
+) -> Dict[str, Any]:
+    """
+    Generate the scene dictionary entries of `count` light sources of the
+    given type, placed within `bbox` (by default [-1, 1]^3) following the
+    given layout. The total power of the lights is roughly `power`, spread
+    with random variations.
+
+    Point and spot lights use the `pointarray` and `spotarray` emitters if
+    `use_arrays` is set, and individual plugins otherwise. Rectangle lights
+    are separate shapes, while mesh lights are the triangles of a single
+    emissive mesh (which the light tree splits if `split_emitters` is set).
+    """
+    if light_type not in LIGHT_TYPES:
+        raise ValueError(f"Unknown light type '{light_type}', must be one of {LIGHT_TYPES}")
+
+    if bbox is None:
+        bbox = mi.ScalarBoundingBox3f([-1, -1, -1], [1, 1, 1])
+
+    rng = np.random.default_rng(seed)
+    lo, extents = np.array(bbox.min), np.array(bbox.extents())
+    pos = lo + extents * (0.05 + 0.9 * light_positions(count, layout, rng, up))
+
+    down = np.zeros(3)
+    down[up] = -1
+    color = rng.uniform(0.5, 1.5, (count, 3)) * power / count
+    # Size of area lights such that they cover a similar area in total
+    size = 0.25 * np.min(extents[np.arange(3) != up]) / np.sqrt(count)
+
+    lights = {}
+    if light_type == "point" and use_arrays:
+        data = np.concatenate([pos, color / (4 * dr.pi)], axis=1)
+        lights["lights"] = { "type": "pointarray", "data": mi.Bitmap(data.astype(np.float32)) }
+    elif light_type == "spot" and use_arrays:
+        data = np.concatenate([
+            pos, np.tile(down, (count, 1)), color / (2 * dr.pi),
+            np.tile([30.0, 20.0], (count, 1))
+        ], axis=1)
+        lights["lights"] = { "type": "spotarray", "data": mi.Bitmap(data.astype(np.float32)) }
+    elif light_type == "mesh":
+        # One downward facing triangle per light
+        offsets = np.zeros((3, 3))
+        offsets[0, (up + 1) % 3] = size
+        offsets[1, (up + 1) % 3] = -size
+        offsets[2, (up + 2) % 3] = size
+        vertices = (pos[:, None, :] + offsets[None, :, :]).reshape(-1, 3)
+        faces = np.arange(3 * count, dtype=np.uint32).reshape(-1, 3)
+
+        props = mi.Properties()
+        props["emitter"] = mi.load_dict({
+            "type": "area",
+            "radiance": { "type": "rgb", "value": [power / (count * size * size)] * 3 }
+        })
+        mesh = mi.Mesh("lights", 3 * count, count, props=props)
+        params = mi.traverse(mesh)
+        params["vertex_positions"] = mi.Float(vertices.ravel().astype(np.float32))
+        params["faces"] = mi.UInt32(faces.ravel())
+        params.update()
+        lights["lights"] = mesh
+    else:
+        for i in range(count):
+            name = f"light_{i}"
+            intensity = { "type": "rgb", "value": color[i].tolist() }
+            if light_type == "point":
+                lights[name] = { "type": "point", "position": pos[i].tolist(), "intensity": intensity }
+            elif light_type == "spot":
+                lights[name] = {
+                    "type": "spot",
+                    "to_world": mi.ScalarTransform4f.look_at(
+                        origin=pos[i].tolist(), target=(pos[i] + down).tolist(),
+                        up=np.roll(down, 1).tolist()
+                    ),
+                    "cutoff_angle": 30.0,
+                    "beam_width": 20.0,
+                    "intensity": intensity,
+                }
+            else:
+                # Rectangles face +Z, rotate them to face downwards
+                to_world = mi.ScalarTransform4f.look_at(
+                    origin=pos[i].tolist(), target=(pos[i] + down).tolist(),
+                    up=np.roll(down, 1).tolist()
+                ) @ mi.ScalarTransform4f.scale([size, size, 1])
+                intensity["value"] = (color[i] / (4 * size * size)).tolist()
+                lights[name] = {
+                    "type": "rectangle",
+                    "to_world": to_world,
+                    "emitter": { "type": "area", "radiance": intensity },
+                }
+
+    return lights
+
+def generate_scene(
+    count: int,
+    light_type: str="point",
+    layout: str="grid",
+    base: Dict[str, Any]=None,
+    keep_base_lights: bool=False,
+    strategy: str="tree",
+    integrator: Dict[str, Any]=None,
+    resolution: int=None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Generate a many-lights scene dictionary by adding procedurally placed
+    lights (see `generate_lights()`) to a base scene, by default the Cornell
+    box. Lights of the base scene are removed unless `keep_base_lights` is
+    set. Remaining keyword arguments are passed to `generate_lights()`.
+    """
+    scene = dict(base if base is not None else mi.cornell_box())
+    if not keep_base_lights:
+        for key in [k for k, v in scene.items() if isinstance(v, dict) and "emitter" in v]:
+            del scene[key]
+
+    # Lights are placed within the bounds of the base scene
+    bbox = mi.load_dict(scene).bbox()
+    if not bbox.valid():
+        bbox = mi.ScalarBoundingBox3f([-1, -1, -1], [1, 1, 1])
+
+    scene.update(STRATEGIES[strategy])
+    if integrator is not None:
+        scene["integrator"] = integrator
+    if resolution is not None:
+        scene["sensor"] = dict(scene["sensor"])
+        scene["sensor"]["film"] = dict(scene["sensor"]["film"], width=resolution, height=resolution)
+    scene.update(generate_lights(count, light_type, layout, bbox, **kwargs))
+    return scene
+
+def peak_host_memory() -> float:
+    """
+    Peak resident host memory of the current process, in MiB (or NaN if
+    unknown). This does not include the memory allocated on CUDA devices,
+    which is the relevant peak in CUDA variants.
+    """
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and in bytes on macOS
+    return peak / (2**20 if os.uname().sysname == "Darwin" else 2**10)
+
+def git_commit() -> str:
+    """
+    Hash of the checked out commit, used to compare results across commits
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Load the scene described by `case` and render it with the given
+    integrator and strategy, returning the measurements.
+
+    The scene is rendered a first time to compile the kernels, a second
+    time to measure the time per sample, and a last time with ray statistics
+    enabled (which adds overhead) to count the traced rays. Cases should run
+    in separate processes (see `run_benchmark()`) so that peak memory and
+    load times are not affected by earlier cases. Only the peak host memory
+    is recorded (see `peak_host_memory()`).
+    """
+    mi.set_variant(case["variant"])
+    result = dict(case)
+
+    t0 = time.time()
+    scene_dict = generate_scene(
+        case["count"], case["light_type"], case["layout"],
+        strategy=case["strategy"], integrator=INTEGRATORS[case["integrator"]],
+        resolution=case["resolution"], seed=case["seed"]
+    )
+    scene = mi.load_dict(scene_dict)
+    result["load_time"] = time.time() - t0
+
+    spp = case["spp"]
+    t0 = time.time()
+    dr.eval(mi.render(scene, spp=spp, seed=0))
+    dr.sync_thread()
+    result["warmup_time"] = time.time() - t0
+
+    t0 = time.time()
+    image = mi.render(scene, spp=spp, seed=1)
+    dr.eval(image)
+    dr.sync_thread()
+    result["time_per_spp"] = (time.time() - t0) / spp
+    result["finite"] = bool(np.all(np.isfinite(np.array(image))))
+
+    scene.set_ray_statistics(True)
+    dr.eval(mi.render(scene, spp=spp, seed=2))
+    result["rays"], result["shadow_rays"] = scene.ray_statistics()
+    scene.set_ray_statistics(False)
+
+    result["peak_host_memory_mb"] = peak_host_memory()
+    return result
+
+def run_benchmark(
+    counts: List[int],
+    light_types: List[str]=LIGHT_TYPES,
+    layouts: List[str]=LAYOUTS,
+    integrators: List[str]=list(INTEGRATORS),
+    strategies: List[str]=list(STRATEGIES),
+    variant: str="cuda_ad_rgb",
+    spp: int=16,
+    resolution: int=256,
+    seed: int=0,
+    output: str=None,
+    isolate: bool=True,
+) -> List[Dict[str, Any]]:
+    """
+    Run every combination of the given light counts, types, layouts,
+    integrators and strategies, and optionally write the results to
+    `output` (as CSV if the filename ends with '.csv', as JSON otherwise).
+
+    Unless `isolate` is unset, each case runs in a fresh process. Cases that
+    fail (e.g. by running out of memory) are recorded with their error.
+    """
+    commit = git_commit()
+    results = []
+    for count in counts:
+        for light_type in light_types:
+            for layout in layouts:
+                for integrator in integrators:
+                    for strategy in strategies:
+                        case = {
+                            "commit": commit, "variant": variant,
+                            "count": count, "light_type": light_type, "layout": layout,
+                            "integrator": integrator, "strategy": strategy,
+                            "spp": spp, "resolution": resolution, "seed": seed,
+                        }
+                        try:
+                            if isolate:
+                                ctx = multiprocessing.get_context("spawn")
+                                with ctx.Pool(1) as pool:
+                                    result = pool.apply(run_case, (case,))
+                            else:
+                                result = run_case(case)
+                        except Exception as e:
+                            result = dict(case, error=str(e))
+                            mi.Log(mi.LogLevel.Warn, f"Benchmark case {case} failed: {e}")
+                        results.append(result)
+
+    if output:
+        write_results(results, output)
+    return results
+
+def write_results(results: List[Dict[str, Any]], path: str):
+    if path.endswith(".csv"):
+        fields = []
+        for result in results:
+            fields += [k for k in result if k not in fields]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+def read_results(path: str) -> List[Dict[str, Any]]:
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+    with open(path) as f:
+        return json.load(f)
+
+def compare_results(
+    old: List[Dict[str, Any]],
+    new: List[Dict[str, Any]],
+    metrics: List[str]=["load_time", "time_per_spp", "shadow_rays", "peak_host_memory_mb"],
+) -> List[Dict[str, Any]]:
+    """
+    Match the cases of two result lists (e.g. of two commits) and return the
+    ratio new / old of each metric
+    """
+    keys = ["variant", "count", "light_type", "layout", "integrator", "strategy", "spp", "resolution"]
+    key = lambda r: tuple(str(r.get(k)) for k in keys)
+    old_by_key = { key(r): r for r in old }
+
+    ratios = []
+    for r in new:
+        o = old_by_key.get(key(r))
+        # CSV rows of successful cases have an empty 'error' column
+        if o is None or o.get("error") or r.get("error"):
+            continue
+        ratio = { k: r[k] for k in keys }
+        for m in metrics:
+            a, b = float(o[m]), float(r[m])
+            ratio[m] = b / a if a > 0 else float("nan")
+        ratios.append(ratio)
+    return ratios
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Many-lights benchmark harness")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 10000, 1000000])
+    parser.add_argument("--light_types", nargs="+", default=LIGHT_TYPES, choices=LIGHT_TYPES)
+    parser.add_argument("--layouts", nargs="+", default=LAYOUTS, choices=LAYOUTS)
+    parser.add_argument("--integrators", nargs="+", default=list(INTEGRATORS), choices=list(INTEGRATORS))
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--variant", default="cuda_ad_rgb")
+    parser.add_argument("--spp", type=int, default=16)
+    parser.add_argument("--resolution", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", default=None, help="Results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    mi.set_variant(args.variant)
+    results = run_benchmark(
+        args.counts, args.light_types, args.layouts, args.integrators, args.strategies,
+        args.variant, args.spp, args.resolution, args.seed, args.output
+    )
+
+    if args.compare:
+        for ratio in compare_results(read_results(args.compare), results):
+            print(ratio)
@@ -0,0 +1,149 @@
+import mitsuba as mi
+import drjit as dr
+from typing import Tuple
+
+class EmitterSelector():
+    """
+    Strategy used to pick the emitter towards which a light sample is drawn.
+
+    Subclasses implement `sample_emitter()`, which returns the index of the
+    chosen emitter in `scene.emitters()`, the index of the chosen primitive
+    of this emitter, its discrete probability and the reusable sample.
+    `sample_direction()` then draws a direction towards the chosen emitter,
+    and folds the selection probability into the returned density and
+    weight, so that both are with respect to the full candidate source pdf.
+
+    All methods optionally take a coarse bound of the BSDF lobe at the
+    shading point (see `mi.BSDF.lobe()`). Strategies that can account for
+    the BSDF use it to favour emitters within the lobe, the others ignore it.
+    The same lobe must be passed when sampling and evaluating densities.
+    """
+
+    # Set if the selected primitive index must be honoured when sampling
+    split_emitters = False
+
+    def sample_emitter(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, sample: mi.Float,
+                       active: mi.Bool, lobe: mi.BSDFLobe3f = None
+                       ) -> Tuple[mi.UInt32, mi.UInt32, mi.Float, mi.Float]:
+        raise NotImplementedError
+
+    def pdf_emitter(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, ds: mi.DirectionSample3f,
+                    active: mi.Bool, lobe: mi.BSDFLobe3f = None) -> mi.Float:
+        raise NotImplementedError
+
+    def sample_direction(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, sample: mi.Point2f,
+                         active: mi.Bool, lobe: mi.BSDFLobe3f = None
+                         ) -> Tuple[mi.DirectionSample3f, mi.Color3f]:
+        index, prim_index, pmf, sample_re = self.sample_emitter(scene, si, sample.x, active, lobe)
+        active &= pmf > 0
+
+        emitter = dr.gather(mi.EmitterPtr, scene.emitters_dr(), index, active)
+        sample = mi.Point2f(sample_re, sample.y)
+        if self.split_emitters:
+            ds, spec = emitter.sample_direction_primitive(si, prim_index, sample, active)
+        else:
+            ds, spec = emitter.sample_direction(si, sample, active)
+
+        ds.pdf *= pmf
+        spec *= dr.select(active, dr.rcp(pmf), 0)
+        return ds, spec
+
+    def pdf_direction(self, scene: mi.Scene, si: mi.SurfaceInteraction3f, ds: mi.DirectionSample3f,
+                      active: mi.Bool, lobe: mi.BSDFLobe3f = None) -> mi.Float:
+        if self.split_emitters:
+            pdf = ds.emitter.pdf_direction_primitive(si, ds, active)
+        else:
+            pdf = ds.emitter.pdf_direction(si, ds, active)
+        return pdf * self.pdf_emitter(scene, si, ds, active, lobe)
+
+
+class SceneEmitterSelector(EmitterSelector):
+    """
+    Defer to the scene's own emitter sampling strategy
+    """
+
+    def sample_direction(self, scene, si, sample, active, lobe=None):
+        if lobe is not None:
+            return scene.sample_emitter_direction(si, lobe, sample, active=active,
+                                                  test_visibility=False)
+        return scene.sample_emitter_direction(si, sample, active=active, test_visibility=False)
+
+    def pdf_direction(self, scene, si, ds, active, lobe=None):
+        if lobe is not None:
+            return scene.pdf_emitter_direction(si, lobe, ds, active)
+        return scene.pdf_emitter_direction(si, ds, active)
+
+
+class UniformEmitterSelector(EmitterSelector):
+    """
+    Choose every emitter with the same probability
+    """
+
+    def sample_emitter(self, scene, si, sample, active, lobe=None):
+        count = len(scene.emitters())
+        index = dr.minimum(mi.UInt32(sample * count), count - 1)
+        return index, mi.UInt32(0), mi.Float(1 / count), sample * count - mi.Float(index)
+
+    def pdf_emitter(self, scene, si, ds, active, lobe=None):
+        return dr.select(active, 1 / len(scene.emitters()), 0)
+
+
+class PowerEmitterSelector(EmitterSelector):
+    """
+    Choose emitters proportionally to their estimated power
+    """
+
+    def __init__(self, scene: mi.Scene):
+        power = [max(emitter.estimate_power(), 0) for emitter in scene.emitters()]
+        if sum(power) == 0:
+            power = [1] * len(power)
+        self.distr = mi.AliasDistribution(mi.Float(power))
+
+    def sample_emitter(self, scene, si, sample, active, lobe=None):
+        index, sample_re, pmf = self.distr.sample_reuse_pmf(sample, active)
+        return index, mi.UInt32(0), pmf, sample_re
+
+    def pdf_emitter(self, scene, si, ds, active, lobe=None):
+        return self.distr.eval_pmf_normalized(ds.emitter.scene_index(), active)
+
+
+class LightTreeEmitterSelector(EmitterSelector):
+    """
+    Choose emitters proportionally to their estimated contribution at the
+    shading point using a light tree. If `split_emitters` is set, emissive
+    meshes are split into their individual triangles. If a BSDF lobe is
+    given, the tree additionally favours emitters within the lobe.
+    """
+
+    def __init__(self, scene: mi.Scene, split_emitters: bool=False):
+        self.split_emitters = split_emitters
+        self.tree = mi.LightTree(scene.emitters(), split_emitters)
+
+    def sample_emitter(self, scene, si, sample, active, lobe=None):
+        if lobe is not None:
+            return self.tree.sample_emitter(si, lobe, sample, active)
+        return self.tree.sample_emitter(si, sample, active)
+
+    def pdf_emitter(self, scene, si, ds, active, lobe=None):
+        if lobe is not None:
+            return self.tree.pdf_emitter(si, lobe, ds.emitter.scene_index(), ds.prim_index, active)
+        return self.tree.pdf_emitter(si, ds.emitter.scene_index(), ds.prim_index, active)
+
+
+def load_emitter_selector(name: str, scene: mi.Scene) -> EmitterSelector:
+    """
+    Instantiate one of the built-in emitter selection strategies by name
+    """
+    if name == "scene":
+        return SceneEmitterSelector()
+    elif name == "uniform":
+        return UniformEmitterSelector()
+    elif name == "power":
+        return PowerEmitterSelector(scene)
+    elif name == "tree":
+        return LightTreeEmitterSelector(scene)
+    elif name == "tree_split":
+        return LightTreeEmitterSelector(scene, split_emitters=True)
+    else:
+        raise ValueError(f"Unknown emitter selector \"{name}\", must be one of: "
+                         "\"scene\", \"uniform\", \"power\", \"tree\" or \"tree_split\"")
@@ -1,69 +1,358 @@
+import mitsuba as mi
+import drjit as dr
 import numpy as np
-from tqdm import tqdm
-from utils.render import linear_to_srgb
-from typing import Tuple, List, Callable
+import time
+from utils.render import linear_to_srgb, render_multi_pass
+from typing import Tuple, List, Callable, Dict
+
+Image = mi.TensorXf|np.ndarray
+
+def to_tensor(img: Image) -> mi.TensorXf:
+    if isinstance(img, mi.TensorXf):
+        return img
+    return mi.TensorXf(np.asarray(img, dtype=np.float32))
+
+def stack(imgs: List[Image]|Image) -> mi.TensorXf:
+    """
+    Stack images of the same shape into a (N, H, W, C) tensor on the device.
+    Tensors that are already stacked are returned as is
+    """
+    if not isinstance(imgs, (list, tuple)):
+        imgs = to_tensor(imgs)
+        return imgs if len(imgs.shape) == 4 else mi.TensorXf(imgs.array, (1,) + tuple(imgs.shape))
+    if all(isinstance(img, np.ndarray) for img in imgs):
+        return mi.TensorXf(np.stack(imgs).astype(np.float32))
+
+    imgs = [to_tensor(img) for img in imgs]
+    size = dr.width(imgs[0].array)
+    result = dr.zeros(mi.Float, len(imgs) * size)
+    for i, img in enumerate(imgs):
+        dr.scatter(result, img.array, dr.arange(mi.UInt32, size) + i * size)
+    return mi.TensorXf(result, (len(imgs),) + tuple(imgs[0].shape))
 
 def metric(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
-    func: Callable,
-    aggregate: Callable=np.mean,
+    gt: Image,
+    imgs: List[Image]|Image,
+    func: Callable[[mi.TensorXf, mi.TensorXf], mi.TensorXf],
+    aggregate: str="mean",
     use_srgb: float=True,
-) -> Tuple[List[float], List[np.ndarray]]:
-    met = []
-    agg_met = []
+) -> Tuple[mi.Float, mi.TensorXf]:
+    """
+    Evaluate `func` on a stack of images against the reference `gt`, which is
+    broadcast over the stack. Everything stays on the device: the function
+    returns the per-image `aggregate` ("mean" or "sum") of the error as an
+    array with one entry per image, along with the per-pixel errors as a
+    (N, H, W, C) tensor.
+    """
+    imgs_ = stack(imgs)
+    gt_ = to_tensor(gt)
+    size = dr.width(gt_.array)
+    if dr.width(imgs_.array) != imgs_.shape[0] * size:
+        raise ValueError(f"Images of shape {imgs_.shape[1:]} do not match the reference of shape {gt_.shape}")
+
+    gt_ = mi.TensorXf(dr.gather(mi.Float, gt_.array, dr.arange(mi.UInt32, dr.width(imgs_.array)) % size),
+                      imgs_.shape)
     if use_srgb:
-        gt_ = linear_to_srgb(gt)
-    else:
-        gt_ = gt
-    for img in tqdm(imgs):
-        if use_srgb:
-            img_ = linear_to_srgb(img)
-        else:
-            img_ = img
-        met.append(func(img_, gt_))
-        agg_met.append(aggregate(met[-1]))
+        imgs_, gt_ = linear_to_srgb(imgs_), linear_to_srgb(gt_)
 
-    return agg_met, met
+    met = func(imgs_, gt_)
+    agg = dr.block_sum(met.array, dr.width(met.array) // imgs_.shape[0])
+    if aggregate == "mean":
+        agg /= dr.width(met.array) // imgs_.shape[0]
+    elif aggregate != "sum":
+        raise ValueError(f"Unknown aggregate '{aggregate}', must be 'mean' or 'sum'")
+
+    return agg, met
 
 def se(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
+    gt: Image,
+    imgs: List[Image]|Image,
     use_srgb: float=True
-) -> Tuple[List[float], List[np.ndarray]]:
-    return metric(gt, imgs, lambda x,y: np.square(x-y), use_srgb=use_srgb)
+) -> Tuple[mi.Float, mi.TensorXf]:
+    return metric(gt, imgs, lambda x,y: dr.sqr(x-y), use_srgb=use_srgb)
 
 def ae(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
+    gt: Image,
+    imgs: List[Image]|Image,
     use_srgb: float=True
-) -> Tuple[List[float], List[np.ndarray]]:
-    return metric(gt, imgs, lambda x,y: np.abs(x-y), use_srgb=use_srgb)
+) -> Tuple[mi.Float, mi.TensorXf]:
+    return metric(gt, imgs, lambda x,y: dr.abs(x-y), use_srgb=use_srgb)
 
 def l1(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
+    gt: Image,
+    imgs: List[Image]|Image,
     use_srgb: float=True
-) -> Tuple[List[float], List[np.ndarray]]:
+) -> Tuple[mi.Float, mi.TensorXf]:
     return metric(gt, imgs, lambda x,y: x-y, use_srgb=use_srgb)
 
 def rae(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
+    gt: Image,
+    imgs: List[Image]|Image,
     use_srgb: float=True
-) -> Tuple[List[float], List[np.ndarray]]:
-    return metric(gt, imgs, lambda x,y: np.abs(x-y) / (y+0.01), use_srgb=use_srgb)
+) -> Tuple[mi.Float, mi.TensorXf]:
+    return metric(gt, imgs, lambda x,y: dr.abs(x-y) / (y+0.01), use_srgb=use_srgb)
 
 def rse(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
+    gt: Image,
+    imgs: List[Image]|Image,
     use_srgb: float=True
-) -> Tuple[List[float], List[np.ndarray]]:
-    return metric(gt, imgs, lambda x,y: np.square(x-y) / (np.square(y)+0.01), use_srgb=use_srgb)
+) -> Tuple[mi.Float, mi.TensorXf]:
+    return metric(gt, imgs, lambda x,y: dr.sqr(x-y) / (dr.sqr(y)+0.01), use_srgb=use_srgb)
+
+def smape(
+    gt: Image,
+    imgs: List[Image]|Image,
+    use_srgb: float=True
+) -> Tuple[mi.Float, mi.TensorXf]:
+    return metric(gt, imgs, lambda x,y: 2 * dr.abs(x-y) / (dr.abs(x)+dr.abs(y)+0.01), use_srgb=use_srgb)
+
+# -------------------- FLIP --------------------
+
+# Observer at 0.7m from a 0.7m wide 4K monitor
+FLIP_PIXELS_PER_DEGREE = 0.7 * 3840 / 0.7 * np.pi / 180
+
+FLIP_REFERENCE_ILLUMINANT = [0.950428545, 1.0, 1.088900371]
+FLIP_LINRGB_TO_XYZ = [
+    [10135552 / 24577794, 8788810 / 24577794, 4435075 / 24577794],
+    [2613072 / 12288897, 8788810 / 12288897, 887015 / 12288897],
+    [1425312 / 73733382, 8788810 / 73733382, 70074185 / 73733382],
+]
+FLIP_XYZ_TO_LINRGB = [
+    [3.241003275, -1.537398934, -0.498615861],
+    [-0.969224334, 1.875930071, 0.041554224],
+    [0.055639419, -0.204011347, 1.057148977],
+]
+
+def _mat_mul(m: List[List[float]], v: mi.Vector3f) -> mi.Vector3f:
+    return mi.Vector3f(*[m[i][0] * v.x + m[i][1] * v.y + m[i][2] * v.z for i in range(3)])
+
+def _xyz_to_ycxcz(v: mi.Vector3f) -> mi.Vector3f:
+    x, y, z = [v[i] / FLIP_REFERENCE_ILLUMINANT[i] for i in range(3)]
+    return mi.Vector3f(116 * y - 16, 500 * (x - y), 200 * (y - z))
+
+def _ycxcz_to_xyz(v: mi.Vector3f) -> mi.Vector3f:
+    y = (v.x + 16) / 116
+    return mi.Vector3f(*[c * FLIP_REFERENCE_ILLUMINANT[i] for i, c in enumerate([y + v.y / 500, y, y - v.z / 200])])
+
+def _linrgb_to_lab(v: mi.Vector3f) -> mi.Vector3f:
+    delta = 6 / 29
+    x, y, z = [v_ / FLIP_REFERENCE_ILLUMINANT[i] for i, v_ in enumerate(_mat_mul(FLIP_LINRGB_TO_XYZ, v))]
+    x, y, z = [dr.select(c > delta**3, dr.cbrt(c), c / (3 * delta**2) + 4 / 29) for c in [x, y, z]]
+    return mi.Vector3f(116 * y - 16, 500 * (x - y), 200 * (y - z))
+
+def _hunt_adjustment(lab: mi.Vector3f) -> mi.Vector3f:
+    return mi.Vector3f(lab.x, 0.01 * lab.x * lab.y, 0.01 * lab.x * lab.z)
+
+def _hyab(a: mi.Vector3f, b: mi.Vector3f) -> mi.Float:
+    d = a - b
+    return dr.abs(d.x) + dr.sqrt(dr.sqr(d.y) + dr.sqr(d.z))
+
+def _convolve(value: mi.Float, shape: Tuple[int, int, int], kernel: np.ndarray, axis: int) -> mi.Float:
+    """
+    Correlate a stack of single channel images, stored as a flat array of
+    (N, H, W) pixels, with a 1D kernel along the given axis (0: x, 1: y).
+    Borders are handled by clamping
+    """
+    _, height, width = shape
+    idx = dr.arange(mi.Int32, dr.width(value))
+    if axis == 0:
+        coord, size, stride = idx % width, width, 1
+    else:
+        coord, size, stride = (idx // width) % height, height, width
+
+    r = len(kernel) // 2
+    result = mi.Float(0)
+    for i, k in enumerate(kernel):
+        if k != 0:
+            offset = dr.clamp(coord + (i - r), 0, size - 1) - coord
+            result += float(k) * dr.gather(mi.Float, value, mi.UInt32(idx + offset * stride))
+    return result
+
+def _csf_filter(ycxcz: mi.Vector3f, shape: Tuple[int, int, int], ppd: float) -> mi.Vector3f:
+    """
+    Filter an image in YCxCz space with the contrast sensitivity functions of
+    FLIP, which are sums of Gaussians and hence separable
+    """
+    params = [[(1, 0.0047)], [(1, 0.0053)], [(34.1, 0.04), (13.5, 0.025)]]
+    r = int(np.ceil(3 * np.sqrt(0.04 / (2 * np.pi**2)) * ppd))
+    x = np.arange(-r, r + 1) / ppd
+
+    result = []
+    for channel, gaussians in enumerate(params):
+        terms = [(a * np.sqrt(np.pi / b), np.exp(-np.pi**2 * x**2 / b)) for a, b in gaussians]
+        total = sum(c * np.sum(g)**2 for c, g in terms)
+        filtered = mi.Float(0)
+        for c, g in terms:
+            filtered += c / total * _convolve(_convolve(ycxcz[channel], shape, g, 0), shape, g, 1)
+        result.append(filtered)
+    return mi.Vector3f(*result)
+
+def _feature_kernels(ppd: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    1D factors of the FLIP edge and point detectors, along with the Gaussian
+    applied in the orthogonal direction
+    """
+    sd = 0.5 * 0.082 * ppd
+    r = int(np.ceil(3 * sd))
+    x = np.arange(-r, r + 1)
+    g = np.exp(-x**2 / (2 * sd**2))
+    kernels = []
+    for h in [-x * g, (x**2 / sd**2 - 1) * g]:
+        # Positive and negative weights respectively sum to 1 and -1
+        kernels.append(np.where(h < 0, h / -np.sum(h[h < 0]), h / np.sum(h[h > 0])))
+    return kernels[0], kernels[1], g / np.sum(g)
+
+def _features(y: mi.Float, shape: Tuple[int, int, int], ppd: float) -> Tuple[mi.Float, mi.Float]:
+    """
+    Magnitude of the edge and point features of a normalized luminance image
+    """
+    edge, point, g = _feature_kernels(ppd)
+    result = []
+    for h in [edge, point]:
+        fx = _convolve(_convolve(y, shape, h, 0), shape, g, 1)
+        fy = _convolve(_convolve(y, shape, g, 0), shape, h, 1)
+        result.append(dr.sqrt(dr.sqr(fx) + dr.sqr(fy)))
+    return tuple(result)
+
+def flip_error(
+    test: mi.TensorXf,
+    reference: mi.TensorXf,
+    pixels_per_degree: float=FLIP_PIXELS_PER_DEGREE,
+) -> mi.TensorXf:
+    """
+    Per-pixel LDR-FLIP error (Andersson et al. 2020) between two stacks of
+    (N, H, W, C) sRGB encoded images, as a (N, H, W, 1) tensor. Values are
+    clamped to [0, 1] and channels beyond the first three are ignored
+    """
+    qc, qf, pc, pt = 0.7, 0.5, 0.4, 0.95
+    n, height, width, channels = test.shape
+    shape = (n, height, width)
+    idx = dr.arange(mi.UInt32, n * height * width) * channels
+
+    def to_ycxcz(img: mi.TensorXf) -> mi.Vector3f:
+        srgb = [dr.clamp(dr.gather(mi.Float, img.array, idx + c), 0, 1) for c in range(3)]
+        linear = mi.Vector3f(*[dr.select(c > 0.04045, dr.power((c + 0.055) / 1.055, 2.4), c / 12.92) for c in srgb])
+        return _xyz_to_ycxcz(_mat_mul(FLIP_LINRGB_TO_XYZ, linear))
+
+    def preprocess(ycxcz: mi.Vector3f) -> mi.Vector3f:
+        linear = _mat_mul(FLIP_XYZ_TO_LINRGB, _ycxcz_to_xyz(_csf_filter(ycxcz, shape, pixels_per_degree)))
+        return _hunt_adjustment(_linrgb_to_lab(dr.clamp(linear, 0, 1)))
+
+    ref_ycxcz, test_ycxcz = to_ycxcz(reference), to_ycxcz(test)
+
+    # Color difference, remapped to [0, 1]
+    cmax = dr.power(_hyab(_hunt_adjustment(_linrgb_to_lab(mi.Vector3f(0, 1, 0))),
+                          _hunt_adjustment(_linrgb_to_lab(mi.Vector3f(0, 0, 1)))), qc)[0]
+    delta_c = dr.power(_hyab(preprocess(ref_ycxcz), preprocess(test_ycxcz)), qc)
+    delta_c = dr.select(delta_c < pc * cmax,
+                        pt / (pc * cmax) * delta_c,
+                        pt + (delta_c - pc * cmax) / (cmax - pc * cmax) * (1 - pt))
+
+    # Feature difference on the normalized luminance
+    ref_edges, ref_points = _features((ref_ycxcz.x + 16) / 116, shape, pixels_per_degree)
+    test_edges, test_points = _features((test_ycxcz.x + 16) / 116, shape, pixels_per_degree)
+    delta_f = dr.maximum(dr.abs(ref_edges - test_edges), dr.abs(ref_points - test_points))
+    delta_f = dr.power(delta_f / np.sqrt(2), qf)
+
+    flip = dr.select(delta_c > 0, dr.power(delta_c, 1 - delta_f), 0)
+    return mi.TensorXf(flip, (n, height, width, 1))
 
 def flip(
-    gt: np.ndarray,
-    imgs: List[np.ndarray],
+    gt: Image,
+    imgs: List[Image]|Image,
     use_srgb: float=True
-) -> Tuple[List[float], List[np.ndarray]]:
-    raise NotImplementedError
\ No newline at end of file
+) -> Tuple[mi.Float, mi.TensorXf]:
+    """
+    LDR-FLIP error of each image. The images are tone mapped using
+    `linear_to_srgb()` if `use_srgb` is set, and otherwise assumed to already
+    be sRGB encoded
+    """
+    return metric(gt, imgs, flip_error, use_srgb=use_srgb)
+
+# Per-image aggregated errors, by name
+ERRORS = {
+    "mse": se,
+    "mae": ae,
+    "rmae": rae,
+    "rmse": rse,
+    "smape": smape,
+    "flip": flip,
+}
+
+def convergence(
+    scene: mi.Scene,
+    integrators: Dict[str, mi.Integrator],
+    gt: np.ndarray,
+    spp: int,
+    spp_per_pass: int=1,
+    times: List[float]=None,
+    error: str|Callable="rmse",
+    use_srgb: bool=False,
+) -> Dict[str, Dict[str, List[float]]]:
+    """
+    Render the scene progressively with each integrator and track the error
+    against the reference `gt`, to compare the integrators at equal time or
+    equal sample count from a single rendering each.
+
+    Each integrator renders passes of `spp_per_pass` samples until `spp`
+    samples are reached or, if `times` (wall-clock checkpoints in seconds)
+    are given, until the last checkpoint has passed. The error is recorded
+    after every pass whose sample count is a power of two, and after the
+    first pass following each time checkpoint. Kernels are compiled by a
+    warm-up pass beforehand, and the time spent computing errors is not
+    counted. `error` is the name of a metric in `ERRORS`, or a function with
+    the same signature as these metrics.
+
+    Returns, for each integrator, the lists `spp`, `time` and `error` of the
+    error-vs-spp curve, and `checkpoint_spp`, `checkpoint_time` and
+    `checkpoint_error` of the error-vs-time curve.
+    """
+    error_func = ERRORS[error] if isinstance(error, str) else error
+    gt_ = to_tensor(gt)
+    res_y, res_x = gt_.shape[:2]
+
+    results = {}
+    for name, integrator in integrators.items():
+        render_func = lambda scene, seed, spp: mi.render(scene, spp=spp, integrator=integrator, seed=seed)
+
+        # Compile the kernels beforehand
+        dr.eval(render_func(scene=scene, seed=0, spp=spp_per_pass))
+        dr.sync_thread()
+
+        curves = { k: [] for k in ["spp", "time", "error", "checkpoint_spp", "checkpoint_time", "checkpoint_error"] }
+        checkpoints = sorted(times) if times else []
+        # Elapsed rendering time, excluding the time spent in the callback
+        state = { "start": time.perf_counter(), "excluded": 0.0, "checkpoint": 0 }
+
+        def callback(spp_: int, img: mi.TensorXf) -> bool:
+            dr.sync_thread()
+            t0 = time.perf_counter()
+            elapsed = t0 - state["start"] - state["excluded"]
+
+            n_passes = spp_ // spp_per_pass
+            is_power_of_two = n_passes & (n_passes - 1) == 0
+            at_checkpoint = state["checkpoint"] < len(checkpoints) and elapsed >= checkpoints[state["checkpoint"]]
+            if is_power_of_two or at_checkpoint:
+                # Only the aggregated error leaves the device
+                err = float(error_func(gt_, img, use_srgb)[0][0])
+                if is_power_of_two:
+                    curves["spp"].append(spp_)
+                    curves["time"].append(elapsed)
+                    curves["error"].append(err)
+                if at_checkpoint:
+                    # Several checkpoints may have passed during a long pass
+                    while state["checkpoint"] < len(checkpoints) and elapsed >= checkpoints[state["checkpoint"]]:
+                        state["checkpoint"] += 1
+                    curves["checkpoint_spp"].append(spp_)
+                    curves["checkpoint_time"].append(elapsed)
+                    curves["checkpoint_error"].append(err)
+
+            state["excluded"] += time.perf_counter() - t0
+            return bool(checkpoints) and state["checkpoint"] == len(checkpoints)
+
+        mi.Log(mi.LogLevel.Info, f"Convergence of '{name}'")
+        render_multi_pass(render_func, res_x, res_y, scene, spp, spp_per_pass=spp_per_pass, callback=callback)
+        results[name] = curves
+
+    return results
+
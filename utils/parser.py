@@ -9,6 +9,9 @@ def add_common_args(parser: ArgumentParser):
     parser.add_argument("--disable_emitter", action="store_true")
     parser.add_argument("--gt_spp", type=int, default=50000)
     parser.add_argument("--spp", type=int, default=1000)
+    parser.add_argument("--target_error", type=float, default=None)
+    parser.add_argument("--checkpoint", action="store_true")
+    parser.add_argument("--checkpoint_interval", type=float, default=300)
     parser.add_argument("-w", action="count", default=0)
 
 def add_test_args(parser: ArgumentParser):
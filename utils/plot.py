@@ -55,6 +55,32 @@ def plot_line(
     ax.set_ylabel(ylabel)
     return fig, ax
 
+def plot_convergence(
+    results: Dict[str, Dict[str, List[float]]],
+    x: str="time",
+    title: str="",
+    ylabel: str="error",
+):
+    """
+    Plot on log-log axes the error curves returned by `metrics.convergence()`
+    against either the sample count (`x="spp"`) or the rendering time
+    (`x="time"`, at the wall-clock checkpoints if there were any)
+    """
+    fig = plt.figure()
+    ax: plt.Axes = fig.add_subplot()
+    for name, curves in results.items():
+        if x == "spp":
+            ax.loglog(curves["spp"], curves["error"], marker=".", label=name)
+        elif curves["checkpoint_time"]:
+            ax.loglog(curves["checkpoint_time"], curves["checkpoint_error"], marker=".", label=name)
+        else:
+            ax.loglog(curves["time"], curves["error"], marker=".", label=name)
+    ax.set_title(title)
+    ax.legend(loc="upper right")
+    ax.set_xlabel("spp" if x == "spp" else "time (s)")
+    ax.set_ylabel(ylabel)
+    return fig, ax
+
 def plot_img_grid(
     img_grid: List[List[Any]],
     widths: List[int]|int,
@@ -1,8 +1,9 @@
 import mitsuba as mi
 import drjit as dr
+import os
 import time
 import numpy as np
-from typing import Tuple, Callable
+from typing import Tuple, Callable, Iterator
 
 def linear_to_srgb(image: mi.TensorXf|np.ndarray, gamma: float=2.2) -> mi.TensorXf|np.ndarray:
     if isinstance(image, np.ndarray):
@@ -10,18 +11,242 @@ def linear_to_srgb(image: mi.TensorXf|np.ndarray, gamma: float=2.2) -> mi.Tensor
     else:
         return dr.clamp(image ** (1 / gamma), 0, 1)
 
-def get_spp_per_pass(res_x: int, res_y: int, spp: int) -> Tuple[int, int]:
-    spp_per_pass = int(spp)
-    samples_per_pass = res_x * res_y * spp_per_pass
-    wavefront_size_limit = int(2**32)
-    if samples_per_pass > wavefront_size_limit:
-        spp_per_pass = spp_per_pass // int((samples_per_pass + wavefront_size_limit - 1) / wavefront_size_limit)
-        n_passes = spp // spp_per_pass
-        samples_per_pass = res_x * res_y * spp_per_pass
-        mi.Log(mi.LogLevel.Warn, f"Too many samples requested, splitting the job into {n_passes} passes with {spp_per_pass} spp")
-        return spp_per_pass, n_passes
+def get_spp_per_pass(
+    res_x: int,
+    res_y: int,
+    spp: int,
+    sample_state_size: int=None,
+    memory_budget: float=None,
+) -> Tuple[int, int]:
+    """
+    Split `spp` samples per pixel into passes of at most 2^32 samples that fit
+    into `memory_budget` (in MiB). By default, the budget is half of the
+    available system memory on LLVM variants, and unlimited otherwise. The
+    fewest passes that fit are made equally large, which may round the
+    sample count up (e.g. when it is prime).
+
+    `sample_state_size` is the estimated memory used by each sample in bytes
+    (see `mi.SamplingIntegrator.sample_state_size()`). By default, it
+    matches the estimate of the C++ integrators.
+    """
+    spp = int(spp)
+    pixel_count = res_x * res_y
+    if sample_state_size is None:
+        # Sampler state, position and splatted values, and the materialized
+        # path state if loops or calls are not recorded
+        recorded = dr.flag(dr.JitFlag.LoopRecord) and dr.flag(dr.JitFlag.VCallRecord)
+        sample_state_size = 48 + (0 if recorded else 512)
+    if memory_budget is None:
+        budget = mi.util.available_memory() // 2 if mi.variant().startswith("llvm") else 0
     else:
-        return spp_per_pass, 1
+        budget = int(memory_budget * 2**20)
+
+    max_wavefront_size = 2**32 - 1
+    if budget > 0:
+        max_wavefront_size = min(max_wavefront_size, budget // sample_state_size)
+
+    # Fewest passes that fit into the budget, made equally large. This may
+    # round the sample count up (e.g. when it is prime)
+    max_spp_per_pass = max(min(max_wavefront_size // pixel_count, spp), 1)
+    n_passes = -(-spp // max_spp_per_pass)
+    spp_per_pass = -(-spp // n_passes)
+    wavefront_size = pixel_count * spp_per_pass
+
+    if spp_per_pass * n_passes != spp:
+        mi.Log(mi.LogLevel.Info, f"Rounding the sample count up from {spp} to {spp_per_pass * n_passes} spp to render "
+                                 f"it in passes of equal size")
+    if wavefront_size > max_wavefront_size:
+        mi.Log(mi.LogLevel.Warn, f"Rendering a single sample per pixel requires ~{mi.util.mem_string(wavefront_size * sample_state_size)}, "
+                                 f"which exceeds the memory budget of {mi.util.mem_string(budget)}")
+    mi.Log(mi.LogLevel.Info if n_passes > 1 else mi.LogLevel.Debug,
+           f"Rendering plan: {n_passes} pass{'es' if n_passes > 1 else ''} of {spp_per_pass} spp ({wavefront_size} samples, "
+           f"~{mi.util.mem_string(wavefront_size * sample_state_size)} per pass at {mi.util.mem_string(sample_state_size)} per sample, "
+           f"budget: {mi.util.mem_string(budget) if budget > 0 else 'none'})")
+    return spp_per_pass, n_passes
+
+class ProgressiveRenderer():
+    """
+    Render a scene progressively in passes of `spp_per_pass` samples with
+    different seeds, keeping the running mean and variance of the passes on
+    the device (using Welford's algorithm).
+
+    Passes are not waited for: the accumulation is scheduled along with the
+    next pass, and intermediate images are returned as unevaluated tensors.
+    If `timings` is set, every pass is instead synchronized and its wall
+    clock, JIT compilation and kernel execution times are recorded in
+    `pass_timings` (from Dr.Jit's kernel history).
+
+    The accumulated state can be written to a checkpoint and restored later
+    (see `save_checkpoint()` and `load_checkpoint()`). Since pass `i` always
+    uses the seed `seed + i`, a resumed rendering continues with the same
+    passes as an uninterrupted one.
+    """
+
+    CHECKPOINT_VERSION = 1
+
+    def __init__(
+        self,
+        render_func: Callable,
+        scene: mi.Scene,
+        spp_per_pass: int,
+        seed: int=0,
+        timings: bool=False,
+    ):
+        self.render_func = render_func
+        self.scene = scene
+        self.spp_per_pass = spp_per_pass
+        self.seed = seed
+        self.timings = timings
+        self.reset()
+
+    def reset(self):
+        self.pass_count = 0
+        self.mean = None
+        self.m2 = None
+        self.pass_timings = []
+
+    @property
+    def spp(self) -> int:
+        return self.pass_count * self.spp_per_pass
+
+    def variance(self) -> mi.TensorXf:
+        """
+        Per-pixel variance of the running mean, estimated from the variance
+        between passes (zero until two passes were rendered)
+        """
+        if self.pass_count < 2:
+            return self.m2
+        return self.m2 / ((self.pass_count - 1) * self.pass_count)
+
+    def step(self) -> mi.TensorXf:
+        """
+        Render one more pass and return the (unevaluated) running mean
+        """
+        if self.timings:
+            history_flag = dr.flag(dr.JitFlag.KernelHistory)
+            dr.set_flag(dr.JitFlag.KernelHistory, True)
+            dr.kernel_history() # Discard earlier kernels
+            t0 = time.perf_counter()
+
+        img = self.render_func(scene=self.scene, spp=self.spp_per_pass, seed=self.seed + self.pass_count)
+        self.pass_count += 1
+        if self.mean is None:
+            self.mean = img
+            self.m2 = mi.TensorXf(dr.zeros(mi.Float, dr.width(img.array)), img.shape)
+        else:
+            delta = img - self.mean
+            self.mean = self.mean + delta / self.pass_count
+            self.m2 = self.m2 + delta * (img - self.mean)
+
+        if self.timings:
+            dr.eval(self.mean, self.m2)
+            dr.sync_thread()
+            history = dr.kernel_history()
+            self.pass_timings.append({
+                "spp": self.spp,
+                "time": time.perf_counter() - t0,
+                "compile_time": sum(k.get("codegen_time", 0) + k.get("backend_time", 0) for k in history) / 1000,
+                "execution_time": sum(k.get("execution_time", 0) for k in history) / 1000,
+            })
+            dr.set_flag(dr.JitFlag.KernelHistory, history_flag)
+        else:
+            dr.schedule(self.mean, self.m2)
+
+        return self.mean
+
+    def save_checkpoint(self, path: str):
+        """
+        Write the running mean and variance, the number of passes and the
+        seed to `path` (as a NumPy archive). The file is replaced atomically,
+        so that an interrupted write keeps the previous checkpoint intact.
+        """
+        if self.mean is None:
+            return
+        dr.eval(self.mean, self.m2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=self.CHECKPOINT_VERSION,
+                mean=self.mean.numpy(),
+                m2=self.m2.numpy(),
+                pass_count=self.pass_count,
+                spp_per_pass=self.spp_per_pass,
+                seed=self.seed,
+            )
+        os.replace(tmp_path, path)
+        mi.Log(mi.LogLevel.Debug, f"Saved checkpoint at {self.spp} spp to \"{path}\"")
+
+    def load_checkpoint(self, path: str):
+        """
+        Restore the state written by `save_checkpoint()`, such that further
+        passes keep accumulating into it
+        """
+        with np.load(path) as data:
+            if int(data["version"]) != self.CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version {int(data['version'])} in \"{path}\"")
+            if int(data["spp_per_pass"]) != self.spp_per_pass or int(data["seed"]) != self.seed:
+                raise ValueError(f"The checkpoint \"{path}\" was rendered with {int(data['spp_per_pass'])} spp per pass and seed "
+                                 f"{int(data['seed'])}, not {self.spp_per_pass} and {self.seed}")
+            self.mean = mi.TensorXf(data["mean"])
+            self.m2 = mi.TensorXf(data["m2"])
+            self.pass_count = int(data["pass_count"])
+        mi.Log(mi.LogLevel.Info, f"Resuming from \"{path}\" at {self.spp} spp")
+
+    def passes(self, n_passes: int) -> Iterator[Tuple[int, mi.TensorXf]]:
+        """
+        Render `n_passes` passes, yielding the number of samples rendered so
+        far and the running mean after each of them
+        """
+        for _ in range(n_passes):
+            img = self.step()
+            yield self.spp, img
+
+    def render(
+        self,
+        spp: int,
+        callback: Callable[[int, mi.TensorXf], bool]=None,
+        time_budget: float=None,
+        checkpoint_path: str=None,
+        checkpoint_interval: float=300,
+    ) -> mi.TensorXf:
+        """
+        Render passes until at least `spp` samples per pixel are reached,
+        invoking `callback` with the number of samples and the running mean
+        after each pass. Returning True from it stops the rendering early.
+
+        If `time_budget` is given, the rendering also stops once it has run
+        for that many seconds (checked after each pass, which is then waited
+        for). The mean is only taken over the passes that were rendered.
+
+        If `checkpoint_path` is given, the rendering resumes from it if it
+        exists, and the state is saved to it every `checkpoint_interval`
+        seconds and once the rendering stops.
+        """
+        if checkpoint_path and os.path.exists(checkpoint_path) and self.mean is None:
+            self.load_checkpoint(checkpoint_path)
+
+        n_passes = -(-(spp - self.spp) // self.spp_per_pass)
+        if self.pass_count == 0:
+            n_passes = max(1, n_passes)
+
+        t0 = t_checkpoint = time.perf_counter()
+        for spp_, img in self.passes(max(0, n_passes)):
+            if callback and callback(spp_, img):
+                break
+            if time_budget is not None:
+                dr.eval(self.mean, self.m2)
+                dr.sync_thread()
+                if time.perf_counter() - t0 >= time_budget:
+                    break
+            if checkpoint_path and time.perf_counter() - t_checkpoint >= checkpoint_interval:
+                self.save_checkpoint(checkpoint_path)
+                t_checkpoint = time.perf_counter()
+
+        dr.eval(self.mean, self.m2)
+        if checkpoint_path:
+            self.save_checkpoint(checkpoint_path)
+        return self.mean
 
 def render_multi_pass(
     render_func: Callable,
@@ -30,23 +255,292 @@ def render_multi_pass(
     scene: mi.Scene,
     spp: int,
     save_path: str=None,
-) -> np.ndarray:
+    spp_per_pass: int=None,
+    callback: Callable[[int, mi.TensorXf], bool]=None,
+    to_numpy: bool=True,
+    sample_state_size: int=None,
+    memory_budget: float=None,
+    checkpoint_path: str=None,
+    checkpoint_interval: float=300,
+) -> np.ndarray|mi.TensorXf:
+    """
+    Render `spp` samples per pixel in several passes with different seeds and
+    average them on the device (see `ProgressiveRenderer`). Unless
+    `spp_per_pass` is given, the passes are as large as the memory budget
+    allows (see `get_spp_per_pass()`).
+
+    Long renderings can be checkpointed to `checkpoint_path` every
+    `checkpoint_interval` seconds, and are resumed from it if it exists
+    (see `ProgressiveRenderer.render()`). Unless given, `spp_per_pass` is
+    then taken from the checkpoint.
+
+    If given, `callback` is invoked after each pass with the number of
+    samples rendered so far and the running average. Returning True from it
+    stops the rendering early. The result is copied to a NumPy array unless
+    `to_numpy` is unset.
+    """
     t0 = time.time()
-    samples_per_pass, n_passes = get_spp_per_pass(res_x, res_y, spp)
-    for pass_ in range(n_passes):
-        t0 = time.time()
-        if pass_ == 0:
-            result = render_func(scene=scene, spp=samples_per_pass, seed=pass_)
-        else:
-            result += render_func(scene=scene, spp=samples_per_pass, seed=pass_)
-        dr.eval(result)
+    if spp_per_pass is None and checkpoint_path and os.path.exists(checkpoint_path):
+        # Resume with the passes of the interrupted rendering
+        with np.load(checkpoint_path) as data:
+            spp_per_pass = int(data["spp_per_pass"])
+    if spp_per_pass is None:
+        spp_per_pass, _ = get_spp_per_pass(res_x, res_y, spp, sample_state_size, memory_budget)
+
+    renderer = ProgressiveRenderer(render_func, scene, spp_per_pass)
+    result = renderer.render(spp, callback, checkpoint_path=checkpoint_path,
+                             checkpoint_interval=checkpoint_interval)
+
+    if save_path:
+        mi.util.write_bitmap(save_path, result)
+
+    if to_numpy:
+        result = result.numpy()
+    dr.sync_thread()
+    mi.Log(mi.LogLevel.Info, f"Time taken: {time.time() - t0:.2f}s", )
+
+    return result
+
+class AdaptiveRenderer():
+    """
+    Render a scene with a sampling integrator, spending samples only on the
+    pixels that have not converged yet.
+
+    Every pass renders `spp_per_pass` samples in each active pixel and
+    updates the running mean and variance of their pass estimates on the
+    device (as in `ProgressiveRenderer`). Once a pixel has received
+    `min_passes` passes and the relative standard error of its luminance
+    drops below `target_error`, it is retired: later passes only launch
+    wavefronts over the compacted indices of the remaining pixels.
+
+    Only films with a box reconstruction filter and RGB variants are
+    supported. Integrators that exchange data between pixels (e.g. the
+    spatial reuse of ReSTIR) only see the active pixels of each pass.
+    """
+
+    def __init__(
+        self,
+        scene: mi.Scene,
+        integrator: mi.SamplingIntegrator=None,
+        spp_per_pass: int=4,
+        target_error: float=0.01,
+        min_passes: int=4,
+        seed: int=0,
+    ):
+        if not dr.is_jit_v(mi.Float):
+            raise RuntimeError("AdaptiveRenderer requires a JIT (cuda or llvm) variant")
+        if not mi.is_rgb or mi.is_polarized:
+            raise RuntimeError("AdaptiveRenderer requires an unpolarized RGB variant")
+        if min_passes < 2:
+            raise ValueError("At least two passes are needed to estimate the variance of a pixel")
+
+        self.scene = scene
+        self.integrator = integrator if integrator is not None else scene.integrator()
+        self.sensor: mi.Sensor = scene.sensors()[0]
+        film: mi.Film = self.sensor.film()
+        if not film.rfilter().is_box_filter():
+            # Samples are averaged per pixel, which only matches mi.render() for a box filter
+            raise ValueError(f"AdaptiveRenderer requires a film with a box reconstruction filter, "
+                             f"not '{film.rfilter().class_().name()}'")
+        self.film_size = film.crop_size()
+        self.spp_per_pass = spp_per_pass
+        self.target_error = target_error
+        self.min_passes = min_passes
+        self.seed = seed
+        # Luminance below which the absolute instead of the relative error is used
+        self.error_epsilon = 1e-3
+        self.reset()
+
+    def reset(self):
+        n_pixels = int(dr.prod(self.film_size))
+        self.pass_count = 0
+        self.sample_count = 0
+        self.count = dr.zeros(mi.UInt32, n_pixels)
+        self.mean = dr.zeros(mi.Color3f, n_pixels)
+        self.m2 = dr.zeros(mi.Color3f, n_pixels)
+        self.active_idx = dr.arange(mi.UInt32, n_pixels)
+
+    @property
+    def active_pixels(self) -> int:
+        return dr.width(self.active_idx)
 
-    result = result / n_passes
+    def step(self) -> int:
+        """
+        Render one pass over the active pixels, retire the converged ones and
+        return the number of pixels that remain active
+        """
+        n_active = self.active_pixels
+        if n_active == 0:
+            return 0
+
+        spp = self.spp_per_pass
+        wavefront_size = n_active * spp
+
+        sampler: mi.Sampler = self.sensor.sampler().clone()
+        sampler.set_sample_count(spp)
+        sampler.set_samples_per_wavefront(spp)
+        sampler.seed(self.seed + self.pass_count, wavefront_size)
+
+        # Each active pixel receives 'spp' consecutive samples of the wavefront
+        idx = dr.gather(mi.UInt32, self.active_idx, dr.arange(mi.UInt32, wavefront_size) // spp)
+        pos = mi.Vector2f(mi.Float(idx % self.film_size.x), mi.Float(idx // self.film_size.x))
+
+        ################################
+        # Camera rays
+        ################################
+        # Sensors expect positions relative to the crop window (as in
+        # SamplingIntegrator::render_sample(), where the crop offset cancels)
+        sample_pos = (pos + sampler.next_2d()) / mi.ScalarVector2f(self.film_size)
+
+        aperture_sample = mi.Point2f(0.5)
+        if self.sensor.needs_aperture_sample():
+            aperture_sample = sampler.next_2d()
+
+        time_ = self.sensor.shutter_open()
+        if self.sensor.shutter_open_time() > 0.0:
+            time_ = time_ + sampler.next_1d() * self.sensor.shutter_open_time()
+
+        ray, ray_weight = self.sensor.sample_ray_differential(time_, mi.Float(0), sample_pos, aperture_sample)
+        if ray.has_differentials:
+            ray.scale_differential(dr.rsqrt(spp))
+
+        spec, _, _ = self.integrator.sample(self.scene, sampler, ray, None, True)
+        value = mi.Color3f(ray_weight * spec)
+        value = dr.select(dr.isfinite(value), value, 0)
+
+        ################################
+        # Per-pixel statistics
+        ################################
+        estimate = mi.Color3f(*[dr.block_sum(value[i], spp) / spp for i in range(3)])
+
+        # Active pixels have all been rendered in every pass so far
+        self.pass_count += 1
+        self.sample_count += wavefront_size
+        n = self.pass_count
+        mean = dr.gather(mi.Color3f, self.mean, self.active_idx)
+        m2 = dr.gather(mi.Color3f, self.m2, self.active_idx)
+        delta = estimate - mean
+        mean = mean + delta / n
+        m2 = m2 + delta * (estimate - mean)
+
+        dr.scatter(self.count, mi.UInt32(n), self.active_idx)
+        dr.scatter(self.mean, mean, self.active_idx)
+        dr.scatter(self.m2, m2, self.active_idx)
+        dr.eval(self.count, self.mean, self.m2)
+
+        if n >= self.min_passes:
+            # Relative standard error of the luminance of each pixel
+            variance = dr.maximum(mi.luminance(m2), 0) / (n * (n - 1))
+            error = dr.sqrt(variance) / dr.maximum(mi.luminance(mean), self.error_epsilon)
+            self.active_idx = dr.gather(mi.UInt32, self.active_idx, dr.compress(~(error < self.target_error)))
+
+        return self.active_pixels
+
+    def render(
+        self,
+        max_spp: int,
+        time_budget: float=None,
+        callback: Callable[[int, int], bool]=None,
+    ) -> mi.TensorXf:
+        """
+        Render passes until all pixels converged, `max_spp` samples per pixel
+        were rendered or `time_budget` seconds elapsed. `callback` is invoked
+        after each pass with the number of passes and of active pixels.
+        Returning True from it stops the rendering early.
+        """
+        t0 = time.perf_counter()
+        while self.pass_count == 0 or (self.pass_count + 1) * self.spp_per_pass <= max_spp:
+            n_active = self.step()
+            if callback and callback(self.pass_count, n_active):
+                break
+            if n_active == 0:
+                break
+            if time_budget is not None and time.perf_counter() - t0 >= time_budget:
+                break
+
+        n_pixels = dr.width(self.count)
+        mi.Log(mi.LogLevel.Info, f"Adaptive sampling: {self.pass_count} passes, {self.sample_count / n_pixels:.1f} spp on average "
+                                 f"({100 * self.sample_count / max(1, n_pixels * self.pass_count * self.spp_per_pass):.0f}% of uniform sampling), "
+                                 f"{self.active_pixels} pixels not converged")
+        return self.image()
+
+    def image(self) -> mi.TensorXf:
+        """
+        Return the current estimate of the image
+        """
+        return mi.TensorXf(dr.ravel(self.mean), (self.film_size.y, self.film_size.x, 3))
+
+    def spp_map(self) -> mi.TensorXf:
+        """
+        Return the number of samples rendered in each pixel
+        """
+        return mi.TensorXf(mi.Float(self.count * self.spp_per_pass), (self.film_size.y, self.film_size.x))
+
+def render_timed(
+    render_func: Callable,
+    scene: mi.Scene,
+    time_budget: float,
+    spp_per_pass: int=1,
+    max_spp: int=2**31 - 1,
+    save_path: str=None,
+    to_numpy: bool=True,
+) -> np.ndarray|mi.TensorXf:
+    """
+    Render passes of `spp_per_pass` samples per pixel until `time_budget`
+    seconds elapsed (or `max_spp` samples per pixel were rendered), and
+    return their average. Any render function can be used, including the
+    Python (AD) integrators through `mi.render()`.
+
+    The number of samples achieved in each pixel is appended to the image as
+    an additional channel, which is named "spp" in the saved image.
+    """
+    renderer = ProgressiveRenderer(render_func, scene, spp_per_pass)
+    img = renderer.render(max_spp, time_budget=time_budget)
+    mi.Log(mi.LogLevel.Info, f"Rendered {renderer.spp} spp in {renderer.pass_count} passes within {time_budget:.2f}s")
+
+    # Append the achieved sample count as an AOV
+    height, width, channels = img.shape
+    idx = dr.arange(mi.UInt32, height * width * (channels + 1))
+    pixel, channel = idx // (channels + 1), idx % (channels + 1)
+    values = dr.gather(mi.Float, img.array, pixel * channels + channel, channel < channels)
+    values = dr.select(channel < channels, values, mi.Float(renderer.spp))
+    result = mi.TensorXf(values, (height, width, channels + 1))
+
+    if save_path:
+        channel_names = ["R", "G", "B", "A"][:channels] if channels <= 4 else [f"C{i}" for i in range(channels)]
+        bitmap = mi.Bitmap(result, mi.Bitmap.PixelFormat.MultiChannel, channel_names + ["spp"])
+        bitmap.write(save_path)
+
+    if to_numpy:
+        result = result.numpy()
+
+    return result
+
+def render_adaptive(
+    scene: mi.Scene,
+    spp: int,
+    target_error: float,
+    integrator: mi.SamplingIntegrator=None,
+    save_path: str=None,
+    spp_per_pass: int=4,
+    time_budget: float=None,
+    to_numpy: bool=True,
+) -> np.ndarray|mi.TensorXf:
+    """
+    Render at most `spp` samples per pixel, stopping in each pixel once its
+    relative error drops below `target_error` (see `AdaptiveRenderer`), or
+    everywhere once `time_budget` seconds elapsed
+    """
+    t0 = time.time()
+    renderer = AdaptiveRenderer(scene, integrator, spp_per_pass, target_error)
+    result = renderer.render(spp, time_budget)
 
     if save_path:
         mi.util.write_bitmap(save_path, result)
 
-    result = result.numpy() # Forces evaluation
+    if to_numpy:
+        result = result.numpy()
+    dr.sync_thread()
     mi.Log(mi.LogLevel.Info, f"Time taken: {time.time() - t0:.2f}s", )
 
     return result
@@ -55,8 +549,24 @@ def render_manual(
     render_func: Callable[[mi.SurfaceInteraction3f, mi.Scene], mi.Color3f],
     scene: mi.Scene,
     spp: int = None,
-    random_offset: bool=True
+    random_offset: bool=True,
+    tile_size: int=None,
+    max_wavefront_size: int=None,
+    seed: int=0,
 ) -> mi.TensorXf:
+    """
+    Render the scene by calling `render_func` on the first intersection of
+    the camera rays, using the wavefront arrays of the active (JIT) variant.
+
+    By default, a single wavefront covers the whole film. Otherwise, the
+    film is processed in square tiles of `tile_size` pixels (or the largest
+    tiles of at most `max_wavefront_size` samples), each of which is
+    evaluated and splatted into the film before the next one is started, so
+    that peak memory does not depend on the resolution.
+    """
+    if not dr.is_jit_v(mi.Float):
+        raise RuntimeError("render_manual() requires a JIT (cuda or llvm) variant")
+
     # Sensor & Film
     sensor: mi.Sensor = scene.sensors()[0]
     film: mi.Film = sensor.film()
@@ -73,26 +583,70 @@ def render_manual(
     spp = sampler.sample_count()
     film.prepare([])
 
+    if max_wavefront_size is not None:
+        tile_size = max(1, int(np.sqrt(max_wavefront_size / spp)))
+    tiled = tile_size is not None
+    if not tiled:
+        tile_size = max(film_size.x, film_size.y)
+
+    tile_index = 0
+    for tile_y in range(0, film_size.y, tile_size):
+        for tile_x in range(0, film_size.x, tile_size):
+            tile_offset = mi.ScalarVector2u(tile_x, tile_y)
+            size = dr.minimum(mi.ScalarVector2u(tile_size), film_size - tile_offset)
+            render_tile(render_func, scene, sensor, sampler, film, film_size, spp,
+                        tile_offset, size, seed + tile_index, random_offset, tiled)
+            tile_index += 1
+
+    img = film.develop()
+
+    return img
+
+def render_tile(
+    render_func: Callable[[mi.SurfaceInteraction3f, mi.Scene], mi.Color3f],
+    scene: mi.Scene,
+    sensor: mi.Sensor,
+    sampler: mi.Sampler,
+    film: mi.Film,
+    film_size: mi.ScalarVector2u,
+    spp: int,
+    tile_offset: mi.ScalarVector2u,
+    tile_size: mi.ScalarVector2u,
+    seed: int,
+    random_offset: bool,
+    tiled: bool,
+):
+    """
+    Render one tile of `render_manual()`, with `tile_offset` relative to the
+    (border extended) film, and splat it into the film
+    """
     # Wavefront setup
-    wavefront_size = film_size.x * film_size.y * spp
+    wavefront_size = tile_size.x * tile_size.y * spp
 
     sampler.set_samples_per_wavefront(spp) # There are 'spp' number of passes
-    sampler.seed(0, wavefront_size)
+    sampler.seed(seed, wavefront_size)
 
     # Image block
-    block = film.create_block()
+    if tiled:
+        # Tiles receive splats from samples up to a filter radius away
+        block = film.create_block(size=tile_size, normalize=False, borders=True)
+    else:
+        block = film.create_block()
     # Offset is the currect location of the block
-    # In case of GPU, the block covers the entire image, hence offset is 0
-    block.set_offset(film.crop_offset())
+    offset = mi.ScalarPoint2i(film.crop_offset()) + mi.ScalarPoint2i(tile_offset)
+    if film.sample_border():
+        offset -= film.rfilter().border_size()
+    block.set_offset(offset if tiled else film.crop_offset())
     # Coalescing is batch read/writes, useful for efficient memory accesses.
     block.set_coalesce(block.coalesce() and spp >= 4)
 
-    idx = dr.arange(dr.cuda.UInt32, 0, wavefront_size)
-    idx = idx // dr.cuda.UInt32(spp)
+    idx = dr.arange(mi.UInt32, 0, wavefront_size)
+    idx = idx // mi.UInt32(spp)
 
     pos = mi.Vector2u(0)
-    pos.y = idx // film_size.x
-    pos.x = -film_size.x * pos.y + idx
+    pos.y = idx // tile_size.x
+    pos.x = -tile_size.x * pos.y + idx
+    pos = pos + tile_offset
 
     if film.sample_border():
         pos = pos - film.rfilter().border_size()
@@ -145,7 +699,9 @@ def render_manual(
     # Save image
     ################################
     block.put(sample_pos, final_color)
+    if tiled:
+        # Evaluate the tile before moving on, freeing its wavefront
+        dr.eval(block.tensor())
     film.put_block(block)
-    img = film.develop()
-
-    return img
\ No newline at end of file
+    if tiled:
+        dr.eval()
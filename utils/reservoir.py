@@ -2,14 +2,160 @@ import mitsuba as mi
 import drjit as dr
 
 class Reservoir():
-    def __init__(self, dtype):
-        self.sample = dr.zeros(dtype)
-        self.w_sum = dr.zeros(mi.Float)
-        self.dtype = dtype
-    
-    def update(self, w: mi.Float, x, rand: mi.Float):
+    """
+    Weighted reservoir of light samples for resampled importance sampling.
+
+    The reservoir is stored as a structure of arrays with one entry per lane
+    (e.g. per pixel), and only keeps what is needed to reconstruct its light
+    sample from any shading point:
+
+    - `light_idx`: index of the emitter in `scene.emitters()`
+    - `p`: position on the emitter (direction towards it for infinite emitters)
+    - `n`: emitter normal at `p`
+    - `uv`: emitter surface coordinates at `p`
+    - `p_hat`: target pdf of the sample at the reservoir's shading point
+    - `w_sum`: sum of the resampling weights of all candidates
+    - `M`: number of candidates seen by the reservoir
+
+    Thanks to `DRJIT_STRUCT`, reservoirs work with `dr.zeros`, `dr.gather`,
+    `dr.scatter`, `dr.select` and `mi.Loop` like any other Dr.Jit type.
+    """
+
+    DRJIT_STRUCT = {
+        "light_idx": mi.UInt32,
+        "p": mi.Point3f,
+        "n": mi.Normal3f,
+        "uv": mi.Point2f,
+        "p_hat": mi.Float,
+        "w_sum": mi.Float,
+        "M": mi.UInt32,
+    }
+
+    # Layout of the channels of `to_tensor()`
+    CHANNELS = {
+        "light_idx": 1, "p": 3, "n": 3, "uv": 2, "p_hat": 1, "w_sum": 1, "M": 1
+    }
+
+    def __init__(self, size: int=1):
+        self.light_idx = dr.zeros(mi.UInt32, size)
+        self.p = dr.zeros(mi.Point3f, size)
+        self.n = dr.zeros(mi.Normal3f, size)
+        self.uv = dr.zeros(mi.Point2f, size)
+        self.p_hat = dr.zeros(mi.Float, size)
+        self.w_sum = dr.zeros(mi.Float, size)
+        self.M = dr.zeros(mi.UInt32, size)
+
+    def update(self, w: mi.Float, ds: mi.DirectionSample3f, p_hat: mi.Float, rand: mi.Float, M: mi.UInt32=1):
+        """
+        Stream a candidate light sample `ds` with resampling weight `w` and
+        target pdf `p_hat` into the reservoir. `M` is the number of
+        candidates it represents.
+        """
+        is_infinite = mi.has_flag(ds.emitter.flags(), mi.EmitterFlags.Infinite)
+
         self.w_sum += w
-        self.sample = dr.select((rand < w / self.w_sum), x, self.sample)
-    
+        self.M += M
+        selected = rand < w / self.w_sum
+
+        self.light_idx = dr.select(selected, ds.emitter.scene_index(), self.light_idx)
+        self.p = dr.select(selected, dr.select(is_infinite, mi.Point3f(ds.d), ds.p), self.p)
+        self.n = dr.select(selected, ds.n, self.n)
+        self.uv = dr.select(selected, ds.uv, self.uv)
+        self.p_hat = dr.select(selected, p_hat, self.p_hat)
+
+    def merge(self, other: "Reservoir", p_hat: mi.Float, rand: mi.Float, active: mi.Bool=True):
+        """
+        Merge another reservoir into this one. `p_hat` is the target pdf of
+        the other reservoir's sample at this reservoir's shading point.
+        """
+        valid = active & (other.p_hat > 0)
+        w = dr.select(valid, p_hat * other.w_sum / other.p_hat, 0)
+
+        self.w_sum += w
+        self.M += dr.select(active, other.M, 0)
+        selected = rand < w / self.w_sum
+
+        self.light_idx = dr.select(selected, other.light_idx, self.light_idx)
+        self.p = dr.select(selected, other.p, self.p)
+        self.n = dr.select(selected, other.n, self.n)
+        self.uv = dr.select(selected, other.uv, self.uv)
+        self.p_hat = dr.select(selected, p_hat, self.p_hat)
+
+    def renormalize(self, M: mi.UInt32):
+        """
+        Let the reservoir represent `M` candidates without changing its
+        contribution weight (e.g. to cap the length of its history)
+        """
+        self.w_sum *= dr.select(self.M > 0, mi.Float(M) / mi.Float(self.M), 0)
+        self.M = mi.UInt32(M)
+
+    def weight(self, Z: mi.Float=None) -> mi.Float:
+        """
+        Unbiased contribution weight of the reservoir's sample, normalized by
+        `Z` candidates (defaults to `M`)
+        """
+        if Z is None:
+            Z = mi.Float(self.M)
+        return dr.select((self.p_hat > 0) & (Z > 0), self.w_sum / (Z * self.p_hat), 0)
+
+    def direction_sample(self, scene: mi.Scene, it: mi.Interaction3f, active: mi.Bool=True) -> mi.DirectionSample3f:
+        """
+        Reconstruct the reservoir's light sample as seen from `it`
+        """
+        emitter = dr.gather(mi.EmitterPtr, scene.emitters_dr(), self.light_idx, active)
+        is_infinite = mi.has_flag(emitter.flags(), mi.EmitterFlags.Infinite)
+
+        ds = dr.zeros(mi.DirectionSample3f)
+        d = dr.select(is_infinite, mi.Vector3f(self.p), self.p - it.p)
+        dist = dr.norm(d)
+        ds.d = d / dist
+        ds.dist = dr.select(is_infinite, 2 * scene.bbox().bounding_sphere().radius, dist)
+        ds.p = dr.select(is_infinite, it.p + ds.d * ds.dist, self.p)
+        ds.n = dr.select(is_infinite, -ds.d, self.n)
+        ds.uv = self.uv
+        ds.time = it.time
+        ds.emitter = emitter
+        return ds
+
+    def to_tensor(self) -> mi.TensorXf:
+        """
+        Serialize the reservoirs into a `[size, 12]` tensor (integer fields
+        are stored bit-for-bit)
+        """
+        size = dr.width(self.w_sum)
+        channels = []
+        for name in self.CHANNELS.keys():
+            value = getattr(self, name)
+            if name in ("light_idx", "M"):
+                value = dr.reinterpret_array_v(mi.Float, value)
+            channels.extend([value] if dr.depth_v(value) == 1 else [value[i] for i in range(len(value))])
+
+        n_channels = len(channels)
+        data = dr.zeros(mi.Float, size * n_channels)
+        idx = dr.arange(mi.UInt32, size) * n_channels
+        for i, channel in enumerate(channels):
+            dr.scatter(data, channel, idx + i)
+        return mi.TensorXf(data, shape=(size, n_channels))
+
+    @staticmethod
+    def from_tensor(tensor: mi.TensorXf) -> "Reservoir":
+        """
+        Deserialize reservoirs written by `to_tensor()`
+        """
+        size, n_channels = tensor.shape
+        idx = dr.arange(mi.UInt32, size) * n_channels
+        result = Reservoir(size)
+        offset = 0
+        for name, count in Reservoir.CHANNELS.items():
+            values = [dr.gather(mi.Float, tensor.array, idx + offset + i) for i in range(count)]
+            offset += count
+            if name in ("light_idx", "M"):
+                setattr(result, name, dr.reinterpret_array_v(mi.UInt32, values[0]))
+            elif count == 1:
+                setattr(result, name, values[0])
+            else:
+                setattr(result, name, Reservoir.DRJIT_STRUCT[name](*values))
+        return result
+
     def __repr__(self) -> str:
-        return f"w_sum: {self.w_sum}, sample: {self.sample}"
\ No newline at end of file
+        return f"w_sum: {self.w_sum}, M: {self.M}, light_idx: {self.light_idx}, p_hat: {self.p_hat}"
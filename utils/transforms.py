@@ -1,5 +1,6 @@
 import mitsuba as mi
 import drjit as dr
+from typing import Tuple
 
 def pol2cart(pol: mi.Point2f) -> mi.Vector3f:
     """
@@ -23,4 +24,35 @@ def cart2pol(cart: mi.Vector3f, clip_upper: bool=False) -> mi.Point2f:
     theta = dr.clip(dr.acos(cart.z), 0 if clip_upper else -dr.pi / 2, dr.pi / 2)
     phi = dr.clip(dr.atan2(cart.y, cart.x), -dr.pi, dr.pi)
 
-    return mi.Point2f(theta, phi)
\ No newline at end of file
+    return mi.Point2f(theta, phi)
+
+def world_to_film(sensor: mi.Sensor) -> mi.Transform4f:
+    """
+    Transform from world space to the film coordinates ([0, 1]^2 over the
+    crop window) of a perspective sensor
+    """
+    if sensor.class_().name() != "PerspectiveCamera":
+        raise ValueError(f"Only perspective sensors can be projected onto their film, "
+                         f"not {sensor.class_().name()}")
+
+    film: mi.Film = sensor.film()
+    camera_to_film = mi.perspective_projection(
+        mi.ScalarVector2i(film.size()),
+        mi.ScalarVector2i(film.crop_size()),
+        mi.ScalarVector2i(film.crop_offset()),
+        mi.traverse(sensor)["x_fov"],
+        sensor.near_clip(),
+        sensor.far_clip()
+    )
+    return camera_to_film @ sensor.world_transform().inverse()
+
+def film_to_pixel(film_pos: mi.Point3f, film_size: mi.ScalarVector2u) -> Tuple[mi.UInt32, mi.Bool]:
+    """
+    Convert film coordinates to a flat pixel index, along with a mask
+    indicating whether they fall inside the film
+    """
+    valid = (film_pos.x >= 0) & (film_pos.x < 1) & (film_pos.y >= 0) & (film_pos.y < 1) & \
+            (film_pos.z >= 0) & (film_pos.z <= 1)
+    pixel = mi.Vector2u(mi.Point2f(film_pos.x, film_pos.y) * mi.ScalarVector2f(film_size))
+    pixel = dr.minimum(pixel, film_size - 1)
+    return pixel.y * film_size.x + pixel.x, valid